@@ -0,0 +1,103 @@
+"""
+Cold-start benchmark for WSGI workers.
+
+Starts fresh interpreters and reports, per run:
+  * boot: importing foodie_backend.wsgi (settings, app registry, URLconf)
+  * first request: the first call into the WSGI application
+  * total: process spawn to first response
+
+With --importtime it also prints the slowest imports of one run, which is the
+startup profile used to decide what to load lazily.
+
+    python manage.py bench_cold_start --runs 10 --path /api/v1/ --importtime
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+WORKER_SCRIPT = r'''
+import io, json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodie_backend.settings')
+from foodie_backend.wsgi import application
+booted = time.perf_counter()
+
+status = []
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+    'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+}
+body = b''.join(application(environ, lambda s, h, e=None: status.append(s)))
+done = time.perf_counter()
+print(json.dumps({
+    'boot_ms': (booted - start) * 1000,
+    'first_request_ms': (done - booted) * 1000,
+    'status': status[0], 'bytes': len(body),
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measure worker boot time and time to first request in fresh processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--path', default='/api/v1/')
+        parser.add_argument('--importtime', action='store_true',
+                            help='Print the slowest imports of one run')
+        parser.add_argument('--top', type=int, default=20)
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'foodie_backend.settings'))
+        cwd = str(settings.BASE_DIR)
+
+        results = []
+        for _ in range(options['runs']):
+            spawned = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, '-c', WORKER_SCRIPT, options['path']],
+                cwd=cwd, env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result['total_ms'] = (time.perf_counter() - spawned) * 1000
+            results.append(result)
+
+        self.stdout.write(f"{options['path']} -> {results[0]['status']} ({results[0]['bytes']} bytes)")
+        for key, label in (('boot_ms', 'boot'), ('first_request_ms', 'first request'),
+                           ('total_ms', 'spawn to first response')):
+            values = [result[key] for result in results]
+            self.stdout.write(
+                f"{label:>24}: median={statistics.median(values):8.1f} ms "
+                f"min={min(values):8.1f} ms max={max(values):8.1f} ms"
+            )
+
+        if options['importtime']:
+            self._print_import_profile(cwd, env, options['path'], options['top'])
+
+    def _print_import_profile(self, cwd, env, path, top):
+        stderr = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', WORKER_SCRIPT, path],
+            cwd=cwd, env=env, capture_output=True, text=True, check=True,
+        ).stderr
+
+        # Attribute each module's own import time to its top-level package
+        by_package = {}
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, _, name = line[len('import time:'):].split('|')
+            package = name.strip().split('.')[0]
+            by_package[package] = by_package.get(package, 0) + int(self_us)
+
+        self.stdout.write('\nImport time by top-level package:')
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f'{self_us / 1000:8.1f} ms  {package}')
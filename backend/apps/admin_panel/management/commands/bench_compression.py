@@ -0,0 +1,108 @@
+"""
+Benchmark API response compression.
+
+Fetches typical payloads through the in-process handler (restaurant list,
+menu, a customer's orders, full sync snapshot, admin stats). For each
+encoding and level it reports CPU per request and bytes on the wire, plus
+the cost of serving the same payload from the compressed cache (one body
+hash and a lookup).
+
+    python manage.py bench_compression
+    python manage.py bench_compression --levels gzip=1,6,9 br=1,4,11 zstd=1,3,19
+"""
+
+import hashlib
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.authentication.models import User
+from apps.restaurants.models import Restaurant
+from foodie_backend.compression import CODECS, compress
+
+DEFAULT_LEVELS = {'gzip': [1, 6, 9], 'br': [1, 4, 6, 11], 'zstd': [1, 3, 9, 19]}
+
+
+def cpu_per_call(function, min_seconds=0.2):
+    """Mean CPU time (ms) of function(), repeated for at least min_seconds"""
+    calls = 0
+    start = time.process_time()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.process_time() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls * 1000
+
+
+class Command(BaseCommand):
+    help = 'Measure CPU per request and bytes on the wire for each compression encoding and level'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--levels', nargs='*', default=None,
+                            help='encoding=level,level ... (default: a spread for each installed codec)')
+
+    def handle(self, *args, **options):
+        levels = self._parse_levels(options['levels'])
+        payloads = self._payloads()
+
+        self.stdout.write(f"Installed codecs: {', '.join(sorted(CODECS))}")
+        header = f"{'payload':<20}{'encoding':>10}{'level':>7}{'bytes':>11}{'ratio':>8}{'cpu ms':>9}"
+        for name, body in payloads.items():
+            self.stdout.write('')
+            self.stdout.write(header)
+            self.stdout.write(f"{name:<20}{'identity':>10}{'-':>7}{len(body):>11,}{1:>8.1f}{0:>9.3f}")
+            for encoding, encoding_levels in levels.items():
+                for level in encoding_levels:
+                    compressed = compress(body, encoding, level)
+                    cpu_ms = cpu_per_call(lambda: compress(body, encoding, level))
+                    self.stdout.write(
+                        f"{name:<20}{encoding:>10}{level:>7}{len(compressed):>11,}"
+                        f"{len(body) / len(compressed):>8.1f}{cpu_ms:>9.3f}"
+                    )
+            cache = {}
+            cached_ms = cpu_per_call(lambda: cache.get(hashlib.blake2b(body, digest_size=16).digest()))
+            self.stdout.write(f"{name:<20}{'cached':>10}{'-':>7}{'':>11}{'':>8}{cached_ms:>9.3f}")
+
+    def _parse_levels(self, specs):
+        if not specs:
+            return {encoding: levels for encoding, levels in DEFAULT_LEVELS.items() if encoding in CODECS}
+        levels = {}
+        for spec in specs:
+            encoding, _, values = spec.partition('=')
+            if encoding not in CODECS:
+                raise CommandError(f'{encoding} is not installed (available: {", ".join(sorted(CODECS))})')
+            levels[encoding] = [int(value) for value in values.split(',') if value]
+        return levels
+
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def _payloads(self):
+        restaurant = Restaurant.objects.filter(menu_items__isnull=False).first()
+        customer = User.objects.filter(user_type='customer', orders__isnull=False).first()
+        admin = User.objects.filter(user_type='admin').first()
+        if restaurant is None or customer is None:
+            raise CommandError('No data to benchmark; run generate_dataset first.')
+
+        client = Client(SERVER_NAME='localhost')
+        customer_auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(customer).access_token}'}
+        requests = {
+            'restaurant list': ('/api/v1/restaurants/', {}),
+            'menu': (f'/api/v1/restaurants/{restaurant.pk}/menu/', {}),
+            'customer orders': ('/api/v1/orders/', customer_auth),
+            'sync snapshot': ('/api/v1/sync/?entities=restaurants,orders,notifications', customer_auth),
+        }
+        if admin is not None:
+            requests['admin stats'] = (
+                '/api/v1/admin-panel/stats/',
+                {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(admin).access_token}'},
+            )
+
+        payloads = {}
+        for name, (path, headers) in requests.items():
+            # No Accept-Encoding, so the middleware leaves the body alone
+            response = client.get(path, **headers)
+            if response.status_code == 200:
+                payloads[name] = response.content
+        return payloads
@@ -0,0 +1,220 @@
+"""
+Overload test for priority load shedding (foodie_backend/admission.py).
+
+Keeps a steady stream of critical requests going (order placement, order and
+delivery status updates) and measures their latency in three phases:
+
+  1. baseline: critical traffic alone
+  2. overload: plus a flood of restaurant browsing, shedding disabled
+  3. shedding: the same flood with shedding enabled
+
+Each phase starts its own `runserver` (one thread per connection, like a
+gthread worker) with rate limits off, so only shedding stands between the
+flood and the critical path. Clients run in this process; in-process requests
+would share the server's GIL and mostly measure the clients. Flood clients
+send at a fixed --flood-rps whatever the responses, so refusing them is not
+free; with --honor-retry-after a refused client waits as the app should.
+Every request opens a new connection: runserver writes headers and body
+separately, and on a kept-alive connection delayed ACKs add ~40 ms to each
+response. Run it against the dataset from
+generate_dataset:
+
+    python manage.py bench_overload --duration 15 --flood-rps 400
+
+With --base-url the running server's settings apply, so only the baseline
+and overload phases are run; compare a server started with LOAD_SHEDDING=False
+against one with LOAD_SHEDDING=True (and RATE_LIMITING=False for both).
+"""
+
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .load_test import HttpTransport, Pools, SCENARIOS, percentile
+
+CRITICAL_LABELS = ('orders:create', 'orders:update_status', 'delivery:update_status')
+FLOOD_LABELS = ('home', 'restaurants:list', 'restaurants:detail', 'restaurants:menu')
+
+
+def _scenarios(role, labels):
+    return [scenario for scenario in SCENARIOS[role] if scenario[1] in labels]
+
+
+class Command(BaseCommand):
+    help = 'Measure critical-path latency while browse traffic overloads the API, with and without shedding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', help='Drive a running server instead of starting one per phase')
+        parser.add_argument('--duration', type=float, default=15, help='Seconds per phase')
+        parser.add_argument('--critical-clients', type=int, default=1,
+                            help='More than one makes concurrent writers, which SQLite turns into lock errors')
+        parser.add_argument('--critical-pause-ms', type=float, default=20,
+                            help='Think time between one critical client\'s requests')
+        parser.add_argument('--flood-clients', type=int, default=16)
+        parser.add_argument('--flood-rps', type=float, default=400, help='Offered browse load')
+        parser.add_argument('--honor-retry-after', action='store_true',
+                            help='Flood clients pause for Retry-After when refused')
+        parser.add_argument('--users-per-role', type=int, default=50)
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='Allowed critical p95 growth over the baseline when shedding')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.pools = Pools(random.Random(options['seed']), options['users_per_role'])
+        if not self.pools.users['customer']:
+            raise CommandError('No generated customers; run generate_dataset first.')
+
+        phases = [('baseline', False, False), ('overload', True, False)]
+        if not options['base_url']:
+            phases.append(('shedding', True, True))
+
+        results = {}
+        for name, flood, shedding in phases:
+            self.stdout.write(f"Running {name} for {options['duration']}s")
+            with self._server(shedding) as base_url:
+                results[name] = self._phase(base_url, flood)
+        self._print(results)
+
+    @contextmanager
+    def _server(self, shedding):
+        if self.options['base_url']:
+            yield self.options['base_url']
+            return
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        env = {**os.environ, 'RATE_LIMITING': 'False', 'LOAD_SHEDDING': str(shedding)}
+        server = subprocess.Popen(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'runserver', f'127.0.0.1:{port}', '--noreload'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                    break
+                except OSError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        raise CommandError('runserver did not start')
+                    time.sleep(0.2)
+            base_url = f'http://127.0.0.1:{port}'
+            # Import the URLconf and views before measuring
+            HttpTransport(base_url).request(
+                'GET', '/api/v1/restaurants/', None, self.pools.users['customer'][0]['token']
+            )
+            yield base_url
+        finally:
+            server.terminate()
+            server.wait()
+
+    def _phase(self, base_url, flood):
+        stop = threading.Event()
+        critical, flooded = [], Counter()
+        lock = threading.Lock()
+
+        def critical_client(index):
+            rng = random.Random(self.options['seed'] * 100 + index)
+            transport = HttpTransport(base_url, keep_alive=False)
+            pause = self.options['critical_pause_ms'] / 1000
+            try:
+                while not stop.is_set():
+                    role = rng.choices(('customer', 'restaurant', 'delivery'), weights=(3, 1, 1))[0]
+                    if not self.pools.users[role]:
+                        continue
+                    session = rng.choice(self.pools.users[role])
+                    _, label, build = rng.choice(_scenarios(role, CRITICAL_LABELS))
+                    request = build(self.pools, session, rng)
+                    if request is None:
+                        continue
+                    sent = time.perf_counter()
+                    status_code = transport.request(*request, session['token'], session['ip'])
+                    with lock:
+                        critical.append(((time.perf_counter() - sent) * 1000, status_code))
+                    time.sleep(pause)
+            finally:
+                transport.close()
+
+        def flood_client(index):
+            rng = random.Random(self.options['seed'] * 1000 + index)
+            transport = HttpTransport(base_url, keep_alive=False)
+            interval = self.options['flood_clients'] / self.options['flood_rps']
+            scenarios = _scenarios('customer', FLOOD_LABELS)
+            next_send = time.perf_counter() + rng.random() * interval
+            retry_after = getattr(settings, 'LOAD_SHEDDING', {}).get('RETRY_AFTER_SECONDS', 2)
+            try:
+                while not stop.is_set():
+                    delay = next_send - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    # Open loop, but a client that fell behind does not fire a backlog at once
+                    next_send = max(next_send + interval, time.perf_counter() - interval)
+                    session = rng.choice(self.pools.users['customer'])
+                    _, _, build = rng.choices(scenarios, weights=[s[0] for s in scenarios])[0]
+                    status_code = transport.request(*build(self.pools, session, rng), session['token'], session['ip'])
+                    with lock:
+                        flooded[status_code] += 1
+                    if status_code == 503 and self.options['honor_retry_after']:
+                        stop.wait(retry_after)
+                        next_send = time.perf_counter()
+            finally:
+                transport.close()
+
+        threads = [threading.Thread(target=critical_client, args=(index,))
+                   for index in range(self.options['critical_clients'])]
+        if flood:
+            threads += [threading.Thread(target=flood_client, args=(index,))
+                        for index in range(self.options['flood_clients'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(self.options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        latencies = sorted(elapsed for elapsed, _ in critical)
+        seconds = self.options['duration']
+        return {
+            'critical_rps': len(latencies) / seconds,
+            'critical_errors': sum(1 for _, status_code in critical if status_code >= 400),
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'browse_ok_rps': sum(count for code, count in flooded.items() if code < 400) / seconds,
+            'browse_shed_rps': flooded[503] / seconds,
+        }
+
+    def _print(self, results):
+        header = (f"{'phase':<10}{'crit rps':>10}{'crit err':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+                  f"{'browse ok/s':>13}{'shed/s':>9}")
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, row in results.items():
+            if row['p50'] is None:
+                self.stdout.write(f'{name:<10}  no critical requests completed')
+                continue
+            self.stdout.write(
+                f"{name:<10}{row['critical_rps']:>10.1f}{row['critical_errors']:>10}{row['p50']:>9.1f}"
+                f"{row['p95']:>9.1f}{row['p99']:>9.1f}{row['browse_ok_rps']:>13.1f}{row['browse_shed_rps']:>9.1f}"
+            )
+
+        final = results.get('shedding', results['overload'])
+        baseline = results['baseline']
+        if final['p95'] is None or baseline['p95'] is None:
+            return
+        limit = baseline['p95'] * (1 + self.options['tolerance'])
+        verdict = 'holds' if final['p95'] <= limit else 'DEGRADES'
+        self.stdout.write(
+            f"Critical p95 {verdict} under overload: {final['p95']:.1f} ms against "
+            f"{baseline['p95']:.1f} ms baseline (limit {limit:.1f} ms)"
+        )
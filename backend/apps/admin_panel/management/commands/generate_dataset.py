@@ -0,0 +1,471 @@
+"""
+Generate a realistic, seeded dataset for development and load testing.
+
+Creates users of every user_type, restaurants with opening hours, menus and
+customizations, orders with items spread over the last N days, deliveries and notifications.
+Everything is written with bulk_create in batches, so a scale-10 dataset
+(10k customers, 50k orders) loads in well under a minute on SQLite.
+bulk_create skips the change-capture signals, so every synced model is
+logged with record_changes() in the same transaction.
+
+The same --seed and --scale always produce the same data.
+
+    python manage.py generate_dataset --scale 1 --seed 42
+    python manage.py generate_dataset --scale 10 --flush
+"""
+
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import time as dt_time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.authentication.models import User, UserProfile
+from apps.delivery.models import Delivery
+from apps.notifications.models import Notification
+from apps.orders.models import Order, OrderItem
+from apps.restaurants.models import Restaurant, MenuItem, OpeningHours, HoursOverride
+from apps.sync.changes import record_changes
+
+# Generated accounts share this domain so --flush only removes generated data
+EMAIL_DOMAIN = 'load.foodie.test'
+
+# Per-unit-of-scale entity counts
+BASE_COUNTS = {
+    'customers': 1000,
+    'restaurants': 50,
+    'drivers': 80,
+    'admins': 3,
+    'orders': 5000,
+}
+
+CITIES = {
+    'Manhattan': (40.7831, -73.9712),
+    'Brooklyn': (40.6782, -73.9442),
+    'Queens': (40.7282, -73.7949),
+    'Bronx': (40.8448, -73.8648),
+    'Jersey City': (40.7178, -74.0431),
+}
+
+# category -> (cuisines, name words, dishes)
+CATEGORIES = {
+    'Pizza': (['Italian'], ['Palace', 'Oven', 'Slice', 'Napoli'],
+              ['Margherita Pizza', 'Pepperoni Pizza', 'Four Cheese Pizza', 'Calzone', 'Garlic Knots']),
+    'Burgers': (['American'], ['Barn', 'Grill', 'Smash', 'Diner'],
+                ['Classic Burger', 'Cheeseburger', 'Veggie Burger', 'Fries', 'Onion Rings']),
+    'Japanese': (['Japanese', 'Sushi'], ['Zen', 'Sakura', 'Tokyo', 'Koi'],
+                 ['California Roll', 'Salmon Sashimi', 'Ramen', 'Gyoza', 'Edamame']),
+    'Mexican': (['Mexican'], ['Fiesta', 'Cantina', 'Taqueria', 'Sol'],
+                ['Chicken Tacos', 'Beef Burrito', 'Quesadilla', 'Nachos', 'Guacamole']),
+    'Healthy': (['Vegetarian', 'Salads'], ['Garden', 'Greens', 'Harvest', 'Bowl'],
+                ['Quinoa Bowl', 'Caesar Salad', 'Acai Bowl', 'Falafel Wrap', 'Green Smoothie']),
+    'Chinese': (['Chinese'], ['Dragon', 'Wok', 'Jade', 'Lotus'],
+                ['Kung Pao Chicken', 'Fried Rice', 'Dumplings', 'Lo Mein', 'Spring Rolls']),
+    'Indian': (['Indian'], ['Spice', 'Masala', 'Tandoor', 'Curry House'],
+               ['Butter Chicken', 'Chicken Tikka', 'Paneer Masala', 'Naan', 'Samosa']),
+    'Desserts': (['Desserts', 'Bakery'], ['Sweets', 'Bakery', 'Creamery', 'Treats'],
+                 ['Chocolate Cake', 'Cheesecake', 'Ice Cream Sundae', 'Cookies', 'Brownie']),
+}
+ADJECTIVES = ['Golden', 'Happy', 'Little', 'Urban', 'Royal', 'Corner', 'Blue', 'Fresh', 'Lucky', 'Old Town']
+FIRST_NAMES = ['James', 'Mary', 'Kwame', 'Ama', 'Wei', 'Sofia', 'Liam', 'Aisha', 'Noah', 'Yaw', 'Emma', 'Raj']
+LAST_NAMES = ['Smith', 'Mensah', 'Garcia', 'Chen', 'Boateng', 'Patel', 'Johnson', 'Owusu', 'Kim', 'Brown']
+PAYMENT_METHODS = ['card', 'card', 'card', 'wallet', 'cash']
+VEHICLES = ['bicycle', 'motorcycle', 'car', 'scooter']
+
+# (weekly hours, weight): (opens, closes) per day, days missing from `days` are closed;
+# no hours at all means open around the clock
+HOURS_PATTERNS = [
+    ({'hours': [((11, 0), (22, 0))], 'days': range(7)}, 45),
+    ({'hours': [((11, 30), (14, 30)), ((17, 0), (22, 30))], 'days': range(1, 7)}, 20),
+    ({'hours': [((17, 0), (2, 0))], 'days': range(7)}, 15),
+    ({'hours': [((7, 0), (15, 0))], 'days': range(6)}, 10),
+    (None, 10),
+]
+
+# Order status weights for orders older than the active window
+SETTLED_ORDER_STATUSES = [('delivered', 88), ('cancelled', 12)]
+ACTIVE_ORDER_STATUSES = [('pending', 20), ('confirmed', 20), ('preparing', 30), ('out_for_delivery', 30)]
+DELIVERY_STATUS_FOR_ORDER = {
+    'confirmed': 'assigned',
+    'preparing': 'accepted',
+    'out_for_delivery': 'in_transit',
+    'delivered': 'delivered',
+}
+
+
+@contextmanager
+def backdated(*fields):
+    """Let bulk_create keep explicit values for auto_now/auto_now_add fields"""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+def money(value):
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+def as_coordinate(value):
+    return Decimal(value).quantize(Decimal('0.0000001'))
+
+
+class Command(BaseCommand):
+    help = 'Generate a seeded synthetic dataset (users, restaurants, menus, orders, deliveries, notifications)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Multiplier for the base entity counts')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--days', type=int, default=30, help='Spread orders over this many days')
+        parser.add_argument('--menu-items', type=int, default=20, help='Average menu items per restaurant')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--password', default='loadtest-password',
+                            help='Password for every generated account')
+        parser.add_argument('--flush', action='store_true',
+                            help='Delete previously generated data first')
+        for name, count in BASE_COUNTS.items():
+            parser.add_argument(f'--{name}', type=int, default=None,
+                                help=f'Override the number of {name} (default {count} x scale)')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.days = options['days']
+        counts = {
+            name: options[name] if options[name] is not None else max(1, int(base * options['scale']))
+            for name, base in BASE_COUNTS.items()
+        }
+
+        if options['flush']:
+            self._timed('flush', self.flush)
+
+        # One hash for every account; hashing per user would dominate the run
+        password = make_password(options['password'])
+        with transaction.atomic():
+            customers = self._timed('customers', self.create_users, 'customer', counts['customers'], password)
+            owners = self._timed('restaurant owners', self.create_users, 'restaurant', counts['restaurants'], password)
+            drivers = self._timed('drivers', self.create_users, 'delivery', counts['drivers'], password)
+            self._timed('admins', self.create_users, 'admin', counts['admins'], password)
+            restaurants = self._timed('restaurants', self.create_restaurants, owners)
+            self._timed('opening hours', self.create_opening_hours, restaurants)
+            menus = self._timed('menu items', self.create_menus, restaurants, options['menu_items'])
+            orders = self._timed('orders', self.create_orders, customers, restaurants, menus, counts['orders'])
+            self._timed('deliveries', self.create_deliveries, orders, drivers)
+            self._timed('notifications', self.create_notifications, orders, customers)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated dataset (seed={options['seed']}); accounts use *@{EMAIL_DOMAIN} "
+            f"with password '{options['password']}'"
+        ))
+
+    def _timed(self, label, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        if isinstance(result, dict):
+            result_rows = sum(len(rows) for rows in result.values())
+        else:
+            result_rows = len(result) if isinstance(result, list) else None
+        size = f'{result_rows:>8} rows' if result_rows is not None else ''
+        self.stdout.write(f'{label:>18}: {size} in {elapsed:6.2f}s')
+        return result
+
+    def flush(self):
+        generated = User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}')
+        Order.objects.filter(customer__in=generated).delete()
+        Restaurant.objects.filter(owner__in=generated).delete()
+        generated.delete()
+        return None
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _point(self, city, spread_km=6.0):
+        latitude, longitude = CITIES[city]
+        # ~111 km per degree of latitude
+        return (
+            as_coordinate(latitude + self.rng.gauss(0, spread_km / 111 / 2)),
+            as_coordinate(longitude + self.rng.gauss(0, spread_km / 85 / 2)),
+        )
+
+    def create_users(self, user_type, count, password):
+        start = User.objects.filter(user_type=user_type, email__endswith=f'@{EMAIL_DOMAIN}').count()
+        city_names = list(CITIES)
+        users = []
+        for index in range(start, start + count):
+            city = self.rng.choice(city_names)
+            latitude, longitude = self._point(city)
+            users.append(User(
+                id=self._uuid(),
+                email=f'{user_type}{index}@{EMAIL_DOMAIN}',
+                password=password,
+                full_name=f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}',
+                phone_number=f'+1{self.rng.randint(2000000000, 9999999999)}',
+                user_type=user_type,
+                is_verified=self.rng.random() < 0.8,
+                is_staff=user_type == 'admin',
+                address=f'{self.rng.randint(1, 999)} {self.rng.choice(LAST_NAMES)} St, {city}',
+                current_latitude=latitude,
+                current_longitude=longitude,
+            ))
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+
+        # bulk_create skips the post_save signal that normally creates profiles
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                vehicle_type=self.rng.choice(VEHICLES) if user_type == 'delivery' else '',
+                is_available=self.rng.random() < 0.6 if user_type == 'delivery' else True,
+            )
+            for user in users
+        ], batch_size=self.batch_size)
+        return users
+
+    def create_restaurants(self, owners):
+        restaurants = []
+        for owner in owners:
+            category = self.rng.choice(list(CATEGORIES))
+            cuisines, words, _ = CATEGORIES[category]
+            city = owner.address.rsplit(', ', 1)[-1]
+            latitude, longitude = self._point(city, spread_km=4.0)
+            prep_minutes = self.rng.choice([15, 20, 25, 30, 35])
+            restaurants.append(Restaurant(
+                id=self._uuid(),
+                owner=owner,
+                name=f'{self.rng.choice(ADJECTIVES)} {self.rng.choice(words)}',
+                rating=Decimal(self.rng.triangular(3.2, 5.0, 4.4)).quantize(Decimal('0.1')),
+                delivery_time=f'{prep_minutes}-{prep_minutes + 10} min',
+                delivery_fee=money(self.rng.choice(['0', '1.99', '2.49', '2.99', '3.99'])),
+                category=category,
+                cuisine=cuisines,
+                tags=self.rng.sample(['Popular', 'Fast Delivery', 'Family Friendly', 'Late Night', 'Deals'], 2),
+                price_range=self.rng.choice(['$', '$$', '$$', '$$$', '$$$$']),
+                minimum_order=money(self.rng.choice(['0', '10', '15', '20'])),
+                is_open=self.rng.random() < 0.85,
+                featured=self.rng.random() < 0.1,
+                address=f'{self.rng.randint(1, 999)} {self.rng.choice(LAST_NAMES)} Ave, {city}',
+                city=city,
+                phone=owner.phone_number,
+                latitude=latitude,
+                longitude=longitude,
+            ))
+        Restaurant.objects.bulk_create(restaurants, batch_size=self.batch_size)
+        record_changes('restaurant', [(restaurant.pk, None) for restaurant in restaurants])
+        return restaurants
+
+    def create_opening_hours(self, restaurants):
+        hours = []
+        overrides = []
+        for restaurant in restaurants:
+            pattern = weighted(self.rng, HOURS_PATTERNS)
+            if pattern is None:
+                continue
+            for weekday in pattern['days']:
+                for opens, closes in pattern['hours']:
+                    hours.append(OpeningHours(
+                        id=self._uuid(), restaurant=restaurant, weekday=weekday,
+                        opens=dt_time(*opens), closes=dt_time(*closes),
+                    ))
+            if self.rng.random() < 0.05:
+                overrides.append(HoursOverride(
+                    id=self._uuid(), restaurant=restaurant,
+                    date=(self.now + timedelta(days=self.rng.randint(1, 7))).date(),
+                    note='Closed for a private event',
+                ))
+        OpeningHours.objects.bulk_create(hours, batch_size=self.batch_size)
+        HoursOverride.objects.bulk_create(overrides, batch_size=self.batch_size)
+        return hours + overrides
+
+    def create_menus(self, restaurants, average_items):
+        menus = {}
+        items = []
+        for restaurant in restaurants:
+            _, _, dishes = CATEGORIES[restaurant.category]
+            menu = []
+            for index in range(max(3, int(self.rng.gauss(average_items, average_items / 4)))):
+                dish = dishes[index % len(dishes)]
+                variant = index // len(dishes)
+                vegetarian = self.rng.random() < 0.3
+                menu.append(MenuItem(
+                    id=self._uuid(),
+                    restaurant=restaurant,
+                    name=dish if variant == 0 else f'{dish} #{variant + 1}',
+                    description=f'House {dish.lower()} made fresh to order.',
+                    price=money(self.rng.uniform(4, 28)),
+                    category=self.rng.choice(['Mains', 'Mains', 'Sides', 'Drinks', 'Specials']),
+                    is_vegetarian=vegetarian,
+                    is_vegan=vegetarian and self.rng.random() < 0.4,
+                    is_gluten_free=self.rng.random() < 0.15,
+                    is_spicy=self.rng.random() < 0.2,
+                    calories=self.rng.randint(150, 1200),
+                    allergens=self.rng.sample(['gluten', 'dairy', 'nuts', 'soy', 'eggs'], self.rng.randint(0, 2)),
+                    customizations=self._customizations(),
+                    is_available=self.rng.random() < 0.95,
+                ))
+            menus[restaurant.pk] = [item for item in menu if item.is_available]
+            items.extend(menu)
+        MenuItem.objects.bulk_create(items, batch_size=self.batch_size)
+        record_changes('menu_item', [(item.pk, None) for item in items])
+        return menus
+
+    def _customizations(self):
+        customizations = []
+        if self.rng.random() < 0.6:
+            customizations.append({
+                'id': 'size', 'name': 'Size', 'type': 'radio', 'required': True,
+                'options': [
+                    {'id': 'size-small', 'name': 'Small', 'price': 0},
+                    {'id': 'size-medium', 'name': 'Medium', 'price': 2},
+                    {'id': 'size-large', 'name': 'Large', 'price': 4},
+                ],
+            })
+        if self.rng.random() < 0.4:
+            customizations.append({
+                'id': 'extras', 'name': 'Extras', 'type': 'checkbox', 'required': False,
+                'options': [
+                    {'id': 'extra-cheese', 'name': 'Extra cheese', 'price': 1.5},
+                    {'id': 'extra-sauce', 'name': 'Extra sauce', 'price': 0.5},
+                ],
+            })
+        return customizations
+
+    def create_orders(self, customers, restaurants, menus, count):
+        # Popularity is long-tailed: a few restaurants get most orders
+        weights = [1 / (rank + 1) ** 0.8 for rank in range(len(restaurants))]
+        ranked = self.rng.sample(restaurants, len(restaurants))
+        ranked = [restaurant for restaurant in ranked if menus[restaurant.pk]]
+        weights = weights[:len(ranked)]
+        tax_rate = Decimal(str(getattr(settings, 'ORDER_TAX_RATE', '0.08')))
+        active_window = timedelta(hours=2)
+
+        orders = []
+        items = []
+        for _ in range(count):
+            restaurant = self.rng.choices(ranked, weights=weights)[0]
+            customer = self.rng.choice(customers)
+            created_at = self.now - timedelta(seconds=self.rng.uniform(0, self.days * 86400))
+            status = weighted(self.rng, ACTIVE_ORDER_STATUSES if self.now - created_at < active_window
+                              else SETTLED_ORDER_STATUSES)
+
+            order = Order(
+                id=self._uuid(),
+                customer=customer,
+                restaurant=restaurant,
+                status=status,
+                delivery_fee=restaurant.delivery_fee,
+                payment_method=self.rng.choice(PAYMENT_METHODS),
+                delivery_address=customer.address,
+                delivery_latitude=customer.current_latitude,
+                delivery_longitude=customer.current_longitude,
+                created_at=created_at,
+                updated_at=created_at,
+                estimated_delivery=created_at + timedelta(minutes=self.rng.randint(25, 55)),
+            )
+            subtotal = Decimal('0')
+            for menu_item in self.rng.sample(menus[restaurant.pk], min(len(menus[restaurant.pk]),
+                                                                       self.rng.randint(1, 4))):
+                quantity = self.rng.choices([1, 2, 3], weights=[75, 20, 5])[0]
+                selected = [
+                    self.rng.choice(customization['options'])
+                    for customization in menu_item.customizations
+                    if customization['required'] or self.rng.random() < 0.3
+                ]
+                price = menu_item.price + sum((Decimal(str(option['price'])) for option in selected), Decimal('0'))
+                subtotal += price * quantity
+                items.append(OrderItem(
+                    order=order, menu_item=menu_item, name=menu_item.name, price=money(price),
+                    quantity=quantity, customizations=[option['id'] for option in selected],
+                ))
+            order.subtotal = money(subtotal)
+            order.tax = money(subtotal * tax_rate)
+            order.total = order.subtotal + order.delivery_fee + order.tax
+            if status == 'delivered':
+                order.delivered_at = order.estimated_delivery
+            orders.append(order)
+
+        created_at = Order._meta.get_field('created_at')
+        updated_at = Order._meta.get_field('updated_at')
+        with backdated(created_at, updated_at):
+            Order.objects.bulk_create(orders, batch_size=self.batch_size)
+        record_changes('order', [(order.pk, order.customer_id) for order in orders])
+        OrderItem.objects.bulk_create(items, batch_size=self.batch_size)
+        return orders
+
+    def create_deliveries(self, orders, drivers):
+        deliveries = []
+        for order in orders:
+            status = DELIVERY_STATUS_FOR_ORDER.get(order.status)
+            if status is None and order.status != 'pending':
+                continue
+            distance = round(self.rng.uniform(0.5, 9.0), 2)
+            tip = money(self.rng.choice([0, 0, 1, 2, 3, 5]))
+            delivery = Delivery(
+                id=self._uuid(),
+                order=order,
+                driver=self.rng.choice(drivers) if status else None,
+                status=status or 'pending',
+                priority=self.rng.choices(['low', 'normal', 'high', 'urgent'], weights=[10, 70, 15, 5])[0],
+                distance_km=distance,
+                estimated_minutes=int(distance * 4) + 10,
+                fee=order.delivery_fee,
+                tip=tip,
+                total_payout=money(Decimal('2.50') + Decimal(str(distance)) * Decimal('0.60') + tip),
+                created_at=order.created_at,
+                updated_at=order.created_at,
+            )
+            if delivery.driver is not None:
+                delivery.assigned_at = order.created_at + timedelta(minutes=2)
+            if status == 'delivered':
+                delivery.picked_up_at = order.created_at + timedelta(minutes=18)
+                delivery.delivered_at = order.delivered_at
+            deliveries.append(delivery)
+
+        fields = [Delivery._meta.get_field('created_at'), Delivery._meta.get_field('updated_at')]
+        with backdated(*fields):
+            Delivery.objects.bulk_create(deliveries, batch_size=self.batch_size)
+        return deliveries
+
+    def create_notifications(self, orders, customers):
+        notifications = []
+        for order in orders:
+            notifications.append(Notification(
+                user=order.customer,
+                type='order_update',
+                title=f'Order {order.status.replace("_", " ")}',
+                message=f'Your order from {order.restaurant.name} is {order.status.replace("_", " ")}.',
+                data={'order_id': str(order.pk)},
+                is_read=self.now - order.created_at > timedelta(days=1),
+                created_at=order.created_at,
+            ))
+        for customer in self.rng.sample(customers, max(1, len(customers) // 3)):
+            notifications.append(Notification(
+                user=customer,
+                type='promotion',
+                title='Free delivery this weekend',
+                message='Enjoy free delivery on orders over $20.',
+                is_read=self.rng.random() < 0.5,
+                created_at=self.now - timedelta(days=self.rng.uniform(0, self.days)),
+            ))
+
+        with backdated(Notification._meta.get_field('created_at')):
+            Notification.objects.bulk_create(notifications, batch_size=self.batch_size)
+        record_changes('notification', [(note.pk, note.user_id) for note in notifications])
+        return notifications
@@ -0,0 +1,383 @@
+"""
+Load-test harness for the /api/v1/ endpoints.
+
+Replays a weighted mix of customer, restaurant, driver and admin traffic and
+reports throughput and latency percentiles per endpoint. Run it against the
+dataset from generate_dataset.
+
+By default requests go through the WSGI handler in-process (no server
+needed, good for CI). Pass --base-url to drive a running server over HTTP
+with keep-alive connections instead.
+
+Save a run with --output and compare a later release against it with
+--baseline; the command fails when an endpoint's p95 latency or the overall
+throughput regresses by more than --tolerance.
+
+    python manage.py load_test --duration 30 --concurrency 8 --output baseline.json
+    python manage.py load_test --duration 30 --baseline baseline.json --tolerance 0.2
+    python manage.py load_test --base-url http://127.0.0.1:8000 --mix customer=80,driver=20
+"""
+
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.authentication.models import User
+from apps.delivery.models import Delivery
+from apps.orders.models import Order
+from apps.restaurants.hours import filter_open
+from apps.restaurants.models import Restaurant, MenuItem
+
+from .generate_dataset import EMAIL_DOMAIN
+
+DEFAULT_MIX = 'customer=70,restaurant=10,delivery=15,admin=5'
+
+
+class Pools:
+    """IDs sampled from the database that scenarios draw request targets from"""
+
+    def __init__(self, rng, users_per_role):
+        self.rng = rng
+        self.restaurants = list(filter_open(Restaurant.objects.all()).values_list('pk', flat=True))
+        if not self.restaurants:
+            raise CommandError('No open restaurants found; run generate_dataset first.')
+
+        self.menus = defaultdict(list)
+        for restaurant_id, item_id in MenuItem.objects.filter(
+            restaurant_id__in=self.restaurants, is_available=True
+        ).values_list('restaurant_id', 'pk'):
+            self.menus[restaurant_id].append(item_id)
+        self.restaurants = [restaurant for restaurant in self.restaurants if self.menus[restaurant]]
+        page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 20
+        self.restaurant_pages = max(1, -(-Restaurant.objects.count() // page_size))
+
+        self.users = {}
+        for user_type in ('customer', 'restaurant', 'delivery', 'admin'):
+            users = list(User.objects.filter(
+                user_type=user_type, email__endswith=f'@{EMAIL_DOMAIN}'
+            ).order_by('email')[:users_per_role])
+            # Each simulated user gets its own client IP for the per-IP rate limits
+            self.users[user_type] = [
+                {'user': user, 'token': str(RefreshToken.for_user(user).access_token),
+                 'ip': f'10.{len(self.users)}.{index // 250}.{index % 250 + 1}'}
+                for index, user in enumerate(users)
+            ]
+
+        customer_ids = [session['user'].pk for session in self.users['customer']]
+        self.orders_by_customer = defaultdict(list)
+        for customer_id, order_id in Order.objects.filter(
+            customer_id__in=customer_ids
+        ).values_list('customer_id', 'pk')[:50000]:
+            self.orders_by_customer[customer_id].append(order_id)
+
+        owner_ids = [session['user'].pk for session in self.users['restaurant']]
+        self.pending_by_owner = defaultdict(list)
+        for owner_id, order_id in Order.objects.filter(
+            restaurant__owner_id__in=owner_ids, status='pending'
+        ).values_list('restaurant__owner_id', 'pk'):
+            self.pending_by_owner[owner_id].append(order_id)
+
+        self.pending_deliveries = list(
+            Delivery.objects.filter(status='pending', driver__isnull=True).values_list('pk', flat=True)
+        )
+        self._lock = threading.Lock()
+
+    def take(self, items):
+        """Remove and return a random item (for one-shot state changes)"""
+        with self._lock:
+            if not items:
+                return None
+            return items.pop(self.rng.randrange(len(items)))
+
+
+# role -> [(weight, endpoint label, request builder)]
+# A builder returns (method, path, body) or None to skip when it has no target
+def _place_order(pools, session, rng):
+    restaurant = rng.choice(pools.restaurants)
+    items = rng.sample(pools.menus[restaurant], min(len(pools.menus[restaurant]), rng.randint(1, 3)))
+    return 'POST', '/api/v1/orders/', {
+        'restaurant_id': str(restaurant),
+        'items': [{'menu_item_id': str(item), 'quantity': rng.randint(1, 2)} for item in items],
+        'delivery_address': session['user'].address or '1 Load Test Way',
+        'payment_method': 'card',
+    }
+
+
+def _order_detail(pools, session, rng):
+    orders = pools.orders_by_customer.get(session['user'].pk)
+    return ('GET', f'/api/v1/orders/{rng.choice(orders)}/', None) if orders else None
+
+
+def _confirm_order(pools, session, rng):
+    order = pools.take(pools.pending_by_owner.get(session['user'].pk, []))
+    return ('POST', f'/api/v1/orders/{order}/status/', {'status': 'confirmed'}) if order else None
+
+
+def _accept_delivery(pools, session, rng):
+    delivery = pools.take(pools.pending_deliveries)
+    return ('POST', f'/api/v1/delivery/{delivery}/status/', {'status': 'accepted'}) if delivery else None
+
+
+SCENARIOS = {
+    'customer': [
+        (10, 'home', lambda p, s, r: ('GET', '/api/v1/home/', None)),
+        (25, 'restaurants:list', lambda p, s, r: (
+            'GET', f'/api/v1/restaurants/?page={r.randint(1, min(3, p.restaurant_pages))}', None
+        )),
+        (10, 'restaurants:detail', lambda p, s, r: ('GET', f'/api/v1/restaurants/{r.choice(p.restaurants)}/', None)),
+        (20, 'restaurants:menu', lambda p, s, r: ('GET', f'/api/v1/restaurants/{r.choice(p.restaurants)}/menu/', None)),
+        (8, 'auth:me', lambda p, s, r: ('GET', '/api/v1/auth/me/', None)),
+        (10, 'orders:list', lambda p, s, r: ('GET', '/api/v1/orders/', None)),
+        (5, 'orders:detail', _order_detail),
+        (8, 'notifications:list', lambda p, s, r: ('GET', '/api/v1/notifications/', None)),
+        (10, 'notifications:unread_count', lambda p, s, r: ('GET', '/api/v1/notifications/unread-count/', None)),
+        (4, 'orders:create', _place_order),
+    ],
+    'restaurant': [
+        (50, 'orders:list', lambda p, s, r: ('GET', '/api/v1/orders/', None)),
+        (20, 'orders:list_pending', lambda p, s, r: ('GET', '/api/v1/orders/?status=pending', None)),
+        (15, 'orders:update_status', _confirm_order),
+        (15, 'auth:me', lambda p, s, r: ('GET', '/api/v1/auth/me/', None)),
+    ],
+    'delivery': [
+        (50, 'delivery:requests', lambda p, s, r: ('GET', '/api/v1/delivery/requests/', None)),
+        (35, 'delivery:active', lambda p, s, r: ('GET', '/api/v1/delivery/active/', None)),
+        (15, 'delivery:update_status', _accept_delivery),
+    ],
+    'admin': [
+        (40, 'admin_panel:stats', lambda p, s, r: ('GET', '/api/v1/admin-panel/stats/', None)),
+        (40, 'orders:list', lambda p, s, r: ('GET', '/api/v1/orders/', None)),
+        (20, 'restaurants:list', lambda p, s, r: ('GET', '/api/v1/restaurants/', None)),
+    ],
+}
+WRITE_LABELS = {'orders:create', 'orders:update_status', 'delivery:update_status'}
+
+
+class InProcessTransport:
+    """Sends requests through Django's test client (full middleware stack)"""
+
+    def __init__(self):
+        from django.test import Client
+        # Unhandled exceptions (e.g. SQLite lock timeouts) come back as 500s
+        self.client = Client(SERVER_NAME='localhost', raise_request_exception=False)
+
+    def request(self, method, path, body, token, ip=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        if ip:
+            headers['REMOTE_ADDR'] = ip
+        if method == 'GET':
+            response = self.client.get(path, **headers)
+        else:
+            response = self.client.post(path, data=json.dumps(body), content_type='application/json', **headers)
+        return response.status_code
+
+    def close(self):
+        connections.close_all()
+
+
+class HttpTransport:
+    """HTTP connection to a running server, kept alive unless keep_alive=False"""
+
+    def __init__(self, base_url, keep_alive=True):
+        self.keep_alive = keep_alive
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=30)
+        self.prefix = parts.path.rstrip('/')
+
+    def request(self, method, path, body, token, ip=None):
+        headers = {'Authorization': f'Bearer {token}', 'Accept': 'application/json'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+            if not self.keep_alive:
+                # The next request opens a new connection
+                self.connection.close()
+            return response.status
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            return 599
+
+    def close(self):
+        self.connection.close()
+        connections.close_all()
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        role, _, weight = part.partition('=')
+        if role not in SCENARIOS:
+            raise CommandError(f'Unknown role in --mix: {role} (expected one of {", ".join(SCENARIOS)})')
+        mix[role] = float(weight or 1)
+    return mix
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = 'Replay mixed customer/restaurant/driver/admin traffic and report per-endpoint latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', help='Drive a running server instead of the in-process handler')
+        parser.add_argument('--duration', type=float, default=20, help='Seconds to run')
+        parser.add_argument('--requests', type=int, default=None, help='Stop after this many requests')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--mix', default=DEFAULT_MIX, help='Role weights, e.g. customer=70,delivery=30')
+        parser.add_argument('--users-per-role', type=int, default=50)
+        parser.add_argument('--read-only', action='store_true', help='Skip scenarios that change data')
+        parser.add_argument('--warmup', type=float, default=2, help='Seconds of traffic excluded from results')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Write results as JSON')
+        parser.add_argument('--baseline', help='Compare against a previous --output file')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed relative regression against the baseline')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        mix = parse_mix(options['mix'])
+        pools = Pools(rng, options['users_per_role'])
+        for role in list(mix):
+            if not pools.users[role]:
+                self.stderr.write(f'No generated {role} users; dropping them from the mix')
+                del mix[role]
+        if not mix:
+            raise CommandError('No users to simulate; run generate_dataset first.')
+
+        samples = defaultdict(list)
+        errors = defaultdict(int)
+        samples_lock = threading.Lock()
+        issued = [0]
+        start = time.perf_counter()
+        warmup_until = start + options['warmup']
+        deadline = warmup_until + options['duration']
+
+        def worker(worker_index):
+            worker_rng = random.Random(options['seed'] * 1000 + worker_index)
+            transport = (HttpTransport(options['base_url']) if options['base_url']
+                         else InProcessTransport())
+            roles, role_weights = zip(*mix.items())
+            try:
+                while time.perf_counter() < deadline:
+                    with samples_lock:
+                        if options['requests'] is not None and issued[0] >= options['requests']:
+                            return
+                        issued[0] += 1
+                    role = worker_rng.choices(roles, weights=role_weights)[0]
+                    session = worker_rng.choice(pools.users[role])
+                    scenarios = [scenario for scenario in SCENARIOS[role]
+                                 if not (options['read_only'] and scenario[1] in WRITE_LABELS)]
+                    _, label, build = worker_rng.choices(scenarios, weights=[s[0] for s in scenarios])[0]
+                    request = build(pools, session, worker_rng)
+                    if request is None:
+                        continue
+
+                    method, path, body = request
+                    sent = time.perf_counter()
+                    status_code = transport.request(method, path, body, session['token'], session['ip'])
+                    elapsed_ms = (time.perf_counter() - sent) * 1000
+                    if sent < warmup_until:
+                        continue
+                    with samples_lock:
+                        samples[label].append(elapsed_ms)
+                        if status_code >= 400:
+                            errors[label] += 1
+            finally:
+                transport.close()
+
+        self.stdout.write(
+            f"Running {options['concurrency']} workers for {options['duration']}s "
+            f"(+{options['warmup']}s warmup) against "
+            f"{options['base_url'] or 'the in-process WSGI handler'}; mix={mix}"
+        )
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(worker, range(options['concurrency'])))
+        measured_seconds = max(time.perf_counter() - warmup_until, 1e-9)
+
+        results = self._summarise(samples, errors, measured_seconds)
+        self._print(results)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options['baseline']:
+            self._compare(results, options['baseline'], options['tolerance'])
+
+    def _summarise(self, samples, errors, seconds):
+        endpoints = {}
+        for label, values in sorted(samples.items()):
+            ordered = sorted(values)
+            endpoints[label] = {
+                'requests': len(ordered),
+                'errors': errors[label],
+                'rps': round(len(ordered) / seconds, 2),
+                'mean_ms': round(statistics.fmean(ordered), 2),
+                'p50_ms': round(percentile(ordered, 50), 2),
+                'p90_ms': round(percentile(ordered, 90), 2),
+                'p95_ms': round(percentile(ordered, 95), 2),
+                'p99_ms': round(percentile(ordered, 99), 2),
+                'max_ms': round(ordered[-1], 2),
+            }
+        total = sum(endpoint['requests'] for endpoint in endpoints.values())
+        return {
+            'seconds': round(seconds, 2),
+            'requests': total,
+            'errors': sum(errors.values()),
+            'rps': round(total / seconds, 2),
+            'endpoints': endpoints,
+        }
+
+    def _print(self, results):
+        header = f"{'endpoint':<28}{'reqs':>7}{'err':>6}{'rps':>9}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for label, row in results['endpoints'].items():
+            self.stdout.write(
+                f"{label:<28}{row['requests']:>7}{row['errors']:>6}{row['rps']:>9.1f}"
+                f"{row['p50_ms']:>9.1f}{row['p90_ms']:>9.1f}{row['p95_ms']:>9.1f}"
+                f"{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+            )
+        self.stdout.write('-' * len(header))
+        self.stdout.write(
+            f"total: {results['requests']} requests, {results['errors']} errors, "
+            f"{results['rps']:.1f} req/s over {results['seconds']}s (latencies in ms)"
+        )
+
+    def _compare(self, results, baseline_path, tolerance):
+        with open(baseline_path, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+
+        regressions = []
+        if results['rps'] < baseline['rps'] * (1 - tolerance):
+            regressions.append(f"throughput {baseline['rps']:.1f} -> {results['rps']:.1f} req/s")
+        for label, row in results['endpoints'].items():
+            previous = baseline['endpoints'].get(label)
+            if previous and row['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{label} p95 {previous['p95_ms']:.1f} -> {row['p95_ms']:.1f} ms")
+
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(f'REGRESSION: {regression}')
+            raise CommandError(f'{len(regressions)} performance regression(s) against {baseline_path}')
+        self.stdout.write(self.style.SUCCESS(f'No regressions beyond {tolerance:.0%} against {baseline_path}'))
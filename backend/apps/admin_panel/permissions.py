@@ -0,0 +1,18 @@
+"""
+Admin Panel Permissions
+"""
+
+from rest_framework.permissions import BasePermission
+
+
+class IsPlatformAdmin(BasePermission):
+    """
+    Allows access to admin user types and Django staff
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user and user.is_authenticated
+            and (user.is_staff or getattr(user, 'user_type', None) == 'admin')
+        )
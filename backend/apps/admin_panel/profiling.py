@@ -0,0 +1,285 @@
+"""
+Request Profiling
+
+Opt-in instrumentation for API views. For a sample of requests it records,
+per view name, the number of queries, repeated query patterns (N+1
+candidates), DB time, serialization (render) time and total time, and keeps
+them as histograms in this worker's memory.
+
+A statistical profiler can be switched on for one view at runtime from the
+admin panel. It samples the request thread's stack every few milliseconds and
+aggregates collapsed stacks that can be fed straight into a flame graph.
+
+Enable with REQUEST_PROFILING['ENABLED']. When disabled the middleware removes
+itself from the chain at startup; when enabled but a request is not sampled
+it costs one random() call.
+"""
+
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+# Upper bounds (ms) of histogram buckets; the last bucket is open-ended
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def get_profiling_setting(name):
+    defaults = {
+        'ENABLED': False,
+        'SAMPLE_RATE': 0.1,
+        'DUPLICATE_QUERY_THRESHOLD': 3,
+        'PROFILER_INTERVAL_MS': 5,
+    }
+    return getattr(settings, 'REQUEST_PROFILING', {}).get(name, defaults[name])
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value_ms):
+        self.counts[bisect_left(HISTOGRAM_BUCKETS_MS, value_ms)] += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, pct):
+        samples = sum(self.counts)
+        if not samples:
+            return None
+        target = pct / 100 * samples
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                if index < len(HISTOGRAM_BUCKETS_MS):
+                    return min(HISTOGRAM_BUCKETS_MS[index], round(self.max, 3))
+                return round(self.max, 3)
+        return round(self.max, 3)
+
+    def to_dict(self):
+        samples = sum(self.counts)
+        labels = [f'<={bound}' for bound in HISTOGRAM_BUCKETS_MS] + [f'>{HISTOGRAM_BUCKETS_MS[-1]}']
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'mean': round(self.total / samples, 3) if samples else None,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'max': round(self.max, 3),
+        }
+
+
+class ViewStats:
+    """Aggregated measurements for one view name"""
+
+    def __init__(self):
+        self.requests = 0
+        self.total_ms = Histogram()
+        self.db_ms = Histogram()
+        self.render_ms = Histogram()
+        self.queries = Histogram()
+        self.duplicate_queries = Counter()
+
+    def to_dict(self):
+        return {
+            'sampled_requests': self.requests,
+            'total_ms': self.total_ms.to_dict(),
+            'db_ms': self.db_ms.to_dict(),
+            'serialization_ms': self.render_ms.to_dict(),
+            'query_count': self.queries.to_dict(),
+            'duplicate_queries': [
+                {'sql': sql, 'occurrences': count}
+                for sql, count in self.duplicate_queries.most_common(10)
+            ],
+        }
+
+
+class ProfileStore:
+    """Per-process store of view stats and runtime profiler targets"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.views = defaultdict(ViewStats)
+        # view name -> remaining requests to profile
+        self.profiler_targets = {}
+        # view name -> Counter of collapsed stacks
+        self.profiles = defaultdict(Counter)
+
+    def record(self, view_name, measurement):
+        with self._lock:
+            stats = self.views[view_name]
+            stats.requests += 1
+            stats.total_ms.add(measurement['total_ms'])
+            stats.db_ms.add(measurement['db_ms'])
+            stats.render_ms.add(measurement['render_ms'])
+            stats.queries.add(measurement['queries'])
+            stats.duplicate_queries.update(measurement['duplicates'])
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self.views.items())}
+
+    def reset(self):
+        with self._lock:
+            self.views.clear()
+
+    def enable_profiler(self, view_name, requests):
+        with self._lock:
+            self.profiler_targets[view_name] = requests
+            self.profiles.pop(view_name, None)
+
+    def disable_profiler(self, view_name):
+        with self._lock:
+            self.profiler_targets.pop(view_name, None)
+
+    def claim_profiler(self, view_name):
+        """Take one profiling slot for a view, if any are left"""
+        if view_name not in self.profiler_targets:
+            return False
+        with self._lock:
+            remaining = self.profiler_targets.get(view_name, 0)
+            if remaining <= 0:
+                return False
+            if remaining == 1:
+                del self.profiler_targets[view_name]
+            else:
+                self.profiler_targets[view_name] = remaining - 1
+            return True
+
+    def add_profile(self, view_name, stacks):
+        with self._lock:
+            self.profiles[view_name].update(stacks)
+
+    def get_profile(self, view_name):
+        with self._lock:
+            return dict(self.profiles.get(view_name, {})), self.profiler_targets.get(view_name, 0)
+
+
+store = ProfileStore()
+
+
+class QueryRecorder:
+    """connection.execute_wrapper hook that times every query"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.templates = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            # Parameters are bound separately, so identical SQL text means the
+            # same query shape repeated with different values
+            self.templates[sql] += 1
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({code.co_filename}:{frame.f_lineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        return self.stacks
+
+
+class RequestProfilingMiddleware:
+    """
+    Middleware recording query counts, N+1 patterns and timings per view
+    """
+
+    def __init__(self, get_response):
+        if not get_profiling_setting('ENABLED'):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = get_profiling_setting('SAMPLE_RATE')
+        self.duplicate_threshold = get_profiling_setting('DUPLICATE_QUERY_THRESHOLD')
+        self.profiler_interval = get_profiling_setting('PROFILER_INTERVAL_MS') / 1000
+
+    def __call__(self, request):
+        sampled = random.random() < self.sample_rate
+        if not sampled and not store.profiler_targets:
+            return self.get_response(request)
+
+        request._profiling = {'render_ms': 0.0, 'sampler': None, 'sampled': sampled}
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(recorder):
+                response = self.get_response(request)
+        finally:
+            sampler = request._profiling['sampler']
+            if sampler is not None:
+                view_name = self._view_name(request)
+                store.add_profile(view_name, sampler.stop())
+
+        if sampled:
+            store.record(self._view_name(request), {
+                'total_ms': (time.perf_counter() - start) * 1000,
+                'db_ms': recorder.duration * 1000,
+                'render_ms': request._profiling['render_ms'],
+                'queries': recorder.count,
+                'duplicates': {
+                    sql: count for sql, count in recorder.templates.items()
+                    if count >= self.duplicate_threshold
+                },
+            })
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profiling = getattr(request, '_profiling', None)
+        if profiling is not None and store.claim_profiler(self._view_name(request)):
+            sampler = StackSampler(threading.get_ident(), self.profiler_interval)
+            sampler.start()
+            profiling['sampler'] = sampler
+        return None
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered to JSON after this hook; time that render
+        profiling = getattr(request, '_profiling', None)
+        if profiling is not None:
+            render_start = time.perf_counter()
+
+            def finished(rendered):
+                profiling['render_ms'] += (time.perf_counter() - render_start) * 1000
+
+            response.add_post_render_callback(finished)
+        return response
+
+    @staticmethod
+    def _view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match is not None else 'unresolved'
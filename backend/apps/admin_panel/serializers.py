@@ -0,0 +1,31 @@
+"""
+Admin Panel Serializers
+"""
+
+from rest_framework import serializers
+
+from apps.authentication.models import User
+
+
+class UserManagementSerializer(serializers.ModelSerializer):
+    """
+    User row for admin user management
+    Matches the frontend UserManagement interface
+    """
+    name = serializers.CharField(source='full_name', read_only=True)
+    status = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = User
+        fields = [
+            'id', 'user_type', 'name', 'email', 'phone_number', 'status',
+            'is_verified', 'created_at', 'last_login'
+        ]
+        read_only_fields = fields
+    
+    def get_status(self, obj):
+        if not obj.is_active:
+            return 'suspended'
+        if not obj.is_verified:
+            return 'pending_verification'
+        return 'active'
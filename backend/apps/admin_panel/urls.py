@@ -4,4 +4,8 @@ from . import views
 app_name = 'admin_panel'
 urlpatterns = [
     path('', views.index, name='index'),
-]
\ No newline at end of file
+    path('stats/', views.platform_stats, name='platform_stats'),
+    path('users/search/', views.user_search, name='user_search'),
+    path('profiling/', views.profiling_stats, name='profiling_stats'),
+    path('profiling/routes/<str:view_name>/', views.route_profiler, name='route_profiler'),
+]
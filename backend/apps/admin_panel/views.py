@@ -1,6 +1,145 @@
-from rest_framework.decorators import api_view
+"""
+Admin Panel Views
+"""
+
+import time
+from datetime import timedelta
+
+from django.db.models import Count, Sum
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
+from apps.authentication.models import User
+from apps.authentication.search import MIN_QUERY_LENGTH, search_users
+from apps.orders.models import Order
+from apps.restaurants.hours import filter_open
+from apps.restaurants.models import Restaurant
+from foodie_backend.admission import monitor as load_monitor
+from .permissions import IsPlatformAdmin
+from .profiling import get_profiling_setting, store
+from .serializers import UserManagementSerializer
+
+
 @api_view(['GET'])
 def index(request):
-    return Response({'status': 'admin panel ready'})
\ No newline at end of file
+    return Response({'status': 'admin panel ready'})
+
+
+@api_view(['GET'])
+@permission_classes([IsPlatformAdmin])
+def platform_stats(request):
+    """
+    Platform overview for the admin dashboard
+    Matches frontend adminManagementService.getPlatformStats()
+    """
+    since = timezone.now() - timedelta(days=1)
+    users_by_type = dict(User.objects.values_list('user_type').annotate(count=Count('id')))
+    orders_today = Order.objects.filter(created_at__gte=since)
+    orders_by_status = dict(orders_today.values_list('status').annotate(count=Count('id')))
+    revenue = orders_today.filter(status='delivered').aggregate(total=Sum('total'))['total']
+    
+    return Response({
+        'success': True,
+        'stats': {
+            'users': users_by_type,
+            'restaurants': Restaurant.objects.count(),
+            'open_restaurants': filter_open(Restaurant.objects.all()).count(),
+            'orders_last_24h': orders_by_status,
+            'revenue_last_24h': revenue or 0,
+        }
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsPlatformAdmin])
+def profiling_stats(request):
+    """
+    Aggregated per-view request profiles and load shedding counters for this
+    worker process. DELETE clears the collected profiles
+    """
+    if request.method == 'DELETE':
+        store.reset()
+        return Response({'success': True, 'message': 'Profiling stats cleared'})
+    
+    return Response({
+        'success': True,
+        'enabled': get_profiling_setting('ENABLED'),
+        'sample_rate': get_profiling_setting('SAMPLE_RATE'),
+        'views': store.snapshot(),
+        'load': load_monitor.snapshot(),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET', 'POST', 'DELETE'])
+@permission_classes([IsPlatformAdmin])
+def route_profiler(request, view_name):
+    """
+    Statistical profiler for one view (e.g. "restaurants:restaurant_list")
+    POST {"requests": N} profiles the next N requests, GET returns collapsed stacks
+    """
+    if request.method == 'POST':
+        if not get_profiling_setting('ENABLED'):
+            return Response({
+                'success': False,
+                'error': 'Request profiling is disabled (REQUEST_PROFILING["ENABLED"])'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            requests = int(request.data.get('requests', 20))
+        except (TypeError, ValueError):
+            requests = 0
+        if requests < 1:
+            return Response({
+                'success': False,
+                'errors': {'requests': ['Must be a positive integer.']}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        store.enable_profiler(view_name, requests)
+        return Response({
+            'success': True,
+            'message': f'Profiling the next {requests} requests to {view_name}'
+        }, status=status.HTTP_201_CREATED)
+    
+    if request.method == 'DELETE':
+        store.disable_profiler(view_name)
+        return Response({'success': True, 'message': f'Profiler stopped for {view_name}'})
+    
+    stacks, remaining = store.get_profile(view_name)
+    return Response({
+        'success': True,
+        'view_name': view_name,
+        'remaining_requests': remaining,
+        'samples': sum(stacks.values()),
+        # Collapsed stack format: "frame;frame;frame" -> sample count
+        'stacks': stacks,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsPlatformAdmin])
+def user_search(request):
+    """
+    Ranked type-ahead search over users by email, name or phone number
+    Matches frontend adminManagementService.getUsers({search, type, limit})
+    """
+    term = request.query_params.get('search', '').strip()
+    if len(term) < MIN_QUERY_LENGTH:
+        return Response({
+            'success': False,
+            'errors': {'search': [f'Enter at least {MIN_QUERY_LENGTH} characters.']}
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = int(request.query_params.get('limit', 0)) or None
+    except ValueError:
+        limit = None
+    
+    started = time.perf_counter()
+    users, backend = search_users(term, limit=limit, user_type=request.query_params.get('type') or None)
+    return Response({
+        'success': True,
+        'count': len(users),
+        'backend': backend,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2),
+        'users': UserManagementSerializer(users, many=True).data
+    }, status=status.HTTP_200_OK)
@@ -4,8 +4,10 @@ Authentication Admin Configuration
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Case, IntegerField, Value, When
 from django.utils.translation import gettext_lazy as _
 from .models import User, UserProfile
+from .search import search_user_ids
 
 
 @admin.register(User)
@@ -17,6 +19,8 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ['user_type', 'is_active', 'is_verified', 'created_at']
     search_fields = ['email', 'full_name', 'phone_number']
     ordering = ['-created_at']
+    # COUNT(*) over every user on each search page is slower than the search
+    show_full_result_count = False
     
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
@@ -46,6 +50,30 @@ class UserAdmin(BaseUserAdmin):
             ),
         }),
     )
+    
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Use the trigram index and list matches best first. Short terms,
+        unindexed databases and terms with more matches than the index
+        returns at once scan as before, so no match is left out.
+        """
+        ids = search_user_ids(search_term, complete=True)
+        if ids is None:
+            return super().get_search_results(request, queryset, search_term)
+        if not ids:
+            return queryset.none(), False
+        request.user_search_ranked = True
+        search_rank = Case(
+            *[When(pk=user_id, then=Value(position)) for position, user_id in enumerate(ids)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=ids).annotate(search_rank=search_rank), False
+
+    def get_ordering(self, request):
+        # Ranked search results keep their rank unless a column header is clicked
+        if getattr(request, 'user_search_ranked', False):
+            return ['search_rank']
+        return super().get_ordering(request)
 
 
 @admin.register(UserProfile)
@@ -0,0 +1,135 @@
+"""
+Benchmark admin user search (apps/authentication/search.py).
+
+Tops auth_users up to --users synthetic accounts (emails at
+@search.foodie.test, kept between runs), then times type-ahead queries
+through the trigram index against the old icontains scan:
+
+    python manage.py bench_user_search --users 5000000 --target-ms 50
+    python manage.py bench_user_search --clean
+
+Queries mix name and email fragments, phone digits, terms that match
+almost every row and terms that match nothing.
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.authentication.models import User
+from apps.authentication.search import ensure_search_index, search_user_ids
+
+EMAIL_DOMAIN = 'search.foodie.test'
+SYLLABLES = ['ka', 'mi', 'to', 'ra', 'ne', 'lo', 'su', 'fa', 'de', 'yo', 'bel', 'kwa', 'ama', 'son', 'chen', 'ric',
+             'ter', 'an', 'vi', 'mar', 'el', 'os', 'ju', 'pa', 'wen', 'din', 'ola', 'tun', 'gar', 'sha']
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Measure admin user search latency with the trigram index against an icontains scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--scan-queries', type=int, default=10,
+                            help='icontains baseline queries (each reads the whole table)')
+        parser.add_argument('--target-ms', type=float, default=50, help='p95 latency target')
+        parser.add_argument('--seed', type=int, default=11)
+        parser.add_argument('--clean', action='store_true', help='Delete the synthetic users and exit')
+
+    def handle(self, *args, **options):
+        synthetic = User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}')
+        if options['clean']:
+            deleted, _ = synthetic.delete()
+            self.stdout.write(f'Deleted {deleted} rows')
+            return
+
+        rng = random.Random(options['seed'])
+        self.stdout.write(f'Search index backend: {ensure_search_index()}')
+        self._top_up(rng, synthetic.count(), options['users'])
+        total = User.objects.count()
+        terms = self._terms(rng, options['queries'])
+
+        indexed = []
+        for term in terms:
+            began = time.perf_counter()
+            search_user_ids(term, limit=20)
+            indexed.append((time.perf_counter() - began) * 1000)
+
+        scanned = []
+        for term in terms[:options['scan_queries']]:
+            began = time.perf_counter()
+            list(User.objects.filter(
+                Q(email__icontains=term) | Q(full_name__icontains=term) | Q(phone_number__icontains=term)
+            ).values_list('id', flat=True)[:20])
+            scanned.append((time.perf_counter() - began) * 1000)
+
+        self.stdout.write(f'{total:,} users, {len(terms)} queries')
+        self.stdout.write(f"{'':<10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for label, timings in (('indexed', indexed), ('icontains', scanned)):
+            if timings:
+                self.stdout.write(
+                    f'{label:<10}{statistics.median(timings):>10.2f}'
+                    f'{percentile(timings, 0.95):>10.2f}{max(timings):>10.2f}'
+                )
+        p95 = percentile(indexed, 0.95)
+        verdict = 'meets' if p95 <= options['target_ms'] else 'MISSES'
+        self.stdout.write(f"Indexed p95 {p95:.2f} ms {verdict} the {options['target_ms']:g} ms target")
+
+    def _name(self, rng):
+        return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+    def _top_up(self, rng, existing, wanted):
+        batch = []
+        began = time.perf_counter()
+        for index in range(existing, wanted):
+            first, last = self._name(rng), self._name(rng)
+            batch.append(User(
+                email=f'{first.lower()}.{last.lower()}{index}@{EMAIL_DOMAIN}',
+                password='!',
+                full_name=f'{first} {last}',
+                phone_number=f'+1{rng.randint(2000000000, 9999999999)}',
+                user_type='customer',
+            ))
+            if len(batch) == 5000:
+                User.objects.bulk_create(batch)
+                batch = []
+                if index % 100_000 < 5000:
+                    self.stdout.write(f'  {index + 1:,} synthetic users')
+        if batch:
+            User.objects.bulk_create(batch)
+        if wanted > existing:
+            self.stdout.write(f'Added {wanted - existing:,} users in {time.perf_counter() - began:.0f}s')
+
+    def _terms(self, rng, count):
+        sample = list(
+            User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}')
+            .order_by('?').values_list('email', 'full_name', 'phone_number')[:count]
+        ) or list(User.objects.values_list('email', 'full_name', 'phone_number')[:count])
+        terms = []
+        for index in range(count):
+            email, full_name, phone_number = sample[index % len(sample)]
+            kind = index % 6
+            if kind == 0:
+                terms.append(full_name.split()[-1][:rng.randint(3, 6)].lower())
+            elif kind == 1:
+                start = rng.randint(0, max(0, email.index('@') - 5))
+                terms.append(email[start:start + rng.randint(4, 8)])
+            elif kind == 2:
+                start = rng.randint(2, len(phone_number) - 5)
+                terms.append(phone_number[start:start + rng.randint(4, 7)])
+            elif kind == 3:
+                terms.append(full_name.lower())
+            elif kind == 4:
+                # Matches nearly every row
+                terms.append(rng.choice(['foodie', 'son', 'ama', 'ka']))
+            else:
+                terms.append(rng.choice(['zqxv', 'qqqz', 'xjw']))
+        return terms
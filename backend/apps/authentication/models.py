@@ -37,6 +37,10 @@ class User(AbstractUser):
     )
     user_type = models.CharField(max_length=20, choices=USER_TYPES)
     avatar = models.ImageField(upload_to='user_avatars/', null=True, blank=True)
+    avatar_asset = models.ForeignKey(
+        'media_assets.ImageAsset', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='+'
+    )
     
     # Profile fields
     date_of_birth = models.DateField(null=True, blank=True)
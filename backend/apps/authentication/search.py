@@ -0,0 +1,268 @@
+"""
+User Search
+
+Indexed substring search over email, full name and phone number for the
+admin panel. A plain `icontains` search reads every row of auth_users.
+Here the database's trigram index does the work:
+
+  * PostgreSQL: pg_trgm GIN indexes on lower(email), lower(full_name) and
+    phone_number, which serve LIKE '%term%'
+  * SQLite: an FTS5 table with the trigram tokenizer (auth_users_search),
+    kept in sync with auth_users by triggers, and an index on lower(email)
+    for email prefixes
+
+ensure_search_index() creates the index. It runs after every migrate and is
+a no-op when everything is already in place. Other databases, or a
+database where the index cannot be created, fall back to icontains.
+
+The trigram index needs at least 3 characters. A search collects a bounded
+set of candidates and ranks them in Python. Candidates are email prefix
+matches from the email B-tree index plus the first substring matches from
+the trigram index. Ranking is exact match, then prefix or
+word prefix, then substring. Email beats name, and name beats phone.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections
+from django.db.models import Q
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+MIN_QUERY_LENGTH = 3
+FTS_TABLE = 'auth_users_search'
+EMAIL_INDEX = 'auth_users_email_lower'
+PG_INDEXES = {
+    'auth_users_email_trgm': 'lower(email)',
+    'auth_users_full_name_trgm': 'lower(full_name)',
+    'auth_users_phone_trgm': 'phone_number',
+}
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON auth_users BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, email, full_name, phone_number)
+            VALUES (new.rowid, new.email, new.full_name, new.phone_number);
+        END""",
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON auth_users BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, email, full_name, phone_number)
+            VALUES ('delete', old.rowid, old.email, old.full_name, old.phone_number);
+        END""",
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF email, full_name, phone_number ON auth_users BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, email, full_name, phone_number)
+            VALUES ('delete', old.rowid, old.email, old.full_name, old.phone_number);
+            INSERT INTO {FTS_TABLE}(rowid, email, full_name, phone_number)
+            VALUES (new.rowid, new.email, new.full_name, new.phone_number);
+        END""",
+}
+
+# Set by ensure_search_index() / search_backend(); None until checked
+_backend = None
+
+
+def get_user_search_setting(name):
+    defaults = {
+        'ENABLED': True,
+        # Rows fetched per candidate query before ranking
+        'CANDIDATES': 200,
+        'DEFAULT_LIMIT': 20,
+        'MAX_LIMIT': 100,
+    }
+    return getattr(settings, 'USER_SEARCH', {}).get(name, defaults[name])
+
+
+def _existing(cursor, kind, names):
+    cursor.execute(
+        f"SELECT name FROM sqlite_master WHERE type = %s AND name IN ({', '.join(['%s'] * len(names))})",
+        [kind, *names],
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _ensure_sqlite(cursor):
+    if not _existing(cursor, 'table', [FTS_TABLE]):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"email, full_name, phone_number, tokenize='trigram', content='auth_users', content_rowid='rowid')"
+        )
+    missing = set(SQLITE_TRIGGERS) - _existing(cursor, 'trigger', list(SQLITE_TRIGGERS))
+    if missing:
+        # New table, or auth_users was rebuilt by a migration (which drops triggers
+        # and may renumber rowids): recreate the triggers and reindex everything
+        for name in SQLITE_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(SQLITE_TRIGGERS[name])
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        logger.info('Rebuilt the user search index')
+    # Search terms are lowercased; the email column keeps the case it was entered with
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {EMAIL_INDEX} ON auth_users (lower(email))')
+
+
+def _ensure_postgresql(cursor):
+    cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression in PG_INDEXES.items():
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON auth_users USING gin ({expression} gin_trgm_ops)')
+
+
+def ensure_search_index(using=DEFAULT_DB_ALIAS):
+    """Create the trigram index for this database; returns the backend in use"""
+    global _backend
+    if not get_user_search_setting('ENABLED'):
+        _backend = 'scan'
+        return _backend
+    database = connections[using]
+    try:
+        with database.cursor() as cursor:
+            if database.vendor == 'sqlite':
+                _ensure_sqlite(cursor)
+            elif database.vendor == 'postgresql':
+                _ensure_postgresql(cursor)
+            else:
+                _backend = 'scan'
+                return _backend
+    except DatabaseError:
+        # No FTS5/trigram tokenizer, or no permission to create pg_trgm
+        logger.warning('User search index unavailable; falling back to icontains', exc_info=True)
+        _backend = 'scan'
+        return _backend
+    _backend = database.vendor
+    return _backend
+
+
+def search_backend():
+    """'sqlite', 'postgresql' or 'scan'"""
+    global _backend
+    if _backend is None:
+        _backend = 'scan'
+        if get_user_search_setting('ENABLED'):
+            try:
+                with connection.cursor() as cursor:
+                    if connection.vendor == 'sqlite' and _existing(cursor, 'table', [FTS_TABLE]):
+                        _backend = 'sqlite'
+                    elif connection.vendor == 'postgresql':
+                        cursor.execute('SELECT 1 FROM pg_indexes WHERE indexname = %s', [next(iter(PG_INDEXES))])
+                        if cursor.fetchone():
+                            _backend = 'postgresql'
+            except DatabaseError:
+                pass
+    return _backend
+
+
+def _like(term, prefix=False):
+    """LIKE pattern with PostgreSQL's default backslash escaping"""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'{escaped}%' if prefix else f'%{escaped}%'
+
+
+def _candidate_queries(term, backend):
+    """(sql, params) pairs returning auth_users ids, best candidates first"""
+    # Email prefixes come from the ordinary email index. A prefix LIKE through
+    # the trigram index would recheck every row sharing the term's trigrams.
+    if backend == 'sqlite':
+        quoted = '"' + term.replace('"', '""') + '"'
+        return [
+            ("SELECT id FROM auth_users WHERE lower(email) >= %s AND lower(email) < %s LIMIT %s",
+             [term, term + '\U0010ffff']),
+            (f"SELECT u.id FROM {FTS_TABLE} s JOIN auth_users u ON u.rowid = s.rowid "
+             f"WHERE {FTS_TABLE} MATCH %s LIMIT %s", [quoted]),
+        ]
+    # Django's varchar_pattern_ops index on email serves the prefix LIKE
+    queries = [
+        ("SELECT id FROM auth_users WHERE email LIKE %s LIMIT %s", [_like(term, True)]),
+        ("SELECT id FROM auth_users WHERE lower(email) LIKE %s OR lower(full_name) LIKE %s LIMIT %s",
+         [_like(term), _like(term)]),
+    ]
+    digits = term.lstrip('+')
+    if digits.isdigit() and len(digits) >= MIN_QUERY_LENGTH:
+        queries.append(("SELECT id FROM auth_users WHERE phone_number LIKE %s LIMIT %s", [_like(digits)]))
+    return queries
+
+
+def _field_score(term, value):
+    value = value.lower()
+    if term not in value:
+        return 0
+    if value == term:
+        return 3
+    words = value.replace('@', ' ').replace('.', ' ').split()
+    if value.startswith(term) or any(word.startswith(term) for word in words):
+        return 2
+    return 1
+
+
+def rank(term, rows):
+    """Matching (id, email, full_name, phone_number, ...) rows, best first"""
+    term = term.lower()
+    digits = term.lstrip('+')
+    ranked = []
+    for row in rows:
+        _, email, full_name, phone_number = row[:4]
+        score, weight, length = max(
+            (_field_score(term, email), 3, len(email)),
+            (_field_score(term, full_name), 2, len(full_name)),
+            (_field_score(digits, phone_number) if digits else 0, 1, len(phone_number)),
+        )
+        if score:
+            ranked.append(((-score, -weight, length), row))
+    ranked.sort(key=lambda item: item[0])
+    return [row for _, row in ranked]
+
+
+def search_user_ids(term, limit=None, complete=False):
+    """
+    Ids of users matching term, best first, or None when the index cannot
+    serve this term (too short or no index) and callers should scan instead
+
+    With complete, every matching id is returned and limit is ignored. When a
+    candidate query stops at CANDIDATES rows the matches may be cut short, so
+    None is returned instead.
+    """
+    term = term.strip().lower()
+    backend = search_backend()
+    if len(term) < MIN_QUERY_LENGTH or backend == 'scan':
+        return None
+    limit = limit or get_user_search_setting('DEFAULT_LIMIT')
+    candidates = get_user_search_setting('CANDIDATES')
+
+    ids = []
+    seen = set()
+    with connection.cursor() as cursor:
+        for sql, params in _candidate_queries(term, backend):
+            cursor.execute(sql, [*params, candidates])
+            rows = cursor.fetchall()
+            if complete and len(rows) >= candidates:
+                return None
+            for (user_id,) in rows:
+                if user_id not in seen:
+                    seen.add(user_id)
+                    ids.append(user_id)
+    if not ids:
+        return []
+
+    id_field = User._meta.pk
+    ids = [id_field.to_python(user_id) for user_id in ids]
+    rows = User.objects.filter(pk__in=ids).values_list('id', 'email', 'full_name', 'phone_number')
+    ranked = rank(term, rows)
+    return [row[0] for row in (ranked if complete else ranked[:limit])]
+
+
+def search_users(term, limit=None, user_type=None):
+    """Ranked users for the admin search API; scans when the index cannot help"""
+    limit = min(limit or get_user_search_setting('DEFAULT_LIMIT'), get_user_search_setting('MAX_LIMIT'))
+    fetch = limit if user_type is None else get_user_search_setting('CANDIDATES')
+    ids = search_user_ids(term, fetch)
+    users = User.objects.all()
+    if user_type:
+        users = users.filter(user_type=user_type)
+    if ids is None:
+        term = term.strip()
+        users = users.filter(
+            Q(email__icontains=term) | Q(full_name__icontains=term) | Q(phone_number__icontains=term)
+        ).order_by('email')[:limit]
+        return list(users), 'scan'
+    by_id = users.in_bulk(ids)
+    return [by_id[user_id] for user_id in ids if user_id in by_id][:limit], search_backend()
@@ -8,6 +8,7 @@ that match the frontend TypeScript interfaces.
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import authenticate
+from apps.media_assets.pipeline import image_urls
 from .models import User, UserProfile
 
 
@@ -16,16 +17,28 @@ class UserSerializer(serializers.ModelSerializer):
     User serializer that matches the frontend User interface
     """
     name = serializers.CharField(source='full_name', read_only=True)
+    avatar_images = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = [
             'id', 'email', 'name', 'full_name', 'phone_number',
-            'user_type', 'avatar', 'date_of_birth', 'address',
+            'user_type', 'avatar', 'avatar_images', 'date_of_birth', 'address',
             'is_active', 'is_verified', 'created_at', 'updated_at',
             'current_latitude', 'current_longitude'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'is_verified']
+        # Avatars are uploaded through the image pipeline, see views.upload_avatar
+        read_only_fields = ['id', 'avatar', 'created_at', 'updated_at', 'is_verified']
+    
+    def get_avatar_images(self, obj):
+        return image_urls(obj.avatar_asset)
+
+
+class AvatarUploadSerializer(serializers.Serializer):
+    """
+    Avatar upload serializer
+    """
+    avatar = serializers.ImageField()
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
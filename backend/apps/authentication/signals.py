@@ -4,9 +4,10 @@ Authentication Signals
 Django signals for handling post-save operations on User model
 """
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_migrate, post_save
 from django.dispatch import receiver
 from .models import User, UserProfile
+from .search import ensure_search_index
 
 
 @receiver(post_save, sender=User)
@@ -15,4 +16,13 @@ def create_user_profile(sender, instance, created, **kwargs):
     Automatically create UserProfile when User is created
     """
     if created:
-        UserProfile.objects.get_or_create(user=instance)
\ No newline at end of file
+        UserProfile.objects.get_or_create(user=instance)
+
+
+@receiver(post_migrate)
+def create_user_search_index(sender, using, **kwargs):
+    """
+    Create (or repair) the trigram user search index after migrations
+    """
+    if sender.name == 'apps.authentication':
+        ensure_search_index(using)
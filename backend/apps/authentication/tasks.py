@@ -0,0 +1,50 @@
+"""
+Authentication Tasks
+
+Account emails, sent in the background by `run_tasks` so requests never
+wait on the mail server.
+"""
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import send_mail
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from apps.tasks.queue import task
+from .models import User
+
+
+def _account_link(user, path):
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    token = default_token_generator.make_token(user)
+    return f'{settings.FRONTEND_URL}/{path}?uid={uid}&token={token}'
+
+
+@task(queue='email', priority=10)
+def send_password_reset_email(user_id):
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return
+    send_mail(
+        'Reset your Foodie Express password',
+        f'Hi {user.full_name or user.email},\n\n'
+        f'Use this link to choose a new password:\n{_account_link(user, "reset-password")}\n\n'
+        'If you did not ask for this, you can ignore this email.',
+        None,
+        [user.email],
+    )
+
+
+@task(queue='email', priority=5)
+def send_verification_email(user_id):
+    user = User.objects.filter(pk=user_id, is_active=True, is_verified=False).first()
+    if user is None:
+        return
+    send_mail(
+        'Verify your Foodie Express email',
+        f'Hi {user.full_name or user.email},\n\n'
+        f'Confirm your email address with this link:\n{_account_link(user, "verify-email")}',
+        None,
+        [user.email],
+    )
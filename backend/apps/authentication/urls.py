@@ -20,8 +20,12 @@ urlpatterns = [
     # User profile endpoints
     path('me/', views.get_current_user, name='current_user'),
     path('profile/update/', views.update_profile, name='update_profile'),
+    path('profile/avatar/', views.upload_avatar, name='upload_avatar'),
     
     # Password management
     path('password/change/', views.change_password, name='change_password'),
     path('password/reset/', views.request_password_reset, name='password_reset'),
+
+    # Email verification
+    path('email/verify/send/', views.send_email_verification, name='send_email_verification'),
 ]
\ No newline at end of file
@@ -6,22 +6,25 @@ the frontend authentication service methods.
 """
 
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
-from django.core.mail import send_mail
 from django.conf import settings
 
+from apps.media_assets.pipeline import InvalidImage, store_image
 from .models import User, UserProfile
+from .tasks import send_password_reset_email, send_verification_email
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer, 
     UserSerializer,
     UserProfileSerializer,
     PasswordResetSerializer,
-    PasswordChangeSerializer
+    PasswordChangeSerializer,
+    AvatarUploadSerializer
 )
 
 
@@ -39,6 +42,7 @@ def register(request):
         
         # Create user profile
         UserProfile.objects.get_or_create(user=user)
+        send_verification_email.enqueue(user.pk)
         
         # Generate tokens
         refresh = RefreshToken.for_user(user)
@@ -163,6 +167,42 @@ def update_profile(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser])
+def upload_avatar(request):
+    """
+    Upload a new avatar
+    Responds immediately; resized variants appear in avatar_images once rendered
+    """
+    serializer = AvatarUploadSerializer(data=request.data)
+    
+    if serializer.is_valid():
+        try:
+            asset = store_image(serializer.validated_data['avatar'], 'avatar')
+        except InvalidImage as e:
+            return Response({
+                'success': False,
+                'errors': {'avatar': [str(e)]}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        user = request.user
+        user.avatar = asset.original
+        user.avatar_asset = asset
+        user.save(update_fields=['avatar', 'avatar_asset', 'updated_at'])
+        
+        return Response({
+            'success': True,
+            'message': 'Avatar uploaded successfully',
+            'user': UserSerializer(user).data
+        }, status=status.HTTP_201_CREATED)
+    
+    return Response({
+        'success': False,
+        'errors': serializer.errors
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def change_password(request):
@@ -200,15 +240,18 @@ def change_password(request):
 @permission_classes([AllowAny])
 def request_password_reset(request):
     """
-    Request password reset (placeholder for development)
+    Request a password reset email
+    Matches frontend authService.requestPasswordReset()
     """
     serializer = PasswordResetSerializer(data=request.data)
     
     if serializer.is_valid():
         email = serializer.validated_data['email']
         
-        # In development, just return success message
-        # In production, send actual reset email
+        # Same response whether or not the account exists
+        user = User.objects.filter(email__iexact=email, is_active=True).only('pk').first()
+        if user is not None:
+            send_password_reset_email.enqueue(user.pk)
         return Response({
             'success': True,
             'message': f'Password reset instructions sent to {email}'
@@ -217,4 +260,24 @@ def request_password_reset(request):
     return Response({
         'success': False,
         'errors': serializer.errors
-    }, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def send_email_verification(request):
+    """
+    Send (again) the email address verification link
+    Matches frontend authService.sendEmailVerification()
+    """
+    if request.user.is_verified:
+        return Response({
+            'success': True,
+            'message': 'Email is already verified'
+        }, status=status.HTTP_200_OK)
+    
+    send_verification_email.enqueue(request.user.pk)
+    return Response({
+        'success': True,
+        'message': 'Verification email sent successfully'
+    }, status=status.HTTP_200_OK)
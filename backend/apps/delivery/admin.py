@@ -1 +1,29 @@
-from django.contrib import admin
\ No newline at end of file
+"""
+Delivery Admin Configuration
+"""
+
+from django.contrib import admin
+from .models import Delivery, DeliveryTrajectory
+
+
+@admin.register(Delivery)
+class DeliveryAdmin(admin.ModelAdmin):
+    """
+    Delivery admin configuration
+    """
+    list_display = ['id', 'order', 'driver', 'status', 'priority', 'total_payout', 'created_at']
+    list_filter = ['status', 'priority', 'is_pre_order']
+    search_fields = ['id', 'order__id', 'driver__email']
+    raw_id_fields = ['order', 'driver']
+
+
+@admin.register(DeliveryTrajectory)
+class DeliveryTrajectoryAdmin(admin.ModelAdmin):
+    """
+    Delivery trajectory admin configuration
+    """
+    list_display = ['delivery', 'point_count', 'raw_point_count', 'distance_m', 'simplified', 'updated_at']
+    list_filter = ['simplified']
+    search_fields = ['delivery__id']
+    raw_id_fields = ['delivery']
+    exclude = ['points']
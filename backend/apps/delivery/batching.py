@@ -0,0 +1,343 @@
+"""
+Delivery Batching
+
+Groups pending orders into multi-order trips for one driver and sequences
+each trip's pickups and drop-offs.
+
+Grouping is greedy. Orders are taken in food-ready order, and each one
+seeds a batch. Orders whose pickup is within PICKUP_RADIUS_KM of the
+seed's, and whose food is ready within READY_WINDOW_MINUTES of it, are
+candidates; the MAX_CANDIDATES of them with drop-offs nearest the seed's
+are tried. Pickups are found through a grid of that size, so there are
+no pairwise comparisons across the city. The candidate that saves the most
+driver time is added, repeatedly, while the batch stays feasible:
+
+  * no more than MAX_ORDERS orders, and never more than CAPACITY bags
+    carried at once
+  * no pickup before the food is ready: the driver waits instead
+  * no customer receives their order more than MAX_ADDED_DELAY_MINUTES
+    later than a driver dedicated to them would have delivered it
+
+Stops are sequenced by cheapest insertion (each order's pickup and drop-off
+go where they lengthen the route least) followed by 2-opt segment
+reversals, keeping every pickup before its drop-off. Batches hold at most a
+few orders, so this takes milliseconds where an exact solver would not.
+
+Travel time is the great-circle distance times DETOUR_FACTOR at SPEED_KMH,
+plus a fixed time at each stop.
+"""
+
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+EARTH_RADIUS_KM = 6371.0
+PICKUP, DROPOFF = 'pickup', 'dropoff'
+
+
+def get_batching_setting(name):
+    defaults = {
+        'ENABLED': True,
+        'MAX_ORDERS': 3,
+        'CAPACITY': 4,
+        'MAX_ADDED_DELAY_MINUTES': 10,
+        'PICKUP_RADIUS_KM': 1.5,
+        'READY_WINDOW_MINUTES': 10,
+        # Candidates tried per batch, nearest drop-offs first
+        'MAX_CANDIDATES': 12,
+        'SPEED_KMH': 25,
+        'DETOUR_FACTOR': 1.3,
+        'PICKUP_SECONDS': 120,
+        'DROPOFF_SECONDS': 90,
+        # Food-ready time when nothing better is known: minutes after the order was placed
+        'PREP_MINUTES': 15,
+        # Drivers polling within this many seconds share one plan
+        'PLAN_CACHE_SECONDS': 5,
+    }
+    return getattr(settings, 'DELIVERY_BATCHING', {}).get(name, defaults[name])
+
+
+def distance_km(a, b):
+    """Haversine distance between two (lat, lng) points in degrees"""
+    phi1, phi2 = math.radians(a[0]), math.radians(b[0])
+    dphi = phi2 - phi1
+    dlambda = math.radians(b[1] - a[1])
+    h = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+class Job:
+    """One order to carry: times are seconds on any common clock (e.g. Unix time)"""
+
+    __slots__ = ('id', 'pickup', 'dropoff', 'ready_at', 'size', 'payload')
+
+    def __init__(self, id, pickup, dropoff, ready_at, size=1, payload=None):
+        self.id = id
+        self.pickup = pickup
+        self.dropoff = dropoff
+        self.ready_at = ready_at
+        self.size = size
+        # Caller's object (e.g. the Delivery), carried through untouched
+        self.payload = payload
+
+    def __repr__(self):
+        return f'Job({self.id!r})'
+
+
+class Batch:
+    """Orders for one trip, their stop sequence and timing"""
+
+    __slots__ = ('jobs', 'route', 'arrivals', 'finish', 'saved_seconds')
+
+    def __init__(self, jobs, route, arrivals, finish, saved_seconds):
+        self.jobs = jobs
+        # [(kind, job)] in visiting order
+        self.route = route
+        # Arrival time at each stop of the route
+        self.arrivals = arrivals
+        self.finish = finish
+        # Driver time saved against carrying the orders on separate trips
+        self.saved_seconds = saved_seconds
+
+
+class Planner:
+    """Travel model and constraints, read from DELIVERY_BATCHING once"""
+
+    def __init__(self, **overrides):
+        def setting(name):
+            return overrides.get(name.lower(), get_batching_setting(name))
+
+        self.max_orders = setting('MAX_ORDERS')
+        self.capacity = setting('CAPACITY')
+        self.max_added_delay = setting('MAX_ADDED_DELAY_MINUTES') * 60
+        self.pickup_radius_km = setting('PICKUP_RADIUS_KM')
+        self.ready_window = setting('READY_WINDOW_MINUTES') * 60
+        self.max_candidates = setting('MAX_CANDIDATES')
+        self.seconds_per_km = setting('DETOUR_FACTOR') * 3600 / setting('SPEED_KMH')
+        self.service = {PICKUP: setting('PICKUP_SECONDS'), DROPOFF: setting('DROPOFF_SECONDS')}
+
+    def travel(self, a, b):
+        return distance_km(a, b) * self.seconds_per_km
+
+    def solo_delivery(self, job, start, now):
+        """When a dedicated driver at start would hand job over"""
+        at_pickup = max(now + (self.travel(start, job.pickup) if start else 0), job.ready_at)
+        return at_pickup + self.service[PICKUP] + self.travel(job.pickup, job.dropoff)
+
+    def simulate(self, route, start, now, solo=None):
+        """
+        (finish time, arrivals) of a route, or None when it breaks a constraint
+
+        Without start the driver is at the first stop at now. solo maps job
+        id -> solo delivery time; when given the added delay is checked.
+        """
+        position = start or (route[0][1].pickup if route else None)
+        clock = now
+        load = 0
+        arrivals = []
+        for kind, job in route:
+            point = job.pickup if kind == PICKUP else job.dropoff
+            clock += self.travel(position, point)
+            arrivals.append(clock)
+            if kind == PICKUP:
+                load += job.size
+                if load > self.capacity:
+                    return None
+                clock = max(clock, job.ready_at)
+            else:
+                load -= job.size
+                if solo is not None and clock - solo[job.id] > self.max_added_delay:
+                    return None
+            clock += self.service[kind]
+            position = point
+        return clock, arrivals
+
+    def insert(self, route, job, start, now, solo):
+        """Cheapest feasible route with job's pickup and drop-off inserted, or None"""
+        best = None
+        for i in range(len(route) + 1):
+            with_pickup = route[:i] + [(PICKUP, job)] + route[i:]
+            for j in range(i + 1, len(with_pickup) + 1):
+                candidate = with_pickup[:j] + [(DROPOFF, job)] + with_pickup[j:]
+                result = self.simulate(candidate, start, now, solo)
+                if result and (best is None or result[0] < best[0]):
+                    best = (result[0], candidate)
+        return best and best[1]
+
+    def two_opt(self, route, start, now, solo):
+        """Reverse segments while that shortens the route and keeps it valid"""
+        best = self.simulate(route, start, now, solo)[0]
+        improved = True
+        while improved:
+            improved = False
+            for i in range(len(route) - 1):
+                for j in range(i + 1, len(route)):
+                    candidate = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                    if not _precedence_ok(candidate):
+                        continue
+                    result = self.simulate(candidate, start, now, solo)
+                    if result and result[0] < best - 1e-6:
+                        route, best, improved = candidate, result[0], True
+        return route
+
+    def sequence(self, jobs, start=None, now=0.0):
+        """Best route found for jobs, or None if they cannot share a trip"""
+        solo = {job.id: self.solo_delivery(job, start, now) for job in jobs}
+        route = []
+        for job in sorted(jobs, key=lambda job: job.ready_at):
+            route = self.insert(route, job, start, now, solo)
+            if route is None:
+                return None
+        return self.two_opt(route, start, now, solo)
+
+    def make_batch(self, jobs, route, start, now):
+        finish, arrivals = self.simulate(route, start, now)
+        solo_seconds = sum(self.solo_delivery(job, None, now) - now for job in jobs)
+        return Batch(jobs, route, arrivals, finish, solo_seconds - (finish - now))
+
+    def plan(self, jobs, now):
+        """
+        Split jobs into batches; every job ends up in exactly one
+
+        Batches are planned as if a driver were at their first pickup at
+        now; use sequence() with the driver's position once one is chosen.
+        """
+        if not jobs:
+            return []
+        # Cells at least PICKUP_RADIUS_KM wide, so candidates are in the 3x3 block around the seed
+        lat_size = self.pickup_radius_km / (EARTH_RADIUS_KM * math.pi / 180)
+        lng_size = lat_size / max(0.1, math.cos(math.radians(jobs[0].pickup[0])))
+        cell = (lat_size, lng_size)
+        grid = {}
+        for job in jobs:
+            grid.setdefault(_cell(job.pickup, cell), []).append(job)
+
+        taken = set()
+        batches = []
+        for seed in sorted(jobs, key=lambda job: job.ready_at):
+            if seed.id in taken:
+                continue
+            taken.add(seed.id)
+            members = [seed]
+            route = [(PICKUP, seed), (DROPOFF, seed)]
+            finish = self.simulate(route, None, now)[0]
+            row, column = _cell(seed.pickup, cell)
+            candidates = [
+                job for dr in (-1, 0, 1) for dc in (-1, 0, 1) for job in grid.get((row + dr, column + dc), ())
+                if job.id not in taken
+                and abs(job.ready_at - seed.ready_at) <= self.ready_window
+                and distance_km(job.pickup, seed.pickup) <= self.pickup_radius_km
+            ]
+            candidates.sort(key=lambda job: distance_km(job.dropoff, seed.dropoff))
+            del candidates[self.max_candidates:]
+            while candidates and len(members) < self.max_orders:
+                solo = {job.id: self.solo_delivery(job, None, now) for job in members}
+                best = None
+                for job in candidates:
+                    solo[job.id] = self.solo_delivery(job, None, now)
+                    extended = self.insert(route, job, None, now, solo)
+                    if extended is None:
+                        continue
+                    saving = (solo[job.id] - now) - (self.simulate(extended, None, now)[0] - finish)
+                    if saving > 0 and (best is None or saving > best[0]):
+                        best = (saving, job, extended)
+                if best is None:
+                    break
+                _, job, route = best
+                members.append(job)
+                taken.add(job.id)
+                candidates.remove(job)
+                finish = self.simulate(route, None, now)[0]
+            if len(members) > 1:
+                solo = {job.id: self.solo_delivery(job, None, now) for job in members}
+                route = self.two_opt(route, None, now, solo)
+            batches.append(self.make_batch(members, route, None, now))
+        return batches
+
+
+def _cell(point, size):
+    return int(point[0] // size[0]), int(point[1] // size[1])
+
+
+def _precedence_ok(route):
+    picked = set()
+    for kind, job in route:
+        if kind == PICKUP:
+            picked.add(job.id)
+        elif job.id not in picked:
+            return False
+    return True
+
+
+def job_for(delivery, planner=None):
+    """Job for a pending Delivery (with order__restaurant loaded), or None without coordinates"""
+    order = delivery.order
+    restaurant = order.restaurant
+    if None in (restaurant.latitude, restaurant.longitude, order.delivery_latitude, order.delivery_longitude):
+        return None
+    pickup = (float(restaurant.latitude), float(restaurant.longitude))
+    dropoff = (float(order.delivery_latitude), float(order.delivery_longitude))
+    if delivery.is_pre_order and delivery.scheduled_time:
+        # Collected just in time for the requested delivery
+        planner = planner or Planner()
+        ready_at = delivery.scheduled_time.timestamp() - planner.service[PICKUP] - planner.travel(pickup, dropoff)
+    else:
+        ready_at = (order.created_at + timedelta(minutes=get_batching_setting('PREP_MINUTES'))).timestamp()
+    return Job(delivery.pk, pickup, dropoff, ready_at, payload=delivery)
+
+
+def driver_position(user):
+    if user.current_latitude is None or user.current_longitude is None:
+        return None
+    return float(user.current_latitude), float(user.current_longitude)
+
+
+class PlanCache:
+    """The latest plan of the pending deliveries, rebuilt at most every PLAN_CACHE_SECONDS"""
+
+    def __init__(self):
+        self.batches = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, build):
+        """The cached batches, or build() when they are missing or too old"""
+        # Held while building, so drivers polling together plan once
+        with self._lock:
+            if self.batches is None or time.monotonic() >= self._expires:
+                self.batches = build()
+                self._expires = time.monotonic() + get_batching_setting('PLAN_CACHE_SECONDS')
+            return self.batches
+
+    def invalidate(self):
+        self.batches = None
+
+
+plans = PlanCache()
+
+
+def batch_payload(batch, start=None, now=None):
+    """A batch as JSON-ready data: orders and the stop sequence with ETAs"""
+    now = now or timezone.now()
+    planner = Planner()
+    route = (planner.sequence(batch.jobs, start, now.timestamp()) if start else None) or batch.route
+    finish, arrivals = planner.simulate(route, start, now.timestamp())
+    return {
+        'delivery_ids': [str(job.id) for job in batch.jobs],
+        'stops': [
+            {
+                'type': kind,
+                'delivery_id': str(job.id),
+                'latitude': (job.pickup if kind == PICKUP else job.dropoff)[0],
+                'longitude': (job.pickup if kind == PICKUP else job.dropoff)[1],
+                'eta': datetime.fromtimestamp(arrival, tz=dt_timezone.utc).isoformat(),
+            }
+            for (kind, job), arrival in zip(route, arrivals)
+        ],
+        'duration_minutes': round((finish - now.timestamp()) / 60, 1),
+        'saved_minutes': round(batch.saved_seconds / 60, 1),
+    }
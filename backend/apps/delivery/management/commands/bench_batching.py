@@ -0,0 +1,180 @@
+"""
+Compare multi-order batching with one-order-per-trip dispatch on a synthetic city.
+
+    python manage.py bench_batching --orders-per-hour 400 --drivers 110 --hours 2
+
+Restaurants are clustered around a few hotspots and customers spread over
+the city. Orders arrive as a Poisson stream and their food is ready 8-20
+minutes after they are placed. Every --dispatch-seconds the same fleet is
+dispatched twice, on identical order streams:
+
+  * single: each idle driver takes the order it can reach first
+  * batched: pending orders are grouped and sequenced by batching.py and
+    each trip goes to the idle driver nearest its first pickup
+
+Only orders whose food is ready within --lookahead-minutes are dispatched.
+Nothing touches the database. Reported: orders per busy driver-hour, how
+long customers wait from order to door, and planning time per dispatch
+round.
+"""
+
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.admin_panel.management.commands.load_test import percentile
+from apps.delivery.batching import DROPOFF, PICKUP, Job, Planner
+
+CITY_CENTRE = (40.6782, -73.9442)
+KM_PER_DEGREE = 111.32
+
+
+class Command(BaseCommand):
+    help = 'Benchmark orders per driver-hour with and without multi-order batching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders-per-hour', type=float, default=400)
+        parser.add_argument('--hours', type=float, default=2)
+        parser.add_argument('--drivers', type=int, default=110)
+        parser.add_argument('--restaurants', type=int, default=150)
+        parser.add_argument('--hotspots', type=int, default=6)
+        parser.add_argument('--city-km', type=float, default=12, help='Side of the square city')
+        parser.add_argument('--dispatch-seconds', type=float, default=30)
+        parser.add_argument('--lookahead-minutes', type=float, default=8)
+        parser.add_argument('--max-orders', type=int, default=None, help='Override MAX_ORDERS')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.options = options
+        rng = random.Random(options['seed'])
+        orders = self._orders(rng)
+        fleet = self._fleet(rng)
+        self.stdout.write(
+            f"{len(orders)} orders over {options['hours']}h, {options['drivers']} drivers, "
+            f"{options['restaurants']} restaurants in a {options['city_km']:.0f} km city"
+        )
+        overrides = {'max_orders': options['max_orders']} if options['max_orders'] else {}
+        results = {
+            'single': self._simulate(orders, fleet, Planner(**overrides), batched=False),
+            'batched': self._simulate(orders, fleet, Planner(**overrides), batched=True),
+        }
+        self._print(results)
+
+    def _point(self, rng, centre, spread_km):
+        """A point around centre (normal, sigma spread_km), clamped to the city"""
+        half = self.options['city_km'] / 2
+        north = min(half, max(-half, (centre[0] - CITY_CENTRE[0]) * KM_PER_DEGREE + rng.gauss(0, spread_km)))
+        scale = KM_PER_DEGREE * math.cos(math.radians(CITY_CENTRE[0]))
+        east = min(half, max(-half, (centre[1] - CITY_CENTRE[1]) * scale + rng.gauss(0, spread_km)))
+        return CITY_CENTRE[0] + north / KM_PER_DEGREE, CITY_CENTRE[1] + east / scale
+
+    def _orders(self, rng):
+        city = self.options['city_km']
+        hotspots = [self._point(rng, CITY_CENTRE, city / 4) for _ in range(self.options['hotspots'])]
+        restaurants = [self._point(rng, rng.choice(hotspots), 0.6) for _ in range(self.options['restaurants'])]
+        # A few restaurants take most of the orders
+        weights = [1 / (rank + 1) ** 0.8 for rank in range(len(restaurants))]
+        orders = []
+        clock = 0.0
+        rate = self.options['orders_per_hour'] / 3600
+        while True:
+            clock += rng.expovariate(rate)
+            if clock > self.options['hours'] * 3600:
+                break
+            restaurant = rng.choices(restaurants, weights=weights)[0]
+            # Customers mostly order from nearby
+            dropoff = self._point(rng, restaurant, 2.0)
+            orders.append((clock, Job(len(orders), restaurant, dropoff, clock + rng.uniform(8, 20) * 60)))
+        return orders
+
+    def _fleet(self, rng):
+        return [self._point(rng, CITY_CENTRE, self.options['city_km'] / 4) for _ in range(self.options['drivers'])]
+
+    def _simulate(self, orders, fleet, planner, batched):
+        step = self.options['dispatch_seconds']
+        lookahead = self.options['lookahead_minutes'] * 60
+        drivers = [{'position': position, 'free_at': 0.0, 'busy': 0.0, 'trips': 0} for position in fleet]
+        placed = {job.id: placed_at for placed_at, job in orders}
+        delivered = {}
+        pending = []
+        upcoming = list(orders)
+        plan_ms = []
+        clock = 0.0
+        while upcoming or pending:
+            while upcoming and upcoming[0][0] <= clock:
+                pending.append(upcoming.pop(0)[1])
+            idle = [driver for driver in drivers if driver['free_at'] <= clock]
+            due = [job for job in pending if job.ready_at <= clock + lookahead]
+            if idle and due:
+                started = time.perf_counter()
+                if batched:
+                    trips = [batch.jobs for batch in sorted(
+                        planner.plan(due, clock), key=lambda batch: min(job.ready_at for job in batch.jobs)
+                    )]
+                else:
+                    trips = [[job] for job in sorted(due, key=lambda job: job.ready_at)]
+                assigned = self._assign(trips, idle, planner, clock, delivered)
+                plan_ms.append((time.perf_counter() - started) * 1000)
+                pending = [job for job in pending if job.id not in assigned]
+            clock += step
+
+        ready_to_door = sorted(delivered[job.id] - job.ready_at for _, job in orders)
+        order_to_door = sorted((delivered[job_id] - placed[job_id]) / 60 for job_id in delivered)
+        busy_hours = sum(driver['busy'] for driver in drivers) / 3600
+        trips = sum(driver['trips'] for driver in drivers)
+        return {
+            'orders': len(delivered),
+            'per_driver_hour': len(delivered) / busy_hours,
+            'orders_per_trip': len(delivered) / trips,
+            'door_p50': percentile(order_to_door, 50),
+            'door_p95': percentile(order_to_door, 95),
+            'ready_p95': percentile(ready_to_door, 95) / 60,
+            'last_delivery_h': max(delivered.values()) / 3600,
+            'plan_p50': percentile(sorted(plan_ms), 50),
+            'plan_p95': percentile(sorted(plan_ms), 95),
+        }
+
+    def _assign(self, trips, idle, planner, clock, delivered):
+        assigned = set()
+        for jobs in trips:
+            if not idle:
+                break
+            first = min(jobs, key=lambda job: job.ready_at).pickup
+            driver = min(idle, key=lambda driver: planner.travel(driver['position'], first))
+            idle.remove(driver)
+            route = planner.sequence(jobs, driver['position'], clock) if len(jobs) > 1 else None
+            route = route or self._fallback_route(jobs)
+            finish, arrivals = planner.simulate(route, driver['position'], clock)
+            for (kind, job), arrival in zip(route, arrivals):
+                if kind == DROPOFF:
+                    delivered[job.id] = arrival
+                    assigned.add(job.id)
+            driver['busy'] += finish - clock
+            driver['free_at'] = finish
+            driver['position'] = route[-1][1].dropoff
+            driver['trips'] += 1
+        return assigned
+
+    @staticmethod
+    def _fallback_route(jobs):
+        """Every pickup in ready order, then every drop-off"""
+        ordered = sorted(jobs, key=lambda job: job.ready_at)
+        return [(PICKUP, job) for job in ordered] + [(DROPOFF, job) for job in ordered]
+
+    def _print(self, results):
+        header = (f"{'dispatch':<10}{'orders':>8}{'per drv-h':>11}{'per trip':>10}{'door p50':>10}"
+                  f"{'door p95':>10}{'ready p95':>11}{'plan p50':>10}{'plan p95':>10}")
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<10}{row['orders']:>8}{row['per_driver_hour']:>11.2f}{row['orders_per_trip']:>10.2f}"
+                f"{row['door_p50']:>10.1f}{row['door_p95']:>10.1f}{row['ready_p95']:>11.1f}"
+                f"{row['plan_p50']:>10.2f}{row['plan_p95']:>10.2f}"
+            )
+        self.stdout.write('(door: minutes from order to delivery; ready: minutes from food ready to delivery; '
+                          'plan: ms per dispatch round)')
+        gain = results['batched']['per_driver_hour'] / results['single']['per_driver_hour'] - 1
+        self.stdout.write(f'Batching delivers {gain:+.0%} orders per busy driver-hour')
@@ -0,0 +1,208 @@
+"""
+Benchmark the compact trajectory store (apps/delivery/trajectory.py).
+
+Generates synthetic delivery trips (driving with GPS noise, turns and stops)
+and stores them two ways in scratch tables: one row per ping, and one
+delta/varint blob per delivery, both before and after simplification. Reports
+on-disk bytes per ping and the time to read back and decode one delivery's
+trail. The scratch tables are dropped afterwards.
+
+    python manage.py bench_trajectories
+    python manage.py bench_trajectories --deliveries 500 --interval 2
+"""
+
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection, models
+from django.core.management.base import BaseCommand
+
+from apps.admin_panel.management.commands.generate_dataset import CITIES
+from apps.delivery.trajectory import (
+    decode,
+    encode,
+    filter_pings,
+    get_tracking_setting,
+    path_length_m,
+    simplify,
+)
+
+
+class BenchLocationPing(models.Model):
+    """Row-per-ping layout, as a plain model would store it"""
+    delivery_key = models.IntegerField()
+    latitude = models.DecimalField(max_digits=10, decimal_places=7)
+    longitude = models.DecimalField(max_digits=10, decimal_places=7)
+    recorded_at = models.DateTimeField()
+
+    class Meta:
+        app_label = 'delivery'
+        db_table = 'bench_location_pings'
+        managed = False
+        indexes = [models.Index(fields=['delivery_key', 'recorded_at'], name='bench_ping_delivery_idx')]
+
+
+class BenchTrajectoryBlob(models.Model):
+    """One encoded trail per delivery"""
+    delivery_key = models.IntegerField(unique=True)
+    points = models.BinaryField()
+
+    class Meta:
+        app_label = 'delivery'
+        db_table = 'bench_trajectory_blobs'
+        managed = False
+
+
+def table_bytes(table):
+    """On-disk size of a table and its indexes, or None if the backend cannot tell"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_total_relation_size(%s)', [table])
+            return cursor.fetchone()[0]
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    'SELECT SUM(pgsize) FROM dbstat WHERE name IN '
+                    '(SELECT name FROM sqlite_master WHERE tbl_name = %s)', [table]
+                )
+            except Exception:
+                return None
+            return cursor.fetchone()[0]
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT data_length + index_length FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s', [table]
+            )
+            return cursor.fetchone()[0]
+    return None
+
+
+def synthetic_trip(rng, interval, start):
+    """(latitude, longitude, datetime) pings for one 15-40 minute trip"""
+    latitude, longitude = rng.choice(list(CITIES.values()))
+    heading = rng.uniform(0, 2 * math.pi)
+    moment = start
+    pings = []
+    stopped_for = 0
+    for _ in range(int(rng.uniform(15, 40) * 60 / interval)):
+        if stopped_for:
+            stopped_for -= interval
+            speed = 0
+        else:
+            speed = rng.uniform(4, 12)
+            if rng.random() < 0.03:
+                # Traffic light, pickup or drop-off
+                stopped_for = rng.choice([30, 60, 300])
+            if rng.random() < 0.05:
+                heading += rng.choice([-1, 1]) * math.pi / 2
+        step = speed * interval
+        latitude += step * math.cos(heading) / 111_195
+        longitude += step * math.sin(heading) / (111_195 * math.cos(math.radians(latitude)))
+        # ~3 m GPS noise
+        pings.append((
+            latitude + rng.gauss(0, 3 / 111_195),
+            longitude + rng.gauss(0, 3 / 111_195),
+            moment,
+        ))
+        moment += timedelta(seconds=interval)
+    return pings
+
+
+class Command(BaseCommand):
+    help = 'Compare bytes per ping and read speed of compact trajectories against a row-per-ping table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--deliveries', type=int, default=200)
+        parser.add_argument('--interval', type=int, default=4, help='Seconds between pings')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        start = datetime(2024, 6, 1, 12, tzinfo=dt_timezone.utc)
+        trips = [synthetic_trip(rng, options['interval'], start) for _ in range(options['deliveries'])]
+        pings = sum(len(trip) for trip in trips)
+
+        began = time.perf_counter()
+        raw_blobs, simplified_blobs = [], []
+        for trip in trips:
+            kept, _ = filter_pings(trip, None, get_tracking_setting('MIN_MOVE_M'),
+                                   get_tracking_setting('MAX_GAP_SECONDS'), get_tracking_setting('MAX_SPEED_MPS'))
+            raw_blobs.append(encode(kept))
+            lats, lngs, times = decode(raw_blobs[-1])
+            indices = simplify(lats, lngs, times, get_tracking_setting('SIMPLIFY_TOLERANCE_M'))
+            simplified_blobs.append(encode((lats[i], lngs[i], times[i]) for i in indices))
+        encode_seconds = time.perf_counter() - began
+
+        self.stdout.write(
+            f'{len(trips):,} deliveries, {pings:,} pings every {options["interval"]}s '
+            f'(encoded and simplified in {encode_seconds:.2f}s)'
+        )
+        with connection.schema_editor() as editor:
+            editor.create_model(BenchLocationPing)
+            editor.create_model(BenchTrajectoryBlob)
+        try:
+            self._compare(trips, pings, raw_blobs, simplified_blobs)
+        finally:
+            with connection.schema_editor() as editor:
+                editor.delete_model(BenchLocationPing)
+                editor.delete_model(BenchTrajectoryBlob)
+
+    def _compare(self, trips, pings, raw_blobs, simplified_blobs):
+        BenchLocationPing.objects.bulk_create(
+            [
+                BenchLocationPing(delivery_key=key, latitude=round(latitude, 7),
+                                  longitude=round(longitude, 7), recorded_at=moment)
+                for key, trip in enumerate(trips)
+                for latitude, longitude, moment in trip
+            ],
+            batch_size=5000,
+        )
+        keys = range(len(trips))
+
+        def read_rows(key):
+            return list(
+                BenchLocationPing.objects.filter(delivery_key=key)
+                .order_by('recorded_at').values_list('latitude', 'longitude', 'recorded_at')
+            )
+
+        def read_blob(key):
+            return decode(BenchTrajectoryBlob.objects.values_list('points', flat=True).get(delivery_key=key))
+
+        header = f"{'layout':<22}{'points':>10}{'payload B/ping':>16}{'on-disk B/ping':>16}{'read ms':>10}"
+        self.stdout.write(header)
+        self._report('row per ping', pings, pings, None, table_bytes('bench_location_pings'), keys, read_rows)
+
+        for label, blobs in (('compact raw', raw_blobs), ('compact simplified', simplified_blobs)):
+            BenchTrajectoryBlob.objects.all().delete()
+            BenchTrajectoryBlob.objects.bulk_create(
+                [BenchTrajectoryBlob(delivery_key=key, points=blob) for key, blob in enumerate(blobs)],
+                batch_size=500,
+            )
+            if connection.vendor == 'sqlite':
+                # Reclaim the pages of the previous round so dbstat reports this one alone
+                with connection.cursor() as cursor:
+                    cursor.execute('VACUUM')
+            points = sum(len(decode(blob)[0]) for blob in blobs)
+            payload = sum(len(blob) for blob in blobs)
+            self._report(label, points, pings, payload, table_bytes('bench_trajectory_blobs'), keys, read_blob)
+
+        began = time.perf_counter()
+        for blob in raw_blobs:
+            lats, lngs, _ = decode(blob)
+            path_length_m(lats, lngs)
+        self.stdout.write(
+            f'\nDecode + distance from compact raw: '
+            f'{(time.perf_counter() - began) / len(raw_blobs) * 1000:.3f} ms per delivery'
+        )
+
+    def _report(self, label, points, pings, payload, disk_bytes, keys, read):
+        began = time.perf_counter()
+        for key in keys:
+            read(key)
+        read_ms = (time.perf_counter() - began) / len(keys) * 1000
+        # Per ping received, so dropped and simplified points show up as savings
+        payload_text = f'{payload / pings:.2f}' if payload is not None else '-'
+        disk_text = f'{disk_bytes / pings:.2f}' if disk_bytes else 'n/a'
+        self.stdout.write(f'{label:<22}{points:>10,}{payload_text:>16}{disk_text:>16}{read_ms:>10.3f}')
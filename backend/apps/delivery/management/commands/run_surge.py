@@ -0,0 +1,118 @@
+"""
+Recompute and publish the surge pricing grid (apps/delivery/surge.py).
+
+    python manage.py run_surge
+    python manage.py run_surge --once
+    python manage.py run_surge --bench 100000 --orders 5000 --drivers 3000
+
+Run one instance next to the web processes; they read the grid from
+SURGE_PRICING['SNAPSHOT_PATH'], so it has to be on a filesystem they share.
+--bench times recomputation, publishing and lookups on a synthetic grid of
+about that many cells and touches neither the database nor the live
+snapshot.
+"""
+
+import os
+import random
+import signal
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.admin_panel.management.commands.load_test import percentile
+from apps.delivery import surge
+
+
+class Command(BaseCommand):
+    help = 'Recompute the supply/demand surge grid every few seconds and publish it to the web processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Publish one grid and exit')
+        parser.add_argument('--bench', type=int, default=0, metavar='CELLS',
+                            help='Time recomputation on a synthetic grid of about CELLS cells')
+        parser.add_argument('--orders', type=int, default=5000, help='Open orders in --bench')
+        parser.add_argument('--drivers', type=int, default=3000, help='Available drivers in --bench')
+        parser.add_argument('--rounds', type=int, default=50, help='Recomputations in --bench')
+
+    def handle(self, *args, **options):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            raise CommandError('run_surge needs numpy (pip install numpy)')
+        if options['bench']:
+            self._bench(options)
+            return
+
+        engine = surge.SurgeEngine()
+        interval = surge.get_surge_setting('RECOMPUTE_SECONDS')
+        self.stopping = False
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: setattr(self, 'stopping', True))
+        self.stdout.write(f'Publishing a {engine.spec.rows}x{engine.spec.columns} grid every {interval}s')
+        while not self.stopping:
+            started = time.monotonic()
+            demand, supply = surge.load_points()
+            # Do not hold a transaction or connection state between runs
+            connection.close_if_unusable_or_obsolete()
+            surge.publish(engine.spec, engine.recompute(demand, supply))
+            if options['once']:
+                self.stdout.write(
+                    f'Published from {len(demand)} open orders and {len(supply)} drivers '
+                    f'in {(time.monotonic() - started) * 1000:.1f} ms'
+                )
+                return
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    def _bench(self, options):
+        import numpy as np
+
+        south, west, north, east = surge.get_surge_setting('BOUNDS')
+        cell_metres = surge.get_surge_setting('CELL_METRES')
+        spec = surge.GridSpec.for_bounds((south, west, north, east), cell_metres)
+        # Resize the cells so the metro area holds about the requested number
+        cell_metres *= (spec.cells / options['bench']) ** 0.5
+        spec = surge.GridSpec.for_bounds((south, west, north, east), cell_metres)
+        engine = surge.SurgeEngine(spec)
+        self.stdout.write(f'{spec.rows}x{spec.columns} = {spec.cells} cells of {cell_metres:.0f} m')
+
+        rng = np.random.default_rng(1)
+        hotspots = rng.uniform((south, west), (north, east), size=(8, 2))
+
+        def points(count, spread):
+            centres = hotspots[rng.integers(0, len(hotspots), count)]
+            return centres + rng.normal(0, spread, size=(count, 2))
+
+        recompute_ms = []
+        publish_ms = []
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'surge.grid')
+            for _ in range(options['rounds']):
+                demand, supply = points(options['orders'], 0.02), points(options['drivers'], 0.05)
+                started = time.perf_counter()
+                grid = engine.recompute(demand, supply)
+                recompute_ms.append((time.perf_counter() - started) * 1000)
+                started = time.perf_counter()
+                surge.publish(spec, grid, path=path)
+                publish_ms.append((time.perf_counter() - started) * 1000)
+
+            reader = surge.SurgeMap(path)
+            lookups = [(random.uniform(south, north), random.uniform(west, east)) for _ in range(100000)]
+            reader.multiplier(*lookups[0])
+            started = time.perf_counter()
+            for latitude, longitude in lookups:
+                reader.multiplier(latitude, longitude)
+            lookup_us = (time.perf_counter() - started) / len(lookups) * 1e6
+            surged = float((grid > 1).mean())
+            del reader
+
+        recompute_ms.sort()
+        publish_ms.sort()
+        self.stdout.write(
+            f"recompute p50 {percentile(recompute_ms, 50):.1f} ms, p95 {percentile(recompute_ms, 95):.1f} ms, "
+            f"max {recompute_ms[-1]:.1f} ms; publish p50 {percentile(publish_ms, 50):.1f} ms"
+        )
+        self.stdout.write(f'lookup {lookup_us:.2f} us; {surged:.1%} of cells above 1x in the last grid')
+        verdict = 'within' if percentile(recompute_ms, 95) < 100 else 'OVER'
+        self.stdout.write(f'Recomputation p95 is {verdict} the 100 ms budget')
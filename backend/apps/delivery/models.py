@@ -1 +1,111 @@
-from django.db import models
\ No newline at end of file
+"""
+Delivery Models
+
+This module defines deliveries matching the frontend DeliveryRequest
+interface in deliveryManagementService.ts.
+"""
+
+from django.conf import settings
+from django.db import models
+import uuid
+
+
+class Delivery(models.Model):
+    """
+    Delivery of one order by a driver
+    Matches the frontend DeliveryRequest interface
+    """
+    
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('assigned', 'Assigned'),
+        ('accepted', 'Accepted'),
+        ('at_restaurant', 'At Restaurant'),
+        ('picked_up', 'Picked Up'),
+        ('in_transit', 'In Transit'),
+        ('delivered', 'Delivered'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    PRIORITIES = [
+        ('low', 'Low'),
+        ('normal', 'Normal'),
+        ('high', 'High'),
+        ('urgent', 'Urgent'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    order = models.OneToOneField('orders.Order', on_delete=models.CASCADE, related_name='delivery')
+    driver = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='deliveries'
+    )
+    status = models.CharField(max_length=20, choices=STATUSES, default='pending')
+    priority = models.CharField(max_length=10, choices=PRIORITIES, default='normal')
+    
+    # Trip and payout
+    distance_km = models.FloatField(default=0)
+    estimated_minutes = models.PositiveIntegerField(default=0)
+    fee = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    tip = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    total_payout = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    
+    is_pre_order = models.BooleanField(default=False)
+    scheduled_time = models.DateTimeField(null=True, blank=True)
+    
+    # Deliveries accepted together as one trip (see batching.py) share a
+    # batch_id; the stops are positions in that trip's route
+    batch_id = models.UUIDField(null=True, blank=True, db_index=True)
+    pickup_stop = models.PositiveSmallIntegerField(null=True, blank=True)
+    dropoff_stop = models.PositiveSmallIntegerField(null=True, blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    assigned_at = models.DateTimeField(null=True, blank=True)
+    accepted_at = models.DateTimeField(null=True, blank=True)
+    arrived_at_restaurant_at = models.DateTimeField(null=True, blank=True)
+    picked_up_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    cancelled_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'deliveries'
+        verbose_name_plural = 'deliveries'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['driver', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"Delivery for order {self.order_id} ({self.status})"
+
+
+class DeliveryTrajectory(models.Model):
+    """
+    A delivery's GPS trail, stored compactly (see apps/delivery/trajectory.py)
+    """
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    delivery = models.OneToOneField(Delivery, on_delete=models.CASCADE, related_name='trajectory')
+    # Delta/varint encoded (lat, lng, time) points
+    points = models.BinaryField(default=bytes)
+    point_count = models.PositiveIntegerField(default=0)
+    # Points kept before simplification
+    raw_point_count = models.PositiveIntegerField(default=0)
+    # Last point in fixed point, so pings append without decoding the blob
+    last_lat_e5 = models.IntegerField(null=True, blank=True)
+    last_lng_e5 = models.IntegerField(null=True, blank=True)
+    last_time = models.BigIntegerField(null=True, blank=True)
+    # Travelled distance over the raw pings
+    distance_m = models.FloatField(default=0)
+    simplified = models.BooleanField(default=False)
+    started_at = models.DateTimeField(null=True, blank=True)
+    ended_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'delivery_trajectories'
+    
+    def __str__(self):
+        return f"Trajectory for delivery {self.delivery_id} ({self.point_count} points)"
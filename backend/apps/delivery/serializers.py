@@ -0,0 +1,89 @@
+"""
+Delivery Serializers
+
+DRF serializers matching the frontend DeliveryRequest interface.
+"""
+
+from rest_framework import serializers
+
+from .models import Delivery
+
+
+class DeliverySerializer(serializers.ModelSerializer):
+    """
+    Delivery serializer that matches the frontend DeliveryRequest interface
+    """
+    order_id = serializers.UUIDField(read_only=True)
+    driver_id = serializers.UUIDField(read_only=True)
+    restaurant_info = serializers.SerializerMethodField()
+    customer_info = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Delivery
+        fields = [
+            'id', 'order_id', 'driver_id', 'status', 'priority', 'restaurant_info', 'customer_info',
+            'distance_km', 'estimated_minutes', 'fee', 'tip', 'total_payout',
+            'is_pre_order', 'scheduled_time', 'batch_id', 'pickup_stop', 'dropoff_stop',
+            'created_at', 'assigned_at', 'accepted_at', 'arrived_at_restaurant_at', 'picked_up_at',
+            'delivered_at', 'cancelled_at'
+        ]
+        read_only_fields = fields
+    
+    def get_restaurant_info(self, obj):
+        restaurant = obj.order.restaurant
+        return {
+            'name': restaurant.name,
+            'address': restaurant.address,
+            'phone': restaurant.phone,
+        }
+    
+    def get_customer_info(self, obj):
+        order = obj.order
+        return {
+            'name': order.customer.full_name,
+            'phone': order.customer.phone_number,
+            'address': order.delivery_address,
+            'delivery_instructions': order.special_instructions,
+        }
+
+
+class DeliveryStatusSerializer(serializers.Serializer):
+    """
+    Delivery status update serializer
+    """
+    status = serializers.ChoiceField(choices=Delivery.STATUSES)
+
+
+class LocationPingSerializer(serializers.Serializer):
+    """
+    One GPS ping from the driver app
+    """
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    timestamp = serializers.DateTimeField(required=False)
+
+
+class LocationPingBatchSerializer(serializers.Serializer):
+    """
+    Pings buffered by the driver app, oldest first
+    """
+    pings = LocationPingSerializer(many=True, allow_empty=False)
+    
+    def validate_pings(self, value):
+        if len(value) > self.context['max_pings']:
+            raise serializers.ValidationError(f"At most {self.context['max_pings']} pings per request.")
+        return value
+
+
+class BatchAcceptSerializer(serializers.Serializer):
+    """
+    Deliveries a driver takes as one trip
+    """
+    delivery_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+    
+    def validate_delivery_ids(self, value):
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError('Each delivery may only be listed once.')
+        if len(value) > self.context['max_orders']:
+            raise serializers.ValidationError(f"At most {self.context['max_orders']} deliveries per trip.")
+        return value
@@ -0,0 +1,268 @@
+"""
+Surge Pricing
+
+Delivery fees follow supply and demand. The metro area (SURGE_PRICING['BOUNDS'])
+is cut into square cells of about CELL_METRES. In each cell, open orders
+(at their restaurant) are the demand, and available drivers at their last
+known position are the supply.
+
+`python manage.py run_surge` recomputes the whole grid every
+RECOMPUTE_SECONDS with numpy:
+
+  1. count orders and drivers per cell (bincount)
+  2. sum both over the (2 x SMOOTHING_CELLS + 1)^2 cells around each cell,
+     using summed-area tables, so a driver one street away counts as supply
+  3. multiplier = 1 + SENSITIVITY x ((demand + PRIOR) / (supply + PRIOR) - 1),
+     clipped to [MIN_MULTIPLIER, MAX_MULTIPLIER]
+  4. blend with the previous grid (TIME_SMOOTHING) so fees do not jump
+     between runs, and round to STEP for publishing
+
+The grid is published to a snapshot file (SNAPSHOT_PATH): a small header
+followed by one float32 per cell. The file is written under a temporary
+name and renamed into place. Web processes map the file read-only and
+notice a new one at most every RELOAD_SECONDS. A fee lookup is then an index
+computation and one array read. It costs no query and does not need numpy.
+Without a snapshot, or with one older than MAX_AGE_SECONDS (run_surge
+stopped), the multiplier is 1.
+"""
+
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+
+from apps.authentication.models import User
+from apps.orders.models import Order
+
+logger = logging.getLogger(__name__)
+
+# magic, rows, columns, south, west, cell height and width (degrees), computed at (Unix time)
+HEADER = struct.Struct('<8sIIddddd')
+MAGIC = b'SURGE\x00\x00\x01'
+METRES_PER_DEGREE = 111320.0
+
+
+def get_surge_setting(name):
+    defaults = {
+        'ENABLED': True,
+        # (south, west, north, east)
+        'BOUNDS': (40.45, -74.30, 40.95, -73.65),
+        'CELL_METRES': 200,
+        'RECOMPUTE_SECONDS': 5,
+        'SMOOTHING_CELLS': 3,
+        'TIME_SMOOTHING': 0.5,
+        'SENSITIVITY': 0.5,
+        'PRIOR': 1.0,
+        'MIN_MULTIPLIER': 1.0,
+        'MAX_MULTIPLIER': 2.5,
+        'STEP': 0.05,
+        'SNAPSHOT_PATH': settings.BASE_DIR / 'surge.grid',
+        'RELOAD_SECONDS': 1.0,
+        'MAX_AGE_SECONDS': 60,
+    }
+    return getattr(settings, 'SURGE_PRICING', {}).get(name, defaults[name])
+
+
+class GridSpec:
+    """Cell geometry: row 0 is the southern edge, column 0 the western one"""
+
+    __slots__ = ('rows', 'columns', 'south', 'west', 'cell_lat', 'cell_lng')
+
+    def __init__(self, rows, columns, south, west, cell_lat, cell_lng):
+        self.rows = rows
+        self.columns = columns
+        self.south = south
+        self.west = west
+        self.cell_lat = cell_lat
+        self.cell_lng = cell_lng
+
+    @classmethod
+    def for_bounds(cls, bounds, cell_metres):
+        south, west, north, east = bounds
+        cell_lat = cell_metres / METRES_PER_DEGREE
+        cell_lng = cell_lat / math.cos(math.radians((south + north) / 2))
+        rows = max(1, math.ceil((north - south) / cell_lat))
+        columns = max(1, math.ceil((east - west) / cell_lng))
+        return cls(rows, columns, south, west, cell_lat, cell_lng)
+
+    @property
+    def cells(self):
+        return self.rows * self.columns
+
+    def index(self, latitude, longitude):
+        """Flat cell index of a point, or None outside the grid"""
+        row = int((latitude - self.south) // self.cell_lat)
+        column = int((longitude - self.west) // self.cell_lng)
+        if 0 <= row < self.rows and 0 <= column < self.columns:
+            return row * self.columns + column
+        return None
+
+
+# Recomputation (run_surge; needs numpy, imported here so web processes never load it)
+
+def _box_sum(grid, radius):
+    """Sum of each cell's (2r+1)^2 neighbourhood, zero outside the grid"""
+    import numpy as np
+
+    size = 2 * radius + 1
+    table = np.pad(grid, ((radius + 1, radius), (radius + 1, radius))).cumsum(axis=0).cumsum(axis=1)
+    return table[size:, size:] - table[:-size, size:] - table[size:, :-size] + table[:-size, :-size]
+
+
+def _counts(spec, points):
+    """Points per cell; points is an (n, 2) array of latitude, longitude"""
+    import numpy as np
+
+    if not len(points):
+        return np.zeros((spec.rows, spec.columns))
+    rows = np.floor((points[:, 0] - spec.south) / spec.cell_lat).astype(np.int64)
+    columns = np.floor((points[:, 1] - spec.west) / spec.cell_lng).astype(np.int64)
+    inside = (rows >= 0) & (rows < spec.rows) & (columns >= 0) & (columns < spec.columns)
+    flat = rows[inside] * spec.columns + columns[inside]
+    return np.bincount(flat, minlength=spec.cells).reshape(spec.rows, spec.columns).astype(np.float64)
+
+
+class SurgeEngine:
+    """Keeps the unrounded multiplier grid between recomputations"""
+
+    def __init__(self, spec=None):
+        try:
+            import numpy as np
+        except ImportError as exc:
+            raise RuntimeError('Surge recomputation needs numpy') from exc
+        self.spec = spec or GridSpec.for_bounds(get_surge_setting('BOUNDS'), get_surge_setting('CELL_METRES'))
+        self.radius = get_surge_setting('SMOOTHING_CELLS')
+        self.alpha = get_surge_setting('TIME_SMOOTHING')
+        self.sensitivity = get_surge_setting('SENSITIVITY')
+        self.prior = get_surge_setting('PRIOR')
+        self.low = get_surge_setting('MIN_MULTIPLIER')
+        self.high = get_surge_setting('MAX_MULTIPLIER')
+        self.step = get_surge_setting('STEP')
+        self.state = np.full((self.spec.rows, self.spec.columns), self.low, dtype=np.float64)
+
+    def recompute(self, demand, supply):
+        """New published grid (float32, rounded to STEP) from (n, 2) point arrays"""
+        import numpy as np
+
+        demand = _box_sum(_counts(self.spec, demand), self.radius)
+        supply = _box_sum(_counts(self.spec, supply), self.radius)
+        target = 1 + self.sensitivity * ((demand + self.prior) / (supply + self.prior) - 1)
+        np.clip(target, self.low, self.high, out=target)
+        self.state += self.alpha * (target - self.state)
+        return (np.round(self.state / self.step) * self.step).astype('<f4')
+
+
+def load_points():
+    """(demand, supply) arrays of (latitude, longitude) from open orders and available drivers"""
+    import numpy as np
+
+    demand = Order.objects.filter(
+        status__in=['pending', 'confirmed', 'preparing'],
+        restaurant__latitude__isnull=False, restaurant__longitude__isnull=False,
+    ).values_list('restaurant__latitude', 'restaurant__longitude')
+    supply = User.objects.filter(
+        user_type='delivery', is_active=True, profile__is_available=True,
+        current_latitude__isnull=False, current_longitude__isnull=False,
+    ).values_list('current_latitude', 'current_longitude')
+    return (
+        np.array(list(demand), dtype=np.float64).reshape(-1, 2),
+        np.array(list(supply), dtype=np.float64).reshape(-1, 2),
+    )
+
+
+def publish(spec, grid, computed_at=None, path=None):
+    """Atomically replace the snapshot file"""
+    path = os.fspath(path or get_surge_setting('SNAPSHOT_PATH'))
+    header = HEADER.pack(
+        MAGIC, spec.rows, spec.columns, spec.south, spec.west, spec.cell_lat, spec.cell_lng,
+        computed_at or time.time(),
+    )
+    with open(path + '.tmp', 'wb') as handle:
+        handle.write(header)
+        handle.write(grid.tobytes())
+    os.replace(path + '.tmp', path)
+
+
+# Lookups (web processes)
+
+class SurgeMap:
+    """The latest published grid, mapped read-only"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.reload_seconds = get_surge_setting('RELOAD_SECONDS')
+        self.max_age = get_surge_setting('MAX_AGE_SECONDS')
+        # (spec, values, computed_at), replaced as a whole
+        self.snapshot = None
+        self._identity = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _reload(self):
+        path = os.fspath(self.path or get_surge_setting('SNAPSHOT_PATH'))
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.snapshot = None
+            self._identity = None
+            return
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        if identity == self._identity:
+            return
+        with open(path, 'rb') as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, rows, columns, south, west, cell_lat, cell_lng, computed_at = HEADER.unpack_from(mapped)
+        if magic != MAGIC or len(mapped) != HEADER.size + rows * columns * 4:
+            logger.warning('Ignoring malformed surge snapshot %s', path)
+            return
+        # The previous mapping stays valid for readers still holding it
+        self.snapshot = (
+            GridSpec(rows, columns, south, west, cell_lat, cell_lng),
+            memoryview(mapped)[HEADER.size:].cast('f'),
+            computed_at,
+        )
+        self._identity = identity
+
+    def multiplier(self, latitude, longitude):
+        if latitude is None or longitude is None:
+            return 1.0
+        now = time.monotonic()
+        if now - self._checked >= self.reload_seconds:
+            with self._lock:
+                if now - self._checked >= self.reload_seconds:
+                    self._checked = now
+                    self._reload()
+        snapshot = self.snapshot
+        if snapshot is None:
+            return 1.0
+        spec, values, computed_at = snapshot
+        if time.time() - computed_at > self.max_age:
+            return 1.0
+        index = spec.index(float(latitude), float(longitude))
+        return 1.0 if index is None else values[index]
+
+
+surge_map = SurgeMap()
+
+
+def surge_multiplier(latitude, longitude):
+    if not get_surge_setting('ENABLED'):
+        return 1.0
+    return surge_map.multiplier(latitude, longitude)
+
+
+def delivery_fee(restaurant):
+    """(fee, multiplier) for delivering from restaurant right now"""
+    multiplier = surge_multiplier(restaurant.latitude, restaurant.longitude)
+    if multiplier == 1.0:
+        return restaurant.delivery_fee, 1.0
+    fee = (restaurant.delivery_fee * Decimal(str(round(multiplier, 2)))).quantize(
+        Decimal('0.01'), rounding=ROUND_HALF_UP
+    )
+    return fee, round(multiplier, 2)
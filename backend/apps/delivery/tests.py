@@ -0,0 +1,197 @@
+"""
+Delivery Tests
+
+Trajectory codec round trips and ping filtering, and batch sequencing.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import SimpleTestCase, override_settings
+
+from .batching import DROPOFF, PICKUP, Job, PlanCache, Planner, _precedence_ok
+from .trajectory import FORMAT_VERSION, decode, encode, filter_pings, replay, simplify
+
+
+def columns(points):
+    return tuple(list(column) for column in zip(*points)) if points else ([], [], [])
+
+
+class TrajectoryCodecTests(SimpleTestCase):
+
+    points = [
+        (560123, -2345678, 1700000000),
+        (560130, -2345650, 1700000004),
+        # Crossing the equator and the meridian keeps the signs straight
+        (-330, 12, 1700000010),
+        (-8999999, 17999999, 1700000011),
+        (8999999, -17999999, 1700086400),
+        (8999999, -17999999, 1700086400),
+    ]
+
+    def test_round_trip(self):
+        blob = encode(self.points)
+        self.assertEqual(blob[0], FORMAT_VERSION)
+        self.assertEqual(tuple(map(list, decode(blob))), columns(self.points))
+
+    def test_appended_fragment_matches_whole_encoding(self):
+        head = encode(self.points[:3])
+        tail = encode(self.points[3:], previous=self.points[2])
+        self.assertEqual(head + tail, encode(self.points))
+
+    def test_empty(self):
+        self.assertEqual(tuple(map(list, decode(b''))), ([], [], []))
+        self.assertEqual(encode([]), bytes([FORMAT_VERSION]))
+
+    def test_small_moves_take_one_byte_per_value(self):
+        start = (4075000, -7399000, 1700000000)
+        step = (start[0] + 20, start[1] - 30, start[2] + 5)
+        self.assertEqual(len(encode([step], previous=start)), 3)
+
+    def test_zigzag_boundaries(self):
+        # 63 and -64 zigzag to 126 and 127, the largest one-byte varints
+        for delta, size in ((63, 1), (-64, 1), (64, 2), (-65, 2), (2 ** 31 - 1, 5), (-2 ** 31, 5)):
+            with self.subTest(delta=delta):
+                fragment = encode([(delta, 0, 0)], previous=(0, 0, 0))
+                self.assertEqual(len(fragment), size + 2)
+                self.assertEqual(list(decode(bytes([FORMAT_VERSION]) + fragment)[0]), [delta])
+
+    def test_unknown_version(self):
+        with self.assertRaises(ValueError):
+            decode(bytes([FORMAT_VERSION + 1, 0, 0, 0]))
+
+    def test_replay_scales_back_to_degrees(self):
+        latitude, longitude, moment = next(replay(encode(self.points[:1])))
+        self.assertAlmostEqual(latitude, 5.60123)
+        self.assertAlmostEqual(longitude, -23.45678)
+        self.assertEqual(moment, 1700000000)
+
+
+class TrajectoryFilterTests(SimpleTestCase):
+
+    start = datetime(2024, 5, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+    def ping(self, seconds, north_m=0.0):
+        # 1e-5 degrees of latitude is about 1.11 m
+        return 5.6 + north_m / 111195, -0.2, self.start + timedelta(seconds=seconds)
+
+    def test_drops_small_moves_until_the_gap(self):
+        pings = [self.ping(0), self.ping(5, 1), self.ping(30, 2), self.ping(61, 2)]
+        kept, _ = filter_pings(pings, None, min_move_m=3, max_gap=60, max_speed=50)
+        self.assertEqual([point[2] - kept[0][2] for point in kept], [0, 61])
+
+    def test_sorts_pings_and_drops_jumps(self):
+        pings = [self.ping(0), self.ping(10, 100), self.ping(20, 5000), self.ping(5, 50)]
+        kept, distance = filter_pings(pings, None, min_move_m=3, max_gap=60, max_speed=50)
+        self.assertEqual([point[2] - kept[0][2] for point in kept], [0, 5, 10])
+        self.assertAlmostEqual(distance, 100, delta=1)
+
+    def test_simplify_drops_points_on_a_constant_speed_line(self):
+        lats = [560000 + 10 * i for i in range(20)]
+        lngs = [-20000] * 20
+        times = [1700000000 + i for i in range(20)]
+        self.assertEqual(simplify(lats, lngs, times, 5), [0, 19])
+
+    def test_simplify_keeps_a_stop(self):
+        # Same path, but the driver waits at the midpoint for 60 s
+        lats = [560000 + 10 * min(i, 10) for i in range(11)] + [560000 + 10 * i for i in range(11, 20)]
+        lngs = [-20000] * 20
+        times = [1700000000 + i for i in range(11)] + [1700000060 + i for i in range(11, 20)]
+        kept = simplify(lats, lngs, times, 5)
+        self.assertIn(10, kept)
+        self.assertEqual((kept[0], kept[-1]), (0, 19))
+
+
+# Degrees of latitude per kilometre
+KM = 1 / 111.195
+ORIGIN = (5.6, -0.2)
+
+
+def north(km):
+    return ORIGIN[0] + km * KM, ORIGIN[1]
+
+
+class BatchingTests(SimpleTestCase):
+
+    def planner(self, **overrides):
+        # No time at stops, so route times are pure travel
+        return Planner(pickup_seconds=0, dropoff_seconds=0, **overrides)
+
+    def finish(self, planner, route, start=None):
+        return planner.simulate(route, start, 0.0)[0]
+
+    def test_precedence(self):
+        a, b = Job('a', ORIGIN, north(1), 0), Job('b', ORIGIN, north(2), 0)
+        self.assertTrue(_precedence_ok([(PICKUP, a), (PICKUP, b), (DROPOFF, b), (DROPOFF, a)]))
+        self.assertFalse(_precedence_ok([(PICKUP, a), (DROPOFF, b), (PICKUP, b), (DROPOFF, a)]))
+
+    def test_two_opt_untangles_drop_offs(self):
+        planner = self.planner()
+        a, b, c = (Job(name, ORIGIN, north(km), 0) for name, km in (('a', 1), ('b', 2), ('c', 3)))
+        tangled = [(PICKUP, a), (PICKUP, b), (PICKUP, c), (DROPOFF, c), (DROPOFF, a), (DROPOFF, b)]
+        route = planner.two_opt(tangled, None, 0.0, None)
+        self.assertEqual([job.id for kind, job in route if kind == DROPOFF], ['a', 'b', 'c'])
+        self.assertLess(self.finish(planner, route), self.finish(planner, tangled))
+
+    def test_two_opt_never_drops_off_before_pickup(self):
+        planner = self.planner()
+        # The driver starts at the drop-off, so visiting it first would be shorter
+        job = Job('a', north(3), ORIGIN, 0)
+        route = [(PICKUP, job), (DROPOFF, job)]
+        self.assertEqual(planner.two_opt(route, ORIGIN, 0.0, None), route)
+
+    def test_sequence_keeps_every_pickup_first(self):
+        planner = self.planner(max_added_delay_minutes=60)
+        rng = random.Random(7)
+        for _ in range(20):
+            jobs = [
+                Job(index, north(rng.uniform(0, 1)), north(rng.uniform(-4, 4)), rng.uniform(0, 300))
+                for index in range(3)
+            ]
+            route = planner.sequence(jobs)
+            self.assertIsNotNone(route)
+            self.assertTrue(_precedence_ok(route))
+            self.assertEqual(sorted(job.id for kind, job in route if kind == PICKUP), [0, 1, 2])
+
+    def test_sequence_refuses_a_late_delivery(self):
+        planner = self.planner(max_added_delay_minutes=1)
+        # Opposite directions: one customer would wait for the other trip
+        jobs = [Job('a', ORIGIN, north(5), 0), Job('b', ORIGIN, north(-5), 0)]
+        self.assertIsNone(planner.sequence(jobs))
+
+    def test_plan_batches_neighbours_and_covers_every_job(self):
+        planner = self.planner()
+        jobs = [
+            Job('a', ORIGIN, north(3), 0),
+            Job('b', north(0.2), north(3.2), 60),
+            Job('c', north(20), north(25), 0),
+        ]
+        batches = planner.plan(jobs, 0.0)
+        self.assertEqual(sorted(job.id for batch in batches for job in batch.jobs), ['a', 'b', 'c'])
+        self.assertEqual(sorted(sorted(job.id for job in batch.jobs) for batch in batches), [['a', 'b'], ['c']])
+        shared = next(batch for batch in batches if len(batch.jobs) == 2)
+        self.assertTrue(_precedence_ok(shared.route))
+        self.assertGreater(shared.saved_seconds, 0)
+
+    def test_plan_respects_capacity(self):
+        planner = self.planner(capacity=1)
+        jobs = [Job('a', ORIGIN, north(3), 0), Job('b', ORIGIN, north(3), 0)]
+        for batch in planner.plan(jobs, 0.0):
+            load = 0
+            for kind, job in batch.route:
+                load += job.size if kind == PICKUP else -job.size
+                self.assertLessEqual(load, 1)
+
+    @override_settings(DELIVERY_BATCHING={'PLAN_CACHE_SECONDS': 60})
+    def test_plan_cache(self):
+        cache = PlanCache()
+        builds = []
+
+        def build():
+            builds.append(1)
+            return [len(builds)]
+
+        self.assertEqual(cache.get(build), [1])
+        self.assertEqual(cache.get(build), [1])
+        cache.invalidate()
+        self.assertEqual(cache.get(build), [2])
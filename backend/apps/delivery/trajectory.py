@@ -0,0 +1,267 @@
+"""
+Delivery Trajectories
+
+Driver GPS pings are kept per delivery in one DeliveryTrajectory row instead
+of one row per ping. Points are stored in fixed point: latitude and longitude
+in 1e-5 degrees (about 1.1 m) and time in whole seconds. They are
+delta-encoded against the previous point and written as zigzag varints, so
+a typical ping costs 4-6 bytes. New pings are encoded against the last point
+kept on the row and appended to the blob without decoding it.
+
+Pings that moved less than MIN_MOVE_M since the last kept point are dropped,
+unless MAX_GAP_SECONDS have passed, so a driver waiting at a restaurant
+costs one point a minute. Pings implying more than MAX_SPEED_MPS from the
+last kept point are GPS jumps and are dropped too. When the delivery is delivered the trail is
+simplified with time-aware Douglas-Peucker (synchronized Euclidean
+distance), which keeps both the shape and the timing of the trip within
+SIMPLIFY_TOLERANCE_M. distance_m is accumulated over the raw pings and is
+not changed by simplification.
+
+Blob layout: one FORMAT_VERSION byte, then (lat, lng, time) varint triples.
+The first triple is absolute and the rest are deltas. Time deltas are never
+negative.
+"""
+
+import math
+from array import array
+from datetime import datetime, timezone as dt_timezone
+from itertools import accumulate
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.authentication.models import User
+from .models import DeliveryTrajectory
+
+FORMAT_VERSION = 1
+SCALE = 100000
+EARTH_RADIUS_M = 6371000
+# Metres per 1e-5 degree of latitude
+METRES_PER_UNIT = math.pi * EARTH_RADIUS_M / 180 / SCALE
+
+
+def get_tracking_setting(name):
+    defaults = {
+        'MIN_MOVE_M': 3,
+        'MAX_GAP_SECONDS': 60,
+        'MAX_SPEED_MPS': 50,
+        'SIMPLIFY_TOLERANCE_M': 5,
+        'MAX_PINGS_PER_REQUEST': 500,
+    }
+    return getattr(settings, 'DELIVERY_TRACKING', {}).get(name, defaults[name])
+
+
+def to_fixed(latitude, longitude):
+    return round(latitude * SCALE), round(longitude * SCALE)
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value):
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def encode(points, previous=None):
+    """
+    Encode (lat_e5, lng_e5, time) points
+
+    Without `previous` the result is a complete blob. With the last stored
+    point it is a fragment to append to an existing blob.
+    """
+    out = bytearray()
+    if previous is None:
+        out.append(FORMAT_VERSION)
+        last_lat = last_lng = last_time = 0
+    else:
+        last_lat, last_lng, last_time = previous
+    for lat, lng, moment in points:
+        _write_varint(out, _zigzag(lat - last_lat))
+        _write_varint(out, _zigzag(lng - last_lng))
+        _write_varint(out, moment - last_time)
+        last_lat, last_lng, last_time = lat, lng, moment
+    return bytes(out)
+
+
+def decode(blob):
+    """(lats, lngs, times) arrays of fixed-point values"""
+    lats, lngs, times = array('i'), array('i'), array('q')
+    if not blob:
+        return lats, lngs, times
+    blob = bytes(blob)
+    if blob[0] != FORMAT_VERSION:
+        raise ValueError(f'Unknown trajectory format {blob[0]}')
+
+    values = []
+    append = values.append
+    value = shift = 0
+    for byte in blob[1:]:
+        if byte < 0x80:
+            append(value | (byte << shift))
+            value = shift = 0
+        else:
+            value |= (byte & 0x7F) << shift
+            shift += 7
+
+    lats.extend(accumulate((v >> 1) ^ -(v & 1) for v in values[0::3]))
+    lngs.extend(accumulate((v >> 1) ^ -(v & 1) for v in values[1::3]))
+    times.extend(accumulate(values[2::3]))
+    return lats, lngs, times
+
+
+def replay(blob):
+    """Yield (latitude, longitude, unix seconds) straight from a blob"""
+    lats, lngs, times = decode(blob)
+    for lat, lng, moment in zip(lats, lngs, times):
+        yield lat / SCALE, lng / SCALE, moment
+
+
+def segment_m(lat1, lng1, lat2, lng2):
+    """Haversine distance in metres between two fixed-point positions"""
+    phi1, phi2 = math.radians(lat1 / SCALE), math.radians(lat2 / SCALE)
+    dphi = phi2 - phi1
+    dlambda = math.radians((lng2 - lng1) / SCALE)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def path_length_m(lats, lngs):
+    return sum(
+        segment_m(lats[i - 1], lngs[i - 1], lats[i], lngs[i])
+        for i in range(1, len(lats))
+    )
+
+
+def simplify(lats, lngs, times, tolerance_m):
+    """
+    Indices of the points kept by time-aware Douglas-Peucker
+
+    A point's error is its distance from where the driver would have been at
+    that time moving at constant speed along the simplified segment.
+    """
+    count = len(lats)
+    if count < 3:
+        return list(range(count))
+    # Local equirectangular projection, in metres
+    x_scale = METRES_PER_UNIT * math.cos(math.radians(lats[0] / SCALE))
+    xs = [lng * x_scale for lng in lngs]
+    ys = [lat * METRES_PER_UNIT for lat in lats]
+    tolerance_sq = tolerance_m * tolerance_m
+
+    keep = bytearray(count)
+    keep[0] = keep[-1] = 1
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        span = times[last] - times[first]
+        worst, worst_sq = None, tolerance_sq
+        for i in range(first + 1, last):
+            fraction = (times[i] - times[first]) / span if span else 0.5
+            dx = xs[first] + (xs[last] - xs[first]) * fraction - xs[i]
+            dy = ys[first] + (ys[last] - ys[first]) * fraction - ys[i]
+            error_sq = dx * dx + dy * dy
+            if error_sq > worst_sq:
+                worst, worst_sq = i, error_sq
+        if worst is not None:
+            keep[worst] = 1
+            stack.append((first, worst))
+            stack.append((worst, last))
+    return [i for i in range(count) if keep[i]]
+
+
+def filter_pings(pings, previous, min_move_m, max_gap, max_speed):
+    """
+    Fixed-point points worth keeping from (latitude, longitude, datetime) pings
+
+    Out-of-order pings, those not newer than the last kept point and those
+    within min_move_m of it (unless max_gap seconds have passed) are
+    dropped, as are jumps faster than max_speed metres per second. Returns (points, metres travelled from previous).
+    """
+    kept = []
+    distance = 0.0
+    last = previous
+    for latitude, longitude, moment in sorted(pings, key=lambda ping: ping[2]):
+        lat, lng = to_fixed(latitude, longitude)
+        seconds = int(moment.timestamp())
+        if last is not None:
+            if seconds <= last[2]:
+                continue
+            moved = segment_m(last[0], last[1], lat, lng)
+            elapsed = seconds - last[2]
+            if moved < min_move_m and elapsed < max_gap:
+                continue
+            if moved > max_speed * elapsed:
+                continue
+            distance += moved
+        last = (lat, lng, seconds)
+        kept.append(last)
+    return kept, distance
+
+
+def append_pings(delivery, pings):
+    """
+    Add (latitude, longitude, datetime) pings to the delivery's trajectory
+
+    Returns (trajectory, number of pings kept).
+    """
+    with transaction.atomic():
+        trajectory, _ = DeliveryTrajectory.objects.select_for_update().get_or_create(delivery=delivery)
+        if trajectory.last_time is None:
+            previous = None
+        else:
+            previous = (trajectory.last_lat_e5, trajectory.last_lng_e5, trajectory.last_time)
+        kept, distance = filter_pings(
+            pings, previous, get_tracking_setting('MIN_MOVE_M'),
+            get_tracking_setting('MAX_GAP_SECONDS'), get_tracking_setting('MAX_SPEED_MPS'),
+        )
+
+        if kept:
+            trajectory.points = bytes(trajectory.points) + encode(kept, previous)
+            trajectory.point_count += len(kept)
+            trajectory.raw_point_count += len(kept)
+            trajectory.last_lat_e5, trajectory.last_lng_e5, trajectory.last_time = kept[-1]
+            trajectory.distance_m += distance
+            if trajectory.started_at is None:
+                trajectory.started_at = datetime.fromtimestamp(kept[0][2], tz=dt_timezone.utc)
+            trajectory.save()
+
+            # The latest position is also the driver's current location
+            User.objects.filter(pk=delivery.driver_id).update(
+                current_latitude=kept[-1][0] / SCALE, current_longitude=kept[-1][1] / SCALE
+            )
+    return trajectory, len(kept)
+
+
+def finish_trajectory(delivery):
+    """Simplify a completed delivery's trail in place; call inside the status transaction"""
+    trajectory = DeliveryTrajectory.objects.select_for_update().filter(delivery=delivery).first()
+    if trajectory is None or trajectory.simplified:
+        return trajectory
+    lats, lngs, times = decode(trajectory.points)
+    kept = simplify(lats, lngs, times, get_tracking_setting('SIMPLIFY_TOLERANCE_M'))
+    trajectory.points = encode((lats[i], lngs[i], times[i]) for i in kept)
+    trajectory.point_count = len(kept)
+    trajectory.simplified = True
+    trajectory.ended_at = delivery.delivered_at or timezone.now()
+    trajectory.save()
+    return trajectory
+
+
+def trajectory_payload(trajectory):
+    return {
+        'delivery_id': str(trajectory.delivery_id),
+        'point_count': trajectory.point_count,
+        'raw_point_count': trajectory.raw_point_count,
+        'distance_km': round(trajectory.distance_m / 1000, 3),
+        'simplified': trajectory.simplified,
+        'encoded_bytes': len(trajectory.points),
+        'started_at': trajectory.started_at,
+        'ended_at': trajectory.ended_at,
+        # [latitude, longitude, unix seconds]
+        'points': [list(point) for point in replay(trajectory.points)],
+    }
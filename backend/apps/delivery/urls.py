@@ -4,4 +4,12 @@ from . import views
 app_name = 'delivery'
 urlpatterns = [
     path('', views.index, name='index'),
-]
\ No newline at end of file
+    path('requests/', views.delivery_requests, name='delivery_requests'),
+    path('active/', views.active_deliveries, name='active_deliveries'),
+    path('batches/', views.delivery_batches, name='delivery_batches'),
+    path('batches/accept/', views.accept_batch, name='accept_batch'),
+    path('surge/', views.surge, name='surge'),
+    path('<uuid:delivery_id>/status/', views.update_delivery_status, name='update_delivery_status'),
+    path('<uuid:delivery_id>/location/', views.record_location, name='record_location'),
+    path('<uuid:delivery_id>/trajectory/', views.delivery_trajectory, name='delivery_trajectory'),
+]
@@ -1,6 +1,367 @@
-from rest_framework.decorators import api_view
+"""
+Delivery Views
+
+This module contains API views for drivers that match the frontend
+deliveryManagementService methods.
+"""
+
+import uuid
+
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from apps.admin_panel.permissions import IsPlatformAdmin
+from apps.events.recorder import record_event
+from apps.notifications.tasks import notify_order_status
+from apps.restaurants.trending import record_delivered_order
+from .batching import Planner, batch_payload, driver_position, get_batching_setting, job_for, plans
+from .models import Delivery, DeliveryTrajectory
+from .serializers import (
+    BatchAcceptSerializer, DeliverySerializer, DeliveryStatusSerializer, LocationPingBatchSerializer,
+)
+from .surge import surge_multiplier
+from .trajectory import append_pings, finish_trajectory, get_tracking_setting, trajectory_payload
+
+ACTIVE_STATUSES = ['assigned', 'accepted', 'at_restaurant', 'picked_up', 'in_transit']
+
+# Allowed status changes and the timestamp each one records
+STATUS_TRANSITIONS = {
+    'pending': {'accepted': 'accepted_at', 'cancelled': 'cancelled_at'},
+    'assigned': {'accepted': 'accepted_at', 'cancelled': 'cancelled_at'},
+    'accepted': {'at_restaurant': 'arrived_at_restaurant_at', 'cancelled': 'cancelled_at'},
+    'at_restaurant': {'picked_up': 'picked_up_at'},
+    'picked_up': {'in_transit': None, 'delivered': 'delivered_at'},
+    'in_transit': {'delivered': 'delivered_at'},
+    'delivered': {},
+    'cancelled': {},
+}
+
+
+def delivery_queryset():
+    return Delivery.objects.select_related('order__restaurant', 'order__customer')
+
+
 @api_view(['GET'])
 def index(request):
-    return Response({'status': 'delivery service ready'})
\ No newline at end of file
+    return Response({'status': 'delivery service ready'})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def delivery_requests(request):
+    """
+    Unassigned delivery requests waiting for a driver
+    Matches frontend deliveryManagementService.getAvailableRequests()
+    """
+    deliveries = delivery_queryset().filter(
+        status='pending', driver__isnull=True
+    ).order_by('created_at')
+    
+    paginator = PageNumberPagination()
+    page = paginator.paginate_queryset(deliveries, request)
+    return Response({
+        'success': True,
+        'count': paginator.page.paginator.count,
+        'requests': DeliverySerializer(page, many=True).data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def active_deliveries(request):
+    """
+    The driver's deliveries in progress
+    Matches frontend deliveryManagementService.getActiveDeliveries()
+    """
+    deliveries = delivery_queryset().filter(
+        driver=request.user, status__in=ACTIVE_STATUSES
+    ).order_by('created_at')
+    return Response({
+        'success': True,
+        'deliveries': DeliverySerializer(deliveries, many=True).data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def surge(request):
+    """
+    Current delivery fee multiplier at a coordinate
+    """
+    try:
+        latitude = float(request.query_params['latitude'])
+        longitude = float(request.query_params['longitude'])
+    except (KeyError, ValueError):
+        return Response({
+            'success': False,
+            'error': 'latitude and longitude are required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        'success': True,
+        'multiplier': round(surge_multiplier(latitude, longitude), 2)
+    }, status=status.HTTP_200_OK)
+
+
+def plan_pending():
+    """Batches of the oldest pending, unassigned deliveries"""
+    planner = Planner()
+    deliveries = delivery_queryset().filter(status='pending', driver__isnull=True).order_by('created_at')
+    jobs = [job for job in (job_for(delivery, planner) for delivery in deliveries[:500]) if job]
+    return planner.plan(jobs, timezone.now().timestamp())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def delivery_batches(request):
+    """
+    Pending deliveries grouped into trips, with pickups and drop-offs sequenced
+    
+    Trips are ordered by when their first food is ready; stop ETAs assume the
+    driver starts from their last known position now.
+    """
+    if request.user.user_type != 'delivery':
+        return Response({
+            'success': False,
+            'error': 'Only delivery drivers can see delivery batches'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+    except ValueError:
+        limit = 20
+    now = timezone.now()
+    batches = plans.get(plan_pending) if get_batching_setting('ENABLED') else []
+    start = driver_position(request.user)
+    return Response({
+        'success': True,
+        'batches': [batch_payload(batch, start, now) for batch in batches[:limit]]
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def accept_batch(request):
+    """
+    Accept several pending deliveries as one trip
+    
+    All of them are accepted or none are; the stops are sequenced from the
+    driver's position and stored on each delivery.
+    """
+    if request.user.user_type != 'delivery':
+        return Response({
+            'success': False,
+            'error': 'Only delivery drivers can accept deliveries'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = BatchAcceptSerializer(
+        data=request.data, context={'max_orders': get_batching_setting('MAX_ORDERS')}
+    )
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    delivery_ids = serializer.validated_data['delivery_ids']
+    now = timezone.now()
+    planner = Planner()
+    with transaction.atomic():
+        deliveries = list(
+            delivery_queryset().select_for_update(of=('self',)).filter(pk__in=delivery_ids).order_by('pk')
+        )
+        unavailable = {str(pk) for pk in delivery_ids} - {
+            str(delivery.pk) for delivery in deliveries if delivery.status == 'pending' and delivery.driver_id is None
+        }
+        if unavailable:
+            return Response({
+                'success': False,
+                'error': 'Some deliveries are no longer available',
+                'delivery_ids': sorted(unavailable)
+            }, status=status.HTTP_409_CONFLICT)
+        
+        jobs = [job_for(delivery, planner) for delivery in deliveries]
+        if None in jobs:
+            route = None
+        else:
+            route = planner.sequence(jobs, driver_position(request.user), now.timestamp())
+        if len(deliveries) > 1 and route is None:
+            return Response({
+                'success': False,
+                'error': 'These deliveries cannot share a trip'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        batch_id = uuid.uuid4() if len(deliveries) > 1 else None
+        stops = {(kind, job.id): index for index, (kind, job) in enumerate(route or [])}
+        for delivery in deliveries:
+            delivery.status = 'accepted'
+            delivery.driver = request.user
+            delivery.accepted_at = now
+            delivery.updated_at = now
+            delivery.batch_id = batch_id
+            delivery.pickup_stop = stops.get(('pickup', delivery.pk))
+            delivery.dropoff_stop = stops.get(('dropoff', delivery.pk))
+        Delivery.objects.bulk_update(
+            deliveries, ['status', 'driver', 'accepted_at', 'batch_id', 'pickup_stop', 'dropoff_stop', 'updated_at']
+        )
+        for delivery in deliveries:
+            record_event('delivery_accepted', delivery, request.user, {
+                'status': 'accepted', 'order_id': str(delivery.order_id), 'batch_id': batch_id,
+            })
+    
+    # The cached plan still offers these deliveries
+    plans.invalidate()
+    deliveries.sort(key=lambda delivery: delivery.pickup_stop or 0)
+    return Response({
+        'success': True,
+        'message': f'Accepted {len(deliveries)} deliveries',
+        'batch_id': batch_id,
+        'deliveries': DeliverySerializer(deliveries, many=True).data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def update_delivery_status(request, delivery_id):
+    """
+    Accept a delivery or move it to its next status
+    Matches frontend deliveryManagementService.updateDeliveryStatus()
+    """
+    if request.user.user_type != 'delivery':
+        return Response({
+            'success': False,
+            'error': 'Only delivery drivers can update deliveries'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = DeliveryStatusSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    with transaction.atomic():
+        delivery = get_object_or_404(delivery_queryset().select_for_update(of=('self',)), pk=delivery_id)
+        new_status = serializer.validated_data['status']
+        if delivery.driver_id not in (None, request.user.pk):
+            return Response({
+                'success': False,
+                'error': 'Delivery is assigned to another driver'
+            }, status=status.HTTP_409_CONFLICT)
+        if new_status not in STATUS_TRANSITIONS[delivery.status]:
+            return Response({
+                'success': False,
+                'error': f'Cannot change delivery from {delivery.status} to {new_status}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        timestamp_field = STATUS_TRANSITIONS[delivery.status][new_status]
+        delivery.status = new_status
+        delivery.driver = request.user
+        update_fields = ['status', 'driver', 'updated_at']
+        if timestamp_field:
+            setattr(delivery, timestamp_field, timezone.now())
+            update_fields.append(timestamp_field)
+        delivery.save(update_fields=update_fields)
+        record_event(f'delivery_{new_status}', delivery, request.user, {
+            'status': new_status, 'order_id': str(delivery.order_id),
+        })
+        
+        if new_status == 'delivered':
+            # Handing over the food completes the order as well
+            order = delivery.order
+            if order.status not in ('delivered', 'cancelled'):
+                order.status = 'delivered'
+                order.delivered_at = delivery.delivered_at
+                order.save(update_fields=['status', 'delivered_at', 'updated_at'])
+                record_event('order_delivered', order, request.user, {'status': 'delivered'})
+                transaction.on_commit(lambda: record_delivered_order(order))
+                notify_order_status.enqueue(order.pk, 'delivered')
+            finish_trajectory(delivery)
+    
+    return Response({
+        'success': True,
+        'message': f'Delivery is now {new_status}',
+        'delivery': DeliverySerializer(delivery).data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def record_location(request, delivery_id):
+    """
+    Append the driver's GPS pings to the delivery's trajectory
+    Matches frontend deliveryManagementService.updateLocation()
+    
+    Accepts {"pings": [{latitude, longitude, timestamp}, ...]} or a single
+    {latitude, longitude}. Buffered pings must be sent before the delivery
+    is marked delivered.
+    """
+    data = request.data if 'pings' in request.data else {'pings': [request.data]}
+    serializer = LocationPingBatchSerializer(
+        data=data, context={'max_pings': get_tracking_setting('MAX_PINGS_PER_REQUEST')}
+    )
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    now = timezone.now()
+    pings = [
+        (ping['latitude'], ping['longitude'], min(ping.get('timestamp') or now, now))
+        for ping in serializer.validated_data['pings']
+    ]
+    with transaction.atomic():
+        # Locking the delivery serializes the first pings, which create the trajectory
+        delivery = get_object_or_404(Delivery.objects.select_for_update(), pk=delivery_id)
+        if delivery.driver_id != request.user.pk:
+            return Response({
+                'success': False,
+                'error': 'Delivery is not assigned to you'
+            }, status=status.HTTP_403_FORBIDDEN)
+        if delivery.status not in ACTIVE_STATUSES:
+            return Response({
+                'success': False,
+                'error': f'Cannot track a delivery that is {delivery.status}'
+            }, status=status.HTTP_409_CONFLICT)
+        trajectory, kept = append_pings(delivery, pings)
+    
+    return Response({
+        'success': True,
+        'message': 'Location updated successfully',
+        'accepted': kept,
+        'point_count': trajectory.point_count,
+        'distance_km': round(trajectory.distance_m / 1000, 3)
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def delivery_trajectory(request, delivery_id):
+    """
+    The delivery's GPS trail and distance travelled, for the driver and admins
+    Matches frontend adminManagementService dispute review and deliveryManagementService earnings
+    """
+    delivery = get_object_or_404(Delivery, pk=delivery_id)
+    is_admin = IsPlatformAdmin().has_permission(request, None)
+    if not is_admin and delivery.driver_id != request.user.pk:
+        return Response({
+            'success': False,
+            'error': 'You do not have access to this delivery'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    trajectory = DeliveryTrajectory.objects.filter(delivery=delivery).first()
+    if trajectory is None:
+        return Response({
+            'success': False,
+            'error': 'No trajectory recorded for this delivery'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        'success': True,
+        'trajectory': trajectory_payload(trajectory)
+    }, status=status.HTTP_200_OK)
@@ -0,0 +1,52 @@
+"""
+Events Admin Configuration
+"""
+
+from django.contrib import admin
+from .models import ActionLog, BusinessEvent, ServiceMetric
+
+
+class ReadOnlyEventAdmin(admin.ModelAdmin):
+    """
+    Event rows are append-only; they leave through retention, not the admin
+    """
+    date_hierarchy = 'timestamp'
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ActionLog)
+class ActionLogAdmin(ReadOnlyEventAdmin):
+    """
+    API call log admin configuration
+    """
+    list_display = ['timestamp', 'user_id', 'user_type', 'action_type', 'service_name', 'method_name', 'success']
+    list_filter = ['user_type', 'action_type', 'success']
+    search_fields = ['user_id', 'service_name', 'method_name']
+
+
+@admin.register(BusinessEvent)
+class BusinessEventAdmin(ReadOnlyEventAdmin):
+    """
+    Business event admin configuration
+    """
+    list_display = ['timestamp', 'event_type', 'entity_type', 'entity_id', 'triggered_by']
+    list_filter = ['event_type', 'entity_type']
+    search_fields = ['entity_id', 'triggered_by']
+
+
+@admin.register(ServiceMetric)
+class ServiceMetricAdmin(ReadOnlyEventAdmin):
+    """
+    Service timing admin configuration
+    """
+    list_display = ['timestamp', 'service_name', 'method_name', 'execution_time', 'success']
+    list_filter = ['service_name', 'success']
@@ -0,0 +1,14 @@
+"""
+Events App Configuration
+"""
+
+from django.apps import AppConfig
+
+
+class EventsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.events'
+    
+    def ready(self):
+        """Connect the partition setup to post_migrate"""
+        import apps.events.signals  # noqa: F401
@@ -0,0 +1,205 @@
+"""
+Event Archives
+
+Expired partitions are written to gzip-compressed NDJSON, one file per
+partition, under EVENT_LOG['ARCHIVE_DIR']/<table>/:
+
+    event_action_logs/event_action_logs_p20260901.ndjson.gz
+    event_action_logs/manifest.json
+
+Rows are streamed from the database in chunks of ARCHIVE_CHUNK_ROWS (a
+server-side cursor on PostgreSQL), so memory use does not depend on the
+size of the partition. A file is written under a temporary name and
+renamed when complete. It is then recorded in manifest.json with its period,
+row count and SHA-256. Files missing from the manifest are ignored.
+
+ArchiveReader gives read-only access to archived periods, filtered by time
+and field values, one row (a dict) at a time.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.expressions import Col
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .partitions import TABLES, get_event_setting, period_end
+
+MANIFEST = 'manifest.json'
+
+
+def archive_root():
+    return os.fspath(get_event_setting('ARCHIVE_DIR'))
+
+
+def _table_dir(key):
+    return os.path.join(archive_root(), TABLES[key]._meta.db_table)
+
+
+def read_manifest(key):
+    path = os.path.join(_table_dir(key), MANIFEST)
+    try:
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {'partitions': {}}
+
+
+def _write_manifest(key, manifest):
+    path = os.path.join(_table_dir(key), MANIFEST)
+    with open(path + '.tmp', 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(path + '.tmp', path)
+
+
+def is_archived(key, partition):
+    return partition in read_manifest(key)['partitions']
+
+
+def _converters(key, connection):
+    """Per column, the backend and field converters the ORM would apply"""
+    model = TABLES[key]
+    converters = []
+    for field in model._meta.concrete_fields:
+        column = Col(model._meta.db_table, field)
+        functions = connection.ops.get_db_converters(column) + column.get_db_converters(connection)
+        converters.append((field.attname, column, functions))
+    return converters
+
+
+class ArchiveEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, but datetimes keep their microseconds"""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def write_archive(key, table, partition, start, unit, using=DEFAULT_DB_ALIAS):
+    """Stream one (detached) partition table to NDJSON.gz and record it in the manifest"""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    fields = TABLES[key]._meta.concrete_fields
+    converters = _converters(key, connection)
+    chunk_rows = get_event_setting('ARCHIVE_CHUNK_ROWS')
+
+    os.makedirs(_table_dir(key), exist_ok=True)
+    filename = f'{partition}.ndjson.gz'
+    path = os.path.join(_table_dir(key), filename)
+    digest = hashlib.sha256()
+    rows = 0
+    first = last = None
+    with open(path + '.tmp', 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0) as archive:
+            # Server-side cursors only live inside a transaction
+            with transaction.atomic(using=using), connection.chunked_cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {', '.join(quote(field.column) for field in fields)} FROM {quote(table)} "
+                    f"ORDER BY {quote('timestamp')}"
+                )
+                while True:
+                    chunk = cursor.fetchmany(chunk_rows)
+                    if not chunk:
+                        break
+                    lines = []
+                    for values in chunk:
+                        row = {}
+                        for (attname, column, functions), value in zip(converters, values):
+                            for function in functions:
+                                value = function(value, column, connection)
+                            row[attname] = value
+                        lines.append(json.dumps(row, cls=ArchiveEncoder, separators=(',', ':')) + '\n')
+                    data = ''.join(lines).encode('utf-8')
+                    archive.write(data)
+                    digest.update(data)
+                    rows += len(chunk)
+                    first = first or lines[0]
+                    last = lines[-1]
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(path + '.tmp', path)
+
+    manifest = read_manifest(key)
+    manifest['partitions'][partition] = {
+        'file': filename,
+        'start': start.isoformat(),
+        'end': period_end(start, unit).isoformat(),
+        'rows': rows,
+        'first_timestamp': json.loads(first)['timestamp'] if first else None,
+        'last_timestamp': json.loads(last)['timestamp'] if last else None,
+        'bytes': os.path.getsize(path),
+        # Of the uncompressed NDJSON
+        'sha256': digest.hexdigest(),
+        'archived_at': timezone.now().isoformat(),
+    }
+    _write_manifest(key, manifest)
+    return manifest['partitions'][partition]
+
+
+class ArchiveReader:
+    """
+    Read-only access to archived event partitions
+
+        reader = ArchiveReader('action_logs')
+        for row in reader.rows(since=..., until=..., user_id='42'):
+            ...
+    """
+
+    def __init__(self, key):
+        if key not in TABLES:
+            raise ValueError(f"Unknown event table {key}; expected one of {', '.join(TABLES)}")
+        self.key = key
+        self.directory = _table_dir(key)
+        self.partitions = read_manifest(key)['partitions']
+
+    def ranges(self):
+        """[(start, end, rows, partition)] of the archived periods, oldest first"""
+        return sorted(
+            (parse_datetime(entry['start']), parse_datetime(entry['end']), entry['rows'], partition)
+            for partition, entry in self.partitions.items()
+        )
+
+    def rows(self, since=None, until=None, **filters):
+        """
+        Archived rows with since <= timestamp < until whose fields equal
+        filters (compared as strings), oldest partition first
+        """
+        filters = {name: str(value) for name, value in filters.items()}
+        for start, end, _, partition in self.ranges():
+            if (since and end <= since) or (until and start >= until):
+                continue
+            path = os.path.join(self.directory, self.partitions[partition]['file'])
+            with gzip.open(path, 'rt', encoding='utf-8') as archive:
+                for line in archive:
+                    row = json.loads(line)
+                    timestamp = parse_datetime(row['timestamp'])
+                    if (since and timestamp < since) or (until and timestamp >= until):
+                        continue
+                    if any(str(row.get(name)) != value for name, value in filters.items()):
+                        continue
+                    row['timestamp'] = timestamp
+                    yield row
+
+    def verify(self, partition):
+        """True when the file's uncompressed SHA-256 matches the manifest"""
+        digest = hashlib.sha256()
+        path = os.path.join(self.directory, self.partitions[partition]['file'])
+        with gzip.open(path, 'rb') as archive:
+            for block in iter(lambda: archive.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest() == self.partitions[partition]['sha256']
+
+
+def parse_since(value):
+    """A date or datetime argument as an aware datetime"""
+    moment = parse_datetime(value) or datetime.fromisoformat(value)
+    return moment if timezone.is_aware(moment) else moment.replace(tzinfo=dt_timezone.utc)
@@ -0,0 +1,87 @@
+"""
+Manage the time-partitioned event tables (apps/events).
+
+    python manage.py event_partitions                    # create upcoming partitions, list them
+    python manage.py event_partitions --retention        # detach, archive and drop expired ones
+    python manage.py event_partitions --retention --dry-run
+    python manage.py event_partitions --read action_logs --since 2026-09-01 --until 2026-09-02 \\
+        --where user_id=42 --limit 20
+
+Run --retention daily from the scheduler or cron; a run that is interrupted
+is finished by the next one. --read streams rows back out of the archive
+files without touching the database.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.events.archive import ArchiveEncoder, ArchiveReader, parse_since, read_manifest
+from apps.events.partitions import TABLES, ensure_tables, list_partitions
+from apps.events.recorder import flush
+from apps.events.retention import apply_retention
+
+
+class Command(BaseCommand):
+    help = 'Create, expire and read time-partitioned event tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention', action='store_true', help='Archive and drop expired partitions')
+        parser.add_argument('--dry-run', action='store_true', help='With --retention, only list what would go')
+        parser.add_argument('--read', choices=list(TABLES), help='Print archived rows of this table as NDJSON')
+        parser.add_argument('--since', help='Date or ISO datetime (UTC unless it has an offset)')
+        parser.add_argument('--until', help='Date or ISO datetime, exclusive')
+        parser.add_argument('--where', action='append', default=[], metavar='FIELD=VALUE')
+        parser.add_argument('--limit', type=int, default=None)
+        parser.add_argument('--verify', action='store_true', help='With --read, check archive checksums first')
+
+    def handle(self, *args, **options):
+        if options['read']:
+            self._read(options)
+            return
+
+        flush()
+        if not ensure_tables():
+            raise CommandError('Event tables need SQLite or PostgreSQL')
+        if options['retention']:
+            for key, partition, rows in apply_retention(dry_run=options['dry_run']):
+                if options['dry_run']:
+                    self.stdout.write(f'Would archive and drop {partition}')
+                elif rows is None:
+                    self.stdout.write(f'Dropped {partition} (archived earlier)')
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'Archived {rows} rows and dropped {partition}'))
+        self._list()
+
+    def _list(self):
+        for key in TABLES:
+            partitions = list_partitions(key)
+            archived = read_manifest(key)['partitions']
+            self.stdout.write(
+                f"{key}: {len(partitions)} partitions"
+                + (f' ({partitions[0][2]} .. {partitions[-1][2]})' if partitions else '')
+                + f', {len(archived)} archived ({sum(entry["rows"] for entry in archived.values())} rows)'
+            )
+
+    def _read(self, options):
+        filters = {}
+        for condition in options['where']:
+            name, separator, value = condition.partition('=')
+            if not separator:
+                raise CommandError(f'--where takes FIELD=VALUE, not {condition}')
+            filters[name] = value
+        try:
+            since = parse_since(options['since']) if options['since'] else None
+            until = parse_since(options['until']) if options['until'] else None
+        except ValueError as error:
+            raise CommandError(f'Bad --since/--until: {error}')
+
+        reader = ArchiveReader(options['read'])
+        if options['verify']:
+            for _, _, _, partition in reader.ranges():
+                if not reader.verify(partition):
+                    raise CommandError(f'Checksum mismatch for {partition}')
+        for count, row in enumerate(reader.rows(since, until, **filters)):
+            if options['limit'] is not None and count >= options['limit']:
+                break
+            self.stdout.write(json.dumps(row, cls=ArchiveEncoder))
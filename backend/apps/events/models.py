@@ -0,0 +1,95 @@
+"""
+Events Models
+
+Append-only activity logs from the action tracking plan
+(DJANGO_BACKEND_PLAN.md): every API call (ActionLog), its timing
+(ServiceMetric) and order lifecycle events (BusinessEvent).
+
+The tables are partitioned by time and created by partitions.py, not by
+migrations, so the models are unmanaged. Rows are written in batches by
+recorder.py. Use these models to read and aggregate.
+"""
+
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class ActionLog(models.Model):
+    """
+    One API call by a user (or anonymous client)
+    """
+    
+    USER_TYPES = [
+        ('customer', 'Customer'),
+        ('restaurant', 'Restaurant'),
+        ('delivery', 'Delivery'),
+        ('admin', 'Admin'),
+        ('anonymous', 'Anonymous'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    timestamp = models.DateTimeField()
+    user_id = models.CharField(max_length=255)
+    user_type = models.CharField(max_length=20, choices=USER_TYPES)
+    action_type = models.CharField(max_length=100)
+    service_name = models.CharField(max_length=100)
+    method_name = models.CharField(max_length=100)
+    parameters = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    response_data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    session_id = models.CharField(max_length=255, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    success = models.BooleanField()
+    error_message = models.TextField(null=True, blank=True)
+    
+    class Meta:
+        managed = False
+        db_table = 'event_action_logs'
+        ordering = ['-timestamp']
+    
+    def __str__(self):
+        return f"{self.user_id} {self.action_type} {self.service_name}:{self.method_name}"
+
+
+class BusinessEvent(models.Model):
+    """
+    Order lifecycle, payment and delivery events
+    """
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    timestamp = models.DateTimeField()
+    event_type = models.CharField(max_length=100)  # order_placed, delivery_completed, ...
+    entity_id = models.CharField(max_length=255)
+    entity_type = models.CharField(max_length=50)  # order, delivery, user, ...
+    event_data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    triggered_by = models.CharField(max_length=255)
+    
+    class Meta:
+        managed = False
+        db_table = 'event_business_events'
+        ordering = ['-timestamp']
+    
+    def __str__(self):
+        return f"{self.event_type} {self.entity_type}:{self.entity_id}"
+
+
+class ServiceMetric(models.Model):
+    """
+    Execution time of one API call
+    """
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    timestamp = models.DateTimeField()
+    service_name = models.CharField(max_length=100)
+    method_name = models.CharField(max_length=100)
+    execution_time = models.FloatField()  # in milliseconds
+    success = models.BooleanField()
+    
+    class Meta:
+        managed = False
+        db_table = 'event_service_metrics'
+        ordering = ['-timestamp']
+    
+    def __str__(self):
+        return f"{self.service_name}:{self.method_name} {self.execution_time:.1f}ms"
@@ -0,0 +1,243 @@
+"""
+Event Table Partitions
+
+The event tables are split into one table per period (a day or a month,
+UTC), so old data leaves by dropping whole tables rather than deleting rows.
+
+  * PostgreSQL: native range partitioning. `event_action_logs` is the
+    partitioned parent and `event_action_logs_p20261019` one partition;
+    writes go to the parent and PostgreSQL routes them
+  * SQLite: one plain table per period, and `event_action_logs` is a view
+    (UNION ALL of the attached period tables) that the ORM reads through;
+    writes go straight to the period table
+
+Partitions are created ahead of time (EVENT_LOG['PREMAKE'] periods) after
+migrate and by the event_partitions command, and on demand when a row
+arrives for a period that has none. Detaching a partition renames it to
+`<name>_detached`. On PostgreSQL it is also detached from the parent. On
+SQLite it is dropped from the view. Either way it stops being visible to
+queries until retention.py archives and drops it.
+
+Partition names encode their period: 8 digits for a day, 6 for a month.
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import ActionLog, BusinessEvent, ServiceMetric
+
+logger = logging.getLogger(__name__)
+
+# EVENT_LOG key -> model
+TABLES = {
+    'action_logs': ActionLog,
+    'business_events': BusinessEvent,
+    'service_metrics': ServiceMetric,
+}
+# Indexes besides timestamp, per table
+INDEXES = {
+    'action_logs': [('user_id', 'timestamp')],
+    'business_events': [('entity_type', 'entity_id')],
+    'service_metrics': [('service_name', 'method_name')],
+}
+SUPPORTED_VENDORS = ('sqlite', 'postgresql')
+
+# (alias, partition name) pairs known to exist in this process
+_known = set()
+
+
+def get_event_setting(name):
+    defaults = {
+        'ENABLED': True,
+        'BATCH_SIZE': 200,
+        'FLUSH_SECONDS': 5,
+        # 'day' or 'month'
+        'PARTITIONS': {'action_logs': 'day', 'service_metrics': 'day', 'business_events': 'month'},
+        'RETENTION_DAYS': {'action_logs': 30, 'service_metrics': 14, 'business_events': 365},
+        'PREMAKE': 3,
+        'ARCHIVE_DIR': settings.BASE_DIR / 'archive',
+        'ARCHIVE_CHUNK_ROWS': 5000,
+    }
+    return getattr(settings, 'EVENT_LOG', {}).get(name, defaults[name])
+
+
+def period_start(moment, unit):
+    moment = moment.astimezone(dt_timezone.utc)
+    if unit == 'month':
+        return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+    return datetime(moment.year, moment.month, moment.day, tzinfo=dt_timezone.utc)
+
+
+def period_end(start, unit):
+    if unit == 'month':
+        return datetime(start.year + start.month // 12, start.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+    return start + timedelta(days=1)
+
+
+def partition_name(key, start, unit):
+    return f"{TABLES[key]._meta.db_table}_p{start:%Y%m%d}" if unit == 'day' else \
+        f"{TABLES[key]._meta.db_table}_p{start:%Y%m}"
+
+
+def parse_partition(key, name):
+    """(period start, unit, detached) for a partition table name, or None"""
+    match = re.fullmatch(rf'{TABLES[key]._meta.db_table}_p(\d{{6}}|\d{{8}})(_detached)?', name)
+    if not match:
+        return None
+    digits = match.group(1)
+    unit = 'day' if len(digits) == 8 else 'month'
+    start = datetime.strptime(digits if unit == 'day' else digits + '01', '%Y%m%d').replace(tzinfo=dt_timezone.utc)
+    return start, unit, bool(match.group(2))
+
+
+def _columns(key, connection, primary_key):
+    quote = connection.ops.quote_name
+    columns = [
+        f"{quote(field.column)} {field.db_type(connection)}{'' if field.null else ' NOT NULL'}"
+        for field in TABLES[key]._meta.concrete_fields
+    ]
+    return ', '.join(columns + [f"PRIMARY KEY ({', '.join(quote(column) for column in primary_key)})"])
+
+
+def _index_sql(key, connection, table):
+    quote = connection.ops.quote_name
+    for columns in [('timestamp',), *INDEXES[key]]:
+        name = f"{table}_{'_'.join(columns)}_idx"
+        yield f"CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} ({', '.join(map(quote, columns))})"
+
+
+def list_partitions(key, using=DEFAULT_DB_ALIAS):
+    """[(period start, unit, name, detached)] oldest first"""
+    connection = connections[using]
+    prefix = TABLES[key]._meta.db_table + '_p'
+    partitions = []
+    for name in connection.introspection.table_names():
+        parsed = parse_partition(key, name) if name.startswith(prefix) else None
+        if parsed:
+            start, unit, detached = parsed
+            partitions.append((start, unit, name, detached))
+    return sorted(partitions)
+
+
+def _rebuild_view(key, cursor, connection):
+    """SQLite: point the read view at the attached period tables"""
+    model = TABLES[key]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in model._meta.concrete_fields)
+    attached = [name for _, _, name, detached in list_partitions(key, connection.alias) if not detached]
+    if attached:
+        body = ' UNION ALL '.join(f'SELECT {columns} FROM {quote(name)}' for name in attached)
+    else:
+        nulls = ', '.join(f'NULL AS {quote(field.column)}' for field in model._meta.concrete_fields)
+        body = f'SELECT {nulls} WHERE 0'
+    cursor.execute(f'DROP VIEW IF EXISTS {quote(model._meta.db_table)}')
+    cursor.execute(f'CREATE VIEW {quote(model._meta.db_table)} AS {body}')
+
+
+def ensure_partition(key, start, unit, using=DEFAULT_DB_ALIAS):
+    """Create the partition for the period starting at start, if missing; returns its name"""
+    name = partition_name(key, start, unit)
+    if (using, name) in _known:
+        return name
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = TABLES[key]._meta.db_table
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {quote(name)} PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)',
+                [start, period_end(start, unit)],
+            )
+        else:
+            # Several processes can reach a new period at once. Writing first takes
+            # SQLite's write lock before any read, so the others wait for it instead
+            # of failing to upgrade a read lock, and find the table already there.
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {quote(name)} ({_columns(key, connection, ['id'])})")
+            for statement in _index_sql(key, connection, name):
+                cursor.execute(statement)
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = %s", [table])
+            view = cursor.fetchone()
+            if view is None or quote(name) not in view[0]:
+                _rebuild_view(key, cursor, connection)
+    _known.add((using, name))
+    return name
+
+
+def ensure_tables(using=DEFAULT_DB_ALIAS, now=None):
+    """Create parents (or views) and the partitions from now to PREMAKE periods ahead"""
+    connection = connections[using]
+    if connection.vendor not in SUPPORTED_VENDORS:
+        logger.warning('Event tables are not supported on %s; events will not be stored', connection.vendor)
+        return False
+    quote = connection.ops.quote_name
+    now = now or datetime.now(dt_timezone.utc)
+    for key, model in TABLES.items():
+        table = model._meta.db_table
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {quote(table)} ({_columns(key, connection, ['id', 'timestamp'])}) "
+                    f"PARTITION BY RANGE ({quote('timestamp')})"
+                )
+                for statement in _index_sql(key, connection, table):
+                    cursor.execute(statement)
+        unit = get_event_setting('PARTITIONS')[key]
+        start = period_start(now, unit)
+        for _ in range(get_event_setting('PREMAKE') + 1):
+            ensure_partition(key, start, unit, using)
+            start = period_end(start, unit)
+        if connection.vendor == 'sqlite' and table not in connection.introspection.table_names(include_views=True):
+            with connection.cursor() as cursor:
+                _rebuild_view(key, cursor, connection)
+    return True
+
+
+def detach_partition(key, name, using=DEFAULT_DB_ALIAS):
+    """Take a partition out of the table (a metadata change); returns the detached name"""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    detached = f'{name}_detached'
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'ALTER TABLE {quote(TABLES[key]._meta.db_table)} DETACH PARTITION {quote(name)}')
+        cursor.execute(f'ALTER TABLE {quote(name)} RENAME TO {quote(detached)}')
+        if connection.vendor == 'sqlite':
+            _rebuild_view(key, cursor, connection)
+    _known.discard((using, name))
+    return detached
+
+
+def drop_partition(name, using=DEFAULT_DB_ALIAS):
+    """Drop a detached partition and its rows in one statement"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {connection.ops.quote_name(name)}')
+
+
+def insert_rows(key, rows, using=DEFAULT_DB_ALIAS):
+    """Insert row dicts (field attname -> Python value) in as few statements as possible"""
+    connection = connections[using]
+    model = TABLES[key]
+    fields = model._meta.concrete_fields
+    quote = connection.ops.quote_name
+    unit = get_event_setting('PARTITIONS')[key]
+    by_table = {}
+    for row in rows:
+        if connection.vendor == 'postgresql':
+            # Routed by PostgreSQL; the partition only has to exist
+            ensure_partition(key, period_start(row['timestamp'], unit), unit, using)
+            table = model._meta.db_table
+        else:
+            table = ensure_partition(key, period_start(row['timestamp'], unit), unit, using)
+        by_table.setdefault(table, []).append(
+            [field.get_db_prep_save(row[field.attname], connection) for field in fields]
+        )
+    columns = ', '.join(quote(field.column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for table, values in by_table.items():
+            cursor.executemany(f'INSERT INTO {quote(table)} ({columns}) VALUES ({placeholders})', values)
@@ -0,0 +1,110 @@
+"""
+Event Recorder
+
+Buffers event rows in memory and writes them in batches: one INSERT per
+partition table for every BATCH_SIZE rows, or every FLUSH_SECONDS, rather
+than one per request. Whatever is buffered is also written at exit. A crash
+loses at most one batch, which is acceptable for activity logs. Business
+events are buffered only once the transaction that produced them commits.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import uuid
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from .partitions import TABLES, get_event_setting, insert_rows
+
+logger = logging.getLogger(__name__)
+
+_buffers = {key: [] for key in TABLES}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _append(key, row):
+    row.setdefault('id', uuid.uuid4())
+    row.setdefault('timestamp', timezone.now())
+    with _lock:
+        _buffers[key].append(row)
+
+
+def record_action(user_id, user_type, action_type, service_name, method_name, success,
+                  parameters=None, response_data=None, session_id='', ip_address=None, error_message=None):
+    _append('action_logs', {
+        'user_id': str(user_id),
+        'user_type': user_type,
+        'action_type': action_type,
+        'service_name': service_name,
+        'method_name': method_name,
+        'parameters': parameters or {},
+        'response_data': response_data or {},
+        'session_id': session_id,
+        'ip_address': ip_address,
+        'success': success,
+        'error_message': error_message,
+    })
+
+
+def record_metric(service_name, method_name, execution_time, success):
+    _append('service_metrics', {
+        'service_name': service_name,
+        'method_name': method_name,
+        'execution_time': execution_time,
+        'success': success,
+    })
+
+
+def record_event(event_type, entity, triggered_by, event_data=None):
+    """Record a business event about a model instance once the current transaction commits"""
+    if not get_event_setting('ENABLED'):
+        return
+    row = {
+        'event_type': event_type,
+        'entity_id': str(entity.pk),
+        'entity_type': entity._meta.model_name,
+        'event_data': event_data or {},
+        'triggered_by': str(getattr(triggered_by, 'pk', triggered_by)),
+        'timestamp': timezone.now(),
+    }
+    transaction.on_commit(lambda: _append('business_events', row))
+
+
+def flush():
+    """Write every buffered row; returns the number written"""
+    global _last_flush
+    with _lock:
+        pending = {key: rows for key, rows in _buffers.items() if rows}
+        for key in pending:
+            _buffers[key] = []
+        _last_flush = time.monotonic()
+    written = 0
+    for key, rows in pending.items():
+        try:
+            insert_rows(key, rows)
+            written += len(rows)
+        except DatabaseError:
+            logger.exception('Dropped %s buffered %s rows', len(rows), key)
+    return written
+
+
+def flush_if_due():
+    with _lock:
+        size = max(len(rows) for rows in _buffers.values())
+        due = size >= get_event_setting('BATCH_SIZE') or (
+            size and time.monotonic() - _last_flush >= get_event_setting('FLUSH_SECONDS')
+        )
+    if due:
+        flush()
+
+
+def _flush_at_exit():
+    if get_event_setting('ENABLED'):
+        flush()
+
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,56 @@
+"""
+Event Retention
+
+A partition expires once its whole period is older than
+EVENT_LOG['RETENTION_DAYS'][table]. Expiring one is three steps, each safe
+to repeat if a run is interrupted:
+
+  1. detach it, so queries and new writes stop seeing it
+  2. stream it to an archive file (archive.py), unless the manifest has it
+  3. drop the table
+
+Old rows are never deleted one by one, so retention costs a few metadata
+changes rather than a scan and a vacuum of the live table.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import DEFAULT_DB_ALIAS
+
+from .archive import is_archived, write_archive
+from .partitions import (
+    TABLES, detach_partition, drop_partition, get_event_setting, list_partitions, period_end,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def expired_partitions(key, now=None, using=DEFAULT_DB_ALIAS):
+    """[(start, unit, name, detached)] whose period ended before the retention cutoff"""
+    now = now or datetime.now(dt_timezone.utc)
+    cutoff = now - timedelta(days=get_event_setting('RETENTION_DAYS')[key])
+    return [
+        partition for partition in list_partitions(key, using)
+        if period_end(partition[0], partition[1]) <= cutoff
+    ]
+
+
+def apply_retention(keys=None, now=None, dry_run=False, using=DEFAULT_DB_ALIAS):
+    """Detach, archive and drop expired partitions; returns [(key, partition, rows archived)]"""
+    results = []
+    for key in keys or TABLES:
+        for start, unit, name, detached in expired_partitions(key, now, using):
+            partition = name.removesuffix('_detached')
+            if dry_run:
+                results.append((key, partition, None))
+                continue
+            table = name if detached else detach_partition(key, name, using)
+            if is_archived(key, partition):
+                rows = None
+            else:
+                rows = write_archive(key, table, partition, start, unit, using)['rows']
+            drop_partition(table, using)
+            logger.info('Archived and dropped %s (%s rows)', partition, 'already archived' if rows is None else rows)
+            results.append((key, partition, rows))
+    return results
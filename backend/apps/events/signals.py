@@ -0,0 +1,19 @@
+"""
+Events Signals
+
+Creates the partitioned event tables after migrations
+"""
+
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+
+from .partitions import ensure_tables
+
+
+@receiver(post_migrate)
+def create_event_tables(sender, using, **kwargs):
+    """
+    Create the event tables and upcoming partitions after migrations
+    """
+    if sender.name == 'apps.events':
+        ensure_tables(using)
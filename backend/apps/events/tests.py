@@ -0,0 +1,230 @@
+"""
+Events Tests
+
+Partition periods and names, row routing on SQLite, and retention: detach,
+archive and drop, and reading the archives back.
+"""
+
+import os
+import tempfile
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import partitions
+from .archive import ArchiveReader, read_manifest, write_archive
+from .models import ActionLog, BusinessEvent
+from .partitions import (
+    detach_partition, ensure_partition, insert_rows, list_partitions, parse_partition, partition_name,
+    period_end, period_start,
+)
+from .retention import apply_retention
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+def action(timestamp, user_id='1', **fields):
+    return {
+        'id': uuid.uuid4(), 'timestamp': timestamp, 'user_id': user_id, 'user_type': 'customer',
+        'action_type': 'view', 'service_name': 'restaurants', 'method_name': 'list',
+        'parameters': {'page': 1}, 'response_data': {}, 'session_id': '', 'ip_address': '10.0.0.1',
+        'success': True, 'error_message': None, **fields,
+    }
+
+
+def table_rows(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(name)}')
+        return cursor.fetchone()[0]
+
+
+def table_exists(name):
+    return name in connection.introspection.table_names()
+
+
+class PeriodTests(SimpleTestCase):
+
+    def test_period_start_is_utc(self):
+        # 23:30 on the 31st in New York is already the 1st in UTC
+        moment = datetime(2025, 12, 31, 23, 30, tzinfo=ZoneInfo('America/New_York'))
+        self.assertEqual(period_start(moment, 'day'), utc(2026, 1, 1))
+        self.assertEqual(period_start(moment, 'month'), utc(2026, 1, 1))
+
+    def test_period_end(self):
+        self.assertEqual(period_end(utc(2025, 11, 1), 'month'), utc(2025, 12, 1))
+        self.assertEqual(period_end(utc(2025, 12, 1), 'month'), utc(2026, 1, 1))
+        self.assertEqual(period_end(utc(2025, 12, 31), 'day'), utc(2026, 1, 1))
+        self.assertEqual(period_end(utc(2024, 2, 28), 'day'), utc(2024, 2, 29))
+
+    def test_name_round_trip(self):
+        for key, start, unit, name in (
+            ('action_logs', utc(2025, 12, 31), 'day', 'event_action_logs_p20251231'),
+            ('business_events', utc(2025, 12, 1), 'month', 'event_business_events_p202512'),
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(partition_name(key, start, unit), name)
+                self.assertEqual(parse_partition(key, name), (start, unit, False))
+                self.assertEqual(parse_partition(key, f'{name}_detached'), (start, unit, True))
+
+    def test_other_names_are_not_partitions(self):
+        for name in ('event_action_logs', 'event_action_logs_p2025123', 'event_action_logs_p20251231_old',
+                     'event_service_metrics_p20251231'):
+            with self.subTest(name=name):
+                self.assertIsNone(parse_partition('action_logs', name))
+
+
+class PartitionTestCase(TestCase):
+    """Partitions created by a test roll back with it, so each test starts with an empty cache"""
+
+    def setUp(self):
+        patcher = mock.patch.object(partitions, '_known', set())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class InsertTests(PartitionTestCase):
+
+    def test_rows_go_to_their_period_table(self):
+        rows = [action(utc(2024, 3, 1, 23, 59)), action(utc(2024, 3, 2, 0, 0)), action(utc(2024, 3, 2, 12))]
+        insert_rows('action_logs', rows)
+        self.assertEqual(table_rows('event_action_logs_p20240301'), 1)
+        self.assertEqual(table_rows('event_action_logs_p20240302'), 2)
+
+        # The ORM reads every period through the view
+        logged = ActionLog.objects.filter(timestamp__lt=utc(2024, 4, 1))
+        self.assertEqual(sorted(row.pk for row in logged), sorted(row['id'] for row in rows))
+        self.assertEqual(logged.get(pk=rows[0]['id']).parameters, {'page': 1})
+
+    def test_monthly_table(self):
+        insert_rows('business_events', [{
+            'id': uuid.uuid4(), 'timestamp': utc(2024, 3, 31, 23), 'event_type': 'order_placed',
+            'entity_id': '1', 'entity_type': 'order', 'event_data': {}, 'triggered_by': 'customer',
+        }])
+        self.assertEqual(table_rows('event_business_events_p202403'), 1)
+        self.assertEqual(BusinessEvent.objects.filter(timestamp__lt=utc(2024, 4, 1)).count(), 1)
+
+    def test_ensure_partition_is_idempotent(self):
+        name = ensure_partition('action_logs', utc(2024, 3, 1), 'day')
+        insert_rows('action_logs', [action(utc(2024, 3, 1, 8))])
+        partitions._known.clear()
+        self.assertEqual(ensure_partition('action_logs', utc(2024, 3, 1), 'day'), name)
+        self.assertEqual(table_rows(name), 1)
+
+    def test_detached_partition_leaves_the_view(self):
+        insert_rows('action_logs', [action(utc(2024, 3, 1, 8)), action(utc(2024, 3, 2, 8))])
+        detached = detach_partition('action_logs', 'event_action_logs_p20240301')
+        self.assertEqual(detached, 'event_action_logs_p20240301_detached')
+        self.assertEqual(ActionLog.objects.filter(timestamp__lt=utc(2024, 4, 1)).count(), 1)
+        found = {name: flag for _, _, name, flag in list_partitions('action_logs')}
+        self.assertTrue(found[detached])
+        self.assertFalse(found['event_action_logs_p20240302'])
+
+
+class RetentionTests(PartitionTestCase):
+
+    # Cutoff is 2024-01-31: the January 10 and 11 partitions have expired
+    now = utc(2024, 3, 1)
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(EVENT_LOG={
+            'PARTITIONS': {'action_logs': 'day', 'service_metrics': 'day', 'business_events': 'month'},
+            'RETENTION_DAYS': {'action_logs': 30, 'service_metrics': 14, 'business_events': 365},
+            'ARCHIVE_DIR': directory.name,
+            # Several chunks per partition
+            'ARCHIVE_CHUNK_ROWS': 2,
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.rows = [
+            action(utc(2024, 1, 10, 9), user_id='1'),
+            action(utc(2024, 1, 10, 8), user_id='2'),
+            action(utc(2024, 1, 10, 10), user_id='1'),
+            action(utc(2024, 1, 11, 9), user_id='2'),
+            action(utc(2024, 2, 25, 9), user_id='1'),
+        ]
+        insert_rows('action_logs', self.rows)
+
+    def retain(self):
+        with self.assertLogs('apps.events.retention', 'INFO'):
+            return apply_retention(['action_logs'], now=self.now)
+
+    def test_detaches_archives_and_drops_expired_partitions(self):
+        results = self.retain()
+        self.assertEqual(results, [
+            ('action_logs', 'event_action_logs_p20240110', 3),
+            ('action_logs', 'event_action_logs_p20240111', 1),
+        ])
+        for name in ('event_action_logs_p20240110', 'event_action_logs_p20240111'):
+            self.assertFalse(table_exists(name))
+            self.assertFalse(table_exists(f'{name}_detached'))
+        self.assertEqual(table_rows('event_action_logs_p20240225'), 1)
+        self.assertEqual(ActionLog.objects.filter(timestamp__lt=utc(2024, 4, 1)).count(), 1)
+
+        # Nothing left to do on a second run
+        self.assertEqual(apply_retention(['action_logs'], now=self.now), [])
+
+    def test_dry_run_changes_nothing(self):
+        results = apply_retention(['action_logs'], now=self.now, dry_run=True)
+        self.assertEqual([partition for _, partition, _ in results],
+                         ['event_action_logs_p20240110', 'event_action_logs_p20240111'])
+        self.assertTrue(table_exists('event_action_logs_p20240110'))
+        self.assertEqual(read_manifest('action_logs'), {'partitions': {}})
+
+    def test_resumes_an_interrupted_run(self):
+        # Stopped after detaching one partition, and after archiving the other
+        detach_partition('action_logs', 'event_action_logs_p20240110')
+        archived = detach_partition('action_logs', 'event_action_logs_p20240111')
+        write_archive('action_logs', archived, 'event_action_logs_p20240111', utc(2024, 1, 11), 'day')
+
+        results = self.retain()
+        self.assertEqual(results, [
+            ('action_logs', 'event_action_logs_p20240110', 3),
+            ('action_logs', 'event_action_logs_p20240111', None),
+        ])
+        self.assertFalse(table_exists(archived))
+        self.assertEqual(sum(entry['rows'] for entry in read_manifest('action_logs')['partitions'].values()), 4)
+
+    def test_archive_reader(self):
+        self.retain()
+        reader = ArchiveReader('action_logs')
+        self.assertEqual([(start, rows) for start, _, rows, _ in reader.ranges()],
+                         [(utc(2024, 1, 10), 3), (utc(2024, 1, 11), 1)])
+
+        archived = list(reader.rows())
+        # Ordered by timestamp within each partition
+        self.assertEqual([row['id'] for row in archived],
+                         [str(self.rows[index]['id']) for index in (1, 0, 2, 3)])
+        self.assertEqual(archived[0]['timestamp'], utc(2024, 1, 10, 8))
+        self.assertEqual(archived[0]['parameters'], {'page': 1})
+
+        window = reader.rows(since=utc(2024, 1, 10, 9), until=utc(2024, 1, 11, 9), user_id=1)
+        self.assertEqual([row['id'] for row in window], [str(self.rows[0]['id']), str(self.rows[2]['id'])])
+
+        manifest = read_manifest('action_logs')['partitions']['event_action_logs_p20240110']
+        self.assertEqual(manifest['first_timestamp'], utc(2024, 1, 10, 8).isoformat())
+        self.assertTrue(reader.verify('event_action_logs_p20240110'))
+
+    def test_verify_detects_a_changed_file(self):
+        self.retain()
+        reader = ArchiveReader('action_logs')
+        path = os.path.join(reader.directory, reader.partitions['event_action_logs_p20240111']['file'])
+        with open(path, 'r+b') as archive:
+            archive.truncate(os.path.getsize(path) - 8)
+        with self.assertRaises(EOFError):
+            reader.verify('event_action_logs_p20240111')
+        reader.partitions['event_action_logs_p20240110']['sha256'] = '0' * 64
+        self.assertFalse(reader.verify('event_action_logs_p20240110'))
+
+    def test_unknown_table(self):
+        with self.assertRaises(ValueError):
+            ArchiveReader('page_views')
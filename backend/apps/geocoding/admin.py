@@ -0,0 +1,16 @@
+"""
+Geocoding Admin Configuration
+"""
+
+from django.contrib import admin
+from .models import GeocodedAddress
+
+
+@admin.register(GeocodedAddress)
+class GeocodedAddressAdmin(admin.ModelAdmin):
+    """
+    Geocoding cache admin configuration (rows are re-resolved after a gazetteer rebuild)
+    """
+    list_display = ['query', 'address', 'precision', 'latitude', 'longitude', 'updated_at']
+    list_filter = ['precision']
+    search_fields = ['query', 'address']
@@ -0,0 +1,10 @@
+"""
+Geocoding App Configuration
+"""
+
+from django.apps import AppConfig
+
+
+class GeocodingConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.geocoding'
@@ -0,0 +1,461 @@
+"""
+Gazetteer
+
+The offline address index behind forward and reverse geocoding
+(geocoder.py).
+
+`python manage.py gazetteer addresses.csv` compiles an OpenAddresses-style
+CSV (LON, LAT, NUMBER, STREET, CITY, POSTCODE columns; .csv.gz accepted)
+into one binary file. Rows without a NUMBER are places or street centres,
+found by name. The file holds flat arrays instead of Python objects, so a
+city-scale gazetteer of a million addresses takes about 30 MB per process:
+
+  * records, one per address, sorted by street and then house number.
+    Each record stores latitude and longitude in micro-degrees, the house
+    number and a postcode. A street's records are
+    records[street_starts[s]:street_starts[s + 1]].
+  * a prefix index for autocomplete. It holds every street name, plus
+    each suffix of the name that starts at a word ("w 42nd st",
+    "42nd st"), sorted and searched with bisect.
+  * a spatial grid for reverse lookup. Every record's cell key (row and
+    column of ~CELL_METRES cells) is sorted, with the record numbers kept
+    in the same order. A lookup walks the rings of cells around the point
+    until no closer record can exist.
+
+Forward lookup finds streets by prefix and then the house number by binary
+search. A missing number is interpolated between the neighbours on the same
+side of the street.
+"""
+
+import bisect
+import csv
+import gzip
+import io
+import math
+import os
+import re
+import struct
+import sys
+import time
+import unicodedata
+from array import array
+
+METRES_PER_DEGREE = 111320.0
+
+# magic, version, cell height and width (degrees)
+HEADER = struct.Struct('<8sQdd')
+MAGIC = b'GAZETTE\x01'
+LENGTH = struct.Struct('<Q')
+# Written in this order; a typecode of None is newline-separated UTF-8 text
+SECTIONS = [
+    ('latitudes', 'i'),
+    ('longitudes', 'i'),
+    ('numbers', 'I'),
+    ('postcodes', 'I'),
+    ('street_starts', 'I'),
+    ('street_cities', 'I'),
+    ('prefix_streets', 'I'),
+    ('cell_keys', 'q'),
+    ('cell_records', 'I'),
+    ('street_names', None),
+    ('city_names', None),
+    ('postcode_names', None),
+    ('prefix_keys', None),
+]
+
+# Cell keys pack (row, column) into one sortable integer
+CELL_OFFSET = 1 << 20
+CELL_STRIDE = 1 << 21
+
+ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'av': 'ave', 'road': 'rd', 'boulevard': 'blvd',
+    'place': 'pl', 'drive': 'dr', 'lane': 'ln', 'court': 'ct', 'parkway': 'pkwy',
+    'terrace': 'ter', 'highway': 'hwy', 'square': 'sq', 'expressway': 'expy', 'plaza': 'plz',
+    'north': 'n', 'south': 's', 'east': 'e', 'west': 'w', 'saint': 'st',
+}
+# Suffixes made only of these are not worth indexing on their own
+SHORT_WORDS = set(ABBREVIATIONS.values())
+WORD = re.compile(r'[a-z0-9]+')
+HOUSE_NUMBER = re.compile(r'^\s*(\d+)(?:-\d+)?[a-zA-Z]?\s+(?=\S)')
+POSTCODE = re.compile(r'^\d{5}$')
+
+
+def words(text):
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode().lower()
+    return WORD.findall(text)
+
+
+def normalize(text):
+    """Lower-case ASCII words with street types and directions abbreviated"""
+    return ' '.join(ABBREVIATIONS.get(word, word) for word in words(text))
+
+
+def parse(query):
+    """
+    (house number or None, street words, city or '', postcode or '')
+    from "123 Atlantic Avenue, Brooklyn, NY 11217"
+    """
+    segments = query.split(',')
+    number = None
+    match = HOUSE_NUMBER.match(segments[0])
+    if match:
+        number = int(match.group(1))
+        segments[0] = segments[0][match.end():]
+    street = [ABBREVIATIONS.get(word, word) for word in words(segments[0])]
+
+    city, postcode = '', ''
+    for segment in segments[1:]:
+        rest = []
+        for word in words(segment):
+            if POSTCODE.match(word):
+                postcode = word
+            else:
+                rest.append(word)
+        # A trailing two-letter word after the city is the state
+        if rest and len(rest[-1]) == 2 and (len(rest) > 1 or city):
+            rest.pop()
+        if rest and not city:
+            city = ' '.join(rest)
+    return number, street, city, postcode
+
+
+def cell_key(row, column):
+    return (row + CELL_OFFSET) * CELL_STRIDE + column + CELL_OFFSET
+
+
+def _encode(values, typecode):
+    if typecode is None:
+        return '\n'.join(values).encode()
+    if sys.byteorder == 'big':
+        values = array(typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _decode(data, typecode):
+    if typecode is None:
+        return bytes(data).decode().split('\n')
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class Gazetteer:
+    """A loaded gazetteer; see the module docstring for the layout"""
+
+    def __init__(self, version, cell_lat, cell_lng, **sections):
+        self.version = version
+        self.cell_lat = cell_lat
+        self.cell_lng = cell_lng
+        for name, _ in SECTIONS:
+            setattr(self, name, sections[name])
+        self.cell_metres = cell_lat * METRES_PER_DEGREE
+
+    # Building
+
+    @classmethod
+    def build(cls, rows, cell_metres=100):
+        """
+        rows: (longitude, latitude, number or None, street, city, postcode)
+        """
+        streets = {}
+        normalized = {}
+        street_names, street_cities, street_keys = [], [], []
+        cities, city_names = {}, []
+        postcodes, postcode_names = {'': 0}, ['']
+        records = []
+        latitude_sum = 0.0
+        for longitude, latitude, number, street, city, postcode in rows:
+            raw = (street, city)
+            street_id = streets.get(raw)
+            if street_id is None:
+                key = (normalize(street), normalize(city))
+                if not key[0]:
+                    continue
+                street_id = normalized.get(key)
+                if street_id is None:
+                    if key[1] not in cities:
+                        cities[key[1]] = len(city_names)
+                        city_names.append(' '.join(city.split()))
+                    street_id = normalized[key] = len(street_names)
+                    street_names.append(' '.join(street.split()))
+                    street_cities.append(cities[key[1]])
+                    street_keys.append(key[0])
+                streets[raw] = street_id
+            postcode_id = postcodes.get(postcode)
+            if postcode_id is None:
+                postcode_id = postcodes[postcode] = len(postcode_names)
+                postcode_names.append(postcode.strip())
+            records.append((street_id, number or 0, round(latitude * 1e6), round(longitude * 1e6), postcode_id))
+            latitude_sum += latitude
+        records.sort()
+
+        street_starts = array('I', [0] * (len(street_names) + 1))
+        for street_id, *_ in records:
+            street_starts[street_id + 1] += 1
+        for street_id in range(len(street_names)):
+            street_starts[street_id + 1] += street_starts[street_id]
+
+        prefixes = []
+        for street_id, key in enumerate(street_keys):
+            parts = key.split()
+            for start in range(len(parts)):
+                if start == 0 or parts[start] not in SHORT_WORDS:
+                    prefixes.append((' '.join(parts[start:]), street_id))
+        prefixes.sort()
+
+        cell_lat = cell_metres / METRES_PER_DEGREE
+        mean_latitude = latitude_sum / len(records) if records else 0.0
+        cell_lng = cell_lat / math.cos(math.radians(mean_latitude))
+        cells = sorted(
+            (cell_key(math.floor(record[2] / 1e6 / cell_lat), math.floor(record[3] / 1e6 / cell_lng)), index)
+            for index, record in enumerate(records)
+        )
+
+        return cls(
+            time.time_ns() // 1000, cell_lat, cell_lng,
+            latitudes=array('i', (record[2] for record in records)),
+            longitudes=array('i', (record[3] for record in records)),
+            numbers=array('I', (record[1] for record in records)),
+            postcodes=array('I', (record[4] for record in records)),
+            street_starts=street_starts,
+            street_cities=array('I', street_cities),
+            prefix_streets=array('I', (street_id for _, street_id in prefixes)),
+            cell_keys=array('q', (key for key, _ in cells)),
+            cell_records=array('I', (index for _, index in cells)),
+            street_names=street_names,
+            city_names=city_names,
+            postcode_names=postcode_names,
+            prefix_keys=[key for key, _ in prefixes],
+        )
+
+    def save(self, path):
+        """Write to path atomically (readers may have the old file open)"""
+        path = str(path)
+        with open(path + '.tmp', 'wb') as handle:
+            handle.write(HEADER.pack(MAGIC, self.version, self.cell_lat, self.cell_lng))
+            for name, typecode in SECTIONS:
+                data = _encode(getattr(self, name), typecode)
+                handle.write(LENGTH.pack(len(data)))
+                handle.write(data)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as handle:
+            data = memoryview(handle.read())
+        magic, version, cell_lat, cell_lng = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a gazetteer file')
+        offset = HEADER.size
+        sections = {}
+        for name, typecode in SECTIONS:
+            (length,) = LENGTH.unpack_from(data, offset)
+            offset += LENGTH.size
+            sections[name] = _decode(data[offset:offset + length], typecode)
+            offset += length
+        return cls(version, cell_lat, cell_lng, **sections)
+
+    @property
+    def records(self):
+        return len(self.numbers)
+
+    def nbytes(self):
+        """Approximate memory held by the arrays and strings"""
+        total = 0
+        for name, typecode in SECTIONS:
+            values = getattr(self, name)
+            if typecode is None:
+                total += sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+            else:
+                total += values.itemsize * len(values)
+        return total
+
+    # Forward lookup
+
+    def _result(self, index, precision, latitude=None, longitude=None, street_id=None):
+        if street_id is None:
+            street_id = bisect.bisect_right(self.street_starts, index) - 1
+        parts = []
+        number = self.numbers[index] if precision == 'exact' else None
+        street = self.street_names[street_id]
+        parts.append(f'{number} {street}' if number else street)
+        city = self.city_names[self.street_cities[street_id]]
+        postcode = self.postcode_names[self.postcodes[index]]
+        locality = ' '.join(part for part in (city, postcode) if part)
+        if locality:
+            parts.append(locality)
+        return {
+            'address': ', '.join(parts),
+            'latitude': round((latitude if latitude is not None else self.latitudes[index] / 1e6), 6),
+            'longitude': round((longitude if longitude is not None else self.longitudes[index] / 1e6), 6),
+            'precision': precision,
+        }
+
+    def _locate(self, street_id, number):
+        """Result for a house number (or the street itself) on one street"""
+        start, end = self.street_starts[street_id], self.street_starts[street_id + 1]
+        if start == end:
+            return None
+        if not number:
+            # A place/centre record sorts first; otherwise the middle address
+            index = start if self.numbers[start] == 0 else (start + end) // 2
+            return self._result(index, 'place' if self.numbers[start] == 0 else 'street', street_id=street_id)
+        position = bisect.bisect_left(self.numbers, number, start, end)
+        if position < end and self.numbers[position] == number:
+            return self._result(position, 'exact', street_id=street_id)
+
+        # Nearest numbered neighbours on the same side of the street
+        below = next((index for index in range(position - 1, max(start, position - 8) - 1, -1)
+                      if self.numbers[index] and self.numbers[index] % 2 == number % 2), None)
+        above = next((index for index in range(position, min(end, position + 8))
+                      if self.numbers[index] % 2 == number % 2), None)
+        if below is None or above is None:
+            nearest = below if below is not None else above
+            if nearest is None:
+                nearest = min(max(position, start), end - 1)
+            return self._result(nearest, 'street', street_id=street_id)
+        share = (number - self.numbers[below]) / (self.numbers[above] - self.numbers[below])
+        latitude = (self.latitudes[below] + share * (self.latitudes[above] - self.latitudes[below])) / 1e6
+        longitude = (self.longitudes[below] + share * (self.longitudes[above] - self.longitudes[below])) / 1e6
+        result = self._result(below, 'interpolated', latitude, longitude, street_id=street_id)
+        result['address'] = f'{number} {result["address"]}'
+        return result
+
+    def _streets(self, street, max_scan, partial):
+        """Street ids whose name (or a word suffix of it) starts with the street words"""
+        if not street:
+            return []
+        variants = [' '.join(street)]
+        if partial:
+            # The last word may be half of a street type still being typed ("aven")
+            last = street[-1]
+            head = ' '.join(street[:-1])
+            variants += [
+                f'{head} {short}'.strip() for full, short in ABBREVIATIONS.items()
+                if full.startswith(last) and full != last
+            ]
+        found = {}
+        for prefix in variants:
+            position = bisect.bisect_left(self.prefix_keys, prefix)
+            for index in range(position, min(position + max_scan, len(self.prefix_keys))):
+                key = self.prefix_keys[index]
+                if not key.startswith(prefix):
+                    break
+                street_id = self.prefix_streets[index]
+                # Whole-name matches first, then shorter names
+                rank = (key != prefix, len(key))
+                if street_id not in found or rank < found[street_id]:
+                    found[street_id] = rank
+        return sorted(found, key=found.get)
+
+    def search(self, query, limit=10, max_scan=500, partial=True):
+        """Best matches for a typed address, as result dicts"""
+        number, street, city, postcode = parse(query)
+        street_ids = self._streets(street, max_scan, partial)
+        # "123 atlantic ave brooklyn": try the last words as the city
+        guessed = False
+        drop = 1
+        while not street_ids and not city and drop < min(len(street), 4):
+            street_ids = self._streets(street[:-drop], max_scan, partial=False)
+            if street_ids:
+                city, guessed = ' '.join(street[-drop:]), True
+            drop += 1
+        if city:
+            city = ' '.join(ABBREVIATIONS.get(word, word) for word in city.split())
+            in_city = [
+                street_id for street_id in street_ids
+                if normalize(self.city_names[self.street_cities[street_id]]).startswith(city)
+            ]
+            # A city given after a comma may just be wrong; a guessed one must match
+            street_ids = in_city if in_city or guessed else street_ids
+
+        results = []
+        for street_id in street_ids:
+            result = self._locate(street_id, number)
+            if result is not None:
+                if postcode and not result['address'].endswith(postcode):
+                    # Same street name elsewhere: rank below postcode matches
+                    results.append((1, len(results), result))
+                else:
+                    results.append((0, len(results), result))
+            if len(results) >= limit * 2:
+                break
+        return [result for _, _, result in sorted(results)[:limit]]
+
+    def geocode(self, address, max_scan=500):
+        """The best match for a complete address, or None"""
+        results = self.search(address, limit=1, max_scan=max_scan, partial=False)
+        return results[0] if results else None
+
+    # Reverse lookup
+
+    def reverse(self, latitude, longitude, max_metres=250):
+        """The nearest address within max_metres, with its distance, or None"""
+        row = math.floor(latitude / self.cell_lat)
+        column = math.floor(longitude / self.cell_lng)
+        point_lat, point_lng = latitude * 1e6, longitude * 1e6
+        # metres per micro-degree
+        scale_lat = METRES_PER_DEGREE / 1e6
+        scale_lng = scale_lat * math.cos(math.radians(latitude))
+        latitudes, longitudes, records, hypot = self.latitudes, self.longitudes, self.cell_records, math.hypot
+        best, best_distance = None, float(max_metres)
+        rings = math.ceil(max_metres / self.cell_metres) + 1
+        for ring in range(rings + 1):
+            # Records in this ring are at least (ring - 1) cells away
+            if (ring - 1) * self.cell_metres > best_distance:
+                break
+            for cell_row in range(row - ring, row + ring + 1):
+                if cell_row in (row - ring, row + ring):
+                    spans = [(column - ring, column + ring)]
+                else:
+                    spans = [(column - ring, column - ring), (column + ring, column + ring)]
+                for first, last in spans:
+                    # Skip cells that cannot hold anything closer than the best so far
+                    gap_lat = max(0.0, cell_row * self.cell_lat - latitude, latitude - (cell_row + 1) * self.cell_lat)
+                    gap_lng = max(0.0, first * self.cell_lng - longitude, longitude - (last + 1) * self.cell_lng)
+                    if hypot(gap_lat * 1e6 * scale_lat, gap_lng * 1e6 * scale_lng) > best_distance:
+                        continue
+                    low = bisect.bisect_left(self.cell_keys, cell_key(cell_row, first))
+                    high = bisect.bisect_right(self.cell_keys, cell_key(cell_row, last))
+                    for position in range(low, high):
+                        index = records[position]
+                        distance = hypot(
+                            (latitudes[index] - point_lat) * scale_lat,
+                            (longitudes[index] - point_lng) * scale_lng,
+                        )
+                        if distance < best_distance:
+                            best, best_distance = index, distance
+        if best is None:
+            return None
+        result = self._result(best, 'exact' if self.numbers[best] else 'place')
+        result['distance_metres'] = round(best_distance, 1)
+        return result
+
+
+# Sources
+
+def read_source(path):
+    """Rows for Gazetteer.build from an OpenAddresses-style CSV (optionally gzipped)"""
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rb') as raw:
+        reader = csv.DictReader(io.TextIOWrapper(raw, encoding='utf-8', newline=''))
+        columns = {name.upper(): name for name in reader.fieldnames or []}
+        missing = {'LON', 'LAT', 'STREET'} - set(columns)
+        if missing:
+            raise ValueError(f"{path} has no {', '.join(sorted(missing))} column")
+        for row in reader:
+            try:
+                longitude = float(row[columns['LON']])
+                latitude = float(row[columns['LAT']])
+            except (TypeError, ValueError):
+                continue
+            match = re.match(r'\s*(\d+)', row.get(columns.get('NUMBER', ''), '') or '')
+            yield (
+                longitude, latitude, int(match.group(1)) if match else None,
+                row[columns['STREET']] or '',
+                row.get(columns.get('CITY', ''), '') or '',
+                row.get(columns.get('POSTCODE', ''), '') or '',
+            )
@@ -0,0 +1,211 @@
+"""
+Geocoder
+
+Forward and reverse geocoding for address entry, saved addresses and
+checkout. Queries are answered from the offline gazetteer (gazetteer.py),
+so no external service is called and nothing is paid per call.
+
+Web processes load GEOCODING['INDEX_PATH'] on first use. They check for a
+rebuilt file at most every RELOAD_SECONDS, and the old index keeps
+answering until the new one has loaded. Results pass through two caches:
+
+  * an in-process LRU of LRU_SIZE entries, for repeated queries while a
+    user types and for addresses seen again in order history
+  * GeocodedAddress rows for resolved customer addresses (the batch
+    endpoint and checkout). These are shared by every process and survive
+    restarts. Rows resolved by an older gazetteer are resolved again.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from .gazetteer import Gazetteer, normalize
+from .models import GeocodedAddress
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+def get_geocoding_setting(name):
+    defaults = {
+        'INDEX_PATH': settings.BASE_DIR / 'gazetteer.bin',
+        'CELL_METRES': 100,
+        'RELOAD_SECONDS': 5.0,
+        'LRU_SIZE': 20000,
+        'SEARCH_LIMIT': 10,
+        'MAX_SCAN': 500,
+        'MAX_REVERSE_METRES': 250,
+        'BATCH_SIZE': 100,
+    }
+    return getattr(settings, 'GEOCODING', {}).get(name, defaults[name])
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache; None is a cacheable value"""
+
+    def __init__(self, size):
+        self.size = size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key, MISSING)
+            if value is not MISSING:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class GazetteerStore:
+    """The loaded gazetteer, swapped when the index file is rebuilt"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.gazetteer = None
+        self.cache = LRUCache(get_geocoding_setting('LRU_SIZE'))
+        self.reload_seconds = get_geocoding_setting('RELOAD_SECONDS')
+        self._identity = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        """The gazetteer, or None when no index has been built"""
+        now = time.monotonic()
+        if now - self._checked >= self.reload_seconds:
+            with self._lock:
+                if now - self._checked >= self.reload_seconds:
+                    self._reload()
+                    self._checked = time.monotonic()
+        return self.gazetteer
+
+    def _reload(self):
+        path = os.fspath(self.path or get_geocoding_setting('INDEX_PATH'))
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.gazetteer = None
+            self._identity = None
+            return
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        if identity == self._identity:
+            return
+        try:
+            gazetteer = Gazetteer.load(path)
+        except (OSError, ValueError, UnicodeDecodeError):
+            logger.exception('Could not load the gazetteer %s', path)
+            return
+        self.gazetteer = gazetteer
+        self._identity = identity
+        # Cached results may come from the previous gazetteer
+        self.cache.clear()
+        logger.info('Loaded gazetteer %s: %d addresses', path, gazetteer.records)
+
+
+store = GazetteerStore()
+
+
+def search(query, limit=None):
+    """Suggestions for a partly typed address"""
+    gazetteer = store.current()
+    if gazetteer is None:
+        return []
+    limit = limit or get_geocoding_setting('SEARCH_LIMIT')
+    key = ('search', ' '.join(query.lower().split()), limit)
+    results = store.cache.get(key)
+    if results is MISSING:
+        results = gazetteer.search(query, limit=limit, max_scan=get_geocoding_setting('MAX_SCAN'))
+        store.cache.put(key, results)
+    return results
+
+
+def reverse(latitude, longitude):
+    """The nearest known address to a point, or None"""
+    gazetteer = store.current()
+    if gazetteer is None:
+        return None
+    # ~1 m; pins dropped on the same spot share an entry
+    key = ('reverse', round(float(latitude), 5), round(float(longitude), 5))
+    result = store.cache.get(key)
+    if result is MISSING:
+        result = gazetteer.reverse(key[1], key[2], get_geocoding_setting('MAX_REVERSE_METRES'))
+        store.cache.put(key, result)
+    return result
+
+
+def geocode_many(addresses):
+    """
+    Results (or None) for complete customer addresses, in order
+    Reads and fills the LRU and the GeocodedAddress cache; one query for
+    the whole batch.
+    """
+    gazetteer = store.current()
+    if gazetteer is None:
+        return [None] * len(addresses)
+    keys = [normalize(address)[:255] for address in addresses]
+    results = {}
+    texts = {}
+    for key, address in zip(keys, addresses):
+        if key in results or key in texts:
+            continue
+        cached = store.cache.get(('address', key))
+        if cached is MISSING:
+            texts[key] = address
+        else:
+            results[key] = cached
+
+    if texts:
+        stale = {}
+        for row in GeocodedAddress.objects.filter(query__in=list(texts)):
+            if row.gazetteer_version == gazetteer.version:
+                results[row.query] = row.as_result()
+            else:
+                stale[row.query] = row
+        created, updated = [], []
+        max_scan = get_geocoding_setting('MAX_SCAN')
+        for key, address in texts.items():
+            if key not in results:
+                result = results[key] = gazetteer.geocode(address, max_scan=max_scan) if key else None
+                if result is not None:
+                    row = stale.get(key) or GeocodedAddress(query=key)
+                    row.address = result['address']
+                    row.latitude = Decimal(str(result['latitude']))
+                    row.longitude = Decimal(str(result['longitude']))
+                    row.precision = result['precision']
+                    row.gazetteer_version = gazetteer.version
+                    # bulk_update does not apply auto_now
+                    row.updated_at = timezone.now()
+                    (updated if key in stale else created).append(row)
+            store.cache.put(('address', key), results[key])
+        # Another process may have resolved the same address meanwhile
+        GeocodedAddress.objects.bulk_create(created, ignore_conflicts=True)
+        GeocodedAddress.objects.bulk_update(
+            updated, ['address', 'latitude', 'longitude', 'precision', 'gazetteer_version', 'updated_at']
+        )
+    return [results[key] for key in keys]
+
+
+def geocode(address):
+    """The best match for one customer address, or None"""
+    return geocode_many([address])[0]
@@ -0,0 +1,163 @@
+"""
+Build the offline geocoding gazetteer (apps/geocoding/gazetteer.py) and benchmark it.
+
+    python manage.py gazetteer addresses.csv.gz
+    python manage.py gazetteer --synthetic 1000000
+    python manage.py gazetteer --bench
+    python manage.py gazetteer --synthetic 1000000 --bench --output /tmp/city.bin
+
+The source is an OpenAddresses-style CSV (LON, LAT, NUMBER, STREET, CITY,
+POSTCODE). --synthetic N lays out about N addresses on street grids around
+the generate_dataset cities instead. The file goes to
+GEOCODING['INDEX_PATH'], or to --output. Web processes pick it up within
+RELOAD_SECONDS.
+
+--bench loads the file and reports its memory footprint. It then times
+complete-address lookups, autocomplete prefixes and reverse lookups, in
+lookups per second, without the caches. The complete addresses are a mix
+of exact and interpolated numbers.
+"""
+
+import bisect
+import math
+import os
+import random
+import time
+import tracemalloc
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.admin_panel.management.commands.generate_dataset import CITIES, FIRST_NAMES, LAST_NAMES
+from apps.geocoding.gazetteer import Gazetteer, read_source
+from apps.geocoding.geocoder import get_geocoding_setting
+
+# Along a street: metres between neighbouring house numbers, and between its two sides
+NUMBER_SPACING = 8
+STREET_WIDTH = 12
+BLOCK_METRES = 80
+NUMBERS_PER_STREET = 400
+# Share of lots without an address point; their numbers are interpolated
+MISSING_SHARE = 0.2
+
+
+def ordinal(number):
+    suffix = 'th' if 10 <= number % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(number % 10, 'th')
+    return f'{number}{suffix}'
+
+
+def synthetic_rows(count, rng):
+    """
+    Rows for Gazetteer.build: per city, east-west numbered streets
+    ("W 42nd St", "E 42nd St") and north-south named avenues on a grid
+    """
+    names = [f'{first} {last}' for last in LAST_NAMES for first in FIRST_NAMES]
+    kinds = ['Ave', 'Blvd', 'Pl', 'Rd']
+    per_city = max(1, math.ceil(count / len(CITIES) / (NUMBERS_PER_STREET * (1 - MISSING_SHARE))))
+    for city_number, (city, (centre_lat, centre_lng)) in enumerate(CITIES.items()):
+        metres_lng = 111320 * math.cos(math.radians(centre_lat))
+        for street in range(per_city):
+            east_west = street % 2 == 0
+            position = (street // 2 - per_city // 4) * BLOCK_METRES
+            if east_west:
+                name = f"{'W' if street % 4 == 0 else 'E'} {ordinal(street // 4 + 1)} St"
+            else:
+                name = f'{names[(street // 2) % len(names)]} {kinds[(street // 2) // len(names) % len(kinds)]}'
+            for number in range(1, NUMBERS_PER_STREET + 1):
+                if rng.random() < MISSING_SHARE:
+                    continue
+                along = (number // 2) * NUMBER_SPACING - NUMBERS_PER_STREET * NUMBER_SPACING / 4
+                side = STREET_WIDTH / 2 if number % 2 else -STREET_WIDTH / 2
+                north, east = (position + side, along) if east_west else (along, position + side)
+                jitter = rng.uniform(-1.5, 1.5)
+                block = int(along // (BLOCK_METRES * 4))
+                yield (
+                    centre_lng + (east + jitter) / metres_lng,
+                    centre_lat + (north + jitter) / 111320,
+                    number,
+                    name,
+                    city,
+                    f'{10000 + city_number * 1000 + street % 50 * 10 + block % 10:05d}',
+                )
+
+
+class Command(BaseCommand):
+    help = 'Compile an address CSV (or a synthetic city) into the geocoding gazetteer, and benchmark it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', nargs='?', help='OpenAddresses-style CSV, optionally .gz')
+        parser.add_argument('--synthetic', type=int, default=0, metavar='ADDRESSES',
+                            help='Build from about this many synthetic addresses instead')
+        parser.add_argument('--output', help='Gazetteer file (default GEOCODING INDEX_PATH)')
+        parser.add_argument('--bench', action='store_true', help='Benchmark lookups on the gazetteer')
+        parser.add_argument('--queries', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        path = os.fspath(options['output'] or get_geocoding_setting('INDEX_PATH'))
+        rng = random.Random(options['seed'])
+        if options['source'] or options['synthetic']:
+            if options['source']:
+                rows = read_source(options['source'])
+            else:
+                rows = synthetic_rows(options['synthetic'], rng)
+            started = time.perf_counter()
+            gazetteer = Gazetteer.build(rows, get_geocoding_setting('CELL_METRES'))
+            if not gazetteer.records:
+                raise CommandError('No usable addresses in the source')
+            gazetteer.save(path)
+            self.stdout.write(
+                f'Built {gazetteer.records} addresses on {len(gazetteer.street_names)} streets in '
+                f'{time.perf_counter() - started:.1f}s: {path} ({os.path.getsize(path) / 2**20:.1f} MB)'
+            )
+        elif not options['bench']:
+            raise CommandError('Give a source CSV, --synthetic or --bench')
+        if options['bench']:
+            self._bench(path, rng, options['queries'])
+
+    def _bench(self, path, rng, count):
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist; build the gazetteer first')
+        tracemalloc.start()
+        started = time.perf_counter()
+        gazetteer = Gazetteer.load(path)
+        load_s = time.perf_counter() - started
+        footprint = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        self.stdout.write(
+            f'{gazetteer.records} addresses loaded in {load_s * 1000:.0f} ms; '
+            f'{footprint / 2**20:.1f} MB per process ({footprint / gazetteer.records:.0f} bytes per address)'
+        )
+
+        addresses, prefixes, points = [], [], []
+        for _ in range(count):
+            index = rng.randrange(gazetteer.records)
+            street_id = bisect.bisect_right(gazetteer.street_starts, index) - 1
+            street = gazetteer.street_names[street_id]
+            city = gazetteer.city_names[gazetteer.street_cities[street_id]]
+            # Neighbouring numbers without an address point of their own are interpolated
+            number = gazetteer.numbers[index] + rng.choice([0, 0, 0, 2, 4])
+            addresses.append(f'{number} {street}, {city}')
+            prefixes.append(f'{number} {street[:rng.randint(3, max(3, len(street)))]}')
+            points.append((
+                gazetteer.latitudes[index] / 1e6 + rng.uniform(-0.0003, 0.0003),
+                gazetteer.longitudes[index] / 1e6 + rng.uniform(-0.0003, 0.0003),
+            ))
+
+        precisions = Counter(
+            result['precision'] if result else 'not found' for result in map(gazetteer.geocode, addresses[:1000])
+        )
+        self.stdout.write('1000 sampled addresses: ' + ', '.join(
+            f'{count} {precision}' for precision, count in precisions.most_common()
+        ))
+        self._time('forward (complete address)', lambda: [gazetteer.geocode(query) for query in addresses])
+        self._time('forward (autocomplete)', lambda: [gazetteer.search(query, limit=5) for query in prefixes])
+        self._time('reverse', lambda: [gazetteer.reverse(latitude, longitude) for latitude, longitude in points])
+
+    def _time(self, label, run):
+        started = time.perf_counter()
+        results = run()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{label:<28}{len(results) / elapsed:>10,.0f} lookups/s  ({elapsed / len(results) * 1e6:.0f} us each)'
+        )
@@ -0,0 +1,50 @@
+"""
+Geocoding Models
+
+Persistent cache of resolved customer addresses (see geocoder.py).
+"""
+
+from django.db import models
+import uuid
+
+
+class GeocodedAddress(models.Model):
+    """
+    An address resolved by the gazetteer, shared by every process
+    Rows resolved by an older gazetteer version are resolved again when read.
+    """
+    
+    PRECISIONS = [
+        ('exact', 'Exact address'),
+        ('interpolated', 'Interpolated along the street'),
+        ('street', 'Street'),
+        ('place', 'Place'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Normalized address text (gazetteer.normalize)
+    query = models.CharField(max_length=255, unique=True)
+    address = models.CharField(max_length=255)
+    latitude = models.DecimalField(max_digits=10, decimal_places=7)
+    longitude = models.DecimalField(max_digits=10, decimal_places=7)
+    precision = models.CharField(max_length=20, choices=PRECISIONS)
+    gazetteer_version = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'geocoded_addresses'
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.query} -> {self.address}"
+    
+    def as_result(self):
+        return {
+            'address': self.address,
+            'latitude': float(self.latitude),
+            'longitude': float(self.longitude),
+            'precision': self.precision,
+        }
@@ -0,0 +1,53 @@
+"""
+Geocoding Serializers
+
+Input validation for the geocoding endpoints.
+"""
+
+import math
+
+from rest_framework import serializers
+
+from .geocoder import get_geocoding_setting
+
+
+class PointSerializer(serializers.Serializer):
+    """
+    A coordinate to reverse geocode
+    """
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+
+    def validate_latitude(self, value):
+        return finite(value)
+
+    def validate_longitude(self, value):
+        return finite(value)
+
+
+def finite(value):
+    # NaN passes the min/max checks because every comparison with it is false
+    if math.isnan(value):
+        raise serializers.ValidationError('A valid number is required.')
+    return value
+
+
+class GeocodeBatchSerializer(serializers.Serializer):
+    """
+    Addresses and points resolved in one call
+    Matches frontend locationService saved addresses and order history
+    """
+    addresses = serializers.ListField(
+        child=serializers.CharField(max_length=255, allow_blank=True), required=False, default=list
+    )
+    points = PointSerializer(many=True, required=False, default=list)
+    
+    def validate(self, attrs):
+        size = len(attrs['addresses']) + len(attrs['points'])
+        if not size:
+            raise serializers.ValidationError('Send at least one address or point.')
+        if size > get_geocoding_setting('BATCH_SIZE'):
+            raise serializers.ValidationError(
+                f"At most {get_geocoding_setting('BATCH_SIZE')} addresses and points per call."
+            )
+        return attrs
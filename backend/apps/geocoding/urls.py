@@ -0,0 +1,14 @@
+"""
+Geocoding URL Configuration
+"""
+
+from django.urls import path
+from . import views
+
+app_name = 'geocoding'
+
+urlpatterns = [
+    path('search/', views.search, name='search'),
+    path('reverse/', views.reverse, name='reverse'),
+    path('batch/', views.batch, name='batch'),
+]
@@ -0,0 +1,88 @@
+"""
+Geocoding Views
+
+Address lookup from the offline gazetteer, replacing the mocked
+frontend locationService geocoding methods.
+"""
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+
+from . import geocoder
+from .serializers import GeocodeBatchSerializer, PointSerializer
+
+MIN_QUERY_LENGTH = 3
+
+
+def unavailable():
+    return Response({
+        'success': False,
+        'error': 'Geocoding is not available; build the gazetteer first'
+    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search(request):
+    """
+    Address suggestions for a partly typed address
+    Matches frontend locationService.geocodeAddress()
+    """
+    if geocoder.store.current() is None:
+        return unavailable()
+    query = request.query_params.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 5)), geocoder.get_geocoding_setting('SEARCH_LIMIT')))
+    except ValueError:
+        limit = 5
+    return Response({
+        'success': True,
+        'results': geocoder.search(query, limit) if len(query) >= MIN_QUERY_LENGTH else []
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def reverse(request):
+    """
+    Nearest address to a coordinate
+    Matches frontend locationService.reverseGeocodeLocation()
+    """
+    serializer = PointSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if geocoder.store.current() is None:
+        return unavailable()
+    point = serializer.validated_data
+    return Response({
+        'success': True,
+        'result': geocoder.reverse(point['latitude'], point['longitude'])
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch(request):
+    """
+    Resolve many addresses and points in one call (saved addresses, order history)
+    Results come back in request order; null where nothing matched
+    """
+    serializer = GeocodeBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if geocoder.store.current() is None:
+        return unavailable()
+    data = serializer.validated_data
+    return Response({
+        'success': True,
+        'addresses': geocoder.geocode_many(data['addresses']),
+        'points': [geocoder.reverse(point['latitude'], point['longitude']) for point in data['points']],
+    }, status=status.HTTP_200_OK)
@@ -0,0 +1,17 @@
+"""
+Media Asset Admin Configuration
+"""
+
+from django.contrib import admin
+from .models import ImageAsset
+
+
+@admin.register(ImageAsset)
+class ImageAssetAdmin(admin.ModelAdmin):
+    """
+    Image asset admin configuration
+    """
+    list_display = ['content_hash', 'kind', 'status', 'original_bytes', 'created_at']
+    list_filter = ['kind', 'status']
+    search_fields = ['content_hash', 'original']
+    readonly_fields = ['variants']
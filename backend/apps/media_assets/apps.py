@@ -0,0 +1,10 @@
+"""
+Media Assets App Configuration
+"""
+
+from django.apps import AppConfig
+
+
+class MediaAssetsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.media_assets'
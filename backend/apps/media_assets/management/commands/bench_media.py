@@ -0,0 +1,123 @@
+"""
+Benchmark the image upload pipeline.
+
+Compares storing uploads as-is with the content-addressed pipeline:
+  * upload latency as seen by the request (p50 / p95)
+  * image bytes a restaurant list screen downloads for one page of cards
+
+Runs against a temporary MEDIA_ROOT and rolls back its database rows.
+
+    python manage.py bench_media --images 40 --page-size 20
+"""
+
+import random
+import statistics
+import tempfile
+import time
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from apps.media_assets import pipeline
+
+
+def synthetic_photo(rng, width=1600, height=1200):
+    """A noisy gradient JPEG, roughly the size of a phone photo upload"""
+    from PIL import Image
+
+    base = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    noise = Image.effect_noise((width, height), rng.randint(20, 60)).convert('RGB')
+    image = Image.blend(base, noise, 0.35)
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=92)
+    return buffer.getvalue()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Measure upload latency and list-screen image bytes before and after the media pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=40)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--card-width', type=int, default=320,
+                            help='Variant width a restaurant card requests')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.stdout.write(f"Generating {options['images']} synthetic uploads...")
+        uploads = [synthetic_photo(rng) for _ in range(options['images'])]
+
+        with tempfile.TemporaryDirectory() as media_root, \
+                override_settings(MEDIA_ROOT=media_root):
+            before = self._store_as_is(uploads)
+            after, assets = self._store_with_pipeline(uploads)
+            self._report('as-is', before)
+            self._report('pipeline', after)
+            self._report_bytes(uploads, assets, options['page_size'], options['card_width'])
+
+    def _store_as_is(self, uploads):
+        timings = []
+        for index, content in enumerate(uploads):
+            start = time.perf_counter()
+            default_storage.save(f'restaurant_images/bench-{index}.jpg', ContentFile(content))
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def _store_with_pipeline(self, uploads):
+        timings = []
+        with transaction.atomic():
+            assets = []
+            for index, content in enumerate(uploads):
+                start = time.perf_counter()
+                assets.append(pipeline.store_image(
+                    ContentFile(content, name=f'bench-{index}.jpg'), 'restaurant'
+                ))
+                timings.append((time.perf_counter() - start) * 1000)
+
+            # on_commit never fires inside this rolled-back block, so render here
+            futures = [
+                pipeline.get_executor().submit(
+                    pipeline.render_variants,
+                    str(default_storage.location),
+                    asset.original,
+                    asset.content_hash,
+                    pipeline.VARIANT_WIDTHS[asset.kind],
+                    pipeline.get_pipeline_setting('WEBP_QUALITY'),
+                    pipeline.get_pipeline_setting('JPEG_QUALITY'),
+                )
+                for asset in assets
+            ]
+            rendered = [future.result() for future in futures]
+            transaction.set_rollback(True)
+        return timings, rendered
+
+    def _report(self, label, timings):
+        self.stdout.write(
+            f"{label:>9} upload latency: p50={statistics.median(timings):.2f} ms "
+            f"p95={percentile(timings, 95):.2f} ms max={max(timings):.2f} ms"
+        )
+
+    def _report_bytes(self, uploads, rendered, page_size, card_width):
+        page_before = sum(len(content) for content in uploads[:page_size])
+        page_after = 0
+        for result in rendered[:page_size]:
+            widths = sorted(int(width) for width in result['variants'])
+            chosen = next((width for width in widths if width >= card_width), widths[-1])
+            page_after += result['variants'][str(chosen)]['bytes']['webp']
+
+        self.stdout.write(
+            f"restaurant list page ({page_size} cards, {card_width}px webp): "
+            f"before={page_before / 1024:.1f} KiB after={page_after / 1024:.1f} KiB "
+            f"({page_before / max(page_after, 1):.1f}x smaller)"
+        )
@@ -0,0 +1,58 @@
+"""
+Media Asset Models
+
+Uploaded images are stored once per content hash and kind. Responsive
+thumbnails and WebP variants are rendered in the background and recorded on
+the asset.
+"""
+
+from django.db import models
+import uuid
+
+
+class ImageAsset(models.Model):
+    """
+    A content-addressed uploaded image and its rendered variants
+    """
+
+    KINDS = [
+        ('avatar', 'User Avatar'),
+        ('restaurant', 'Restaurant Image'),
+        ('menu', 'Menu Item Image'),
+    ]
+
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    content_hash = models.CharField(max_length=64)
+    kind = models.CharField(max_length=20, choices=KINDS)
+    original = models.CharField(max_length=255)
+    original_bytes = models.PositiveIntegerField(default=0)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+
+    # {"320": {"webp": "assets/ab/<hash>-320.webp", "jpeg": "...", "bytes": {...}}}
+    variants = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUSES, default='pending')
+    error_message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'media_image_assets'
+        constraints = [
+            # Variant widths depend on the kind, so each kind gets its own asset
+            models.UniqueConstraint(fields=['content_hash', 'kind'], name='unique_image_asset'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'status']),
+            models.Index(fields=['updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} image {self.content_hash[:12]} ({self.status})"
@@ -0,0 +1,282 @@
+"""
+Image Upload Pipeline
+
+Uploads are hashed and stored once under a content-addressed path, so the
+same picture uploaded twice (or by two restaurants) shares one file. Assets
+are keyed on (content hash, kind) because each kind renders different
+widths; a menu photo reused as a restaurant banner gets its own asset but
+still shares the original file. The
+request only pays for hashing and writing the original; thumbnails and WebP
+variants are rendered in a background process pool and recorded on the
+ImageAsset when they are done. Until then clients get the original URL as a
+placeholder.
+
+Every file under ``assets/`` is named after its content hash, so it can be
+served with a one-year immutable cache header.
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import ImageAsset
+
+logger = logging.getLogger(__name__)
+
+# Target widths per image kind, matched to how the mobile app displays them
+VARIANT_WIDTHS = {
+    'avatar': (64, 128, 256),
+    'restaurant': (320, 640, 1280),
+    'menu': (160, 320, 640),
+}
+
+ASSET_PREFIX = 'assets'
+ALLOWED_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+_executor = None
+
+
+class InvalidImage(ValueError):
+    """Raised when an upload is not an image we can process"""
+
+
+def get_pipeline_setting(name):
+    defaults = {'WORKERS': 2, 'SYNC': False, 'WEBP_QUALITY': 80, 'JPEG_QUALITY': 82}
+    return getattr(settings, 'MEDIA_PIPELINE', {}).get(name, defaults[name])
+
+
+def get_executor():
+    """Lazily start the shared process pool used for rendering variants"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=get_pipeline_setting('WORKERS'))
+    return _executor
+
+
+def asset_name(content_hash, suffix):
+    """Storage name for a content-addressed file, fanned out by hash prefix"""
+    return f"{ASSET_PREFIX}/{content_hash[:2]}/{content_hash}{suffix}"
+
+
+def hash_upload(uploaded_file):
+    """Return (sha256 hexdigest, size) of an uploaded file without loading it whole"""
+    digest = hashlib.sha256()
+    size = 0
+    uploaded_file.seek(0)
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest(), size
+
+
+def _detect_format(uploaded_file):
+    from PIL import Image
+
+    try:
+        with Image.open(uploaded_file) as image:
+            image_format = image.format
+            image.verify()
+    except Exception as exc:
+        raise InvalidImage('Upload a valid image file.') from exc
+    finally:
+        uploaded_file.seek(0)
+
+    if image_format not in ALLOWED_FORMATS:
+        raise InvalidImage(f'Unsupported image format: {image_format}.')
+    return ALLOWED_FORMATS[image_format]
+
+
+def store_image(uploaded_file, kind):
+    """
+    Store an uploaded image and schedule its variants.
+
+    Returns the existing ImageAsset when the same content was uploaded before
+    for the same kind. If rendering that asset failed, it is queued again.
+    """
+    if kind not in VARIANT_WIDTHS:
+        raise ValueError(f'Unknown image kind: {kind}')
+
+    content_hash, size = hash_upload(uploaded_file)
+    existing = ImageAsset.objects.filter(content_hash=content_hash, kind=kind).first()
+    if existing is not None:
+        if existing.status == 'failed':
+            _requeue(existing, uploaded_file)
+        return existing
+
+    extension = _detect_format(uploaded_file)
+    name = asset_name(content_hash, f'.{extension}')
+    if not default_storage.exists(name):
+        name = default_storage.save(name, uploaded_file)
+
+    try:
+        with transaction.atomic():
+            asset = ImageAsset.objects.create(
+                content_hash=content_hash,
+                kind=kind,
+                original=name,
+                original_bytes=size,
+            )
+    except IntegrityError:
+        # Another request stored the same content first
+        return ImageAsset.objects.get(content_hash=content_hash, kind=kind)
+
+    transaction.on_commit(lambda: schedule_variants(asset))
+    return asset
+
+
+def _requeue(asset, uploaded_file):
+    """Render a failed asset again from a fresh upload of the same content"""
+    # Only the request that moves it back to pending schedules the render
+    requeued = ImageAsset.objects.filter(pk=asset.pk, status='failed').update(
+        status='pending', error_message='', updated_at=timezone.now()
+    )
+    if not requeued:
+        return
+    asset.status, asset.error_message = 'pending', ''
+    if not default_storage.exists(asset.original):
+        default_storage.save(asset.original, uploaded_file)
+    transaction.on_commit(lambda: schedule_variants(asset))
+
+
+def schedule_variants(asset):
+    """Render variants for an asset in the process pool (or inline in SYNC mode)"""
+    args = (
+        os.fspath(settings.MEDIA_ROOT),
+        asset.original,
+        asset.content_hash,
+        VARIANT_WIDTHS[asset.kind],
+        get_pipeline_setting('WEBP_QUALITY'),
+        get_pipeline_setting('JPEG_QUALITY'),
+    )
+    if get_pipeline_setting('SYNC'):
+        try:
+            result = render_variants(*args)
+        except Exception as exc:
+            _mark_failed(asset.pk, exc)
+        else:
+            _mark_ready(asset.pk, result)
+        return None
+
+    future = get_executor().submit(render_variants, *args)
+    future.add_done_callback(lambda done: _on_rendered(asset.pk, done))
+    return future
+
+
+def _on_rendered(asset_pk, future):
+    # Runs on the executor's management thread, which has its own DB connection
+    close_old_connections()
+    try:
+        exc = future.exception()
+        if exc is not None:
+            _mark_failed(asset_pk, exc)
+        else:
+            _mark_ready(asset_pk, future.result())
+    finally:
+        close_old_connections()
+
+
+def _mark_ready(asset_pk, result):
+    ImageAsset.objects.filter(pk=asset_pk).update(
+        status='ready',
+        width=result['width'],
+        height=result['height'],
+        variants=result['variants'],
+        error_message='',
+        # update() skips auto_now; the catalogue snapshot fingerprint reads it
+        updated_at=timezone.now(),
+    )
+
+
+def _mark_failed(asset_pk, exc):
+    logger.warning('Rendering image asset %s failed: %s', asset_pk, exc)
+    ImageAsset.objects.filter(pk=asset_pk).update(
+        status='failed', error_message=str(exc), updated_at=timezone.now()
+    )
+
+
+def render_variants(media_root, original, content_hash, widths, webp_quality, jpeg_quality):
+    """
+    Render resized WebP and JPEG variants of an original image.
+
+    Runs in a worker process, so it only touches the filesystem, never the DB.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(os.path.join(media_root, original)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        width, height = image.size
+
+        variants = {}
+        for target in sorted(widths):
+            # Never upscale; the smallest variant is always produced
+            if target > width and variants:
+                break
+            resized = image
+            if target < width:
+                resized = image.resize(
+                    (target, max(1, round(height * target / width))),
+                    Image.Resampling.LANCZOS,
+                )
+
+            entry = {'bytes': {}}
+            for image_format, extension, options in (
+                ('WEBP', 'webp', {'quality': webp_quality, 'method': 4}),
+                ('JPEG', 'jpg', {'quality': jpeg_quality, 'optimize': True, 'progressive': True}),
+            ):
+                buffer = BytesIO()
+                resized.save(buffer, image_format, **options)
+                name = asset_name(content_hash, f'-{target}.{extension}')
+                path = os.path.join(media_root, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as handle:
+                    handle.write(buffer.getvalue())
+                entry[extension] = name
+                entry['bytes'][extension] = buffer.tell()
+            variants[str(min(target, width))] = entry
+
+    return {'width': width, 'height': height, 'variants': variants}
+
+
+def image_urls(asset):
+    """
+    Client-facing URLs for an asset.
+
+    While variants are rendering the original is returned as a placeholder
+    so the upload response never waits on the pool.
+    """
+    if asset is None:
+        return None
+
+    original_url = default_storage.url(asset.original)
+    if asset.status != 'ready':
+        return {'status': asset.status, 'url': original_url, 'srcset': {}}
+
+    widths = sorted(asset.variants, key=int)
+    return {
+        'status': 'ready',
+        'url': default_storage.url(asset.variants[widths[-1]]['webp']),
+        'original': original_url,
+        'srcset': {
+            width: {
+                'webp': default_storage.url(asset.variants[width]['webp']),
+                'jpeg': default_storage.url(asset.variants[width]['jpg']),
+            }
+            for width in widths
+        },
+    }
+
+
+def save_generated_image(content, kind, name='upload'):
+    """Store raw image bytes (fixtures, imports) through the same pipeline"""
+    return store_image(ContentFile(content, name=name), kind)
@@ -0,0 +1,19 @@
+"""
+Media Asset Views
+"""
+
+from django.views.static import serve
+
+# Content-addressed files never change, so clients and CDNs may keep them forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def serve_asset(request, path, document_root=None):
+    """
+    Serve a content-addressed media file with a long-lived immutable cache header.
+    Used in development; in production the web server applies the same header
+    to MEDIA_URL/assets/.
+    """
+    response = serve(request, path, document_root=document_root)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
@@ -1 +1,17 @@
-from django.contrib import admin
\ No newline at end of file
+"""
+Notification Admin Configuration
+"""
+
+from django.contrib import admin
+from .models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    """
+    Notification admin configuration
+    """
+    list_display = ['title', 'user', 'type', 'is_read', 'is_priority', 'created_at']
+    list_filter = ['type', 'is_read', 'is_priority']
+    search_fields = ['title', 'user__email']
+    raw_id_fields = ['user']
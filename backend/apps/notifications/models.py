@@ -1 +1,57 @@
-from django.db import models
\ No newline at end of file
+"""
+Notification Models
+
+This module defines in-app notifications matching the frontend
+AppNotification interface in notificationService.ts.
+"""
+
+from django.conf import settings
+from django.db import models
+import uuid
+
+
+class Notification(models.Model):
+    """
+    In-app notification
+    Matches the frontend AppNotification interface
+    """
+    
+    TYPES = [
+        ('order_update', 'Order Update'),
+        ('delivery_update', 'Delivery Update'),
+        ('payment_update', 'Payment Update'),
+        ('promotion', 'Promotion'),
+        ('system_alert', 'System Alert'),
+        ('chat_message', 'Chat Message'),
+        ('rating_reminder', 'Rating Reminder'),
+        ('schedule_reminder', 'Schedule Reminder'),
+        ('restaurant_new', 'New Restaurant'),
+        ('system', 'System'),
+        ('payment', 'Payment'),
+        ('delivery', 'Delivery'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    type = models.CharField(max_length=30, choices=TYPES)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    action_url = models.CharField(max_length=255, blank=True)
+    image_url = models.CharField(max_length=255, blank=True)
+    
+    is_read = models.BooleanField(default=False)
+    is_priority = models.BooleanField(default=False)
+    is_pinned = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'notifications'
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'is_read']),
+        ]
+    
+    def __str__(self):
+        return f"{self.type}: {self.title}"
@@ -0,0 +1,28 @@
+"""
+Notification Serializers
+"""
+
+from rest_framework import serializers
+
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """
+    Notification serializer that matches the frontend AppNotification interface
+    """
+    
+    class Meta:
+        model = Notification
+        fields = [
+            'id', 'type', 'title', 'message', 'data', 'action_url', 'image_url',
+            'is_read', 'is_priority', 'is_pinned', 'created_at', 'expires_at'
+        ]
+        read_only_fields = fields
+
+
+class MarkReadSerializer(serializers.Serializer):
+    """
+    Notification ids to mark as read
+    """
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
@@ -0,0 +1,43 @@
+"""
+Notification Tasks
+
+Background tasks that create in-app notifications, run by `run_tasks`.
+"""
+
+from apps.orders.models import Order
+from apps.tasks.queue import task
+from .models import Notification
+
+# order status -> (title, message)
+ORDER_STATUS_MESSAGES = {
+    'confirmed': ('Order confirmed', '{restaurant} has confirmed your order.'),
+    'preparing': ('Preparing your order', '{restaurant} is preparing your order.'),
+    'out_for_delivery': ('On the way', 'Your order from {restaurant} is on its way.'),
+    'delivered': ('Order delivered', 'Your order from {restaurant} has been delivered. Enjoy!'),
+    'cancelled': ('Order cancelled', 'Your order from {restaurant} was cancelled.'),
+}
+
+
+@task(queue='notifications', priority=5)
+def notify_order_status(order_id, status):
+    """Tell the customer their order moved to `status`"""
+    if status not in ORDER_STATUS_MESSAGES:
+        return
+    order = Order.objects.select_related('restaurant').filter(pk=order_id).first()
+    if order is None:
+        return
+    data = {'order_id': str(order.pk), 'status': status}
+    # Tasks can run twice; one notification per order and status
+    if Notification.objects.filter(user_id=order.customer_id, type='order_update', data__order_id=data['order_id'],
+                                   data__status=status).exists():
+        return
+    title, message = ORDER_STATUS_MESSAGES[status]
+    Notification.objects.create(
+        user_id=order.customer_id,
+        type='order_update',
+        title=title,
+        message=message.format(restaurant=order.restaurant.name),
+        data=data,
+        action_url=f'/tracking/{order.pk}',
+        is_priority=status in ('out_for_delivery', 'delivered'),
+    )
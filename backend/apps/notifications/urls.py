@@ -3,5 +3,7 @@ from . import views
 
 app_name = 'notifications'
 urlpatterns = [
-    path('', views.index, name='index'),
-]
\ No newline at end of file
+    path('', views.notification_list, name='notification_list'),
+    path('unread-count/', views.unread_count, name='unread_count'),
+    path('read/', views.mark_read, name='mark_read'),
+]
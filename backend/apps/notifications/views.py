@@ -1,6 +1,83 @@
-from rest_framework.decorators import api_view
+"""
+Notification Views
+
+This module contains API views that match the frontend notificationService methods.
+"""
+
+from django.db import transaction
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from apps.sync.changes import record_changes
+from .models import Notification
+from .serializers import NotificationSerializer, MarkReadSerializer
+
+
+def mark_notifications_read(user, ids=None):
+    """Mark the user's unread notifications (or just `ids`) as read; returns the count"""
+    notifications = Notification.objects.filter(user=user, is_read=False)
+    if ids:
+        notifications = notifications.filter(pk__in=ids)
+    changed = list(notifications.values_list('pk', flat=True))
+    with transaction.atomic():
+        updated = Notification.objects.filter(pk__in=changed).update(is_read=True)
+        record_changes('notification', [(pk, user.pk) for pk in changed])
+    return updated
+
+
 @api_view(['GET'])
-def index(request):
-    return Response({'status': 'notifications service ready'})
\ No newline at end of file
+@permission_classes([IsAuthenticated])
+def notification_list(request):
+    """
+    Get the user's notifications, pinned first
+    Matches frontend notificationService.getNotifications()
+    """
+    notifications = Notification.objects.filter(user=request.user).order_by('-is_pinned', '-created_at')
+    if request.query_params.get('unread') in ('true', '1'):
+        notifications = notifications.filter(is_read=False)
+    
+    paginator = PageNumberPagination()
+    page = paginator.paginate_queryset(notifications, request)
+    return Response({
+        'success': True,
+        'count': paginator.page.paginator.count,
+        'next': paginator.get_next_link(),
+        'notifications': NotificationSerializer(page, many=True).data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def unread_count(request):
+    """
+    Count of unread notifications
+    Matches frontend notificationService.getUnreadCount()
+    """
+    return Response({
+        'success': True,
+        'unread_count': Notification.objects.filter(user=request.user, is_read=False).count()
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_read(request):
+    """
+    Mark notifications as read; all of them when no ids are given
+    Matches frontend notificationService.markAsRead() / markAllAsRead()
+    """
+    serializer = MarkReadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    updated = mark_notifications_read(request.user, serializer.validated_data['ids'])
+    return Response({
+        'success': True,
+        'updated': updated
+    }, status=status.HTTP_200_OK)
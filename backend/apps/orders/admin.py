@@ -1,2 +1,34 @@
+"""
+Order Admin Configuration
+"""
+
 from django.contrib import admin
-# Order admin will be implemented here
\ No newline at end of file
+from .models import Order, OrderItem, OrderTimer
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    raw_id_fields = ['menu_item']
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    """
+    Order admin configuration
+    """
+    list_display = ['id', 'customer', 'restaurant', 'status', 'total', 'created_at']
+    list_filter = ['status', 'payment_method', 'created_at']
+    search_fields = ['id', 'customer__email', 'restaurant__name']
+    raw_id_fields = ['customer', 'restaurant']
+    inlines = [OrderItemInline]
+
+
+@admin.register(OrderTimer)
+class OrderTimerAdmin(admin.ModelAdmin):
+    """
+    Scheduled order timer admin configuration
+    """
+    list_display = ['order', 'action', 'due_at', 'fired_at']
+    list_filter = ['action', 'fired_at']
+    raw_id_fields = ['order']
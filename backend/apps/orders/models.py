@@ -1,2 +1,121 @@
+"""
+Order Models
+
+This module defines orders and order items matching the frontend Order and
+OrderItem interfaces in ordersService.ts.
+"""
+
+from django.conf import settings
 from django.db import models
-# Order models will be implemented here
\ No newline at end of file
+import uuid
+
+
+class Order(models.Model):
+    """
+    Customer order
+    Matches the frontend Order interface
+    """
+    
+    STATUSES = [
+        ('scheduled', 'Scheduled'),
+        ('pending', 'Pending'),
+        ('confirmed', 'Confirmed'),
+        ('preparing', 'Preparing'),
+        ('out_for_delivery', 'Out for Delivery'),
+        ('delivered', 'Delivered'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    ACTIVE_STATUSES = ['scheduled', 'pending', 'confirmed', 'preparing', 'out_for_delivery']
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    customer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='orders')
+    restaurant = models.ForeignKey('restaurants.Restaurant', on_delete=models.PROTECT, related_name='orders')
+    status = models.CharField(max_length=20, choices=STATUSES, default='pending')
+    
+    # Pricing
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2)
+    delivery_fee = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    tax = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    discount = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    total = models.DecimalField(max_digits=10, decimal_places=2)
+    promo_code = models.CharField(max_length=50, blank=True)
+    payment_method = models.CharField(max_length=50)
+    
+    # Delivery details
+    delivery_address = models.TextField()
+    delivery_latitude = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True)
+    delivery_longitude = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True)
+    special_instructions = models.TextField(blank=True)
+    
+    # Requested delivery time of a pre-order; see scheduler.py for when it is
+    # released to the restaurant and dispatched
+    scheduled_for = models.DateTimeField(null=True, blank=True)
+    estimated_delivery = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'orders'
+        indexes = [
+            models.Index(fields=['customer', '-created_at']),
+            models.Index(fields=['restaurant', 'status']),
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Order {self.id} ({self.status})"
+
+
+class OrderItem(models.Model):
+    """
+    Line item of an order
+    Name and price are copied from the menu so later menu edits do not change past orders
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    menu_item = models.ForeignKey(
+        'restaurants.MenuItem', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='order_items'
+    )
+    name = models.CharField(max_length=255)
+    price = models.DecimalField(max_digits=8, decimal_places=2)
+    quantity = models.PositiveIntegerField(default=1)
+    customizations = models.JSONField(default=list, blank=True)
+    special_instructions = models.TextField(blank=True)
+    
+    class Meta:
+        db_table = 'order_items'
+    
+    def __str__(self):
+        return f"{self.quantity} x {self.name}"
+
+
+class OrderTimer(models.Model):
+    """
+    Future action on a scheduled order
+    Written in the same transaction as the order (transactional outbox), so a
+    committed pre-order always has its timers; fired_at is set once it ran
+    """
+    
+    ACTIONS = [
+        ('release', 'Release to restaurant'),
+        ('dispatch', 'Dispatch to drivers'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='timers')
+    action = models.CharField(max_length=20, choices=ACTIONS)
+    due_at = models.DateTimeField()
+    fired_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'order_timers'
+        indexes = [
+            models.Index(fields=['fired_at', 'due_at']),
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.action} order {self.order_id} at {self.due_at}"
@@ -0,0 +1,260 @@
+"""
+Order Scheduler
+
+Pre-orders are placed with status "scheduled" and a requested delivery time
+(scheduled_for). Two timers are written in the same transaction as the order:
+
+  * release:  scheduled_for - RELEASE_LEAD_MINUTES; the order becomes
+              "pending" and shows up in the restaurant's queue
+  * dispatch: scheduled_for - DISPATCH_LEAD_MINUTES; a pre-order Delivery is
+              created and offered to drivers
+
+`python manage.py run_scheduler` owns the timers. At startup it loads every
+unfired timer into an in-memory hierarchical timing wheel, and timers that
+fell due while it was down fire immediately. After that it only tails newly
+created timer rows, so nothing polls the orders table for due rows. Due
+timers are applied in batches, and each batch is one transaction with
+set-based updates.
+
+With several scheduler processes, rows are claimed with SKIP LOCKED where the
+database supports it, so each timer fires once.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.sync.changes import record_changes
+from .models import Order, OrderTimer
+
+logger = logging.getLogger(__name__)
+
+
+def get_scheduler_setting(name):
+    defaults = {
+        'TICK_MS': 100,
+        'WHEEL_SIZE': 256,
+        'WHEEL_LEVELS': 4,
+        'RELEASE_LEAD_MINUTES': 45,
+        'DISPATCH_LEAD_MINUTES': 20,
+        'POLL_SECONDS': 1.0,
+        'POLL_OVERLAP_SECONDS': 10,
+        'BATCH_SIZE': 500,
+    }
+    return getattr(settings, 'ORDER_SCHEDULER', {}).get(name, defaults[name])
+
+
+def timers_for(order):
+    """Unsaved release and dispatch timers for a pre-order"""
+    return [
+        OrderTimer(
+            order=order, action='release',
+            due_at=order.scheduled_for - timedelta(minutes=get_scheduler_setting('RELEASE_LEAD_MINUTES')),
+        ),
+        OrderTimer(
+            order=order, action='dispatch',
+            due_at=order.scheduled_for - timedelta(minutes=get_scheduler_setting('DISPATCH_LEAD_MINUTES')),
+        ),
+    ]
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel
+
+    Time is counted in ticks. A timer is stored at the highest level where its
+    due tick differs from the current tick (digits in base `size`), in the
+    slot given by that digit. When the clock reaches a slot on a higher level
+    its timers cascade down, and level 0 slots fire. Adding, cancelling and
+    firing are O(1) per timer no matter how many are pending.
+    """
+
+    def __init__(self, tick_ms, size, levels, start_ms):
+        self.tick_ms = tick_ms
+        self.size = size
+        self.levels = levels
+        self.now_tick = start_ms // tick_ms
+        self.wheels = [[{} for _ in range(size)] for _ in range(levels)]
+        # Timers beyond the top level (size ** levels ticks away)
+        self.overflow = {}
+        self.slots = {}
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, key):
+        return key in self.slots
+
+    def add(self, key, due_ms):
+        """Schedule key; returns False if it is already due"""
+        self.cancel(key)
+        # Round up so timers never fire early
+        return self._place(key, -(-due_ms // self.tick_ms), due_ms)
+
+    def cancel(self, key):
+        location = self.slots.pop(key, None)
+        if location is None:
+            return
+        level, slot = location
+        bucket = self.overflow if level is None else self.wheels[level][slot]
+        bucket.pop(key, None)
+
+    def _place(self, key, due_tick, due_ms):
+        if due_tick <= self.now_tick:
+            return False
+        for level in range(self.levels):
+            span = self.size ** (level + 1)
+            if due_tick // span == self.now_tick // span:
+                slot = (due_tick // self.size ** level) % self.size
+                self.wheels[level][slot][key] = (due_tick, due_ms)
+                self.slots[key] = (level, slot)
+                return True
+        self.overflow[key] = (due_tick, due_ms)
+        self.slots[key] = (None, None)
+        return True
+
+    def advance(self, now_ms):
+        """Move the clock to now_ms and return [(key, due_ms)] that fell due"""
+        target = now_ms // self.tick_ms
+        expired = []
+        while self.now_tick < target:
+            if not self.slots:
+                # Nothing pending: jump instead of stepping tick by tick
+                self.now_tick = target
+                break
+            self.now_tick += 1
+            self._cascade(expired)
+            bucket = self.wheels[0][self.now_tick % self.size]
+            for key, (_, due_ms) in bucket.items():
+                del self.slots[key]
+                expired.append((key, due_ms))
+            bucket.clear()
+        return expired
+
+    def _cascade(self, expired):
+        top_span = self.size ** self.levels
+        if self.now_tick % top_span == 0 and self.overflow:
+            self._replace(self.overflow, expired)
+        for level in range(self.levels - 1, 0, -1):
+            if self.now_tick % self.size ** level == 0:
+                slot = (self.now_tick // self.size ** level) % self.size
+                self._replace(self.wheels[level][slot], expired)
+
+    def _replace(self, bucket, expired):
+        entries = list(bucket.items())
+        bucket.clear()
+        for key, (due_tick, due_ms) in entries:
+            del self.slots[key]
+            if not self._place(key, due_tick, due_ms):
+                expired.append((key, due_ms))
+
+
+def _epoch_ms(moment):
+    return int(moment.timestamp() * 1000)
+
+
+class OrderScheduler:
+    """Loads timers into a TimingWheel and applies them as they fall due"""
+
+    def __init__(self):
+        self.wheel = TimingWheel(
+            get_scheduler_setting('TICK_MS'),
+            get_scheduler_setting('WHEEL_SIZE'),
+            get_scheduler_setting('WHEEL_LEVELS'),
+            _epoch_ms(timezone.now()),
+        )
+        self.due = []
+        self.watermark = None
+        self.fired = 0
+
+    def load(self):
+        """Read every unfired timer; those already due are queued to fire"""
+        started = timezone.now()
+        self._track(OrderTimer.objects.filter(fired_at=None))
+        self.watermark = started
+        return len(self.wheel) + len(self.due)
+
+    def poll(self):
+        """Pick up timers created since the last poll"""
+        started = timezone.now()
+        overlap = timedelta(seconds=get_scheduler_setting('POLL_OVERLAP_SECONDS'))
+        # Rows can commit out of created_at order, so re-read a short overlap
+        added = self._track(OrderTimer.objects.filter(fired_at=None, created_at__gte=self.watermark - overlap))
+        self.watermark = started
+        return added
+
+    def _track(self, timers):
+        added = 0
+        queued = {timer_id for timer_id, _ in self.due}
+        for timer_id, due_at in timers.values_list('id', 'due_at').iterator(chunk_size=2000):
+            if timer_id in self.wheel or timer_id in queued:
+                continue
+            due_ms = _epoch_ms(due_at)
+            if not self.wheel.add(timer_id, due_ms):
+                self.due.append((timer_id, due_ms))
+            added += 1
+        return added
+
+    def tick(self, now=None):
+        """Advance the wheel and fire everything due; returns the number fired"""
+        now = now or timezone.now()
+        self.due.extend(self.wheel.advance(_epoch_ms(now)))
+        if not self.due:
+            return 0
+        due, self.due = self.due, []
+        batch_size = get_scheduler_setting('BATCH_SIZE')
+        fired = 0
+        for start in range(0, len(due), batch_size):
+            try:
+                fired += self.fire([timer_id for timer_id, _ in due[start:start + batch_size]], now)
+            except Exception:
+                # Keep the unapplied timers queued for the next tick
+                self.due = due[start:] + self.due
+                raise
+        lateness_ms = _epoch_ms(now) - min(due_ms for _, due_ms in due)
+        logger.info('Fired %s order timers (oldest %.0f ms late)', fired, lateness_ms)
+        return fired
+
+    def fire(self, timer_ids, now):
+        """Apply a batch of timers in one transaction"""
+        from apps.delivery.models import Delivery
+
+        with transaction.atomic():
+            timers = OrderTimer.objects.filter(pk__in=timer_ids, fired_at=None)
+            if connection.features.has_select_for_update_skip_locked:
+                timers = timers.select_for_update(skip_locked=True)
+            timers = list(timers.values_list('id', 'order_id', 'action'))
+            if not timers:
+                return 0
+
+            release_ids = [order_id for _, order_id, action in timers if action == 'release']
+            released = list(
+                Order.objects.filter(pk__in=release_ids, status='scheduled').values_list('pk', 'customer_id')
+            )
+            Order.objects.filter(pk__in=[pk for pk, _ in released]).update(status='pending', updated_at=now)
+            record_changes('order', released)
+
+            dispatch_ids = [order_id for _, order_id, action in timers if action == 'dispatch']
+            if dispatch_ids:
+                dispatched = set(Delivery.objects.filter(order_id__in=dispatch_ids).values_list('order_id', flat=True))
+                Delivery.objects.bulk_create([
+                    Delivery(
+                        order_id=order_id,
+                        fee=delivery_fee,
+                        total_payout=delivery_fee,
+                        is_pre_order=True,
+                        scheduled_time=scheduled_for,
+                        priority='high',
+                    )
+                    for order_id, delivery_fee, scheduled_for in Order.objects.filter(
+                        pk__in=dispatch_ids
+                    ).exclude(status__in=['delivered', 'cancelled']).values_list('id', 'delivery_fee', 'scheduled_for')
+                    if order_id not in dispatched
+                ])
+
+            OrderTimer.objects.filter(pk__in=[timer_id for timer_id, _, _ in timers]).update(fired_at=now)
+        self.fired += len(timers)
+        return len(timers)
@@ -0,0 +1,172 @@
+"""
+Order Serializers
+
+DRF serializers matching the frontend Order and OrderItem interfaces.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.delivery.surge import delivery_fee
+from apps.geocoding.geocoder import geocode
+from apps.restaurants import hours
+from apps.restaurants.models import Restaurant, MenuItem
+from .models import Order, OrderItem, OrderTimer
+from .scheduler import timers_for
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    """
+    Order item serializer that matches the frontend OrderItem interface
+    """
+    menu_item_id = serializers.UUIDField(read_only=True)
+    
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'menu_item_id', 'name', 'price', 'quantity', 'customizations', 'special_instructions']
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    """
+    Order serializer that matches the frontend Order interface
+    """
+    restaurant_id = serializers.UUIDField(read_only=True)
+    restaurant_name = serializers.CharField(source='restaurant.name', read_only=True)
+    items = OrderItemSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'restaurant_id', 'restaurant_name', 'items', 'subtotal', 'delivery_fee',
+            'tax', 'discount', 'total', 'status', 'created_at', 'estimated_delivery',
+            'delivery_address', 'payment_method', 'promo_code', 'special_instructions',
+            'scheduled_for', 'delivered_at'
+        ]
+        read_only_fields = fields
+
+
+class OrderItemInputSerializer(serializers.Serializer):
+    """
+    Cart line submitted at checkout
+    """
+    menu_item_id = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=1, max_value=50)
+    customizations = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+    special_instructions = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class OrderCreateSerializer(serializers.Serializer):
+    """
+    Order placement serializer
+    Matches frontend checkout / ordersService.placeOrder()
+    """
+    restaurant_id = serializers.UUIDField()
+    items = OrderItemInputSerializer(many=True)
+    delivery_address = serializers.CharField()
+    delivery_latitude = serializers.DecimalField(max_digits=10, decimal_places=7, required=False)
+    delivery_longitude = serializers.DecimalField(max_digits=10, decimal_places=7, required=False)
+    payment_method = serializers.CharField(max_length=50)
+    promo_code = serializers.CharField(max_length=50, required=False, allow_blank=True, default='')
+    special_instructions = serializers.CharField(required=False, allow_blank=True, default='')
+    scheduled_for = serializers.DateTimeField(required=False, allow_null=True, default=None)
+    
+    def validate(self, attrs):
+        try:
+            restaurant = Restaurant.objects.get(pk=attrs['restaurant_id'])
+        except Restaurant.DoesNotExist:
+            raise serializers.ValidationError({'restaurant_id': 'Restaurant not found.'})
+        if attrs['scheduled_for'] and attrs['scheduled_for'] <= timezone.now():
+            raise serializers.ValidationError({'scheduled_for': 'Scheduled time must be in the future.'})
+        if attrs['scheduled_for']:
+            # The manual switch only pauses orders for now
+            if not hours.scheduled_open(restaurant.pk, attrs['scheduled_for']):
+                raise serializers.ValidationError({'scheduled_for': 'Restaurant is closed at the scheduled time.'})
+        elif not hours.is_open(restaurant):
+            raise serializers.ValidationError({'restaurant_id': 'Restaurant is closed.'})
+        if not attrs['items']:
+            raise serializers.ValidationError({'items': 'Order must contain at least one item.'})
+        
+        menu = MenuItem.objects.in_bulk(
+            [line['menu_item_id'] for line in attrs['items']]
+        )
+        for line in attrs['items']:
+            menu_item = menu.get(line['menu_item_id'])
+            if menu_item is None or menu_item.restaurant_id != restaurant.pk or not menu_item.is_available:
+                raise serializers.ValidationError({
+                    'items': f"Menu item {line['menu_item_id']} is not available."
+                })
+            line['menu_item'] = menu_item
+        
+        attrs['restaurant'] = restaurant
+        if attrs.get('delivery_latitude') is None or attrs.get('delivery_longitude') is None:
+            # Batching, surge and tracking need the drop-off point
+            result = geocode(attrs['delivery_address'])
+            if result is not None:
+                attrs['delivery_latitude'] = Decimal(str(result['latitude']))
+                attrs['delivery_longitude'] = Decimal(str(result['longitude']))
+        return attrs
+    
+    def create(self, validated_data):
+        restaurant = validated_data['restaurant']
+        lines = []
+        subtotal = Decimal('0')
+        for line in validated_data['items']:
+            menu_item = line['menu_item']
+            unit_price = menu_item.price + _customization_price(menu_item, line['customizations'])
+            subtotal += unit_price * line['quantity']
+            lines.append(OrderItem(
+                menu_item=menu_item,
+                name=menu_item.name,
+                price=unit_price,
+                quantity=line['quantity'],
+                customizations=line['customizations'],
+                special_instructions=line['special_instructions'],
+            ))
+        
+        tax = (subtotal * Decimal(str(getattr(settings, 'ORDER_TAX_RATE', '0.08')))).quantize(Decimal('0.01'))
+        # Pre-orders are delivered later, so current demand does not apply to them
+        fee = restaurant.delivery_fee if validated_data['scheduled_for'] else delivery_fee(restaurant)[0]
+        order = Order.objects.create(
+            customer=self.context['request'].user,
+            restaurant=restaurant,
+            subtotal=subtotal,
+            delivery_fee=fee,
+            tax=tax,
+            total=subtotal + fee + tax,
+            promo_code=validated_data['promo_code'],
+            payment_method=validated_data['payment_method'],
+            delivery_address=validated_data['delivery_address'],
+            delivery_latitude=validated_data.get('delivery_latitude'),
+            delivery_longitude=validated_data.get('delivery_longitude'),
+            special_instructions=validated_data['special_instructions'],
+            scheduled_for=validated_data['scheduled_for'],
+            status='scheduled' if validated_data['scheduled_for'] else 'pending',
+        )
+        for line in lines:
+            line.order = order
+        OrderItem.objects.bulk_create(lines)
+        if order.scheduled_for:
+            # Same transaction as the order; run_scheduler picks them up
+            OrderTimer.objects.bulk_create(timers_for(order))
+        return order
+
+
+class OrderStatusSerializer(serializers.Serializer):
+    """
+    Order status update serializer
+    """
+    status = serializers.ChoiceField(choices=Order.STATUSES)
+
+
+def _customization_price(menu_item, option_ids):
+    """Sum the prices of the selected customization options of a menu item"""
+    selected = set(option_ids)
+    extra = Decimal('0')
+    for customization in menu_item.customizations:
+        for option in customization.get('options', []):
+            if option.get('id') in selected:
+                extra += Decimal(str(option.get('price', 0)))
+    return extra
@@ -0,0 +1,132 @@
+"""
+Order Scheduler Tests
+
+The timing wheel is tested on its own with a fake clock. OrderScheduler.fire
+is tested against the database.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from apps.authentication.models import User
+from apps.delivery.models import Delivery
+from apps.restaurants.models import Restaurant
+from .models import Order, OrderTimer
+from .scheduler import OrderScheduler, TimingWheel, timers_for
+
+
+class TimingWheelTests(SimpleTestCase):
+    """Small wheels (4 slots, 2 levels) so a few ticks cross every boundary"""
+
+    def wheel(self, start_ms=0, levels=2):
+        return TimingWheel(tick_ms=10, size=4, levels=levels, start_ms=start_ms)
+
+    def test_fires_in_due_order(self):
+        wheel = self.wheel()
+        for key, due_ms in (('c', 30), ('a', 10), ('b', 20)):
+            wheel.add(key, due_ms)
+        fired = [key for ms in range(0, 40, 10) for key, _ in wheel.advance(ms)]
+        self.assertEqual(fired, ['a', 'b', 'c'])
+        self.assertEqual(len(wheel), 0)
+
+    def test_never_fires_early(self):
+        wheel = self.wheel()
+        wheel.add('a', 15)
+        self.assertEqual(wheel.advance(10), [])
+        self.assertEqual(wheel.advance(20), [('a', 15)])
+
+    def test_already_due_is_refused(self):
+        wheel = self.wheel(start_ms=100)
+        self.assertFalse(wheel.add('a', 100))
+        self.assertFalse(wheel.add('b', 50))
+        self.assertNotIn('a', wheel)
+
+    def test_cascades_from_higher_level(self):
+        wheel = self.wheel()
+        # Tick 9 is outside the current 4-tick slot, so it starts on level 1
+        wheel.add('a', 90)
+        self.assertEqual(wheel.slots['a'][0], 1)
+        self.assertEqual(wheel.advance(80), [])
+        # Cascaded to level 0 when the clock reached tick 8
+        self.assertEqual(wheel.slots['a'][0], 0)
+        self.assertEqual(wheel.advance(90), [('a', 90)])
+
+    def test_cascade_keeps_order_across_levels(self):
+        wheel = self.wheel()
+        # 71 ms rounds up to tick 8, which starts the second level 1 slot
+        due = {'late': 150, 'early': 20, 'middle': 70, 'rounded_up': 71}
+        for key, due_ms in due.items():
+            wheel.add(key, due_ms)
+        fired = []
+        for ms in range(0, 170, 10):
+            fired.extend(key for key, _ in wheel.advance(ms))
+        self.assertEqual(fired, ['early', 'middle', 'rounded_up', 'late'])
+
+    def test_overflow_beyond_top_level(self):
+        wheel = self.wheel()
+        # 4 ** 2 = 16 ticks fit in the wheels; tick 40 does not
+        wheel.add('far', 400)
+        self.assertEqual(wheel.slots['far'], (None, None))
+        self.assertEqual(wheel.advance(390), [])
+        self.assertEqual(wheel.advance(400), [('far', 400)])
+
+    def test_jump_over_many_ticks_fires_everything_due(self):
+        wheel = self.wheel()
+        for index in range(1, 30):
+            wheel.add(index, index * 10)
+        fired = wheel.advance(1000)
+        self.assertEqual([key for key, _ in fired], list(range(1, 30)))
+
+    def test_cancel_and_reschedule(self):
+        wheel = self.wheel()
+        wheel.add('a', 50)
+        wheel.add('b', 50)
+        wheel.cancel('a')
+        wheel.add('b', 120)
+        self.assertEqual(wheel.advance(100), [])
+        self.assertEqual(wheel.advance(120), [('b', 120)])
+
+
+class OrderSchedulerTests(TestCase):
+
+    def setUp(self):
+        customer = User.objects.create(email='customer@example.com', full_name='Customer', user_type='customer')
+        restaurant = Restaurant.objects.create(name='Kitchen', category='Grill', address='1 Main St')
+        self.order = Order.objects.create(
+            customer=customer, restaurant=restaurant, status='scheduled',
+            subtotal=Decimal('20.00'), delivery_fee=Decimal('3.50'), total=Decimal('23.50'),
+            payment_method='card', delivery_address='2 Side St',
+            scheduled_for=timezone.now() + timedelta(hours=2),
+        )
+        self.timers = OrderTimer.objects.bulk_create(timers_for(self.order))
+
+    def test_release_then_dispatch(self):
+        scheduler = OrderScheduler()
+        self.assertEqual(scheduler.load(), 2)
+
+        release, dispatch = (timer.due_at for timer in self.timers)
+        self.assertEqual(scheduler.tick(release + timedelta(seconds=1)), 1)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'pending')
+        self.assertFalse(Delivery.objects.filter(order=self.order).exists())
+
+        self.assertEqual(scheduler.tick(dispatch + timedelta(seconds=1)), 1)
+        delivery = Delivery.objects.get(order=self.order)
+        self.assertTrue(delivery.is_pre_order)
+        self.assertEqual(delivery.fee, Decimal('3.50'))
+        self.assertFalse(OrderTimer.objects.filter(fired_at=None).exists())
+
+    def test_overdue_timers_fire_once(self):
+        later = self.order.scheduled_for + timedelta(minutes=1)
+        first = OrderScheduler()
+        first.load()
+        self.assertEqual(first.tick(later), 2)
+
+        # A second scheduler started afterwards finds nothing left to fire
+        second = OrderScheduler()
+        self.assertEqual(second.load(), 0)
+        self.assertEqual(first.fire([timer.pk for timer in self.timers], later), 0)
+        self.assertEqual(Delivery.objects.filter(order=self.order).count(), 1)
@@ -4,4 +4,6 @@ from . import views
 app_name = 'orders'
 urlpatterns = [
     path('', views.order_list, name='order_list'),
-]
\ No newline at end of file
+    path('<uuid:order_id>/', views.order_detail, name='order_detail'),
+    path('<uuid:order_id>/status/', views.update_order_status, name='update_order_status'),
+]
@@ -1,6 +1,147 @@
-from rest_framework.decorators import api_view
+"""
+Order Views
+
+This module contains API views for placing and tracking orders that match
+the frontend ordersService methods.
+"""
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-@api_view(['GET'])
+from apps.events.recorder import record_event
+from apps.notifications.tasks import notify_order_status
+from apps.restaurants.trending import record_delivered_order
+from .models import Order, OrderItem
+from .serializers import OrderSerializer, OrderCreateSerializer, OrderStatusSerializer
+
+# Allowed status changes; anything else is rejected
+STATUS_TRANSITIONS = {
+    # Scheduled orders are released to "pending" by the scheduler only
+    'scheduled': {'cancelled'},
+    'pending': {'confirmed', 'cancelled'},
+    'confirmed': {'preparing', 'cancelled'},
+    'preparing': {'out_for_delivery', 'cancelled'},
+    'out_for_delivery': {'delivered'},
+    'delivered': set(),
+    'cancelled': set(),
+}
+
+
+def visible_orders(user):
+    """Orders a user may see: their own, their restaurants', or all for admins"""
+    orders = Order.objects.select_related('restaurant').prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.order_by('id'))
+    )
+    if user.user_type == 'admin' or user.is_staff:
+        return orders
+    if user.user_type == 'restaurant':
+        return orders.filter(restaurant__owner=user)
+    if user.user_type == 'delivery':
+        return orders.filter(delivery__driver=user)
+    return orders.filter(customer=user)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
 def order_list(request):
-    return Response({'orders': []})
\ No newline at end of file
+    """
+    List the user's orders or place a new order
+    Matches frontend ordersService.getOrders() / placeOrder()
+    """
+    if request.method == 'POST':
+        serializer = OrderCreateSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            with transaction.atomic():
+                order = serializer.save()
+                record_event('order_placed', order, request.user, {
+                    'restaurant_id': str(order.restaurant_id), 'total': order.total,
+                })
+            return Response({
+                'success': True,
+                'message': 'Order placed successfully',
+                'order': OrderSerializer(visible_orders(request.user).get(pk=order.pk)).data
+            }, status=status.HTTP_201_CREATED)
+        
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    orders = visible_orders(request.user).order_by('-created_at')
+    if request.query_params.get('status'):
+        orders = orders.filter(status=request.query_params['status'])
+    
+    paginator = PageNumberPagination()
+    page = paginator.paginate_queryset(orders, request)
+    return Response({
+        'success': True,
+        'count': paginator.page.paginator.count,
+        'next': paginator.get_next_link(),
+        'orders': OrderSerializer(page, many=True).data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def order_detail(request, order_id):
+    """
+    Get order details
+    Matches frontend ordersService.getOrderById()
+    """
+    order = get_object_or_404(visible_orders(request.user), pk=order_id)
+    return Response({
+        'success': True,
+        'order': OrderSerializer(order).data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def update_order_status(request, order_id):
+    """
+    Move an order to its next status
+    Matches frontend restaurantManagementService.updateOrderStatus()
+    """
+    serializer = OrderStatusSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    with transaction.atomic():
+        order = get_object_or_404(visible_orders(request.user).select_for_update(of=('self',)), pk=order_id)
+        new_status = serializer.validated_data['status']
+        if request.user.user_type == 'customer' and new_status != 'cancelled':
+            return Response({
+                'success': False,
+                'error': 'Customers can only cancel orders'
+            }, status=status.HTTP_403_FORBIDDEN)
+        if new_status not in STATUS_TRANSITIONS[order.status]:
+            return Response({
+                'success': False,
+                'error': f'Cannot change order from {order.status} to {new_status}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        order.status = new_status
+        update_fields = ['status', 'updated_at']
+        if new_status == 'delivered':
+            order.delivered_at = timezone.now()
+            update_fields.append('delivered_at')
+            transaction.on_commit(lambda: record_delivered_order(order))
+        order.save(update_fields=update_fields)
+        record_event(f'order_{new_status}', order, request.user, {'status': new_status})
+        notify_order_status.enqueue(order.pk, new_status)
+    
+    return Response({
+        'success': True,
+        'message': f'Order is now {new_status}',
+        'order': OrderSerializer(order).data
+    }, status=status.HTTP_200_OK)
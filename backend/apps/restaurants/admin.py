@@ -1,7 +1,67 @@
 """
-Restaurant Admin - Placeholder
+Restaurant Admin Configuration
 """
 
 from django.contrib import admin
+from .models import Restaurant, MenuItem, OpeningHours, HoursOverride, PopularityScore, Favorite
 
-# Restaurant admin will be implemented when models are ready
\ No newline at end of file
+
+class MenuItemInline(admin.TabularInline):
+    model = MenuItem
+    extra = 0
+    fields = ['name', 'category', 'price', 'is_available']
+
+
+class OpeningHoursInline(admin.TabularInline):
+    model = OpeningHours
+    extra = 0
+    fields = ['weekday', 'opens', 'closes']
+
+
+class HoursOverrideInline(admin.TabularInline):
+    model = HoursOverride
+    extra = 0
+    fields = ['date', 'opens', 'closes', 'note']
+
+
+@admin.register(Restaurant)
+class RestaurantAdmin(admin.ModelAdmin):
+    """
+    Restaurant admin configuration
+    """
+    list_display = ['name', 'category', 'city', 'rating', 'is_open', 'featured', 'created_at']
+    list_filter = ['is_open', 'featured', 'category', 'price_range', 'timezone']
+    search_fields = ['name', 'address', 'city']
+    raw_id_fields = ['owner', 'image_asset']
+    inlines = [OpeningHoursInline, HoursOverrideInline, MenuItemInline]
+
+
+@admin.register(MenuItem)
+class MenuItemAdmin(admin.ModelAdmin):
+    """
+    Menu item admin configuration
+    """
+    list_display = ['name', 'restaurant', 'category', 'price', 'is_available']
+    list_filter = ['category', 'is_available', 'is_vegetarian']
+    search_fields = ['name', 'restaurant__name']
+    raw_id_fields = ['restaurant', 'image_asset']
+
+
+@admin.register(PopularityScore)
+class PopularityScoreAdmin(admin.ModelAdmin):
+    """
+    Trending score admin configuration (read-mostly; maintained by trending.py)
+    """
+    list_display = ['kind', 'object_id', 'scope', 'log_score', 'updated_at']
+    list_filter = ['kind', 'scope']
+    search_fields = ['object_id']
+    ordering = ['kind', 'scope', '-log_score']
+
+
+@admin.register(Favorite)
+class FavoriteAdmin(admin.ModelAdmin):
+    """
+    Favorite admin configuration
+    """
+    list_display = ['user', 'restaurant', 'menu_item', 'created_at']
+    raw_id_fields = ['user', 'restaurant', 'menu_item']
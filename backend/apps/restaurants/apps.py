@@ -7,4 +7,8 @@ from django.apps import AppConfig
 
 class RestaurantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.restaurants'
\ No newline at end of file
+    name = 'apps.restaurants'
+    
+    def ready(self):
+        """Connect opening hours and catalogue invalidation signals"""
+        import apps.restaurants.signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,403 @@
+"""
+Catalogue Snapshot
+
+Restaurant pages and menus are the most read data in the API, and they
+change rarely. `python manage.py catalogue --publish` (or --watch) writes
+them to one versioned file, CATALOGUE['SNAPSHOT_PATH']. Web processes map
+that file read-only instead of each querying the database and caching its
+own copy. The operating system keeps one copy of the mapped pages for all
+workers on the machine, and a newly started worker only has to map the
+file.
+
+The file is a header followed by sections, each an 8-byte length and then
+the data:
+
+  * restaurant keys: the two 64-bit halves of each id, sorted, so finding a
+    restaurant is a binary search over the mapped array
+  * fixed-width restaurant columns: manual switch, delivery fee in cents,
+    coordinates in microdegrees. These are the inputs of the fields that
+    are computed per request.
+  * offsets into one blob of JSON documents: each restaurant's API
+    representation, and then its available menu items in menu order.
+    Every document is followed by a comma, so a whole menu is one slice.
+  * menu item keys, sorted, with each item's row and restaurant row
+  * the fingerprint of the tables the snapshot was built from
+
+Reading a record decodes only that record. The live fields, surge delivery
+fee and open now, are applied when a record is read, the same way
+RestaurantSerializer applies them.
+
+A snapshot is published by writing a temporary file and renaming it into
+place. Processes look for a new version at most every RELOAD_SECONDS and
+swap to it. Readers still holding the previous mapping keep using it. The
+fingerprint is row counts and the latest updated_at of restaurants, menu
+items and images. Processes compare it with the database at most every
+REFRESH_SECONDS. While the two differ, for example between an edit and the
+next publish, no snapshot is returned and callers read the database.
+"""
+
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+from array import array
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+
+from apps.media_assets.models import ImageAsset
+from .models import MenuItem, Restaurant
+from .serializers import MenuItemSerializer, RestaurantSerializer, add_live_fields
+
+logger = logging.getLogger(__name__)
+
+# magic, version, built at (Unix time), restaurants, menu items
+HEADER = struct.Struct('<8sQdII')
+LENGTH = struct.Struct('<Q')
+MAGIC = b'CATALOG\x01'
+LOW_BITS = (1 << 64) - 1
+# Coordinates of a restaurant without any
+NO_COORDINATE = -2 ** 31
+SWITCHED_ON = 1
+
+# (name, array typecode); None is raw bytes
+SECTIONS = [
+    ('restaurant_high', 'Q'),
+    ('restaurant_low', 'Q'),
+    ('restaurant_flags', 'B'),
+    ('restaurant_fees', 'i'),
+    ('restaurant_latitudes', 'i'),
+    ('restaurant_longitudes', 'i'),
+    ('restaurant_documents', 'Q'),
+    ('restaurant_menus', 'I'),
+    ('item_documents', 'Q'),
+    ('item_restaurants', 'I'),
+    ('item_high', 'Q'),
+    ('item_low', 'Q'),
+    ('item_rows', 'I'),
+    ('documents', None),
+    ('fingerprint', None),
+]
+
+
+def get_catalogue_setting(name):
+    defaults = {
+        'ENABLED': True,
+        'SNAPSHOT_PATH': settings.BASE_DIR / 'catalogue.snapshot',
+        'RELOAD_SECONDS': 2.0,
+        'REFRESH_SECONDS': 10,
+        'WATCH_SECONDS': 5,
+    }
+    return getattr(settings, 'CATALOGUE', {}).get(name, defaults[name])
+
+
+def fingerprint():
+    """Row counts and latest updates of the tables a snapshot is built from"""
+    return json.dumps([
+        list(model.objects.aggregate(count=Count('pk'), latest=Max('updated_at')).values())
+        for model in (Restaurant, MenuItem, ImageAsset)
+    ], cls=DjangoJSONEncoder)
+
+
+def _split(key):
+    return key.int >> 64, key.int & LOW_BITS
+
+
+def _find(high, low, key):
+    """Row of key (a UUID) in the sorted key columns, or None"""
+    key_high, key_low = _split(key)
+    row = bisect.bisect_left(high, key_high)
+    while row < len(high) and high[row] == key_high:
+        if low[row] == key_low:
+            return row
+        row += 1
+    return None
+
+
+def _microdegrees(value):
+    return NO_COORDINATE if value is None else round(value * 1000000)
+
+
+# Publishing (catalogue command)
+
+def build(version=1):
+    """The snapshot file contents for the catalogue in the database"""
+    # Taken first, so a change made during the build leaves the snapshot stale
+    current = fingerprint()
+    encode = DjangoJSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+    menus = defaultdict(list)
+    for item in MenuItem.objects.filter(is_available=True).select_related('image_asset').order_by(
+        'restaurant_id', 'category', 'name'
+    ):
+        menus[item.restaurant_id].append(item)
+
+    restaurants = sorted(Restaurant.objects.select_related('image_asset'), key=lambda restaurant: restaurant.pk.int)
+    columns = {name: array(typecode) for name, typecode in SECTIONS if typecode}
+    documents = bytearray()
+    restaurant_serializer = RestaurantSerializer()
+    item_serializer = MenuItemSerializer()
+    for restaurant in restaurants:
+        high, low = _split(restaurant.pk)
+        columns['restaurant_high'].append(high)
+        columns['restaurant_low'].append(low)
+        columns['restaurant_flags'].append(SWITCHED_ON if restaurant.is_open else 0)
+        columns['restaurant_fees'].append(round(restaurant.delivery_fee * 100))
+        columns['restaurant_latitudes'].append(_microdegrees(restaurant.latitude))
+        columns['restaurant_longitudes'].append(_microdegrees(restaurant.longitude))
+        columns['restaurant_documents'].append(len(documents))
+        documents += encode(restaurant_serializer.static_representation(restaurant)).encode() + b','
+    columns['restaurant_documents'].append(len(documents))
+
+    item_keys = []
+    columns['restaurant_menus'].append(0)
+    for row, restaurant in enumerate(restaurants):
+        for item in menus.get(restaurant.pk, ()):
+            item_keys.append((*_split(item.pk), len(columns['item_restaurants'])))
+            columns['item_restaurants'].append(row)
+            columns['item_documents'].append(len(documents))
+            documents += encode(item_serializer.to_representation(item)).encode() + b','
+        columns['restaurant_menus'].append(len(columns['item_restaurants']))
+    columns['item_documents'].append(len(documents))
+    item_keys.sort()
+    for high, low, row in item_keys:
+        columns['item_high'].append(high)
+        columns['item_low'].append(low)
+        columns['item_rows'].append(row)
+
+    parts = [HEADER.pack(MAGIC, version, time.time(), len(restaurants), len(item_keys))]
+    for name, typecode in SECTIONS:
+        if typecode:
+            data = columns[name].tobytes()
+        elif name == 'documents':
+            data = bytes(documents)
+        else:
+            data = current.encode()
+        parts.append(LENGTH.pack(len(data)))
+        parts.append(data)
+        # Keep every section 8-byte aligned for the array views
+        parts.append(bytes(-len(data) % 8))
+    return b''.join(parts)
+
+
+def published_version(path=None):
+    """Version of the snapshot at path, 0 without a readable one"""
+    path = os.fspath(path or get_catalogue_setting('SNAPSHOT_PATH'))
+    try:
+        with open(path, 'rb') as handle:
+            magic, version, *_ = HEADER.unpack(handle.read(HEADER.size))
+    except (OSError, struct.error):
+        return 0
+    return version if magic == MAGIC else 0
+
+
+def publish(path=None):
+    """Build the next version and atomically replace the snapshot file; returns the Snapshot"""
+    path = os.fspath(path or get_catalogue_setting('SNAPSHOT_PATH'))
+    data = build(published_version(path) + 1)
+    with open(path + '.tmp', 'wb') as handle:
+        handle.write(data)
+    os.replace(path + '.tmp', path)
+    return Snapshot.map(path)
+
+
+# Reading (web processes)
+
+class CatalogueRestaurant:
+    """Restaurant columns from a snapshot; enough for delivery_fee() and hours.is_open()"""
+
+    __slots__ = ('pk', 'is_open', 'delivery_fee', 'latitude', 'longitude')
+
+    def __init__(self, pk, is_open, delivery_fee, latitude, longitude):
+        self.pk = pk
+        self.is_open = is_open
+        self.delivery_fee = delivery_fee
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+class Snapshot:
+    """One mapped snapshot file"""
+
+    def __init__(self, mapped):
+        self.mapped = mapped
+        view = memoryview(mapped)
+        magic, self.version, self.built_at, self.restaurants, self.items = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError('Not a catalogue snapshot')
+        offset = HEADER.size
+        for name, typecode in SECTIONS:
+            (length,) = LENGTH.unpack_from(view, offset)
+            offset += LENGTH.size
+            if offset + length > len(view):
+                raise ValueError('Truncated catalogue snapshot')
+            section = view[offset:offset + length]
+            setattr(self, name, section.cast(typecode) if typecode else section)
+            offset += length + (-length % 8)
+        self.fingerprint = bytes(self.fingerprint).decode()
+
+    @classmethod
+    def map(cls, path):
+        with open(path, 'rb') as handle:
+            return cls(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def restaurant_row(self, restaurant_id):
+        return _find(self.restaurant_high, self.restaurant_low, restaurant_id)
+
+    def item_row(self, item_id):
+        row = _find(self.item_high, self.item_low, item_id)
+        return None if row is None else self.item_rows[row]
+
+    def record(self, row):
+        latitude = self.restaurant_latitudes[row]
+        longitude = self.restaurant_longitudes[row]
+        return CatalogueRestaurant(
+            uuid.UUID(int=self.restaurant_high[row] << 64 | self.restaurant_low[row]),
+            bool(self.restaurant_flags[row] & SWITCHED_ON),
+            Decimal(self.restaurant_fees[row]).scaleb(-2),
+            None if latitude == NO_COORDINATE else latitude / 1000000,
+            None if longitude == NO_COORDINATE else longitude / 1000000,
+        )
+
+    def switched_on(self, row):
+        return bool(self.restaurant_flags[row] & SWITCHED_ON)
+
+    def restaurant_document(self, row):
+        """The restaurant's stored representation, without the live fields"""
+        offsets = self.restaurant_documents
+        return json.loads(self.documents[offsets[row]:offsets[row + 1] - 1].tobytes())
+
+    def item_document(self, row):
+        offsets = self.item_documents
+        return json.loads(self.documents[offsets[row]:offsets[row + 1] - 1].tobytes())
+
+    def menu_document(self, row):
+        """Available menu items of the restaurant in row, in menu order"""
+        first, last = self.restaurant_menus[row], self.restaurant_menus[row + 1]
+        if first == last:
+            return []
+        offsets = self.item_documents
+        return json.loads(b'[' + self.documents[offsets[first]:offsets[last] - 1].tobytes() + b']')
+
+
+class CatalogueStore:
+    """The published snapshot, swapped when a new version appears"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.snapshot = None
+        self.fresh = False
+        self._identity = None
+        self._checked = 0.0
+        self._verified = 0.0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Map the published file without touching the database (process start)"""
+        with self._lock:
+            self._checked = time.monotonic()
+            self._reload()
+        return self.snapshot
+
+    def invalidate(self):
+        """This process changed the catalogue; read the database until it is published"""
+        self.fresh = False
+        self._verified = time.monotonic()
+
+    def current(self):
+        """The snapshot, or None when there is none or the database has moved on"""
+        if not get_catalogue_setting('ENABLED'):
+            return None
+        now = time.monotonic()
+        if (
+            now - self._checked >= get_catalogue_setting('RELOAD_SECONDS')
+            or now - self._verified >= get_catalogue_setting('REFRESH_SECONDS')
+        ):
+            with self._lock:
+                if now - self._checked >= get_catalogue_setting('RELOAD_SECONDS'):
+                    self._checked = time.monotonic()
+                    self._reload()
+                if self.snapshot is not None and now - self._verified >= get_catalogue_setting('REFRESH_SECONDS'):
+                    self._verified = time.monotonic()
+                    self.fresh = self.snapshot.fingerprint == fingerprint()
+        return self.snapshot if self.fresh else None
+
+    def _reload(self):
+        path = os.fspath(self.path or get_catalogue_setting('SNAPSHOT_PATH'))
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.snapshot = None
+            self._identity = None
+            return
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        if identity == self._identity:
+            return
+        try:
+            snapshot = Snapshot.map(path)
+        except (OSError, ValueError, struct.error):
+            logger.exception('Could not map the catalogue snapshot %s', path)
+            return
+        # The previous mapping stays valid for readers still holding it
+        self.snapshot = snapshot
+        self._identity = identity
+        self.fresh = False
+        self._verified = 0.0
+        logger.info(
+            'Mapped catalogue version %d: %d restaurants, %d menu items',
+            snapshot.version, snapshot.restaurants, snapshot.items
+        )
+
+
+store = CatalogueStore()
+
+
+def restaurant(restaurant_id):
+    """RestaurantSerializer data from the snapshot, or None to read the database"""
+    snapshot = store.current()
+    row = None if snapshot is None else snapshot.restaurant_row(restaurant_id)
+    if row is None:
+        return None
+    return add_live_fields(snapshot.restaurant_document(row), snapshot.record(row))
+
+
+def restaurants(restaurant_ids, switched_on=False):
+    """{id: RestaurantSerializer data} of those in the snapshot, or None to read the database"""
+    snapshot = store.current()
+    if snapshot is None:
+        return None
+    found = {}
+    for restaurant_id in restaurant_ids:
+        row = snapshot.restaurant_row(restaurant_id)
+        if row is not None and (snapshot.switched_on(row) or not switched_on):
+            found[restaurant_id] = add_live_fields(snapshot.restaurant_document(row), snapshot.record(row))
+    return found
+
+
+def menu(restaurant_id):
+    """Available MenuItemSerializer data in menu order, or None to read the database"""
+    snapshot = store.current()
+    row = None if snapshot is None else snapshot.restaurant_row(restaurant_id)
+    if row is None:
+        return None
+    return snapshot.menu_document(row)
+
+
+def menu_items(item_ids, switched_on=False):
+    """{id: MenuItemSerializer data} of available items in the snapshot, or None to read the database"""
+    snapshot = store.current()
+    if snapshot is None:
+        return None
+    found = {}
+    for item_id in item_ids:
+        row = snapshot.item_row(item_id)
+        if row is not None and (snapshot.switched_on(snapshot.item_restaurants[row]) or not switched_on):
+            found[item_id] = snapshot.item_document(row)
+    return found
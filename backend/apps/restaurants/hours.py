@@ -0,0 +1,400 @@
+"""
+Opening Hours
+
+A restaurant is open by its weekly hours (OpeningHours), in its own time
+zone. HoursOverride rows replace those hours on particular dates, such as
+holidays. Restaurant.is_open stays the manual switch. A restaurant takes
+orders now when it is switched on and its hours say it is open. A
+restaurant without weekly hours is open around the clock, as every
+restaurant was before hours existed.
+
+Hours are not evaluated row by row at query time. Each process keeps an
+interval index over a window that runs from a day ago to HORIZON_DAYS
+ahead:
+
+  * each restaurant's hours are expanded into UTC intervals for every
+    local date in the window. Overrides and DST are applied, and
+    overlapping intervals are merged.
+  * the interval ends form one sorted array of boundaries, in minutes
+    since the epoch. Between two boundaries the set of open restaurants
+    does not change. That set is stored as a bitset with one bit per
+    restaurant.
+
+"Is R open at T" is a binary search over the boundaries plus a bit test.
+"Which restaurants are open at T" does the same search and returns the set
+for that segment, which is cached. Answering either costs microseconds and
+no query, whether T is now or a slot in a scheduled-order time picker.
+
+The index is rebuilt:
+
+  * about once a day, as the window runs short
+  * right away when hours are saved in this process
+  * when a fingerprint of the hours tables changes, which picks up changes
+    made by other processes. The fingerprint is row counts and the latest
+    updated_at, and it is checked at most every REFRESH_SECONDS.
+
+Times beyond the window are still answered for a single restaurant, by
+evaluating its hours directly.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import HoursOverride, OpeningHours, Restaurant
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+ALL_DAY = (dt_time(0, 0), dt_time(0, 0))
+
+
+def get_hours_setting(name):
+    defaults = {
+        'DEFAULT_TIMEZONE': settings.TIME_ZONE,
+        'HORIZON_DAYS': 8,
+        'REFRESH_SECONDS': 10,
+        'SEGMENT_CACHE': 16,
+    }
+    return getattr(settings, 'OPENING_HOURS', {}).get(name, defaults[name])
+
+
+def epoch_minute(moment):
+    return int(moment.timestamp() // 60)
+
+
+def from_epoch_minute(minute):
+    return datetime.fromtimestamp(minute * 60, tz=dt_timezone.utc)
+
+
+def restaurant_zone(name):
+    default = get_hours_setting('DEFAULT_TIMEZONE')
+    try:
+        return ZoneInfo(name or default)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning('Unknown time zone %r; using %s', name, default)
+        return ZoneInfo(default)
+
+
+@lru_cache(maxsize=65536)
+def local_minute(zone, day, moment):
+    """Epoch minute of a local wall-clock time (the earlier one on DST overlaps)"""
+    return epoch_minute(datetime.combine(day, moment, tzinfo=zone))
+
+
+def merge(spans):
+    """Sorted, disjoint, non-touching union of (start, end) spans"""
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+class Schedule:
+    """One restaurant's weekly hours and overrides"""
+
+    __slots__ = ('zone', 'weekly', 'overrides')
+
+    def __init__(self, zone):
+        self.zone = zone
+        # weekday -> [(opens, closes)]; None until the restaurant has weekly hours
+        self.weekly = None
+        # local date -> [(opens, closes)]; an empty list closes the date
+        self.overrides = {}
+
+    def add_weekly(self, weekday, opens, closes):
+        if self.weekly is None:
+            self.weekly = [[] for _ in range(7)]
+        self.weekly[weekday].append((opens, closes))
+
+    def add_override(self, day, opens, closes):
+        hours = self.overrides.setdefault(day, [])
+        if opens is not None:
+            hours.append((opens, closes))
+
+    def key(self):
+        """Hashable weekly hours, shared by restaurants with the same intervals; None with overrides"""
+        if self.overrides:
+            return None
+        return self.zone, tuple(map(tuple, self.weekly)) if self.weekly is not None else None
+
+    def intervals(self, first, last):
+        """Merged UTC (start, end) epoch minutes opening on local dates first..last"""
+        spans = []
+        day = first
+        while day <= last:
+            hours = self.overrides.get(day)
+            if hours is None:
+                hours = self.weekly[day.weekday()] if self.weekly is not None else [ALL_DAY]
+            for opens, closes in hours:
+                closing_day = day if closes > opens else day + timedelta(days=1)
+                spans.append((local_minute(self.zone, day, opens), local_minute(self.zone, closing_day, closes)))
+            day += timedelta(days=1)
+        return merge(spans)
+
+
+def load_schedules(first, last, restaurant_ids=None):
+    """
+    {restaurant_id: Schedule or None} with overrides between local dates
+    first and last; None for restaurants open around the clock
+    """
+    restaurants = Restaurant.objects.all()
+    hours = OpeningHours.objects.all()
+    overrides = HoursOverride.objects.filter(date__gte=first, date__lte=last)
+    if restaurant_ids is not None:
+        restaurants = restaurants.filter(pk__in=restaurant_ids)
+        hours = hours.filter(restaurant_id__in=restaurant_ids)
+        overrides = overrides.filter(restaurant_id__in=restaurant_ids)
+
+    schedules = {}
+    zones = {}
+    for restaurant_id, zone_name in restaurants.values_list('pk', 'timezone'):
+        schedules[restaurant_id] = None
+        zones[restaurant_id] = zone_name
+
+    def schedule_for(restaurant_id):
+        schedule = schedules.get(restaurant_id)
+        if schedule is None:
+            schedule = schedules[restaurant_id] = Schedule(restaurant_zone(zones[restaurant_id]))
+        return schedule
+
+    for restaurant_id, weekday, opens, closes in hours.values_list('restaurant_id', 'weekday', 'opens', 'closes'):
+        if restaurant_id in zones:
+            schedule_for(restaurant_id).add_weekly(weekday, opens, closes)
+    for restaurant_id, day, opens, closes in overrides.values_list('restaurant_id', 'date', 'opens', 'closes'):
+        if restaurant_id in zones:
+            schedule_for(restaurant_id).add_override(day, opens, closes)
+    return schedules
+
+
+def local_dates(start, end):
+    """Local dates whose intervals can reach [start, end) in any time zone"""
+    return (
+        from_epoch_minute(start).date() - timedelta(days=2),
+        from_epoch_minute(end).date() + timedelta(days=1),
+    )
+
+
+class IntervalIndex:
+    """
+    Open restaurants per segment of [start, end), in epoch minutes
+    masks[i] has bit slots[id] set when restaurant id is open from
+    boundaries[i] up to boundaries[i + 1].
+    """
+
+    def __init__(self, start, end, ids, boundaries, masks, intervals):
+        self.built_at = timezone.now()
+        self.start = start
+        self.end = end
+        self.ids = ids
+        self.slots = {restaurant_id: slot for slot, restaurant_id in enumerate(ids)}
+        self.boundaries = boundaries
+        self.masks = masks
+        # restaurant_id -> merged (start, end) intervals within the window; missing means always open
+        self.intervals = intervals
+        self._sets = {}
+        self._cache_size = get_hours_setting('SEGMENT_CACHE')
+
+    @classmethod
+    def build(cls, schedules, start, end):
+        first, last = local_dates(start, end)
+        ids = list(schedules)
+        size = (len(ids) + 7) // 8
+        # Bits are set in little-endian bytearrays, which is O(1) per bit; int XORs are O(restaurants)
+        opened = bytearray(size)
+        # epoch minute -> bits that flip there
+        flips = defaultdict(lambda: bytearray(size))
+        intervals = {}
+        # Most restaurants keep common hours; expand each distinct week once
+        expanded = {}
+        for slot, restaurant_id in enumerate(ids):
+            byte, bit = slot >> 3, 1 << (slot & 7)
+            schedule = schedules[restaurant_id]
+            if schedule is None:
+                opened[byte] |= bit
+                continue
+            key = schedule.key()
+            spans = expanded.get(key) if key is not None else None
+            if spans is None:
+                spans = [
+                    (max(opens, start), min(closes, end))
+                    for opens, closes in schedule.intervals(first, last) if opens < end and closes > start
+                ]
+                if key is not None:
+                    expanded[key] = spans
+            intervals[restaurant_id] = spans
+            for opens, closes in spans:
+                if opens == start:
+                    opened[byte] |= bit
+                else:
+                    flips[opens][byte] ^= bit
+                if closes < end:
+                    flips[closes][byte] ^= bit
+
+        mask = int.from_bytes(opened, 'little')
+        boundaries = array('q', [start])
+        masks = [mask]
+        for minute in sorted(flips):
+            mask ^= int.from_bytes(flips[minute], 'little')
+            boundaries.append(minute)
+            masks.append(mask)
+        return cls(start, end, ids, boundaries, masks, intervals)
+
+    def covers(self, minute):
+        return self.start <= minute < self.end
+
+    def segment(self, minute):
+        return bisect.bisect_right(self.boundaries, minute) - 1
+
+    def is_open(self, restaurant_id, minute):
+        slot = self.slots.get(restaurant_id)
+        if slot is None:
+            # Created since the last build; no hours seen yet
+            return True
+        return bool(self.masks[self.segment(minute)] >> slot & 1)
+
+    def open_and_closed(self, minute):
+        """(open ids, closed ids) at minute, as frozensets"""
+        index = self.segment(minute)
+        cached = self._sets.get(index)
+        if cached is None:
+            # bin() is the cheapest way to walk every bit of a large int
+            bits = bin(self.masks[index])[:1:-1].ljust(len(self.ids), '0')
+            opened, closed = [], []
+            for restaurant_id, bit in zip(self.ids, bits):
+                (opened if bit == '1' else closed).append(restaurant_id)
+            cached = (frozenset(opened), frozenset(closed))
+            if len(self._sets) >= self._cache_size:
+                self._sets.clear()
+            self._sets[index] = cached
+        return cached
+
+    def open_intervals(self, restaurant_id, start, end):
+        """Merged (start, end) epoch minutes overlapping [start, end)"""
+        spans = self.intervals.get(restaurant_id)
+        if spans is None:
+            return [(start, end)]
+        return [(max(opens, start), min(closes, end)) for opens, closes in spans if opens < end and closes > start]
+
+
+class HoursIndex:
+    """The per-process interval index and when to rebuild it"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.index = None
+        self._stale = False
+        self._fingerprint = None
+        self._checked = 0.0
+
+    def invalidate(self):
+        self._stale = True
+
+    @staticmethod
+    def fingerprint():
+        return tuple(
+            tuple(model.objects.aggregate(count=Count('pk'), latest=Max('updated_at')).values())
+            for model in (Restaurant, OpeningHours, HoursOverride)
+        )
+
+    def current(self):
+        """The index, rebuilt first if it is missing, stale or running short"""
+        index = self.index
+        now = epoch_minute(timezone.now())
+        if (
+            index is not None and not self._stale and now - index.start < 2 * MINUTES_PER_DAY
+            and time.monotonic() - self._checked < get_hours_setting('REFRESH_SECONDS')
+        ):
+            return index
+        with self._lock:
+            index = self.index
+            if index is None or self._stale or now - index.start >= 2 * MINUTES_PER_DAY:
+                return self._rebuild(now)
+            if time.monotonic() - self._checked >= get_hours_setting('REFRESH_SECONDS'):
+                self._checked = time.monotonic()
+                if self.fingerprint() != self._fingerprint:
+                    return self._rebuild(now)
+            return index
+
+    def _rebuild(self, now):
+        self._stale = False
+        self._checked = time.monotonic()
+        # Taken first, so a change made during the build triggers another one
+        self._fingerprint = self.fingerprint()
+        start = now - MINUTES_PER_DAY
+        end = now + get_hours_setting('HORIZON_DAYS') * MINUTES_PER_DAY
+        started = time.perf_counter()
+        self.index = IntervalIndex.build(load_schedules(*local_dates(start, end)), start, end)
+        logger.debug(
+            'Built the opening hours index: %d restaurants, %d segments in %.1f ms',
+            len(self.index.ids), len(self.index.boundaries), (time.perf_counter() - started) * 1000
+        )
+        return self.index
+
+
+index = HoursIndex()
+
+
+def _minute(moment):
+    return epoch_minute(moment or timezone.now())
+
+
+def scheduled_open(restaurant_id, moment=None):
+    """Whether the restaurant's hours have it open at moment (default now)"""
+    minute = _minute(moment)
+    current = index.current()
+    if current.covers(minute):
+        return current.is_open(restaurant_id, minute)
+    # Beyond the window: evaluate this restaurant's hours directly
+    first, last = local_dates(minute, minute + 1)
+    schedule = load_schedules(first, last, [restaurant_id]).get(restaurant_id)
+    if schedule is None:
+        return True
+    return any(opens <= minute < closes for opens, closes in schedule.intervals(first, last))
+
+
+def is_open(restaurant, moment=None):
+    """Takes orders at moment (default now): switched on and within its hours"""
+    return restaurant.is_open and scheduled_open(restaurant.pk, moment)
+
+
+def filter_open(queryset, moment=None):
+    """
+    Restaurants in queryset that are switched on and open at moment
+    Raises ValueError for a moment outside the index window.
+    """
+    minute = _minute(moment)
+    current = index.current()
+    if not current.covers(minute):
+        raise ValueError(f"Opening hours are indexed up to {get_hours_setting('HORIZON_DAYS')} days ahead.")
+    opened, closed = current.open_and_closed(minute)
+    queryset = queryset.filter(is_open=True)
+    # Whichever list is shorter; restaurants newer than the index count as open
+    if len(closed) <= len(opened):
+        return queryset.exclude(pk__in=closed) if closed else queryset
+    return queryset.filter(Q(pk__in=opened) | Q(created_at__gte=current.built_at))
+
+
+def open_intervals(restaurant_id, days=None):
+    """[(opens_at, closes_at)] aware UTC datetimes from now over the next days"""
+    current = index.current()
+    start = epoch_minute(timezone.now())
+    end = min(current.end, start + (days or get_hours_setting('HORIZON_DAYS')) * MINUTES_PER_DAY)
+    return [
+        (from_epoch_minute(opens), from_epoch_minute(closes))
+        for opens, closes in current.open_intervals(restaurant_id, start, end)
+    ]
@@ -0,0 +1,108 @@
+"""
+Time "open now" / "open at T" lookups on the opening hours index (apps/restaurants/hours.py).
+
+    python manage.py bench_hours --restaurants 5000
+
+Synthetic restaurants get weekly hours like generate_dataset's, spread over
+a few time zones, with some holiday closures. The command compares three
+things: evaluating every restaurant's hours per query (what filtering row
+by row costs), the index's per-restaurant test, and its open set for a
+time. Nothing touches the database.
+"""
+
+import random
+import time
+from datetime import time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.admin_panel.management.commands.generate_dataset import HOURS_PATTERNS, weighted
+from apps.admin_panel.management.commands.load_test import percentile
+from apps.restaurants.hours import (
+    MINUTES_PER_DAY, IntervalIndex, Schedule, epoch_minute, local_dates, restaurant_zone,
+)
+
+ZONES = ['America/New_York', 'America/Chicago', 'America/Denver', 'America/Los_Angeles']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark open-restaurant lookups on the opening hours interval index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=8, help='Index window ahead of now')
+        parser.add_argument('--queries', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        now = epoch_minute(timezone.now())
+        start, end = now - MINUTES_PER_DAY, now + options['days'] * MINUTES_PER_DAY
+        schedules = self._schedules(rng, options['restaurants'], timezone.now().date())
+
+        started = time.perf_counter()
+        index = IntervalIndex.build(schedules, start, end)
+        build_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(
+            f"{options['restaurants']} restaurants, {len(index.boundaries)} segments over "
+            f"{options['days'] + 1} days, built in {build_ms:.0f} ms"
+        )
+
+        # Scheduled-order picker times: anywhere in the window ahead
+        moments = [rng.randrange(now, end) for _ in range(options['queries'])]
+        ids = list(schedules)
+
+        naive_ms = []
+        for minute in moments[:20]:
+            # Only the local dates around the time need expanding
+            first, last = local_dates(minute, minute + 1)
+            started = time.perf_counter()
+            sum(
+                1 for schedule in schedules.values()
+                if schedule is None
+                or any(opens <= minute < closes for opens, closes in schedule.intervals(first, last))
+            )
+            naive_ms.append((time.perf_counter() - started) * 1000)
+
+        lookups = [(rng.choice(ids), minute) for minute in moments]
+        started = time.perf_counter()
+        for restaurant_id, minute in lookups:
+            index.is_open(restaurant_id, minute)
+        lookup_us = (time.perf_counter() - started) / len(lookups) * 1e6
+
+        cold_us = []
+        for minute in moments:
+            index._sets.clear()
+            started = time.perf_counter()
+            opened, _ = index.open_and_closed(minute)
+            cold_us.append((time.perf_counter() - started) * 1e6)
+        # "Open now" keeps hitting the same segment
+        started = time.perf_counter()
+        for _ in moments:
+            index.open_and_closed(minute)
+        warm_us = (time.perf_counter() - started) / len(moments) * 1e6
+
+        naive_ms.sort()
+        cold_us.sort()
+        self.stdout.write(f'evaluate hours per row: p50 {percentile(naive_ms, 50):.1f} ms per query')
+        self.stdout.write(f'index, one restaurant:  {lookup_us:.2f} us per lookup')
+        self.stdout.write(
+            f'index, open set:        p50 {percentile(cold_us, 50):.0f} us uncached, '
+            f'{warm_us:.2f} us cached ({len(opened)} of {len(ids)} open at the last time)'
+        )
+
+    def _schedules(self, rng, count, today):
+        schedules = {}
+        for number in range(count):
+            pattern = weighted(rng, HOURS_PATTERNS)
+            if pattern is None:
+                schedules[number] = None
+                continue
+            schedule = schedules[number] = Schedule(restaurant_zone(rng.choice(ZONES)))
+            for weekday in pattern['days']:
+                for opens, closes in pattern['hours']:
+                    schedule.add_weekly(weekday, dt_time(*opens), dt_time(*closes))
+            if rng.random() < 0.05:
+                schedule.add_override(today + timedelta(days=rng.randint(1, 7)), None, None)
+        return schedules
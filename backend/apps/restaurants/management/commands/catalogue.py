@@ -0,0 +1,202 @@
+"""
+Publish the memory-mapped catalogue snapshot (apps/restaurants/catalogue.py).
+
+    python manage.py catalogue --publish
+    python manage.py catalogue --watch
+    python manage.py catalogue --bench --workers 4
+
+--publish writes the next version once, for example after a deploy or a
+bulk import. --watch runs next to the web processes and publishes again
+whenever the catalogue tables change. It checks at most every
+CATALOGUE['WATCH_SECONDS']. Until the new version is published, web
+processes read the database.
+
+--bench builds a snapshot from the database into a temporary file. It then
+forks --workers processes twice, once for each way of holding the
+catalogue:
+
+  * per-process cache: each worker loads every restaurant and menu into
+    its own dicts, which is what caching in the worker would cost
+  * mapped snapshot: each worker maps the file
+
+Every worker then reads every restaurant and its menu once, so all the
+data is touched. Workers take turns for the timed part. Once all workers
+are warm, each reports its warm-up time, its time per lookup and its memory
+(from /proc/self/smaps_rollup). Rss
+counts shared pages in full. Pss divides them between the processes that
+share them, so the Pss of all workers added up is what the machine spends.
+"""
+
+import multiprocessing
+import os
+import random
+import signal
+import tempfile
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from apps.restaurants import catalogue
+from apps.restaurants.models import MenuItem, Restaurant
+from apps.restaurants.serializers import MenuItemSerializer, RestaurantSerializer
+
+SMAPS_ROLLUP = '/proc/self/smaps_rollup'
+
+
+def memory():
+    """{'rss', 'pss', 'private'} of this process in bytes"""
+    fields = {}
+    with open(SMAPS_ROLLUP) as handle:
+        for line in handle:
+            name, _, rest = line.partition(':')
+            if rest.strip().endswith('kB'):
+                fields[name] = int(rest.split()[0]) * 1024
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'private': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def cached_lookup(path):
+    """Every restaurant and menu as Python objects, loaded from the database"""
+    restaurant_serializer = RestaurantSerializer()
+    item_serializer = MenuItemSerializer()
+    restaurants = {
+        restaurant.pk: restaurant_serializer.static_representation(restaurant)
+        for restaurant in Restaurant.objects.select_related('image_asset')
+    }
+    menus = defaultdict(list)
+    for item in MenuItem.objects.filter(is_available=True).select_related('image_asset').order_by(
+        'restaurant_id', 'category', 'name'
+    ):
+        menus[item.restaurant_id].append(item_serializer.to_representation(item))
+    return lambda restaurant_id: (restaurants[restaurant_id], menus.get(restaurant_id, []))
+
+
+def mapped_lookup(path):
+    snapshot = catalogue.Snapshot.map(path)
+
+    def lookup(restaurant_id):
+        row = snapshot.restaurant_row(restaurant_id)
+        return snapshot.restaurant_document(row), snapshot.menu_document(row)
+    return lookup
+
+
+def bench_worker(warm, path, restaurant_ids, lock, barrier, results):
+    idle = memory()
+    # One worker at a time, so the timings do not depend on the number of cores
+    with lock:
+        started = time.perf_counter()
+        lookup = warm(path)
+        warm_s = time.perf_counter() - started
+        started = time.perf_counter()
+        for restaurant_id in restaurant_ids:
+            lookup(restaurant_id)
+        lookup_s = (time.perf_counter() - started) / len(restaurant_ids)
+    # Measured with every worker warm, so Pss divides the shared pages between all of them
+    barrier.wait()
+    results.put((idle, memory(), warm_s, lookup_s))
+    barrier.wait()
+
+
+class Command(BaseCommand):
+    help = 'Publish the memory-mapped restaurant and menu snapshot that web processes share'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--publish', action='store_true', help='Publish the next version and exit')
+        parser.add_argument('--watch', action='store_true', help='Publish whenever the catalogue changes')
+        parser.add_argument('--bench', action='store_true',
+                            help='Compare worker memory and warm-up with and without a snapshot')
+        parser.add_argument('--workers', type=int, default=4, help='Worker processes in --bench')
+
+    def handle(self, *args, **options):
+        if options['bench']:
+            self._bench(options['workers'])
+        elif options['watch']:
+            self._watch()
+        elif options['publish']:
+            self._publish()
+        else:
+            raise CommandError('Give --publish, --watch or --bench')
+
+    def _publish(self, path=None):
+        started = time.perf_counter()
+        snapshot = catalogue.publish(path)
+        path = os.fspath(path or catalogue.get_catalogue_setting('SNAPSHOT_PATH'))
+        self.stdout.write(
+            f'Published version {snapshot.version}: {snapshot.restaurants} restaurants, '
+            f'{snapshot.items} menu items in {time.perf_counter() - started:.1f}s '
+            f'({os.path.getsize(path) / 2**20:.1f} MB)'
+        )
+        return snapshot
+
+    def _watch(self):
+        interval = catalogue.get_catalogue_setting('WATCH_SECONDS')
+        self.stopping = False
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: setattr(self, 'stopping', True))
+        published = catalogue.CatalogueStore().load()
+        self.stdout.write(f'Checking for catalogue changes every {interval}s')
+        while not self.stopping:
+            started = time.monotonic()
+            if published is None or published.fingerprint != catalogue.fingerprint():
+                published = self._publish()
+            # Do not hold a transaction or connection state between runs
+            connection.close_if_unusable_or_obsolete()
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    def _bench(self, workers):
+        if not os.path.exists(SMAPS_ROLLUP):
+            raise CommandError(f'--bench reads {SMAPS_ROLLUP}, which needs Linux')
+        context = multiprocessing.get_context('fork')
+        # Forked processes must open their own connections
+        connections.close_all()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'catalogue.snapshot')
+            # Built in a child, so the workers do not inherit the memory the build used
+            builder = context.Process(target=self._publish, args=(path,))
+            builder.start()
+            builder.join()
+            if builder.exitcode:
+                raise CommandError('Building the snapshot failed')
+            snapshot = catalogue.Snapshot.map(path)
+            if not snapshot.restaurants:
+                raise CommandError('No restaurants; run generate_dataset first')
+            restaurant_ids = [snapshot.record(row).pk for row in range(snapshot.restaurants)]
+            random.Random(1).shuffle(restaurant_ids)
+            del snapshot
+            for label, warm in (('per-process cache', cached_lookup), ('mapped snapshot', mapped_lookup)):
+                self._run(context, label, warm, path, restaurant_ids, workers)
+
+    def _run(self, context, label, warm, path, restaurant_ids, workers):
+        lock = context.Lock()
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(target=bench_worker, args=(warm, path, restaurant_ids, lock, barrier, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        def mean(values):
+            return sum(values) / len(values)
+
+        idle = {key: mean([report[0][key] for report in reports]) for key in ('rss', 'pss', 'private')}
+        warm = {key: mean([report[1][key] for report in reports]) for key in ('rss', 'pss', 'private')}
+        self.stdout.write(
+            f'{label:<18} warm-up {mean([report[2] for report in reports]) * 1000:>8.1f} ms, '
+            f'{mean([report[3] for report in reports]) * 1e6:>6.1f} us per lookup'
+        )
+        self.stdout.write(
+            f'{"":<18} per worker: Rss {warm["rss"] / 2**20:.1f} MB, Pss {warm["pss"] / 2**20:.1f} MB, '
+            f'private {warm["private"] / 2**20:.1f} MB '
+            f'(+{(warm["private"] - idle["private"]) / 2**20:.1f} MB over an idle worker); '
+            f'{workers} workers: Pss {warm["pss"] * workers / 2**20:.1f} MB'
+        )
@@ -0,0 +1,99 @@
+"""
+Maintain trending popularity scores.
+
+    python manage.py trending --rebuild --days 30   # recompute from delivered orders
+    python manage.py trending --show --city brooklyn
+    python manage.py trending --bench 200000        # ingestion throughput
+
+--bench feeds synthetic order events into a throwaway store (nothing is
+written to the database) and reports events/sec for ingestion and the cost of
+a top-K read, for comparison with the peak order rate.
+"""
+
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.restaurants import trending
+from apps.restaurants.models import MenuItem, Restaurant
+
+
+class Command(BaseCommand):
+    help = 'Rebuild, inspect or benchmark time-decayed trending scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute scores from delivered orders')
+        parser.add_argument('--days', type=int, default=None, help='Only replay orders from the last N days')
+        parser.add_argument('--show', action='store_true', help='Print the current top items and restaurants')
+        parser.add_argument('--city', default=None)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--bench', type=int, default=0, metavar='EVENTS',
+                            help='Measure in-memory ingestion and read speed')
+
+    def handle(self, *args, **options):
+        if not (options['rebuild'] or options['show'] or options['bench']):
+            raise CommandError('Pass --rebuild, --show or --bench')
+
+        if options['rebuild']:
+            since = timezone.now() - timedelta(days=options['days']) if options['days'] else None
+            start = time.perf_counter()
+            replayed = trending.store.rebuild(since=since)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(self.style.SUCCESS(
+                f'Replayed {replayed} delivered orders in {elapsed:.2f}s '
+                f'({replayed / max(elapsed, 1e-9):,.0f} orders/s including DB reads and snapshot)'
+            ))
+
+        if options['show']:
+            self._show(options['city'], options['limit'])
+
+        if options['bench']:
+            self._bench(options['bench'])
+
+    def _show(self, city, limit):
+        for kind, model in (('menu_item', MenuItem), ('restaurant', Restaurant)):
+            ranked = trending.store.top(kind, city, limit)
+            names = dict(model.objects.filter(pk__in=[object_id for object_id, _ in ranked])
+                         .values_list('pk', 'name'))
+            self.stdout.write(f"\nTop {kind.replace('_', ' ')}s in {trending.scope_for(city)}:")
+            for object_id, log_score in ranked:
+                self.stdout.write(
+                    f'{trending.current_score(log_score):10.3f}  {names.get(object_id, object_id)}'
+                )
+
+    def _bench(self, events):
+        rng = random.Random(1)
+        items = [uuid.uuid4() for _ in range(5000)]
+        cities = ['manhattan', 'brooklyn', 'queens', 'bronx', 'staten island']
+        now = timezone.now()
+        # Zipf-like skew, as in real order streams
+        weights = [1 / (rank + 1) for rank in range(len(items))]
+        stream = [
+            ('menu_item', item, rng.choice(cities), rng.randint(1, 3), now + timedelta(seconds=index))
+            for index, item in enumerate(rng.choices(items, weights=weights, k=events))
+        ]
+
+        store = trending.TrendingStore()
+        store._loaded = True
+        start = time.perf_counter()
+        for offset in range(0, events, 100):
+            with store._lock:
+                store._ingest(stream[offset:offset + 100])
+        ingest_seconds = time.perf_counter() - start
+
+        reads = 10000
+        start = time.perf_counter()
+        for index in range(reads):
+            with store._lock:
+                store._top[('menu_item', cities[index % len(cities)])].ranked()[:10]
+        read_us = (time.perf_counter() - start) / reads * 1e6
+
+        self.stdout.write(
+            f'Ingested {events:,} events in {ingest_seconds:.2f}s '
+            f'({events / ingest_seconds:,.0f} events/s, each updating city and global top-K)\n'
+            f'Top-{trending.get_trending_setting("TOP_K")} read: {read_us:.1f} us'
+        )
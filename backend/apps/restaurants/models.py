@@ -1,7 +1,270 @@
 """
-Restaurant Models - Placeholder
+Restaurant Models
+
+This module defines restaurants and menu items matching the frontend
+Restaurant and MenuItem interfaces in restaurantService.ts.
 """
 
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+import uuid
+
+
+def validate_timezone(value):
+    try:
+        ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValidationError(f'{value} is not a known IANA time zone.')
+
+
+class Restaurant(models.Model):
+    """
+    Restaurant model
+    Matches the frontend Restaurant interface
+    """
+    
+    PRICE_RANGES = [
+        ('$', '$'),
+        ('$$', '$$'),
+        ('$$$', '$$$'),
+        ('$$$$', '$$$$'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='restaurants'
+    )
+    name = models.CharField(max_length=255)
+    image = models.ImageField(upload_to='restaurant_images/', null=True, blank=True)
+    image_asset = models.ForeignKey(
+        'media_assets.ImageAsset', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='+'
+    )
+    
+    # Listing fields
+    rating = models.DecimalField(max_digits=2, decimal_places=1, default=0)
+    delivery_time = models.CharField(max_length=20, default='30-40 min')
+    delivery_fee = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    category = models.CharField(max_length=100)
+    cuisine = models.JSONField(default=list, blank=True)
+    tags = models.JSONField(default=list, blank=True)
+    price_range = models.CharField(max_length=4, choices=PRICE_RANGES, default='$$')
+    minimum_order = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    # Manual switch; opening hours decide when a switched-on restaurant is open (see hours.py)
+    is_open = models.BooleanField(default=True)
+    featured = models.BooleanField(default=False)
+    
+    # Contact and location
+    address = models.TextField()
+    city = models.CharField(max_length=100, blank=True)
+    phone = models.CharField(max_length=20, blank=True)
+    latitude = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=10, decimal_places=7, null=True, blank=True)
+    # IANA name; blank means OPENING_HOURS['DEFAULT_TIMEZONE']
+    timezone = models.CharField(max_length=64, blank=True, validators=[validate_timezone])
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'restaurants'
+        indexes = [
+            models.Index(fields=['is_open', 'featured']),
+            models.Index(fields=['category']),
+            models.Index(fields=['city']),
+            models.Index(fields=['updated_at']),
+        ]
+    
+    def __str__(self):
+        return self.name
+
+
+class OpeningHours(models.Model):
+    """
+    Weekly opening interval in the restaurant's local time
+    An interval that closes at or before it opens runs past midnight
+    (22:00-02:00 belongs to the day it opens); opens == closes is all day.
+    A restaurant without any rows is open around the clock.
+    """
+    
+    WEEKDAYS = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='opening_hours')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS)
+    opens = models.TimeField()
+    closes = models.TimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'restaurant_opening_hours'
+        ordering = ['weekday', 'opens']
+        indexes = [
+            models.Index(fields=['restaurant', 'weekday']),
+            models.Index(fields=['updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.opens:%H:%M}-{self.closes:%H:%M}"
+
+
+class HoursOverride(models.Model):
+    """
+    Opening hours for one local date (holidays, events), replacing the
+    weekly hours of that date
+    A row without opens/closes closes the restaurant for the day; several
+    rows on one date give several intervals.
+    """
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='hours_overrides')
+    date = models.DateField()
+    opens = models.TimeField(null=True, blank=True)
+    closes = models.TimeField(null=True, blank=True)
+    note = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'restaurant_hours_overrides'
+        ordering = ['date', 'opens']
+        indexes = [
+            models.Index(fields=['restaurant', 'date']),
+            models.Index(fields=['date']),
+            models.Index(fields=['updated_at']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(opens=None, closes=None) | models.Q(opens__isnull=False, closes__isnull=False),
+                name='hours_override_opens_and_closes'
+            ),
+        ]
+    
+    def __str__(self):
+        if self.opens is None:
+            return f"{self.date} closed"
+        return f"{self.date} {self.opens:%H:%M}-{self.closes:%H:%M}"
+
+
+class MenuItem(models.Model):
+    """
+    Menu item model
+    Matches the frontend MenuItem interface; customizations keep the
+    MenuCustomization shape ({id, name, type, required, options[]})
+    """
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='menu_items')
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    price = models.DecimalField(max_digits=8, decimal_places=2)
+    image = models.ImageField(upload_to='menu_images/', null=True, blank=True)
+    image_asset = models.ForeignKey(
+        'media_assets.ImageAsset', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='+'
+    )
+    category = models.CharField(max_length=100)
+    
+    # Dietary information
+    is_vegetarian = models.BooleanField(default=False)
+    is_vegan = models.BooleanField(default=False)
+    is_gluten_free = models.BooleanField(default=False)
+    is_spicy = models.BooleanField(default=False)
+    calories = models.PositiveIntegerField(null=True, blank=True)
+    allergens = models.JSONField(default=list, blank=True)
+    customizations = models.JSONField(default=list, blank=True)
+    
+    is_available = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'menu_items'
+        indexes = [
+            models.Index(fields=['restaurant', 'category']),
+            models.Index(fields=['updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.restaurant.name})"
+
+
+class PopularityScore(models.Model):
+    """
+    Time-decayed popularity of a menu item or restaurant within a city
+
+    Scores use forward decay and are stored as logarithms, so they never
+    overflow. Comparing two rows compares their current decayed popularity.
+    See trending.py for how they are maintained.
+    """
+    
+    KINDS = [
+        ('menu_item', 'Menu item'),
+        ('restaurant', 'Restaurant'),
+    ]
+    # Scope that aggregates every city
+    ALL_CITIES = '*'
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KINDS)
+    object_id = models.UUIDField()
+    scope = models.CharField(max_length=100)
+    log_score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'popularity_scores'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id', 'scope'], name='unique_popularity_score'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'scope', '-log_score']),
+            models.Index(fields=['updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id} in {self.scope}"
+
 
-# Placeholder - will be implemented with full restaurant models
\ No newline at end of file
+class Favorite(models.Model):
+    """
+    Restaurant or menu item saved by a user
+    Matches the frontend FavoriteRestaurant / FavoriteItem interfaces
+    """
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='favorites')
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'favorites'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'restaurant'], condition=models.Q(menu_item=None),
+                name='unique_favorite_restaurant'
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'menu_item'], condition=models.Q(restaurant=None),
+                name='unique_favorite_menu_item'
+            ),
+            models.CheckConstraint(
+                check=models.Q(restaurant=None) ^ models.Q(menu_item=None),
+                name='favorite_restaurant_xor_menu_item'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} likes {self.restaurant_id or self.menu_item_id}"
@@ -0,0 +1,139 @@
+"""
+Restaurant Serializers
+
+DRF serializers matching the frontend Restaurant and MenuItem interfaces.
+"""
+
+from rest_framework import serializers
+
+from apps.delivery.surge import delivery_fee
+from apps.media_assets.pipeline import image_urls
+from . import hours
+from .models import Restaurant, MenuItem, OpeningHours, HoursOverride, Favorite
+
+DELIVERY_FEE = serializers.DecimalField(max_digits=6, decimal_places=2)
+
+
+def add_live_fields(data, restaurant):
+    """
+    Set the fields that change without the restaurant row changing
+    restaurant only needs pk, is_open, delivery_fee and coordinates, so the
+    catalogue snapshot (catalogue.py) can pass its own records.
+    """
+    # delivery_fee is what checkout would charge now (see apps/delivery/surge.py)
+    fee, multiplier = delivery_fee(restaurant)
+    data['delivery_fee'] = DELIVERY_FEE.to_representation(fee)
+    data['surge_multiplier'] = multiplier
+    # Open now: switched on and within its opening hours (see hours.py)
+    data['is_open'] = restaurant.is_open and hours.scheduled_open(restaurant.pk)
+    return data
+
+
+class RestaurantSerializer(serializers.ModelSerializer):
+    """
+    Restaurant serializer that matches the frontend Restaurant interface
+    """
+    images = serializers.SerializerMethodField()
+    coordinates = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Restaurant
+        fields = [
+            'id', 'name', 'image', 'images', 'rating', 'delivery_time', 'delivery_fee',
+            'category', 'cuisine', 'address', 'city', 'phone', 'is_open', 'featured',
+            'tags', 'price_range', 'minimum_order', 'coordinates'
+        ]
+        read_only_fields = ['id', 'image', 'rating']
+    
+    def to_representation(self, instance):
+        return add_live_fields(self.static_representation(instance), instance)
+    
+    def static_representation(self, instance):
+        """Representation without the live fields (stored in the catalogue snapshot)"""
+        return super().to_representation(instance)
+    
+    def get_images(self, obj):
+        return image_urls(obj.image_asset)
+    
+    def get_coordinates(self, obj):
+        if obj.latitude is None or obj.longitude is None:
+            return None
+        return {'latitude': float(obj.latitude), 'longitude': float(obj.longitude)}
+
+
+class OpeningHoursSerializer(serializers.ModelSerializer):
+    """
+    Weekly opening interval in the restaurant's local time
+    """
+    
+    class Meta:
+        model = OpeningHours
+        fields = ['weekday', 'opens', 'closes']
+
+
+class HoursOverrideSerializer(serializers.ModelSerializer):
+    """
+    Opening hours replacing the weekly ones on one date (closed when opens is null)
+    """
+    
+    class Meta:
+        model = HoursOverride
+        fields = ['date', 'opens', 'closes', 'note']
+
+
+class MenuItemSerializer(serializers.ModelSerializer):
+    """
+    Menu item serializer that matches the frontend MenuItem interface
+    """
+    restaurant_id = serializers.UUIDField(read_only=True)
+    images = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = MenuItem
+        fields = [
+            'id', 'restaurant_id', 'name', 'description', 'price', 'image', 'images',
+            'category', 'is_vegetarian', 'is_vegan', 'is_gluten_free', 'is_spicy',
+            'calories', 'allergens', 'customizations', 'is_available'
+        ]
+        read_only_fields = ['id', 'image']
+    
+    def get_images(self, obj):
+        return image_urls(obj.image_asset)
+
+
+class FavoriteSerializer(serializers.ModelSerializer):
+    """
+    Favorite serializer that matches the frontend FavoriteRestaurant / FavoriteItem interfaces
+    """
+    restaurant = RestaurantSerializer(read_only=True)
+    menu_item = MenuItemSerializer(read_only=True)
+    date_added = serializers.DateTimeField(source='created_at', read_only=True)
+    
+    class Meta:
+        model = Favorite
+        fields = ['id', 'restaurant', 'menu_item', 'date_added']
+
+
+class FavoriteCreateSerializer(serializers.Serializer):
+    """
+    Add a restaurant or a menu item to favorites (exactly one of the two)
+    """
+    restaurant_id = serializers.UUIDField(required=False)
+    menu_item_id = serializers.UUIDField(required=False)
+    
+    def validate(self, attrs):
+        if bool(attrs.get('restaurant_id')) == bool(attrs.get('menu_item_id')):
+            raise serializers.ValidationError('Provide either restaurant_id or menu_item_id.')
+        if attrs.get('restaurant_id') and not Restaurant.objects.filter(pk=attrs['restaurant_id']).exists():
+            raise serializers.ValidationError({'restaurant_id': 'Restaurant not found.'})
+        if attrs.get('menu_item_id') and not MenuItem.objects.filter(pk=attrs['menu_item_id']).exists():
+            raise serializers.ValidationError({'menu_item_id': 'Menu item not found.'})
+        return attrs
+    
+    def save(self, user):
+        favorite, created = Favorite.objects.get_or_create(
+            user=user,
+            restaurant_id=self.validated_data.get('restaurant_id'),
+            menu_item_id=self.validated_data.get('menu_item_id'),
+        )
+        return favorite, created
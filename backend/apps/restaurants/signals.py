@@ -0,0 +1,29 @@
+"""
+Restaurant Signals
+
+Rebuild this process's opening hours index when hours change, and stop
+reading the catalogue snapshot once this process changes the catalogue
+"""
+
+from django.db.models.signals import post_delete, post_save
+
+from . import catalogue
+from .hours import index
+from .models import HoursOverride, MenuItem, OpeningHours, Restaurant
+
+
+def hours_changed(sender, **kwargs):
+    index.invalidate()
+
+
+def catalogue_changed(sender, **kwargs):
+    catalogue.store.invalidate()
+
+
+for model in (OpeningHours, HoursOverride):
+    post_save.connect(hours_changed, sender=model, dispatch_uid=f'hours_save_{model.__name__}')
+    post_delete.connect(hours_changed, sender=model, dispatch_uid=f'hours_delete_{model.__name__}')
+
+for model in (Restaurant, MenuItem):
+    post_save.connect(catalogue_changed, sender=model, dispatch_uid=f'catalogue_save_{model.__name__}')
+    post_delete.connect(catalogue_changed, sender=model, dispatch_uid=f'catalogue_delete_{model.__name__}')
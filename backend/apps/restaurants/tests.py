@@ -0,0 +1,299 @@
+"""
+Restaurant Tests
+
+Opening hours: interval expansion (overnight hours, DST, overrides), the
+interval index and the open-now queries. Catalogue snapshot: key lookup,
+columns and documents against the database.
+"""
+
+import json
+import os
+import tempfile
+import uuid
+from array import array
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import catalogue, hours
+from .catalogue import CatalogueStore, Snapshot, _find
+from .hours import MINUTES_PER_DAY, IntervalIndex, Schedule, epoch_minute, merge
+from .models import HoursOverride, MenuItem, Restaurant
+from .serializers import MenuItemSerializer, RestaurantSerializer
+
+UTC = ZoneInfo('UTC')
+NEW_YORK = ZoneInfo('America/New_York')
+
+
+def minute(year, month, day, hour, minute=0):
+    return epoch_minute(datetime(year, month, day, hour, minute, tzinfo=dt_timezone.utc))
+
+
+def every_day(zone, opens, closes):
+    schedule = Schedule(zone)
+    for weekday in range(7):
+        schedule.add_weekly(weekday, opens, closes)
+    return schedule
+
+
+class ScheduleTests(SimpleTestCase):
+
+    def test_merge_joins_overlapping_and_touching_spans(self):
+        self.assertEqual(merge([(5, 8), (1, 3), (3, 4), (7, 10), (12, 13)]), [(1, 4), (5, 10), (12, 13)])
+
+    def test_overnight_interval_belongs_to_the_day_it_opens(self):
+        schedule = Schedule(UTC)
+        # Monday 2024-05-06, 22:00-02:00
+        schedule.add_weekly(0, time(22), time(2))
+        self.assertEqual(
+            schedule.intervals(date(2024, 5, 5), date(2024, 5, 7)),
+            [(minute(2024, 5, 6, 22), minute(2024, 5, 7, 2))],
+        )
+
+    def test_overnight_hours_merge_with_the_next_morning(self):
+        schedule = Schedule(UTC)
+        schedule.add_weekly(4, time(18), time(3))
+        schedule.add_weekly(5, time(0), time(1))
+        self.assertEqual(
+            schedule.intervals(date(2024, 5, 10), date(2024, 5, 11)),
+            [(minute(2024, 5, 10, 18), minute(2024, 5, 11, 3))],
+        )
+
+    def test_all_day_runs_into_the_next_day(self):
+        schedule = every_day(UTC, time(0), time(0))
+        self.assertEqual(
+            schedule.intervals(date(2024, 5, 6), date(2024, 5, 8)),
+            [(minute(2024, 5, 6, 0), minute(2024, 5, 9, 0))],
+        )
+
+    def test_without_weekly_hours_open_around_the_clock(self):
+        schedule = Schedule(UTC)
+        schedule.add_override(date(2024, 5, 7), None, None)
+        self.assertEqual(
+            schedule.intervals(date(2024, 5, 6), date(2024, 5, 8)),
+            [(minute(2024, 5, 6, 0), minute(2024, 5, 7, 0)), (minute(2024, 5, 8, 0), minute(2024, 5, 9, 0))],
+        )
+
+    def test_overrides_replace_the_weekly_hours(self):
+        schedule = every_day(UTC, time(9), time(17))
+        schedule.add_override(date(2024, 12, 25), None, None)
+        schedule.add_override(date(2024, 12, 26), time(12), time(14))
+        schedule.add_override(date(2024, 12, 26), time(18), time(20))
+        self.assertEqual(schedule.intervals(date(2024, 12, 25), date(2024, 12, 26)), [
+            (minute(2024, 12, 26, 12), minute(2024, 12, 26, 14)),
+            (minute(2024, 12, 26, 18), minute(2024, 12, 26, 20)),
+        ])
+        self.assertIsNone(schedule.key())
+
+    def test_spring_forward_shortens_the_day(self):
+        # Clocks go from 02:00 EST to 03:00 EDT on Sunday 2024-03-10
+        schedule = every_day(NEW_YORK, time(1), time(5))
+        self.assertEqual(
+            schedule.intervals(date(2024, 3, 10), date(2024, 3, 10)),
+            [(minute(2024, 3, 10, 6), minute(2024, 3, 10, 9))],
+        )
+
+    def test_fall_back_lengthens_the_day(self):
+        # Clocks go from 02:00 EDT back to 01:00 EST on Sunday 2024-11-03
+        schedule = every_day(NEW_YORK, time(0), time(4))
+        self.assertEqual(
+            schedule.intervals(date(2024, 11, 3), date(2024, 11, 3)),
+            [(minute(2024, 11, 3, 4), minute(2024, 11, 3, 9))],
+        )
+
+    def test_same_local_hours_move_in_utc_across_the_change(self):
+        schedule = every_day(NEW_YORK, time(11), time(14))
+        before, after = schedule.intervals(date(2024, 3, 9), date(2024, 3, 11))[::2]
+        self.assertEqual(before, (minute(2024, 3, 9, 16), minute(2024, 3, 9, 19)))
+        self.assertEqual(after, (minute(2024, 3, 11, 15), minute(2024, 3, 11, 18)))
+
+
+class IntervalIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.start = minute(2024, 5, 6, 0)
+        self.end = self.start + 3 * MINUTES_PER_DAY
+        lunch = every_day(UTC, time(11), time(15))
+        late = every_day(UTC, time(20), time(2))
+        closed = every_day(UTC, time(11), time(15))
+        for day in range(5, 10):
+            closed.add_override(date(2024, 5, day), None, None)
+        self.index = IntervalIndex.build(
+            {'lunch': lunch, 'late': late, 'always': None, 'closed': closed}, self.start, self.end
+        )
+
+    def test_is_open(self):
+        cases = [
+            ('lunch', minute(2024, 5, 6, 12), True),
+            ('lunch', minute(2024, 5, 6, 15), False),
+            ('late', minute(2024, 5, 7, 1, 59), True),
+            ('late', minute(2024, 5, 7, 2), False),
+            # The window starts inside Sunday night's interval
+            ('late', self.start, True),
+            ('always', minute(2024, 5, 7, 4), True),
+            ('closed', minute(2024, 5, 6, 12), False),
+            ('created_after_the_build', minute(2024, 5, 6, 12), True),
+        ]
+        for restaurant_id, at, expected in cases:
+            with self.subTest(restaurant_id=restaurant_id, at=at):
+                self.assertIs(self.index.is_open(restaurant_id, at), expected)
+
+    def test_open_and_closed(self):
+        opened, closed = self.index.open_and_closed(minute(2024, 5, 7, 12))
+        self.assertEqual(opened, {'lunch', 'always'})
+        self.assertEqual(closed, {'late', 'closed'})
+
+    def test_open_intervals_are_clipped(self):
+        start = minute(2024, 5, 6, 12)
+        self.assertEqual(
+            self.index.open_intervals('lunch', start, minute(2024, 5, 7, 12)),
+            [(start, minute(2024, 5, 6, 15)), (minute(2024, 5, 7, 11), minute(2024, 5, 7, 12))],
+        )
+
+
+class OpenNowTests(TestCase):
+
+    def setUp(self):
+        today = timezone.now().date()
+        self.open = Restaurant.objects.create(name='Open', category='Grill', address='1 Main St', timezone='UTC')
+        self.closed = Restaurant.objects.create(name='Closed', category='Grill', address='2 Main St', timezone='UTC')
+        self.switched_off = Restaurant.objects.create(
+            name='Off', category='Grill', address='3 Main St', timezone='UTC', is_open=False
+        )
+        HoursOverride.objects.bulk_create([
+            HoursOverride(restaurant=self.closed, date=today + timedelta(days=offset)) for offset in (-1, 0, 1)
+        ])
+        hours.index.invalidate()
+
+    def test_filter_open(self):
+        self.assertEqual(list(hours.filter_open(Restaurant.objects.all())), [self.open])
+
+    def test_is_open(self):
+        self.assertTrue(hours.is_open(self.open))
+        self.assertFalse(hours.is_open(self.closed))
+        self.assertFalse(hours.is_open(self.switched_off))
+
+    def test_beyond_the_window(self):
+        later = timezone.now() + timedelta(days=hours.get_hours_setting('HORIZON_DAYS') + 5)
+        self.assertTrue(hours.scheduled_open(self.closed.pk, later))
+        with self.assertRaises(ValueError):
+            hours.filter_open(Restaurant.objects.all(), later)
+
+
+def key(high, low):
+    return uuid.UUID(int=high << 64 | low)
+
+
+def encoded(data):
+    """data as it comes back out of a snapshot document"""
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+class SnapshotKeyTests(SimpleTestCase):
+
+    def setUp(self):
+        # Sorted by (high, low); rows 1-3 share their high half
+        self.keys = [(1, 9), (5, 2), (5, 7), (5, 2 ** 64 - 1), (2 ** 64 - 1, 0)]
+        self.high = array('Q', [high for high, _ in self.keys])
+        self.low = array('Q', [low for _, low in self.keys])
+
+    def test_finds_every_key(self):
+        for row, (high, low) in enumerate(self.keys):
+            with self.subTest(row=row):
+                self.assertEqual(_find(self.high, self.low, key(high, low)), row)
+
+    def test_missing_keys(self):
+        for high, low in ((0, 0), (5, 3), (5, 0), (6, 2), (2 ** 64 - 1, 1)):
+            with self.subTest(high=high, low=low):
+                self.assertIsNone(_find(self.high, self.low, key(high, low)))
+
+    def test_empty(self):
+        self.assertIsNone(_find(array('Q'), array('Q'), uuid.uuid4()))
+
+
+class CatalogueSnapshotTests(TestCase):
+
+    def setUp(self):
+        self.restaurants = [
+            Restaurant.objects.create(
+                name=f'Kitchen {index}', category='Grill', address=f'{index} Main St',
+                delivery_fee=Decimal('2.49') + index, latitude=Decimal('5.6037') + index,
+                longitude=Decimal('-0.1870') - index,
+            )
+            for index in range(3)
+        ]
+        self.no_coordinates = Restaurant.objects.create(
+            name='Pop-up', category='Grill', address='Market', is_open=False
+        )
+        kitchen = self.restaurants[0]
+        self.menu = [
+            MenuItem.objects.create(restaurant=kitchen, name=name, category=category, price=Decimal('9.50'))
+            for category, name in (('Mains', 'Stew'), ('Drinks', 'Sobolo'), ('Mains', 'Jollof'))
+        ]
+        self.sold_out = MenuItem.objects.create(
+            restaurant=kitchen, name='Banku', category='Mains', price=Decimal('7.00'), is_available=False
+        )
+        self.snapshot = Snapshot(catalogue.build())
+
+    def test_header(self):
+        self.assertEqual((self.snapshot.version, self.snapshot.restaurants, self.snapshot.items), (1, 4, 3))
+        self.assertEqual(self.snapshot.fingerprint, catalogue.fingerprint())
+
+    def test_restaurant_lookup(self):
+        for restaurant in [*self.restaurants, self.no_coordinates]:
+            with self.subTest(name=restaurant.name):
+                row = self.snapshot.restaurant_row(restaurant.pk)
+                self.assertIsNotNone(row)
+                self.assertEqual(
+                    self.snapshot.restaurant_document(row),
+                    encoded(RestaurantSerializer().static_representation(restaurant)),
+                )
+                record = self.snapshot.record(row)
+                self.assertEqual(record.pk, restaurant.pk)
+                self.assertEqual(record.delivery_fee, restaurant.delivery_fee)
+                self.assertEqual(record.is_open, restaurant.is_open)
+        self.assertIsNone(self.snapshot.restaurant_row(uuid.uuid4()))
+
+    def test_coordinates(self):
+        record = self.snapshot.record(self.snapshot.restaurant_row(self.restaurants[1].pk))
+        self.assertAlmostEqual(record.latitude, 6.6037)
+        self.assertAlmostEqual(record.longitude, -1.187)
+        record = self.snapshot.record(self.snapshot.restaurant_row(self.no_coordinates.pk))
+        self.assertEqual((record.latitude, record.longitude), (None, None))
+
+    def test_menu_in_menu_order_without_unavailable_items(self):
+        row = self.snapshot.restaurant_row(self.restaurants[0].pk)
+        self.assertEqual([item['name'] for item in self.snapshot.menu_document(row)], ['Sobolo', 'Jollof', 'Stew'])
+        self.assertEqual(self.snapshot.menu_document(self.snapshot.restaurant_row(self.restaurants[1].pk)), [])
+
+    def test_item_lookup(self):
+        for item in self.menu:
+            row = self.snapshot.item_row(item.pk)
+            self.assertEqual(self.snapshot.item_document(row), encoded(MenuItemSerializer(item).data))
+            restaurant_row = self.snapshot.item_restaurants[row]
+            self.assertEqual(self.snapshot.record(restaurant_row).pk, item.restaurant_id)
+        self.assertIsNone(self.snapshot.item_row(self.sold_out.pk))
+
+    def test_publish_and_read_through_the_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'catalogue.snapshot')
+            self.assertEqual(catalogue.publish(path).version, 1)
+            self.assertEqual(catalogue.publish(path).version, 2)
+            # Compare fingerprints with the database on every read
+            with mock.patch.object(catalogue, 'store', CatalogueStore(path)), \
+                    override_settings(CATALOGUE={'REFRESH_SECONDS': 0}):
+                kitchen = self.restaurants[0]
+                self.assertEqual(
+                    catalogue.restaurant(kitchen.pk), encoded(RestaurantSerializer(kitchen).data)
+                )
+                self.assertEqual(set(catalogue.restaurants([self.no_coordinates.pk], switched_on=True)), set())
+                self.assertEqual(len(catalogue.menu(kitchen.pk)), 3)
+
+                # An edit makes the snapshot stale until the next publish
+                MenuItem.objects.filter(pk=self.menu[0].pk).update(price=Decimal('11.00'), updated_at=timezone.now())
+                self.assertIsNone(catalogue.menu(kitchen.pk))
@@ -0,0 +1,338 @@
+"""
+Trending Service
+
+Time-decayed popularity for menu items and restaurants, with a top-K per city.
+
+Each completed order adds quantity x e^(lambda * (t - LANDMARK)) to the
+score of every item it contains, and to its restaurant. This is forward
+decay: existing scores never have to be rewritten as time passes, because
+rescaling by the current time gives the decayed value without changing the
+ranking. Scores are kept as logarithms (combined with logaddexp) so the
+exponent cannot overflow. lambda comes from TRENDING['HALF_LIFE_HOURS'].
+
+Every process keeps all scores plus a heap-backed top-K per (kind, city) in
+memory. Recording an order costs O(items x log K) and reading "popular near
+you" only walks the K entries, so neither needs an aggregation query.
+
+Every TRENDING['SNAPSHOT_SECONDS'] a process adds the increments it has
+collected to PopularityScore rows, then reloads rows that other workers
+changed since. That keeps workers close to each other and lets a restarted
+worker pick up where it left off. If a worker dies, increments it had not
+flushed are lost. `python manage.py trending --rebuild` recomputes every
+score from delivered orders.
+"""
+
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import PopularityScore
+
+logger = logging.getLogger(__name__)
+
+LANDMARK = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def get_trending_setting(name):
+    defaults = {
+        'HALF_LIFE_HOURS': 48,
+        'TOP_K': 50,
+        'SNAPSHOT_SECONDS': 60,
+    }
+    return getattr(settings, 'TRENDING', {}).get(name, defaults[name])
+
+
+def decay_rate():
+    """lambda per second for the configured half-life"""
+    return math.log(2) / (get_trending_setting('HALF_LIFE_HOURS') * 3600)
+
+
+def log_weight(quantity, when):
+    return math.log(quantity) + decay_rate() * (when - LANDMARK).total_seconds()
+
+
+def logaddexp(a, b):
+    if a is None:
+        return b
+    high, low = (a, b) if a >= b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+def current_score(log_score, now=None):
+    """Decayed popularity at `now`, in orders-equivalent units"""
+    now = now or timezone.now()
+    return math.exp(log_score - decay_rate() * (now - LANDMARK).total_seconds())
+
+
+def scope_for(city):
+    return (city or '').strip().lower() or PopularityScore.ALL_CITIES
+
+
+class TopK:
+    """
+    The K highest scores among keys whose scores only increase
+
+    A min-heap of members; an update pushes a new entry and leaves the old
+    one behind, and stale entries are dropped when they reach the top.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.members = {}
+        self.heap = []
+
+    def offer(self, key, score):
+        if key in self.members:
+            self.members[key] = score
+            heapq.heappush(self.heap, (score, key))
+            if len(self.heap) > 4 * self.k:
+                self.heap = [(value, member) for member, value in self.members.items()]
+                heapq.heapify(self.heap)
+            return
+        if len(self.members) < self.k:
+            self.members[key] = score
+            heapq.heappush(self.heap, (score, key))
+            return
+        self._drop_stale()
+        if score > self.heap[0][0]:
+            _, evicted = heapq.heapreplace(self.heap, (score, key))
+            del self.members[evicted]
+            self.members[key] = score
+
+    def _drop_stale(self):
+        while self.heap and self.members.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+    def ranked(self):
+        return sorted(self.members.items(), key=lambda member: member[1], reverse=True)
+
+
+class TrendingStore:
+    """Per-process popularity scores and top-K lists"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        # (kind, scope) -> {object_id: log_score}
+        self._scores = defaultdict(dict)
+        self._top = {}
+        # (kind, object_id, scope) -> log increment not yet written to the DB
+        self._pending = {}
+        self._last_sync = 0.0
+        self._synced_until = None
+
+    # Ingestion
+
+    def record(self, events):
+        """
+        Add (kind, object_id, city, quantity, when) events
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._ingest(events)
+        self.maybe_sync()
+
+    def _ingest(self, events):
+        for kind, object_id, city, quantity, when in events:
+            weight = log_weight(quantity, when)
+            for scope in {scope_for(city), PopularityScore.ALL_CITIES}:
+                key = (kind, object_id, scope)
+                self._pending[key] = logaddexp(self._pending.get(key), weight)
+                self._add(kind, scope, object_id, weight)
+
+    def record_order(self, order, items=None):
+        """
+        Count a delivered order
+        items: (menu_item_id, quantity) pairs; read from the order if omitted
+        """
+        if items is None:
+            items = order.items.exclude(menu_item=None).values_list('menu_item_id', 'quantity')
+        when = order.delivered_at or timezone.now()
+        city = order.restaurant.city
+        events = [('menu_item', menu_item_id, city, quantity, when) for menu_item_id, quantity in items]
+        events.append(('restaurant', order.restaurant_id, city, 1, when))
+        self.record(events)
+
+    def _add(self, kind, scope, object_id, weight):
+        scores = self._scores[(kind, scope)]
+        score = logaddexp(scores.get(object_id), weight)
+        scores[object_id] = score
+        self._top_for(kind, scope).offer(object_id, score)
+
+    def _top_for(self, kind, scope):
+        top = self._top.get((kind, scope))
+        if top is None:
+            top = self._top[(kind, scope)] = TopK(get_trending_setting('TOP_K'))
+        return top
+
+    # Reads
+
+    def top(self, kind, city=None, limit=None):
+        """[(object_id, log_score)] best first, for a city or all cities"""
+        self._ensure_loaded()
+        self.maybe_sync()
+        with self._lock:
+            top = self._top.get((kind, scope_for(city)))
+            ranked = top.ranked() if top is not None else []
+        return ranked[:limit] if limit else ranked
+
+    # Persistence
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            started = timezone.now()
+            self._apply_rows(
+                PopularityScore.objects.values_list('kind', 'object_id', 'scope', 'log_score'), started
+            )
+            self._last_sync = time.monotonic()
+            self._loaded = True
+
+    def maybe_sync(self):
+        with self._lock:
+            if time.monotonic() - self._last_sync < get_trending_setting('SNAPSHOT_SECONDS'):
+                return
+            # Claimed under the lock so only one thread syncs per interval
+            self._last_sync = time.monotonic()
+        self.sync()
+
+    def sync(self):
+        """Write pending increments, then pull scores other processes changed"""
+        with self._lock:
+            self._last_sync = time.monotonic()
+            pending, self._pending = self._pending, {}
+
+        try:
+            self._flush(pending)
+        except IntegrityError:
+            # Another worker inserted one of our new rows first; retry as updates
+            self._flush(pending)
+        except Exception:
+            with self._lock:
+                for key, weight in pending.items():
+                    self._pending[key] = logaddexp(self._pending.get(key), weight)
+            raise
+
+        started = timezone.now()
+        rows = PopularityScore.objects.all()
+        if self._synced_until is not None:
+            rows = rows.filter(updated_at__gte=self._synced_until)
+        rows = list(rows.values_list('kind', 'object_id', 'scope', 'log_score'))
+        with self._lock:
+            self._apply_rows(rows, started)
+
+    def _flush(self, pending):
+        if not pending:
+            return
+        object_ids = {object_id for _, object_id, _ in pending}
+        with transaction.atomic():
+            existing = {
+                (row.kind, row.object_id, row.scope): row
+                for row in PopularityScore.objects.select_for_update().filter(object_id__in=object_ids)
+            }
+            updated, created = [], []
+            for (kind, object_id, scope), weight in pending.items():
+                row = existing.get((kind, object_id, scope))
+                if row is None:
+                    created.append(PopularityScore(kind=kind, object_id=object_id, scope=scope, log_score=weight))
+                else:
+                    row.log_score = logaddexp(row.log_score, weight)
+                    row.updated_at = timezone.now()
+                    updated.append(row)
+            PopularityScore.objects.bulk_update(updated, ['log_score', 'updated_at'], batch_size=500)
+            PopularityScore.objects.bulk_create(created, batch_size=500)
+
+    def _apply_rows(self, rows, started):
+        """Replace in-memory scores with DB rows read at `started` (caller holds the lock)"""
+        changed = set()
+        for kind, object_id, scope, log_score in rows:
+            # Keep increments recorded locally since the last flush on top
+            pending = self._pending.get((kind, object_id, scope))
+            self._scores[(kind, scope)][object_id] = logaddexp(pending, log_score)
+            changed.add((kind, scope))
+        for kind, scope in changed:
+            top = self._top[(kind, scope)] = TopK(get_trending_setting('TOP_K'))
+            for object_id, score in heapq.nlargest(
+                top.k, self._scores[(kind, scope)].items(), key=lambda item: item[1]
+            ):
+                top.offer(object_id, score)
+        # Overlap the next reload a little so rows committed during this one are not missed
+        self._synced_until = started - timedelta(seconds=5)
+
+    def rebuild(self, since=None, batch_size=2000):
+        """
+        Recompute every score from delivered orders
+        Returns the number of orders replayed
+        """
+        from apps.orders.models import Order, OrderItem
+
+        orders = Order.objects.filter(status='delivered').exclude(delivered_at=None)
+        if since is not None:
+            orders = orders.filter(delivered_at__gte=since)
+
+        with transaction.atomic():
+            PopularityScore.objects.all().delete()
+            self.reset()
+            with self._lock:
+                self._loaded = True
+            replayed = 0
+            batch = []
+            rows = orders.values_list(
+                'id', 'restaurant_id', 'restaurant__city', 'delivered_at'
+            ).order_by('delivered_at')
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(row)
+                if len(batch) == batch_size:
+                    replayed += self._replay(batch, OrderItem)
+                    batch = []
+            replayed += self._replay(batch, OrderItem)
+            self.sync()
+        return replayed
+
+    def _replay(self, orders, order_item_model):
+        if not orders:
+            return 0
+        by_order = defaultdict(list)
+        for order_id, menu_item_id, quantity in order_item_model.objects.filter(
+            order_id__in=[order[0] for order in orders]
+        ).exclude(menu_item=None).values_list('order_id', 'menu_item_id', 'quantity'):
+            by_order[order_id].append((menu_item_id, quantity))
+
+        events = []
+        for order_id, restaurant_id, city, delivered_at in orders:
+            events.extend(('menu_item', menu_item_id, city, quantity, delivered_at)
+                          for menu_item_id, quantity in by_order[order_id])
+            events.append(('restaurant', restaurant_id, city, 1, delivered_at))
+        with self._lock:
+            self._ingest(events)
+        return len(orders)
+
+    def reset(self):
+        with self._lock:
+            self._scores.clear()
+            self._top.clear()
+            self._pending.clear()
+            self._loaded = False
+            self._synced_until = None
+
+
+store = TrendingStore()
+
+
+def record_delivered_order(order):
+    """on_commit hook for completed orders; never fails the request"""
+    try:
+        store.record_order(order)
+    except Exception:
+        logger.exception('Could not record order %s in trending scores', order.pk)
@@ -10,6 +10,11 @@ app_name = 'restaurants'
 urlpatterns = [
     # Restaurant endpoints
     path('', views.restaurant_list, name='restaurant_list'),
+    path('popular-items/', views.popular_items, name='popular_items'),
+    path('trending/', views.trending_restaurants, name='trending_restaurants'),
+    path('favorites/', views.favorites, name='favorites'),
+    path('favorites/<uuid:favorite_id>/', views.remove_favorite, name='remove_favorite'),
     path('<uuid:restaurant_id>/', views.restaurant_detail, name='restaurant_detail'),
     path('<uuid:restaurant_id>/menu/', views.restaurant_menu, name='restaurant_menu'),
+    path('<uuid:restaurant_id>/hours/', views.restaurant_hours, name='restaurant_hours'),
 ]
\ No newline at end of file
@@ -1,39 +1,261 @@
 """
-Restaurant Views - Placeholder
+Restaurant Views
+
+This module contains API views for browsing restaurants and menus that match
+the frontend restaurantService methods.
 """
 
+from datetime import timedelta
+
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from . import catalogue, hours, trending
+from .models import Restaurant, MenuItem, Favorite
+from .serializers import (
+    RestaurantSerializer,
+    OpeningHoursSerializer,
+    HoursOverrideSerializer,
+    MenuItemSerializer,
+    FavoriteSerializer,
+    FavoriteCreateSerializer
+)
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def restaurant_list(request):
-    """Get list of restaurants"""
-    # Placeholder - will return mock data for now
+    """
+    Get list of restaurants
+    Matches frontend restaurantService.getRestaurants() / searchRestaurants() / getOpenRestaurants()
+    open_at=<ISO datetime> keeps restaurants open at that time (scheduled orders)
+    """
+    restaurants = Restaurant.objects.select_related('image_asset').order_by('-featured', '-rating', 'name')
+    
+    params = request.query_params
+    if params.get('category'):
+        restaurants = restaurants.filter(category__iexact=params['category'])
+    if params.get('city'):
+        restaurants = restaurants.filter(city__iexact=params['city'])
+    open_at = None
+    if params.get('open_at'):
+        open_at = parse_datetime(params['open_at'])
+        if open_at is None:
+            return Response({
+                'success': False,
+                'message': 'open_at must be an ISO 8601 date and time.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(open_at):
+            open_at = timezone.make_aware(open_at)
+    if open_at or params.get('is_open') in ('true', '1'):
+        try:
+            restaurants = hours.filter_open(restaurants, open_at)
+        except ValueError as error:
+            return Response({
+                'success': False,
+                'message': str(error)
+            }, status=status.HTTP_400_BAD_REQUEST)
+    if params.get('featured') in ('true', '1'):
+        restaurants = restaurants.filter(featured=True)
+    if params.get('search'):
+        restaurants = restaurants.filter(name__icontains=params['search'])
+    
+    paginator = PageNumberPagination()
+    page = paginator.paginate_queryset(restaurants, request)
     return Response({
         'success': True,
-        'restaurants': []
+        'count': paginator.page.paginator.count,
+        'next': paginator.get_next_link(),
+        'restaurants': RestaurantSerializer(page, many=True).data
     }, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def restaurant_detail(request, restaurant_id):
-    """Get restaurant details"""
+    """
+    Get restaurant details
+    Matches frontend restaurantService.getRestaurantById()
+    """
+    data = catalogue.restaurant(restaurant_id)
+    if data is None:
+        restaurant = get_object_or_404(Restaurant.objects.select_related('image_asset'), pk=restaurant_id)
+        data = RestaurantSerializer(restaurant).data
     return Response({
         'success': True,
-        'restaurant': {}
+        'restaurant': data
     }, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def restaurant_menu(request, restaurant_id):
-    """Get restaurant menu"""
+    """
+    Get restaurant menu
+    Matches frontend restaurantService.getMenuItems()
+    """
+    menu = catalogue.menu(restaurant_id)
+    if menu is None:
+        get_object_or_404(Restaurant.objects.only('id'), pk=restaurant_id)
+        menu = MenuItemSerializer(MenuItem.objects.filter(
+            restaurant_id=restaurant_id, is_available=True
+        ).select_related('image_asset').order_by('category', 'name'), many=True).data
+    return Response({
+        'success': True,
+        'menu': menu
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def restaurant_hours(request, restaurant_id):
+    """
+    Opening hours, upcoming overrides and the open intervals of the next days
+    Feeds the scheduled-order time picker
+    """
+    restaurant = get_object_or_404(Restaurant, pk=restaurant_id)
+    try:
+        days = max(1, min(int(request.query_params.get('days', 7)), hours.get_hours_setting('HORIZON_DAYS')))
+    except ValueError:
+        days = 7
+    today = timezone.localdate(timezone=hours.restaurant_zone(restaurant.timezone))
+    return Response({
+        'success': True,
+        'timezone': str(hours.restaurant_zone(restaurant.timezone)),
+        'is_open': hours.is_open(restaurant),
+        'weekly': OpeningHoursSerializer(restaurant.opening_hours.all(), many=True).data,
+        'overrides': HoursOverrideSerializer(
+            restaurant.hours_overrides.filter(date__gte=today, date__lte=today + timedelta(days=days)), many=True
+        ).data,
+        'open_intervals': [
+            {'opens_at': opens_at, 'closes_at': closes_at}
+            for opens_at, closes_at in hours.open_intervals(restaurant.pk, days)
+        ],
+    }, status=status.HTTP_200_OK)
+
+
+def trending_limit(request):
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        limit = 10
+    return max(1, min(limit, trending.get_trending_setting('TOP_K')))
+
+
+def popular_menu_items(city=None, limit=10):
+    """
+    Most popular available menu items, best first, from the trending top-K
+    Each item carries its decayed popularity score
+    """
+    ranked = trending.store.top('menu_item', city)
+    ids = [object_id for object_id, _ in ranked]
+    mapped = catalogue.menu_items(ids, switched_on=True)
+    items = mapped if mapped is not None else MenuItem.objects.filter(
+        is_available=True, restaurant__is_open=True
+    ).select_related('image_asset').in_bulk(ids)
+    popular = []
+    for object_id, log_score in ranked:
+        if object_id in items:
+            popular.append(dict(
+                items[object_id] if mapped is not None else MenuItemSerializer(items[object_id]).data,
+                popularity=round(trending.current_score(log_score), 3)
+            ))
+            if len(popular) == limit:
+                break
+    return popular
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def popular_items(request):
+    """
+    Trending menu items, optionally within a city
+    Matches frontend restaurantService.getPopularItems()
+    """
     return Response({
         'success': True,
-        'menu': []
-    }, status=status.HTTP_200_OK)
\ No newline at end of file
+        'items': popular_menu_items(request.query_params.get('city'), trending_limit(request))
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def trending_restaurants(request):
+    """
+    Trending restaurants, optionally within a city
+    Matches frontend restaurantService.getTrendingRestaurants()
+    """
+    limit = trending_limit(request)
+    ranked = trending.store.top('restaurant', request.query_params.get('city'))
+    ids = [object_id for object_id, _ in ranked]
+    mapped = catalogue.restaurants(ids, switched_on=True)
+    restaurants = mapped if mapped is not None else Restaurant.objects.filter(
+        is_open=True
+    ).select_related('image_asset').in_bulk(ids)
+    data = []
+    for object_id, log_score in ranked:
+        if object_id in restaurants:
+            data.append(dict(
+                restaurants[object_id] if mapped is not None else RestaurantSerializer(restaurants[object_id]).data,
+                popularity=round(trending.current_score(log_score), 3)
+            ))
+            if len(data) == limit:
+                break
+    return Response({
+        'success': True,
+        'restaurants': data
+    }, status=status.HTTP_200_OK)
+
+
+def favorite_queryset(user):
+    return Favorite.objects.filter(user=user).select_related(
+        'restaurant__image_asset', 'menu_item__image_asset'
+    )
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def favorites(request):
+    """
+    List or add favorites
+    Matches frontend favoritesService.getFavorites() / addRestaurant() / addItem()
+    """
+    if request.method == 'POST':
+        serializer = FavoriteCreateSerializer(data=request.data)
+        if serializer.is_valid():
+            favorite, created = serializer.save(request.user)
+            return Response({
+                'success': True,
+                'favorite': FavoriteSerializer(favorite_queryset(request.user).get(pk=favorite.pk)).data
+            }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+        
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'favorites': FavoriteSerializer(favorite_queryset(request.user).order_by('-created_at'), many=True).data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def remove_favorite(request, favorite_id):
+    """
+    Remove a favorite
+    Matches frontend favoritesService.removeRestaurant() / removeItem()
+    """
+    favorite = get_object_or_404(Favorite, pk=favorite_id, user=request.user)
+    favorite.delete()
+    return Response({
+        'success': True,
+        'message': 'Removed from favorites'
+    }, status=status.HTTP_200_OK)
@@ -0,0 +1,27 @@
+"""
+Sync Admin Configuration
+"""
+
+from django.contrib import admin
+from .models import ChangeLog, SyncMutation
+
+
+@admin.register(ChangeLog)
+class ChangeLogAdmin(admin.ModelAdmin):
+    """
+    Change log admin configuration
+    """
+    list_display = ['id', 'entity', 'object_id', 'operation', 'user_id', 'created_at']
+    list_filter = ['entity', 'operation']
+    search_fields = ['object_id', 'user_id']
+
+
+@admin.register(SyncMutation)
+class SyncMutationAdmin(admin.ModelAdmin):
+    """
+    Offline mutation admin configuration
+    """
+    list_display = ['client_id', 'user', 'type', 'status', 'created_at']
+    list_filter = ['type', 'status']
+    search_fields = ['client_id', 'user__email']
+    raw_id_fields = ['user']
@@ -0,0 +1,14 @@
+"""
+Sync App Configuration
+"""
+
+from django.apps import AppConfig
+
+
+class SyncConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.sync'
+    
+    def ready(self):
+        """Connect change capture signals"""
+        import apps.sync.signals  # noqa: F401
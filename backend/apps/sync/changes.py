@@ -0,0 +1,40 @@
+"""
+Change Capture
+
+Writes ChangeLog rows for every synced model. Saves and deletes are captured
+by the signals in signals.py. Code that changes rows with
+QuerySet.update() or bulk_create() bypasses those signals and must call
+record_changes() itself, inside the same transaction.
+"""
+
+from .models import ChangeLog
+
+# model label -> (entity name, attribute holding the owning user's id or None)
+TRACKED_MODELS = {
+    'restaurants.Restaurant': ('restaurant', None),
+    'restaurants.MenuItem': ('menu_item', None),
+    'orders.Order': ('order', 'customer_id'),
+    'notifications.Notification': ('notification', 'user_id'),
+    'restaurants.Favorite': ('favorite', 'user_id'),
+}
+
+
+def record_change(instance, operation='upsert'):
+    entity, owner_attribute = TRACKED_MODELS[instance._meta.label]
+    ChangeLog.objects.create(
+        entity=entity,
+        object_id=instance.pk,
+        operation=operation,
+        user_id=getattr(instance, owner_attribute) if owner_attribute else None,
+    )
+
+
+def record_changes(entity, rows, operation='upsert'):
+    """
+    Log many changes at once
+    rows: (object_id, user_id) pairs; user_id is None for public objects
+    """
+    ChangeLog.objects.bulk_create([
+        ChangeLog(entity=entity, object_id=object_id, operation=operation, user_id=user_id)
+        for object_id, user_id in rows
+    ])
@@ -0,0 +1,87 @@
+"""
+Maintain and measure the delta sync change log.
+
+    python manage.py sync_changelog --prune-days 30
+    python manage.py sync_changelog --bench 20
+
+--prune-days removes change log rows older than N days. Clients holding an
+older token get a full snapshot on their next sync.
+
+--bench compares, for sampled generated customers, a full sync against a
+delta sync after a typical small change: response bytes and SQL queries.
+"""
+
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.authentication.models import User
+from apps.notifications.models import Notification
+from apps.sync.models import ChangeLog, ChangeLogPrune
+
+
+class Command(BaseCommand):
+    help = 'Prune the sync change log or benchmark delta vs full sync'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune-days', type=int, default=None)
+        parser.add_argument('--bench', type=int, default=0, metavar='USERS')
+
+    def handle(self, *args, **options):
+        if options['prune_days'] is None and not options['bench']:
+            raise CommandError('Pass --prune-days or --bench')
+        if options['prune_days'] is not None:
+            self._prune(options['prune_days'])
+        if options['bench']:
+            self._bench(options['bench'])
+
+    def _prune(self, days):
+        cutoff = timezone.now() - timedelta(days=days)
+        through = ChangeLog.objects.filter(created_at__lt=cutoff).order_by('-id').values_list('id', flat=True).first()
+        if through is None:
+            self.stdout.write('Nothing to prune')
+            return
+        with transaction.atomic():
+            ChangeLogPrune.objects.create(pruned_through=through)
+            deleted, _ = ChangeLog.objects.filter(id__lte=through).delete()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} change log rows through #{through}'))
+
+    @override_settings(SYNC={'SETTLE_SECONDS': 0}, ALLOWED_HOSTS=['localhost'])
+    def _bench(self, users):
+        client = Client(SERVER_NAME='localhost')
+        customers = list(User.objects.filter(user_type='customer', notifications__is_read=False).distinct()[:users])
+        if not customers:
+            raise CommandError('No customers with notifications; run generate_dataset first.')
+
+        totals = {'full': [0, 0], 'delta': [0, 0]}
+        for customer in customers:
+            headers = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(customer).access_token}'}
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get('/api/v1/sync/', **headers)
+            totals['full'][0] += len(response.content)
+            totals['full'][1] += len(queries)
+            token = json.loads(response.content)['token']
+
+            # A returning user typically finds a notification or two changed
+            notification = Notification.objects.filter(user=customer, is_read=False).first()
+            client.post('/api/v1/sync/', {'mutations': [
+                {'id': f'bench-{notification.pk}', 'type': 'notification.read', 'data': {'ids': [str(notification.pk)]}}
+            ]}, content_type='application/json', **headers)
+
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(f'/api/v1/sync/?since={token}', **headers)
+            totals['delta'][0] += len(response.content)
+            totals['delta'][1] += len(queries)
+
+        count = len(customers)
+        for kind, (size, query_count) in totals.items():
+            self.stdout.write(
+                f'{kind:>6} sync: {size / count / 1024:10.1f} KiB, {query_count / count:5.1f} queries per user'
+            )
+        self.stdout.write(f"Delta is {totals['full'][0] / max(totals['delta'][0], 1):,.0f}x smaller")
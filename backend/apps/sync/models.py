@@ -0,0 +1,90 @@
+"""
+Sync Models
+
+Change log behind the delta sync API (/api/v1/sync/) and the record of
+offline mutations already applied.
+"""
+
+from django.conf import settings
+from django.db import models
+import uuid
+
+
+class ChangeLog(models.Model):
+    """
+    One row per created, updated or deleted synced object
+    The auto-increment id is the sequence that sync tokens refer to
+    """
+    
+    ENTITIES = [
+        ('restaurant', 'Restaurant'),
+        ('menu_item', 'Menu item'),
+        ('order', 'Order'),
+        ('notification', 'Notification'),
+        ('favorite', 'Favorite'),
+    ]
+    
+    OPERATIONS = [
+        ('upsert', 'Created or updated'),
+        ('delete', 'Deleted'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    entity = models.CharField(max_length=20, choices=ENTITIES)
+    object_id = models.UUIDField()
+    operation = models.CharField(max_length=10, choices=OPERATIONS)
+    # Owner of private objects; None for public catalogue data. A plain value
+    # rather than a foreign key so rows can be logged while the user is deleted
+    user_id = models.UUIDField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'sync_change_log'
+        indexes = [
+            models.Index(fields=['user_id', 'id']),
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"#{self.id} {self.operation} {self.entity} {self.object_id}"
+
+
+class ChangeLogPrune(models.Model):
+    """
+    Sequence up to which the change log was pruned
+    Tokens at or below it can no longer be served as deltas
+    """
+    pruned_through = models.BigIntegerField()
+    pruned_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'sync_change_log_prunes'
+
+
+class SyncMutation(models.Model):
+    """
+    Offline mutation received from a client, keyed by the client's id so
+    resending a batch never applies it twice
+    """
+    
+    STATUSES = [
+        ('applied', 'Applied'),
+        ('rejected', 'Rejected'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    client_id = models.CharField(max_length=64)
+    type = models.CharField(max_length=50)
+    status = models.CharField(max_length=10, choices=STATUSES)
+    result = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'sync_mutations'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client_id'], name='unique_sync_mutation'),
+        ]
+    
+    def __str__(self):
+        return f"{self.type} {self.client_id} ({self.status})"
@@ -0,0 +1,51 @@
+"""
+Sync Serializers
+"""
+
+from rest_framework import serializers
+
+from apps.restaurants.serializers import FavoriteSerializer, RestaurantSerializer
+
+
+class SyncedRestaurantSerializer(RestaurantSerializer):
+    """
+    Restaurant for delta sync, as stored: base delivery_fee and the manual
+    is_open switch
+    The surge fee and open-now change over time without a ChangeLog entry,
+    so synced copies would keep stale values. /restaurants/ and checkout
+    show the current fee; clients work out open-now from the switch and
+    /restaurants/<id>/hours/.
+    """
+    
+    def to_representation(self, instance):
+        return self.static_representation(instance)
+
+
+class SyncedFavoriteSerializer(FavoriteSerializer):
+    """
+    Favorite for delta sync (see SyncedRestaurantSerializer)
+    """
+    restaurant = SyncedRestaurantSerializer(read_only=True)
+
+
+class SyncMutationSerializer(serializers.Serializer):
+    """
+    One offline mutation; id is generated by the client and makes it idempotent
+    """
+    id = serializers.CharField(max_length=64)
+    type = serializers.CharField(max_length=50)
+    data = serializers.DictField(required=False, default=dict)
+
+
+class SyncMutationBatchSerializer(serializers.Serializer):
+    """
+    Offline mutations in the order they were made
+    """
+    mutations = SyncMutationSerializer(many=True)
+    
+    def validate_mutations(self, value):
+        if len(value) > self.context['max_mutations']:
+            raise serializers.ValidationError(
+                f"At most {self.context['max_mutations']} mutations per request."
+            )
+        return value
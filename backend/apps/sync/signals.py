@@ -0,0 +1,25 @@
+"""
+Sync Signals
+
+Capture saves and deletes of synced models into the change log
+"""
+
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .changes import TRACKED_MODELS, record_change
+
+
+def log_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_change(instance, 'upsert')
+
+
+def log_delete(sender, instance, **kwargs):
+    record_change(instance, 'delete')
+
+
+for label in TRACKED_MODELS:
+    model = apps.get_model(label)
+    post_save.connect(log_save, sender=model, dispatch_uid=f'sync_save_{label}')
+    post_delete.connect(log_delete, sender=model, dispatch_uid=f'sync_delete_{label}')
@@ -0,0 +1,214 @@
+"""
+Sync Tests
+
+Delta collapsing and the settle holdback, snapshot paging, the fallback to
+a full snapshot for pruned tokens, and idempotent offline mutations.
+"""
+
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.authentication.models import User
+from apps.restaurants.models import Favorite, MenuItem, Restaurant
+from .changes import record_changes
+from .models import ChangeLog, ChangeLogPrune, SyncMutation
+from .views import delta, full_snapshot, parse_cursor, settled_head
+
+SYNC_SETTINGS = {
+    'SETTLE_SECONDS': 2,
+    'PAGE_SIZE': 1000,
+    'MAX_MUTATIONS': 100,
+    'SNAPSHOT_LIMITS': {'orders': 50, 'notifications': 100},
+}
+
+
+def settle():
+    # Age every logged change past SETTLE_SECONDS
+    ChangeLog.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+
+
+def ids(changes, name, key='upserted'):
+    return sorted(str(row['id']) if key == 'upserted' else row for row in changes[name][key])
+
+
+class SyncTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(email='customer@example.com', full_name='Customer', user_type='customer')
+
+    def restaurant(self, name='Kitchen'):
+        return Restaurant.objects.create(name=name, category='Grill', address='1 Main St')
+
+
+@override_settings(SYNC=SYNC_SETTINGS)
+class DeltaTests(SyncTestCase):
+
+    def test_later_entries_win(self):
+        kept = self.restaurant()
+        kept.name = 'Renamed'
+        kept.save()
+        favorite = Favorite.objects.create(user=self.user, restaurant=kept)
+        favorite_id = str(favorite.pk)
+        favorite.delete()
+        settle()
+
+        token, has_more, changes = delta(self.user, 0, ['restaurants', 'favorites'])
+        self.assertEqual(token, ChangeLog.objects.order_by('-id').first().pk)
+        self.assertFalse(has_more)
+        self.assertEqual(ids(changes, 'restaurants'), [str(kept.pk)])
+        self.assertEqual(changes['restaurants']['upserted'][0]['name'], 'Renamed')
+        self.assertEqual(changes['favorites'], {'upserted': [], 'deleted': [favorite_id]})
+
+    def test_upsert_no_longer_visible_is_deleted(self):
+        missing = uuid.uuid4()
+        record_changes('restaurant', [(missing, None)])
+        other = User.objects.create(email='other@example.com', full_name='Other', user_type='customer')
+        Favorite.objects.create(user=other, restaurant=self.restaurant())
+        settle()
+
+        _, _, changes = delta(self.user, 0, ['restaurants', 'favorites'])
+        self.assertIn(str(missing), changes['restaurants']['deleted'])
+        # Another user's favorite is not in this user's log at all
+        self.assertEqual(changes['favorites'], {'upserted': [], 'deleted': []})
+
+    def test_recent_changes_are_held_back(self):
+        first = self.restaurant('First')
+        settle()
+        head = settled_head()
+        second = self.restaurant('Second')
+
+        token, _, changes = delta(self.user, 0, ['restaurants'])
+        self.assertEqual(token, head)
+        self.assertEqual(ids(changes, 'restaurants'), [str(first.pk)])
+
+        settle()
+        token, _, changes = delta(self.user, token, ['restaurants'])
+        self.assertGreater(token, head)
+        self.assertEqual(ids(changes, 'restaurants'), [str(second.pk)])
+
+    def test_token_never_moves_backwards(self):
+        self.restaurant()
+        self.assertEqual(settled_head(), 0)
+        token, _, _ = delta(self.user, 7, ['restaurants'])
+        self.assertEqual(token, 7)
+
+    @override_settings(SYNC={**SYNC_SETTINGS, 'PAGE_SIZE': 2})
+    def test_pages_through_the_log(self):
+        created = {str(self.restaurant(f'R{index}').pk) for index in range(3)}
+        settle()
+        token, has_more, changes = delta(self.user, 0, ['restaurants'])
+        self.assertTrue(has_more)
+        self.assertEqual(token, ChangeLog.objects.order_by('id')[1].pk)
+        token, has_more, rest = delta(self.user, token, ['restaurants'])
+        self.assertFalse(has_more)
+        self.assertEqual(set(ids(changes, 'restaurants') + ids(rest, 'restaurants')), created)
+
+
+@override_settings(SYNC={**SYNC_SETTINGS, 'PAGE_SIZE': 2})
+class SnapshotTests(SyncTestCase):
+
+    def test_cursor_pages_across_entities(self):
+        restaurants = [self.restaurant(f'R{index}') for index in range(3)]
+        items = [
+            MenuItem.objects.create(restaurant=restaurants[0], name=f'Item {index}', price=Decimal('5.00'),
+                                    category='Mains')
+            for index in range(2)
+        ]
+        settle()
+        entities = ['restaurants', 'menu_items']
+
+        seen = {'restaurants': [], 'menu_items': []}
+        pages, cursor, tokens = 0, None, set()
+        while True:
+            token, cursor, changes = full_snapshot(self.user, entities, cursor and parse_cursor(cursor, entities))
+            pages += 1
+            tokens.add(token)
+            for name, change in changes.items():
+                self.assertLessEqual(len(change['upserted']), 2)
+                seen[name] += ids(changes, name)
+            if cursor is None:
+                break
+        self.assertEqual(pages, 3)
+        # Every page carries the head taken for the first one
+        self.assertEqual(tokens, {settled_head()})
+        self.assertEqual(sorted(seen['restaurants']), sorted(str(row.pk) for row in restaurants))
+        self.assertEqual(sorted(seen['menu_items']), sorted(str(row.pk) for row in items))
+
+    def test_bad_cursor(self):
+        with self.assertRaises(ValueError):
+            parse_cursor('1:orders:', ['restaurants'])
+        with self.assertRaises(ValueError):
+            parse_cursor('1:restaurants:not-a-uuid', ['restaurants'])
+
+
+@override_settings(SYNC=SYNC_SETTINGS)
+class SyncViewTests(SyncTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_pruned_token_falls_back_to_a_snapshot(self):
+        restaurant = self.restaurant()
+        settle()
+        ChangeLogPrune.objects.create(pruned_through=5)
+
+        response = self.client.get('/api/v1/sync/', {'since': 4, 'entities': 'restaurants'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['full'])
+        self.assertEqual(ids(response.data['changes'], 'restaurants'), [str(restaurant.pk)])
+
+        response = self.client.get('/api/v1/sync/', {'since': 5, 'entities': 'restaurants'})
+        self.assertFalse(response.data['full'])
+
+    def test_invalid_token(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.client.get('/api/v1/sync/', {'since': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def post(self, *mutations):
+        return self.client.post('/api/v1/sync/', {'mutations': list(mutations)}, format='json')
+
+    def test_replayed_mutations_apply_once(self):
+        restaurant = self.restaurant()
+        add = {'id': 'client-1', 'type': 'favorite.add', 'data': {'restaurant_id': str(restaurant.pk)}}
+        unknown = {'id': 'client-2', 'type': 'order.cancel', 'data': {}}
+
+        first = self.post(add, unknown, add).data['results']
+        self.assertEqual([result['duplicate'] for result in first], [False, False, True])
+        self.assertEqual([result['status'] for result in first], ['applied', 'rejected', 'applied'])
+
+        replay = self.post(add, unknown).data['results']
+        self.assertEqual([result['duplicate'] for result in replay], [True, True])
+        self.assertEqual(replay[0]['result'], first[0]['result'])
+        self.assertEqual(Favorite.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(SyncMutation.objects.filter(user=self.user).count(), 2)
+
+    def test_concurrent_replay_returns_the_stored_result(self):
+        restaurant = self.restaurant()
+        stored = SyncMutation.objects.create(
+            user=self.user, client_id='client-1', type='favorite.add', status='applied', result={'favorite_id': 'x'}
+        )
+        real_filter = SyncMutation.objects.filter
+
+        def stored_meanwhile(**lookup):
+            # The other request stores its row after this one has looked for it
+            if 'client_id__in' in lookup:
+                return SyncMutation.objects.none()
+            return real_filter(**lookup)
+
+        add = {'id': 'client-1', 'type': 'favorite.add', 'data': {'restaurant_id': str(restaurant.pk)}}
+        with mock.patch.object(SyncMutation.objects, 'filter', side_effect=stored_meanwhile):
+            response = self.post(add)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['result'], stored.result)
+        # The handler ran inside the rolled back savepoint
+        self.assertFalse(Favorite.objects.exists())
+        self.assertEqual(SyncMutation.objects.count(), 1)
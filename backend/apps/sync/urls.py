@@ -0,0 +1,12 @@
+"""
+Sync URL Configuration
+"""
+
+from django.urls import path
+from . import views
+
+app_name = 'sync'
+
+urlpatterns = [
+    path('', views.sync, name='sync'),
+]
@@ -0,0 +1,304 @@
+"""
+Sync Views
+
+Delta sync for the mobile app. GET /api/v1/sync/ without a token returns a
+full snapshot plus a token. The snapshot comes in pages of PAGE_SIZE rows:
+while has_more is true, ask again with ?cursor=<cursor>, then sync from
+the token. Calls with ?since=<token> return only the
+restaurants, menu items, orders, notifications and favorites that changed
+since then, grouped by entity as {"upserted": [...], "deleted": [ids]}.
+
+Tokens are ChangeLog sequence numbers. Rows newer than SETTLE_SECONDS are
+held back until a later call, so a transaction that commits after a
+higher-numbered one is not skipped over. SETTLE_SECONDS must be longer than
+the longest write transaction.
+
+POST /api/v1/sync/ applies a batch of offline mutations. Every mutation
+carries a client-generated id, and replaying a batch returns the stored
+results instead of applying anything twice.
+"""
+
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from apps.notifications.models import Notification
+from apps.notifications.serializers import NotificationSerializer
+from apps.notifications.views import mark_notifications_read
+from apps.orders.serializers import OrderSerializer
+from apps.orders.views import visible_orders
+from apps.restaurants.models import Restaurant, MenuItem, Favorite
+from apps.restaurants.serializers import MenuItemSerializer, FavoriteCreateSerializer
+from apps.restaurants.views import favorite_queryset
+from .models import ChangeLog, ChangeLogPrune, SyncMutation
+from .serializers import SyncMutationBatchSerializer, SyncedFavoriteSerializer, SyncedRestaurantSerializer
+
+
+def get_sync_setting(name):
+    defaults = {
+        'SETTLE_SECONDS': 2,
+        'PAGE_SIZE': 1000,
+        'MAX_MUTATIONS': 100,
+        # Newest rows included in a full snapshot of per-user lists
+        'SNAPSHOT_LIMITS': {'orders': 50, 'notifications': 100},
+    }
+    return getattr(settings, 'SYNC', {}).get(name, defaults[name])
+
+
+# payload key -> (ChangeLog entity, queryset of objects the user may see, serializer, newest-first ordering)
+SYNCED_ENTITIES = OrderedDict([
+    ('restaurants', ('restaurant', lambda user: Restaurant.objects.select_related('image_asset'),
+                     SyncedRestaurantSerializer, None)),
+    ('menu_items', ('menu_item', lambda user: MenuItem.objects.select_related('image_asset'),
+                    MenuItemSerializer, None)),
+    ('orders', ('order', lambda user: visible_orders(user).filter(customer=user),
+                OrderSerializer, '-created_at')),
+    ('notifications', ('notification', lambda user: Notification.objects.filter(user=user),
+                       NotificationSerializer, '-created_at')),
+    ('favorites', ('favorite', favorite_queryset, SyncedFavoriteSerializer, '-created_at')),
+])
+
+
+def settled_head():
+    """Highest sequence that is safe to hand out as a token"""
+    settled = timezone.now() - timedelta(seconds=get_sync_setting('SETTLE_SECONDS'))
+    head = ChangeLog.objects.filter(created_at__lt=settled).order_by('-id').values_list('id', flat=True).first()
+    return head or 0
+
+
+def parse_entities(request):
+    requested = request.query_params.get('entities')
+    if not requested:
+        return list(SYNCED_ENTITIES)
+    return [name for name in requested.split(',') if name in SYNCED_ENTITIES]
+
+
+def parse_cursor(cursor, entities):
+    """(head, entity, last primary key or None) from a snapshot cursor; raises ValueError"""
+    head, name, after = cursor.split(':')
+    if name not in entities:
+        raise ValueError(name)
+    return int(head), name, uuid.UUID(after) if after else None
+
+
+def full_snapshot(user, entities, cursor=None):
+    """
+    One page of the full snapshot: (token, cursor for the next page or None, changes)
+    Entities in SNAPSHOT_LIMITS come whole on the page that reaches them;
+    the others are paged by primary key, PAGE_SIZE rows per page. Every
+    page carries the head taken for the first one, so the delta sync that
+    follows also covers changes made while the client was paging.
+    """
+    if not entities:
+        return settled_head(), None, {}
+    head, resume, after = cursor or (settled_head(), entities[0], None)
+    limits = get_sync_setting('SNAPSHOT_LIMITS')
+    budget = get_sync_setting('PAGE_SIZE')
+    changes = {}
+    for name in entities[entities.index(resume):]:
+        _, queryset, serializer, ordering = SYNCED_ENTITIES[name]
+        objects = queryset(user)
+        if name in limits:
+            objects = objects.order_by(ordering)[:limits[name]]
+            changes[name] = {'upserted': serializer(objects, many=True).data, 'deleted': []}
+            continue
+        objects = objects.order_by('pk')
+        if name == resume and after is not None:
+            objects = objects.filter(pk__gt=after)
+        # One more than fits tells whether this entity goes on
+        page = list(objects[:budget + 1])
+        rows = page[:budget]
+        changes[name] = {'upserted': serializer(rows, many=True).data, 'deleted': []}
+        if len(page) > budget:
+            return head, f'{head}:{name}:{rows[-1].pk if rows else ""}', changes
+        budget -= len(rows)
+    return head, None, changes
+
+
+def delta(user, since, entities):
+    head = settled_head()
+    page_size = get_sync_setting('PAGE_SIZE')
+    rows = list(
+        ChangeLog.objects.filter(id__gt=since, id__lte=head)
+        .filter(Q(user_id=None) | Q(user_id=user.pk))
+        .filter(entity__in=[SYNCED_ENTITIES[name][0] for name in entities])
+        .order_by('id').values_list('id', 'entity', 'object_id', 'operation')[:page_size + 1]
+    )
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    token = rows[-1][0] if has_more else max(head, since)
+
+    # Later entries win: an object created then deleted is reported as deleted
+    latest = {}
+    for _, entity, object_id, operation in rows:
+        latest[(entity, object_id)] = operation
+
+    changes = {}
+    for name in entities:
+        entity, queryset, serializer, _ = SYNCED_ENTITIES[name]
+        upserted = [object_id for (kind, object_id), operation in latest.items()
+                    if kind == entity and operation == 'upsert']
+        deleted = [object_id for (kind, object_id), operation in latest.items()
+                   if kind == entity and operation == 'delete']
+        found = queryset(user).in_bulk(upserted) if upserted else {}
+        # Gone (or no longer visible) by the time we read it: tell the client to drop it
+        deleted += [object_id for object_id in upserted if object_id not in found]
+        changes[name] = {
+            'upserted': serializer(list(found.values()), many=True).data,
+            'deleted': [str(object_id) for object_id in deleted],
+        }
+    return token, has_more, changes
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    """
+    Delta sync and offline mutation batch
+    Matches frontend restaurantService / ordersService / notificationService / favoritesService caches
+    """
+    if request.method == 'POST':
+        return apply_mutations(request)
+
+    entities = parse_entities(request)
+    since = request.query_params.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return Response({
+                'success': False,
+                'errors': {'since': 'Invalid sync token.'}
+            }, status=status.HTTP_400_BAD_REQUEST)
+        pruned = ChangeLogPrune.objects.aggregate(through=Max('pruned_through'))['through'] or 0
+        if since < pruned:
+            since = None
+
+    if since is None:
+        cursor = request.query_params.get('cursor')
+        if cursor is not None:
+            try:
+                cursor = parse_cursor(cursor, entities)
+            except ValueError:
+                return Response({
+                    'success': False,
+                    'errors': {'cursor': 'Invalid snapshot cursor.'}
+                }, status=status.HTTP_400_BAD_REQUEST)
+        token, cursor, changes = full_snapshot(request.user, entities, cursor)
+        return Response({
+            'success': True,
+            'full': True,
+            'token': str(token),
+            'has_more': cursor is not None,
+            'cursor': cursor,
+            'changes': changes
+        }, status=status.HTTP_200_OK)
+
+    token, has_more, changes = delta(request.user, since, entities)
+    return Response({
+        'success': True,
+        'full': False,
+        'token': str(token),
+        'has_more': has_more,
+        'changes': changes
+    }, status=status.HTTP_200_OK)
+
+
+def _favorite_add(user, data):
+    serializer = FavoriteCreateSerializer(data=data)
+    if not serializer.is_valid():
+        return 'rejected', {'errors': serializer.errors}
+    favorite, _ = serializer.save(user)
+    return 'applied', {'favorite_id': str(favorite.pk)}
+
+
+def _favorite_remove(user, data):
+    try:
+        lookup = {key: uuid.UUID(str(data[key])) for key in ('id', 'restaurant_id', 'menu_item_id') if data.get(key)}
+    except ValueError:
+        return 'rejected', {'errors': 'Invalid id.'}
+    if not lookup:
+        return 'rejected', {'errors': 'Provide id, restaurant_id or menu_item_id.'}
+    # Deleting through the queryset still sends post_delete, so the change is logged
+    deleted, _ = Favorite.objects.filter(user=user, **lookup).delete()
+    return 'applied', {'removed': deleted}
+
+
+def _notification_read(user, data):
+    ids = data.get('ids') or []
+    try:
+        ids = [uuid.UUID(str(value)) for value in ids]
+    except (TypeError, ValueError):
+        return 'rejected', {'errors': {'ids': 'Expected a list of notification ids.'}}
+    return 'applied', {'updated': mark_notifications_read(user, ids)}
+
+
+MUTATION_HANDLERS = {
+    'favorite.add': _favorite_add,
+    'favorite.remove': _favorite_remove,
+    'notification.read': _notification_read,
+}
+
+
+def apply_mutations(request):
+    serializer = SyncMutationBatchSerializer(
+        data=request.data, context={'max_mutations': get_sync_setting('MAX_MUTATIONS')}
+    )
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    mutations = serializer.validated_data['mutations']
+    previous = {
+        mutation.client_id: mutation
+        for mutation in SyncMutation.objects.filter(
+            user=request.user, client_id__in=[mutation['id'] for mutation in mutations]
+        )
+    }
+
+    results = []
+    for mutation in mutations:
+        stored = previous.get(mutation['id'])
+        if stored is None:
+            handler = MUTATION_HANDLERS.get(mutation['type'])
+            try:
+                with transaction.atomic():
+                    if handler is None:
+                        outcome, result = 'rejected', {'errors': f"Unknown mutation type {mutation['type']}"}
+                    else:
+                        outcome, result = handler(request.user, mutation['data'])
+                    stored = SyncMutation.objects.create(
+                        user=request.user, client_id=mutation['id'], type=mutation['type'],
+                        status=outcome, result=result,
+                    )
+            except IntegrityError:
+                # Same mutation applied concurrently by a retried request
+                stored = SyncMutation.objects.filter(user=request.user, client_id=mutation['id']).first()
+                if stored is None:
+                    raise
+            duplicate = False
+        else:
+            duplicate = True
+        previous[mutation['id']] = stored
+        results.append({
+            'id': stored.client_id,
+            'status': stored.status,
+            'duplicate': duplicate,
+            'result': stored.result,
+        })
+
+    return Response({
+        'success': True,
+        'results': results
+    }, status=status.HTTP_200_OK)
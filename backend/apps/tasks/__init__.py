@@ -0,0 +1 @@
+# This file makes Python treat this directory as a package
\ No newline at end of file
@@ -0,0 +1,17 @@
+"""
+Tasks Admin Configuration
+"""
+
+from django.contrib import admin
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """
+    Task queue admin configuration
+    """
+    list_display = ['id', 'name', 'queue', 'priority', 'status', 'attempts', 'run_at', 'created_at']
+    list_filter = ['status', 'queue', 'name']
+    search_fields = ['name', 'last_error']
+    readonly_fields = ['locked_by', 'locked_at', 'created_at', 'finished_at']
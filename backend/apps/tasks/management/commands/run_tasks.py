@@ -0,0 +1,96 @@
+"""
+Run background task workers (apps/tasks).
+
+    python manage.py run_tasks
+    python manage.py run_tasks --processes 4 --queues email notifications
+    python manage.py run_tasks --burst                  # run what is due and exit
+    python manage.py run_tasks --bench 20000 --processes 4
+
+Each process claims its own batches, so run as many processes (on as many
+hosts) as the database can take. Stop with SIGINT or SIGTERM; workers finish
+their current batch first.
+"""
+
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.tasks.models import Task
+from apps.tasks.process import run_worker_process
+from apps.tasks.queue import enqueue_many, get_task_setting
+from apps.tasks.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run workers that execute queued background tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queues', nargs='*', default=None, help='Queues to work on (default: all)')
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--burst', action='store_true', help='Exit once no task is due')
+        parser.add_argument('--bench', type=int, default=0, metavar='TASKS',
+                            help='Queue TASKS no-op tasks and measure how fast the workers drain them')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or get_task_setting('BATCH_SIZE')
+        if options['bench']:
+            self._bench(options['bench'], options['processes'], batch_size)
+            return
+
+        if options['processes'] == 1:
+            worker = Worker(queues=options['queues'], batch_size=batch_size)
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: setattr(worker, 'stopping', True))
+            self.stdout.write(f'Worker {worker.worker_id} started')
+            worker.run(burst=options['burst'])
+            self.stdout.write(f'Stopped after {worker.processed} tasks ({worker.failed} failed)')
+            return
+
+        self._run_processes(options['processes'], options['queues'], batch_size, options['burst'])
+
+    def _run_processes(self, count, queues, batch_size, burst):
+        # Children open their own connections
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        processes = [
+            context.Process(target=run_worker_process, args=(queues, batch_size, burst), daemon=True)
+            for _ in range(count)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f'Started {count} worker processes')
+
+        def stop(*_):
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        # Ctrl+C reaches the children directly; just wait for them
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for process in processes:
+            process.join()
+
+    def _bench(self, count, processes, batch_size):
+        Task.objects.filter(name='tasks.noop').delete()
+        began = time.perf_counter()
+        enqueue_many('tasks.noop', (((index,), {}) for index in range(count)), queue='bench')
+        enqueue_seconds = time.perf_counter() - began
+
+        began = time.perf_counter()
+        if processes == 1:
+            Worker(queues=['bench'], batch_size=batch_size).run(burst=True)
+        else:
+            self._run_processes(processes, ['bench'], batch_size, burst=True)
+        run_seconds = time.perf_counter() - began
+
+        left = Task.objects.filter(name='tasks.noop').count()
+        self.stdout.write(
+            f'Queued {count:,} tasks in {enqueue_seconds:.2f}s ({count / enqueue_seconds:,.0f}/s)\n'
+            f'Drained {count - left:,} with {processes} process(es), batch {batch_size}, '
+            f'in {run_seconds:.2f}s ({(count - left) / run_seconds:,.0f}/s)'
+        )
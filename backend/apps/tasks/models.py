@@ -0,0 +1,55 @@
+"""
+Tasks Models
+
+Background tasks waiting for, or being run by, a `run_tasks` worker.
+"""
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """
+    One queued call of a registered task function
+    Successful tasks are deleted unless TASK_QUEUE['KEEP_COMPLETED'] is set
+    """
+    
+    STATUSES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    queue = models.CharField(max_length=50, default='default')
+    name = models.CharField(max_length=150)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    # Higher runs first
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUSES, default='queued')
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'task_queue'
+        indexes = [
+            # Claim order; only queued rows are indexed, so it stays small
+            models.Index(
+                fields=['queue', '-priority', 'run_at'],
+                condition=Q(status='queued'), name='task_queue_ready_idx'
+            ),
+            models.Index(fields=['status', 'locked_at'], name='task_queue_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.id} {self.name} ({self.status})"
@@ -0,0 +1,23 @@
+"""
+Worker process entry point for `run_tasks --processes N`.
+
+Kept free of model imports so it can be loaded by a freshly spawned
+interpreter before Django is set up.
+"""
+
+import signal
+
+
+def run_worker_process(queues, batch_size, burst):
+    import django
+    django.setup()
+    from .worker import Worker
+
+    worker = Worker(queues=queues, batch_size=batch_size)
+
+    def stop(*_):
+        worker.stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    return worker.run(burst=burst)
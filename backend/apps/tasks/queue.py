@@ -0,0 +1,87 @@
+"""
+Task Queue
+
+A background task queue stored in the database, so no broker is needed.
+Functions become tasks with the @task decorator in an app's tasks.py:
+
+    @task(queue='email', priority=5)
+    def send_password_reset_email(user_id):
+        ...
+
+    send_password_reset_email.enqueue(user.pk)
+
+enqueue() is a single INSERT on the request's connection, so inside a
+transaction the task is only visible to workers once the transaction
+commits, and it is discarded if the transaction rolls back. Arguments are
+stored as JSON, which turns UUIDs and datetimes into strings.
+
+Workers (`python manage.py run_tasks`, see worker.py) run tasks at least
+once: a task can run again if its worker dies before acknowledging it, so
+tasks must be safe to repeat.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Task
+
+# task name -> function
+registry = {}
+
+
+def get_task_setting(name):
+    defaults = {
+        'BATCH_SIZE': 100,
+        'POLL_SECONDS': 0.5,
+        'LOCK_TIMEOUT_SECONDS': 300,
+        'MAX_ATTEMPTS': 5,
+        'BACKOFF_SECONDS': 10,
+        'BACKOFF_MAX_SECONDS': 3600,
+        'KEEP_COMPLETED': False,
+    }
+    return getattr(settings, 'TASK_QUEUE', {}).get(name, defaults[name])
+
+
+def task(function=None, *, name=None, queue='default', priority=0, max_attempts=None):
+    """Register a function as a task and give it an .enqueue(*args, **kwargs) method"""
+    def register(function):
+        task_name = name or f'{function.__module__}.{function.__qualname__}'
+        if task_name in registry and registry[task_name] is not function:
+            raise ValueError(f'Task {task_name} is already registered')
+        registry[task_name] = function
+        function.task_name = task_name
+        function.enqueue = lambda *args, **kwargs: enqueue(
+            task_name, args, kwargs, queue=queue, priority=priority, max_attempts=max_attempts
+        )
+        return function
+    return register(function) if function is not None else register
+
+
+def _build(name, args, kwargs, queue, priority, run_at, delay, max_attempts):
+    if name not in registry:
+        raise ValueError(f'Unknown task {name}')
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Task(
+        name=name, args=list(args), kwargs=kwargs or {}, queue=queue, priority=priority,
+        run_at=run_at, max_attempts=max_attempts or get_task_setting('MAX_ATTEMPTS'),
+    )
+
+
+def enqueue(name, args=(), kwargs=None, *, queue='default', priority=0, run_at=None, delay=None,
+            max_attempts=None):
+    """Queue one call of a registered task; delay is in seconds"""
+    task_row = _build(name, args, kwargs, queue, priority, run_at, delay, max_attempts)
+    task_row.save(force_insert=True)
+    return task_row
+
+
+def enqueue_many(name, calls, *, queue='default', priority=0, run_at=None, delay=None, max_attempts=None,
+                 batch_size=1000):
+    """Queue many calls of one task; calls are (args, kwargs) pairs"""
+    return Task.objects.bulk_create(
+        [_build(name, args, kwargs, queue, priority, run_at, delay, max_attempts) for args, kwargs in calls],
+        batch_size=batch_size,
+    )
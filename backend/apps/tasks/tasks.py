@@ -0,0 +1,10 @@
+"""
+Built-in tasks
+"""
+
+from .queue import task
+
+
+@task(name='tasks.noop')
+def noop(*args, **kwargs):
+    """Does nothing; used by run_tasks --bench"""
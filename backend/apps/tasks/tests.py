@@ -0,0 +1,203 @@
+"""
+Task Queue Tests
+
+Claiming on both paths (SELECT ... SKIP LOCKED and the single SQLite UPDATE),
+acknowledgement, retries with backoff and requeueing of lost tasks.
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Task
+from .queue import enqueue, task
+from .worker import Worker
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.fail')
+def fail():
+    raise RuntimeError('boom')
+
+
+QUEUE_SETTINGS = {
+    'BATCH_SIZE': 100,
+    'LOCK_TIMEOUT_SECONDS': 300,
+    'MAX_ATTEMPTS': 3,
+    'BACKOFF_SECONDS': 10,
+    'BACKOFF_MAX_SECONDS': 3600,
+    'KEEP_COMPLETED': False,
+}
+
+
+def skip_locked(enabled):
+    # SQLite compiles no FOR UPDATE clause, so the SKIP LOCKED path runs here too
+    return mock.patch.object(connection.features, 'has_select_for_update_skip_locked', enabled)
+
+
+@override_settings(TASK_QUEUE=QUEUE_SETTINGS)
+class ClaimTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def on_both_paths(self, check):
+        for enabled in (True, False):
+            with self.subTest(skip_locked=enabled), skip_locked(enabled):
+                check()
+            Task.objects.all().delete()
+
+    def test_claims_by_priority_then_due_time(self):
+        def check():
+            now = timezone.now()
+            enqueue('tests.record', ['low'], run_at=now - timedelta(minutes=2))
+            enqueue('tests.record', ['late'], priority=5, run_at=now - timedelta(minutes=1))
+            enqueue('tests.record', ['early'], priority=5, run_at=now - timedelta(minutes=3))
+            claimed = Worker().claim()
+            self.assertEqual([row[2] for row in claimed], [['early'], ['late'], ['low']])
+            # attempts is returned already incremented
+            self.assertEqual({row[4] for row in claimed}, {1})
+        self.on_both_paths(check)
+
+    def test_skips_future_and_other_queues(self):
+        def check():
+            enqueue('tests.record', ['later'], delay=60)
+            enqueue('tests.record', ['email'], queue='email')
+            enqueue('tests.record', ['now'])
+            self.assertEqual([row[2] for row in Worker(queues=['default']).claim()], [['now']])
+        self.on_both_paths(check)
+
+    def test_workers_claim_disjoint_batches(self):
+        def check():
+            for index in range(5):
+                enqueue('tests.record', [index])
+            first, second = Worker(batch_size=3), Worker(batch_size=3)
+            first_ids = {row[0] for row in first.claim()}
+            second_ids = {row[0] for row in second.claim()}
+            self.assertEqual((len(first_ids), len(second_ids)), (3, 2))
+            self.assertFalse(first_ids & second_ids)
+            self.assertEqual(Worker().claim(), [])
+            locked = Task.objects.filter(locked_by=first.worker_id, status='running')
+            self.assertEqual(set(locked.values_list('pk', flat=True)), first_ids)
+        self.on_both_paths(check)
+
+    def test_run_batch_runs_and_deletes(self):
+        def check():
+            enqueue('tests.record', ['a'])
+            enqueue('tests.record', ['b'])
+            worker = Worker()
+            self.assertEqual(worker.run_batch(), 2)
+            self.assertEqual(worker.processed, 2)
+            self.assertFalse(Task.objects.exists())
+        self.on_both_paths(check)
+        self.assertEqual(calls, ['a', 'b', 'a', 'b'])
+
+
+@override_settings(TASK_QUEUE=QUEUE_SETTINGS)
+class AckTests(TestCase):
+
+    def test_only_the_locking_worker_acknowledges(self):
+        enqueue('tests.record', ['a'])
+        owner, other = Worker(), Worker()
+        task_ids = [row[0] for row in owner.claim()]
+        other.ack(task_ids)
+        self.assertEqual(Task.objects.get().status, 'running')
+        owner.ack(task_ids)
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASK_QUEUE={**QUEUE_SETTINGS, 'KEEP_COMPLETED': True})
+    def test_keep_completed(self):
+        enqueue('tests.record', ['a'])
+        worker = Worker()
+        worker.ack([row[0] for row in worker.claim()])
+        finished = Task.objects.get()
+        self.assertEqual(finished.status, 'done')
+        self.assertIsNotNone(finished.finished_at)
+
+
+@override_settings(TASK_QUEUE=QUEUE_SETTINGS)
+class RetryTests(TestCase):
+
+    def run_due(self, worker):
+        # Make the backed-off task due again and run it
+        Task.objects.filter(status='queued').update(run_at=timezone.now())
+        with self.assertLogs('apps.tasks.worker'):
+            worker.run_batch()
+        return Task.objects.get()
+
+    def test_backoff_doubles_with_jitter(self):
+        enqueue('tests.fail')
+        worker = Worker()
+        for attempt, base in ((1, 10), (2, 20)):
+            before = timezone.now()
+            failed = self.run_due(worker)
+            self.assertEqual((failed.status, failed.attempts), ('queued', attempt))
+            self.assertEqual((failed.locked_by, failed.locked_at), ('', None))
+            self.assertIn('RuntimeError: boom', failed.last_error)
+            delay = (failed.run_at - before).total_seconds()
+            self.assertGreaterEqual(delay, base * 0.5 - 1)
+            self.assertLessEqual(delay, base + 1)
+
+    @override_settings(TASK_QUEUE={**QUEUE_SETTINGS, 'BACKOFF_SECONDS': 1000, 'BACKOFF_MAX_SECONDS': 60})
+    def test_backoff_is_capped(self):
+        enqueue('tests.fail')
+        before = timezone.now()
+        failed = self.run_due(Worker())
+        self.assertLessEqual((failed.run_at - before).total_seconds(), 61)
+
+    def test_fails_after_max_attempts(self):
+        enqueue('tests.fail', max_attempts=2)
+        worker = Worker()
+        self.run_due(worker)
+        failed = self.run_due(worker)
+        self.assertEqual((failed.status, failed.attempts), ('failed', 2))
+        self.assertIsNotNone(failed.finished_at)
+        self.assertEqual(worker.failed, 2)
+        self.assertEqual(Worker().claim(), [])
+
+    def test_unregistered_task_is_retried(self):
+        Task.objects.create(name='tests.missing')
+        missing = self.run_due(Worker())
+        self.assertEqual(missing.status, 'queued')
+        self.assertIn('tests.missing is not registered', missing.last_error)
+
+
+@override_settings(TASK_QUEUE=QUEUE_SETTINGS)
+class RequeueStaleTests(TestCase):
+
+    def lock(self, attempts, max_attempts, age_seconds):
+        return Task.objects.create(
+            name='tests.record', args=['x'], status='running', attempts=attempts, max_attempts=max_attempts,
+            locked_by='gone:1:dead', locked_at=timezone.now() - timedelta(seconds=age_seconds),
+        )
+
+    def test_requeues_expired_locks(self):
+        stale = self.lock(1, 3, 301)
+        fresh = self.lock(1, 3, 60)
+        exhausted = self.lock(3, 3, 301)
+        with self.assertLogs('apps.tasks.worker', 'WARNING'):
+            self.assertEqual(Worker().requeue_stale(), 1)
+
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.locked_by, stale.locked_at), ('queued', '', None))
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.status, 'running')
+        exhausted.refresh_from_db()
+        self.assertEqual((exhausted.status, exhausted.last_error), ('failed', 'Worker lock expired'))
+
+    def test_checked_at_most_every_30_seconds(self):
+        worker = Worker()
+        self.assertEqual(worker.requeue_stale(), 0)
+        self.lock(1, 3, 301)
+        self.assertEqual(worker.requeue_stale(), 0)
+        with self.assertLogs('apps.tasks.worker', 'WARNING'):
+            self.assertEqual(Worker().requeue_stale(), 1)
@@ -0,0 +1,152 @@
+"""
+Task Worker
+
+Claims batches of due tasks, runs them and acknowledges the whole batch with
+one statement. On PostgreSQL (and MySQL 8) the claim is
+SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers take disjoint
+batches without waiting on each other. SQLite has no row locks. There the
+claim is a single UPDATE ... WHERE id IN (SELECT ... LIMIT n), and because
+SQLite serializes writers each row goes to exactly one worker.
+
+Failed tasks are retried with exponential backoff and jitter until
+max_attempts, then left as "failed" with the last error. Tasks whose worker
+died mid-run are requeued after LOCK_TIMEOUT_SECONDS.
+"""
+
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+from .queue import get_task_setting, registry
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Runs tasks from the given queues (all queues when None)"""
+
+    def __init__(self, queues=None, batch_size=None):
+        self.queues = queues
+        self.batch_size = batch_size or get_task_setting('BATCH_SIZE')
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.processed = 0
+        self.failed = 0
+        self.stopping = False
+        self._next_requeue = 0
+
+    def _ready(self, now):
+        ready = Task.objects.filter(status='queued', run_at__lte=now)
+        if self.queues:
+            ready = ready.filter(queue__in=self.queues)
+        return ready.order_by('-priority', 'run_at')
+
+    def claim(self):
+        """Lock up to batch_size due tasks for this worker"""
+        now = timezone.now()
+        fields = ('id', 'name', 'args', 'kwargs', 'attempts', 'max_attempts')
+        lock = {'status': 'running', 'locked_by': self.worker_id, 'locked_at': now, 'attempts': F('attempts') + 1}
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                claimed = list(
+                    self._ready(now).select_for_update(skip_locked=True).values_list(*fields)[:self.batch_size]
+                )
+                Task.objects.filter(pk__in=[row[0] for row in claimed]).update(**lock)
+            return [(*row[:4], row[4] + 1, row[5]) for row in claimed]
+
+        # One statement, so there is no read lock to upgrade and nothing to race
+        claimed = Task.objects.filter(
+            pk__in=self._ready(now).values('pk')[:self.batch_size], status='queued'
+        ).update(**lock)
+        if not claimed:
+            return []
+        return list(
+            Task.objects.filter(locked_by=self.worker_id, locked_at=now, status='running')
+            .order_by('-priority', 'run_at').values_list(*fields)
+        )
+
+    def run_batch(self):
+        """Claim, run and acknowledge one batch; returns the number claimed"""
+        self.requeue_stale()
+        claimed = self.claim()
+        done, failures = [], []
+        for task_id, name, args, kwargs, attempts, max_attempts in claimed:
+            function = registry.get(name)
+            try:
+                if function is None:
+                    raise LookupError(f'Task {name} is not registered in this worker')
+                function(*args, **kwargs)
+            except Exception:
+                failures.append((task_id, name, attempts, max_attempts, traceback.format_exc()))
+            else:
+                done.append(task_id)
+        self.ack(done)
+        for failure in failures:
+            self.retry(*failure)
+        self.processed += len(done)
+        self.failed += len(failures)
+        return len(claimed)
+
+    def ack(self, task_ids):
+        if not task_ids:
+            return
+        finished = Task.objects.filter(pk__in=task_ids, locked_by=self.worker_id)
+        if get_task_setting('KEEP_COMPLETED'):
+            finished.update(status='done', finished_at=timezone.now())
+        else:
+            finished.delete()
+
+    def retry(self, task_id, name, attempts, max_attempts, error):
+        now = timezone.now()
+        task = Task.objects.filter(pk=task_id, locked_by=self.worker_id)
+        if attempts >= max_attempts:
+            logger.error('Task %s #%s failed after %s attempts\n%s', name, task_id, attempts, error)
+            task.update(status='failed', finished_at=now, last_error=error)
+            return
+        delay = min(get_task_setting('BACKOFF_MAX_SECONDS'), get_task_setting('BACKOFF_SECONDS') * 2 ** (attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        logger.warning('Task %s #%s failed (attempt %s), retrying in %.0fs', name, task_id, attempts, delay)
+        task.update(status='queued', run_at=now + timedelta(seconds=delay), locked_by='', locked_at=None,
+                    last_error=error)
+
+    def requeue_stale(self):
+        """Put back tasks whose worker stopped acknowledging them; checked every 30s"""
+        if time.monotonic() < self._next_requeue:
+            return 0
+        self._next_requeue = time.monotonic() + 30
+        cutoff = timezone.now() - timedelta(seconds=get_task_setting('LOCK_TIMEOUT_SECONDS'))
+        stale = Task.objects.filter(status='running', locked_at__lt=cutoff)
+        exhausted = stale.filter(attempts__gte=F('max_attempts')).update(
+            status='failed', finished_at=timezone.now(), last_error='Worker lock expired'
+        )
+        requeued = stale.update(status='queued', locked_by='', locked_at=None)
+        if exhausted or requeued:
+            logger.warning('Requeued %s stale tasks, failed %s', requeued, exhausted)
+        return requeued
+
+    def run(self, burst=False):
+        """Work until stopped; with burst, stop once nothing is due"""
+        poll_seconds = get_task_setting('POLL_SECONDS')
+        while not self.stopping:
+            try:
+                claimed = self.run_batch()
+            except Exception:
+                logger.exception('Task worker batch failed; retrying')
+                close_old_connections()
+                time.sleep(1)
+                continue
+            if not claimed:
+                if burst:
+                    break
+                close_old_connections()
+                time.sleep(poll_seconds)
+        return self.processed
@@ -0,0 +1,223 @@
+"""
+Admission control for foodie_backend project.
+
+Requests are classified by method and path (ROUTES) as critical (checkout,
+payments, order and delivery status updates), normal, or sheddable (browsing
+and analytics). When the process is overloaded, LoadSheddingMiddleware
+refuses the lowest priorities with 503 and Retry-After before any view runs,
+so a burst of restaurant browsing cannot starve order placement.
+
+A priority is shed when any of these goes over its threshold:
+
+  * MAX_IN_FLIGHT: requests currently running in this process. This only
+    means something with threaded or async workers (gunicorn gthread,
+    uvicorn); a sync worker runs one request at a time
+  * MAX_LATENCY_MS: smoothed latency of the higher priorities' requests, so
+    sheddable work gives way as soon as checkout slows down. Averages decay
+    while nothing is admitted, so shedding stops on its own
+  * MAX_QUEUE_MS: time the request waited in front of the worker, taken from
+    the proxy's X-Request-Start header when there is one
+
+A priority with no threshold (None) is never shed for that signal; by default
+critical requests are only refused when far more of them are in flight than
+the process can run. Rate limits per client are in throttling.py.
+"""
+
+import logging
+import math
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ('critical', 'normal', 'sheddable')
+
+DEFAULT_ROUTES = [
+    # (method or '*', path regex, priority); the first match wins
+    ('POST', r'^/api/v1/orders/$', 'critical'),
+    ('POST', r'^/api/v1/orders/[^/]+/status/$', 'critical'),
+    ('*', r'^/api/v1/payments/', 'critical'),
+    ('POST', r'^/api/v1/delivery/[^/]+/status/$', 'critical'),
+    ('POST', r'^/api/v1/delivery/batches/accept/$', 'critical'),
+    ('GET', r'^/api/v1/home/', 'sheddable'),
+    ('GET', r'^/api/v1/restaurants/', 'sheddable'),
+    ('GET', r'^/api/v1/admin-panel/(stats|profiling)/', 'sheddable'),
+]
+
+
+def get_load_shedding_setting(name):
+    defaults = {
+        'ENABLED': True,
+        'PATHS': ['/api/'],
+        'ROUTES': DEFAULT_ROUTES,
+        'DEFAULT_PRIORITY': 'normal',
+        'MAX_IN_FLIGHT': {'sheddable': 4, 'normal': 16, 'critical': None},
+        'MAX_LATENCY_MS': {'sheddable': 150, 'normal': 1000, 'critical': None},
+        'MAX_QUEUE_MS': {'sheddable': 200, 'normal': 1000, 'critical': None},
+        'LATENCY_HALF_LIFE_SECONDS': 1.0,
+        'RETRY_AFTER_SECONDS': 2,
+    }
+    return getattr(settings, 'LOAD_SHEDDING', {}).get(name, defaults[name])
+
+
+def _compiled_routes():
+    return [(method.upper(), re.compile(pattern), priority)
+            for method, pattern, priority in get_load_shedding_setting('ROUTES')]
+
+
+def classify(method, path, routes=None):
+    """Priority of a request from ROUTES, or DEFAULT_PRIORITY"""
+    for route_method, pattern, priority in routes if routes is not None else _compiled_routes():
+        if route_method in ('*', method) and pattern.match(path):
+            return priority
+    return get_load_shedding_setting('DEFAULT_PRIORITY')
+
+
+def request_priority(request):
+    """Priority set by LoadSheddingMiddleware, or classified now"""
+    priority = getattr(request, 'admission_priority', None)
+    return priority or classify(request.method, request.path)
+
+
+def queue_ms(header, now=None):
+    """Milliseconds since an X-Request-Start value (t=<s|ms|us> or a bare number)"""
+    try:
+        started = float(header.strip().removeprefix('t='))
+    except (AttributeError, ValueError):
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    now = time.time() if now is None else now
+    return max(0.0, (now - started) * 1000)
+
+
+class LoadMonitor:
+    """In-flight count and decaying latency averages per priority for this process"""
+
+    def __init__(self, half_life_seconds=1.0):
+        self.half_life = half_life_seconds
+        self.in_flight = 0
+        self.shed = dict.fromkeys(PRIORITIES, 0)
+        self.admitted = dict.fromkeys(PRIORITIES, 0)
+        now = time.monotonic()
+        # priority -> [average ms, monotonic time of the last sample]
+        self._latency = {priority: [0.0, now] for priority in PRIORITIES}
+        self._lock = threading.Lock()
+
+    def _decayed(self, priority, now):
+        average, updated = self._latency[priority]
+        return average * 0.5 ** ((now - updated) / self.half_life)
+
+    def latency_ms(self, priority):
+        with self._lock:
+            return self._decayed(priority, time.monotonic())
+
+    def latency_above_ms(self, priority):
+        """Worst average latency among the priorities above this one"""
+        higher = PRIORITIES[:PRIORITIES.index(priority)]
+        now = time.monotonic()
+        with self._lock:
+            return max((self._decayed(other, now) for other in higher), default=0.0)
+
+    def start(self, priority):
+        with self._lock:
+            self.in_flight += 1
+            self.admitted[priority] += 1
+
+    def finish(self, priority, elapsed_ms):
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            # A sample weighs more the longer it has been since the previous one
+            weight = max(0.05, 1 - 0.5 ** ((now - self._latency[priority][1]) / self.half_life))
+            average = self._decayed(priority, now)
+            self._latency[priority] = [average * (1 - weight) + elapsed_ms * weight, now]
+
+    def reject(self, priority):
+        with self._lock:
+            self.shed[priority] += 1
+
+    def snapshot(self):
+        return {
+            'in_flight': self.in_flight,
+            'latency_ms': {priority: round(self.latency_ms(priority), 2) for priority in PRIORITIES},
+            'admitted': dict(self.admitted),
+            'shed': dict(self.shed),
+        }
+
+
+monitor = LoadMonitor()
+
+
+class LoadSheddingMiddleware:
+    """
+    Refuses low-priority requests with 503 while the process is overloaded
+    """
+
+    def __init__(self, get_response):
+        if not get_load_shedding_setting('ENABLED'):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.paths = tuple(get_load_shedding_setting('PATHS'))
+        self.routes = _compiled_routes()
+        self.max_in_flight = get_load_shedding_setting('MAX_IN_FLIGHT')
+        self.max_latency_ms = get_load_shedding_setting('MAX_LATENCY_MS')
+        self.max_queue_ms = get_load_shedding_setting('MAX_QUEUE_MS')
+        self.retry_after = get_load_shedding_setting('RETRY_AFTER_SECONDS')
+        monitor.half_life = get_load_shedding_setting('LATENCY_HALF_LIFE_SECONDS')
+        self._last_warning = 0.0
+
+    def __call__(self, request):
+        if not request.path.startswith(self.paths):
+            return self.get_response(request)
+
+        priority = classify(request.method, request.path, self.routes)
+        request.admission_priority = priority
+        reason = self._overloaded(request, priority)
+        if reason:
+            return self._shed(priority, reason)
+
+        monitor.start(priority)
+        started = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            monitor.finish(priority, (time.perf_counter() - started) * 1000)
+
+    def _overloaded(self, request, priority):
+        limit = self.max_in_flight.get(priority)
+        if limit is not None and monitor.in_flight >= limit:
+            return f'{monitor.in_flight} requests in flight'
+        limit = self.max_latency_ms.get(priority)
+        if limit is not None:
+            latency = monitor.latency_above_ms(priority)
+            if latency > limit:
+                return f'higher-priority latency {latency:.0f} ms'
+        limit = self.max_queue_ms.get(priority)
+        header = request.META.get('HTTP_X_REQUEST_START')
+        if limit is not None and header:
+            waited = queue_ms(header)
+            if waited is not None and waited > limit:
+                return f'queued {waited:.0f} ms'
+        return None
+
+    def _shed(self, priority, reason):
+        monitor.reject(priority)
+        now = time.monotonic()
+        if now - self._last_warning > 1:
+            self._last_warning = now
+            logger.warning('Shedding %s requests: %s', priority, reason)
+        response = JsonResponse(
+            {'success': False, 'error': 'The server is busy. Please try again shortly.'}, status=503
+        )
+        response['Retry-After'] = str(math.ceil(self.retry_after))
+        # Logged above at most once a second, not once per request by django.request
+        response._has_been_logged = True
+        return response
@@ -11,6 +11,11 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodie_backend.settings')
 
 django_asgi_app = get_asgi_application()
 
+# Map the catalogue snapshot before the first request (see wsgi.py)
+from apps.restaurants.catalogue import store as catalogue  # noqa: E402
+
+catalogue.load()
+
 # For now, only HTTP. WebSocket routing will be added when we implement real-time features
 application = ProtocolTypeRouter({
     'http': django_asgi_app,
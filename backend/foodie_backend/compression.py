@@ -0,0 +1,244 @@
+"""
+Response compression for foodie_backend project.
+
+CompressionMiddleware compresses API responses using the best encoding that
+both the client (Accept-Encoding) and the server support: brotli, zstd or
+gzip. brotli and zstd are used when the `brotli` and `zstandard` packages are
+installed. Responses below MIN_SIZE, responses of types that do not compress
+well, streaming responses and anything marked Cache-Control: no-transform are
+sent as-is. Compression levels can be set per content type in LEVELS.
+
+Identical payloads are compressed once. The body is hashed (much cheaper than
+compressing it), and a body seen a second time has its compressed form kept
+in a per-process LRU capped at CACHE_BYTES. Public catalogue responses
+(restaurant lists, menus) then cost one hash per request. Per-user responses
+are seen only once, so they never enter the cache. Responses marked private
+or no-store are never cached.
+
+Paths in EXCLUDE_PATHS are never compressed. By default that is the auth
+endpoints, whose responses carry tokens next to user input and would
+otherwise be exposed to BREACH-style attacks.
+"""
+
+import gzip
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = re.compile(r'^(text/|application/(json|javascript|xml|[\w.+-]+\+json)|image/svg\+xml)')
+
+
+def _gzip(data, level):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _brotli(data, level):
+    return brotli.compress(data, quality=level, mode=brotli.MODE_TEXT)
+
+
+def _zstd(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+# encoding -> (compress function, default level); only installed codecs are listed
+CODECS = {'gzip': (_gzip, 6)}
+if brotli is not None:
+    CODECS['br'] = (_brotli, 4)
+if zstandard is not None:
+    CODECS['zstd'] = (_zstd, 3)
+
+
+def get_compression_setting(name):
+    defaults = {
+        'ENABLED': True,
+        'MIN_SIZE': 1024,
+        # Server preference when the client accepts several with equal q
+        'ENCODINGS': ['br', 'zstd', 'gzip'],
+        # content type prefix -> {encoding: level}; the longest matching prefix wins
+        'LEVELS': {},
+        'CACHE_BYTES': 32 * 1024 * 1024,
+        'EXCLUDE_PATHS': ['/api/v1/auth/'],
+    }
+    return getattr(settings, 'RESPONSE_COMPRESSION', {}).get(name, defaults[name])
+
+
+def parse_accept_encoding(header):
+    """{encoding: q} from an Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate(header, preference):
+    """Pick an encoding from preference that the client accepts, or None"""
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in preference:
+        if encoding not in CODECS:
+            continue
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_q:
+            best, best_q = encoding, quality
+    return best
+
+
+def level_for(content_type, encoding, levels):
+    best_prefix = ''
+    level = CODECS[encoding][1]
+    for prefix, by_encoding in levels.items():
+        if content_type.startswith(prefix) and len(prefix) >= len(best_prefix) and encoding in by_encoding:
+            best_prefix, level = prefix, by_encoding[encoding]
+    return level
+
+
+def compress(data, encoding, level):
+    return CODECS[encoding][0](data, level)
+
+
+class CompressedCache:
+    """
+    Byte-bounded LRU of compressed bodies keyed by body digest
+
+    A digest is admitted only on its second sighting, so one-off payloads
+    never evict hot ones.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        # Digests seen once, newest last; bounded by count
+        self.seen = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def should_store(self, digest):
+        with self._lock:
+            if digest in self.seen:
+                del self.seen[digest]
+                return True
+            self.seen[digest] = None
+            if len(self.seen) > 10000:
+                self.seen.popitem(last=False)
+            return False
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes // 8:
+            return
+        with self._lock:
+            if key in self.entries:
+                return
+            self.entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self.entries), 'bytes': self.size, 'hits': self.hits, 'misses': self.misses}
+
+
+cache = CompressedCache(get_compression_setting('CACHE_BYTES'))
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/zstd/gzip compression with a compressed payload cache
+    """
+
+    def __init__(self, get_response):
+        if not get_compression_setting('ENABLED'):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.min_size = get_compression_setting('MIN_SIZE')
+        self.preference = get_compression_setting('ENCODINGS')
+        self.levels = get_compression_setting('LEVELS')
+        self.exclude_paths = tuple(get_compression_setting('EXCLUDE_PATHS'))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self._compressible(request, response):
+            return response
+
+        # Whether or not this client gets a compressed body, caches must key on it
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.preference)
+        if encoding is None:
+            return response
+
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        level = level_for(content_type, encoding, self.levels)
+        body = response.content
+        cache_control = response.get('Cache-Control', '').lower()
+        shareable = 'private' not in cache_control and 'no-store' not in cache_control
+
+        compressed = None
+        if shareable:
+            digest = hashlib.blake2b(body, digest_size=16).digest()
+            key = (digest, encoding, level)
+            compressed = cache.get(key)
+        if compressed is None:
+            compressed = compress(body, encoding, level)
+            if shareable and cache.should_store(key):
+                cache.put(key, compressed)
+
+        if len(compressed) >= len(body):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # The representation changed; a strong validator would no longer match it
+            response['ETag'] = 'W/' + etag
+        return response
+
+    def _compressible(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return False
+        if request.path.startswith(self.exclude_paths):
+            return False
+        if 'no-transform' in response.get('Cache-Control', '').lower():
+            return False
+        if not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '').lower()):
+            return False
+        return len(response.content) >= self.min_size
@@ -0,0 +1,217 @@
+"""
+Home screen endpoint for foodie_backend project.
+
+The customer home tab needs the current user, nearby or featured
+restaurants, trending dishes, the unread notification count and the status of
+active orders. GET /api/v1/home/ returns all of them in one response so the
+app makes one round-trip instead of five.
+
+The request is authenticated once, then every section runs concurrently, each
+in its own worker thread with its own database connection. (In Django 4.2 the
+async ORM sends every query through one shared thread, so the queries would
+still run one after another.) Each section has a timeout from
+HOME_SCREEN['SECTION_TIMEOUT_MS']. A section that is too slow or fails comes
+back as null and is listed in "errors", and the rest of the screen still
+renders.
+"""
+
+import asyncio
+import logging
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+from rest_framework import exceptions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from apps.authentication.serializers import UserSerializer
+from apps.notifications.models import Notification
+from apps.orders.models import Order
+from apps.restaurants import hours
+from apps.restaurants.models import Restaurant
+from apps.restaurants.serializers import RestaurantSerializer
+from apps.restaurants.views import popular_menu_items
+from .throttling import throttle_wait
+
+logger = logging.getLogger(__name__)
+
+# Restaurants within this distance of the supplied coordinates count as nearby
+NEARBY_RADIUS_KM = 10
+KM_PER_DEGREE = 111.32
+
+
+def get_home_setting(name):
+    defaults = {
+        'SECTION_TIMEOUT_MS': 800,
+        'SECTION_LIMIT': 10,
+    }
+    return getattr(settings, 'HOME_SCREEN', {}).get(name, defaults[name])
+
+
+def section_timeout(name):
+    timeout = get_home_setting('SECTION_TIMEOUT_MS')
+    if isinstance(timeout, dict):
+        timeout = timeout.get(name, timeout.get('default', 800))
+    return timeout / 1000
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance (haversine)"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * 6371 * math.asin(math.sqrt(a))
+
+
+def parse_coordinates(params):
+    try:
+        latitude, longitude = float(params['latitude']), float(params['longitude'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+# Sections. Each runs synchronously in its own worker thread.
+
+def user_section(user, params):
+    return UserSerializer(user).data
+
+
+def restaurants_section(user, params):
+    limit = get_home_setting('SECTION_LIMIT')
+    # Switched on and within opening hours, as /restaurants/?is_open=true
+    restaurants = hours.filter_open(Restaurant.objects.select_related('image_asset'))
+    coordinates = parse_coordinates(params)
+    if coordinates is None:
+        restaurants = restaurants.order_by('-featured', '-rating', 'name')[:limit]
+        return {'nearby': False, 'restaurants': RestaurantSerializer(restaurants, many=True).data}
+
+    latitude, longitude = coordinates
+    # Bounding box in SQL, then exact distances for the few rows inside it
+    lat_delta = NEARBY_RADIUS_KM / KM_PER_DEGREE
+    lng_delta = NEARBY_RADIUS_KM / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    candidates = []
+    for restaurant in restaurants.filter(
+        latitude__range=(latitude - lat_delta, latitude + lat_delta),
+        longitude__range=(longitude - lng_delta, longitude + lng_delta),
+    ):
+        distance = distance_km(latitude, longitude, float(restaurant.latitude), float(restaurant.longitude))
+        if distance <= NEARBY_RADIUS_KM:
+            candidates.append((distance, restaurant))
+    candidates.sort(key=lambda candidate: candidate[0])
+
+    data = RestaurantSerializer([restaurant for _, restaurant in candidates[:limit]], many=True).data
+    for row, (distance, _) in zip(data, candidates):
+        row['distance_km'] = round(distance, 2)
+    return {'nearby': True, 'restaurants': data}
+
+
+def popular_items_section(user, params):
+    return popular_menu_items(params.get('city'), get_home_setting('SECTION_LIMIT'))
+
+
+def unread_count_section(user, params):
+    return Notification.objects.filter(user=user, is_read=False).count()
+
+
+def active_orders_section(user, params):
+    orders = Order.objects.filter(customer=user, status__in=Order.ACTIVE_STATUSES).order_by('-created_at')
+    return [
+        {
+            'id': str(order['id']),
+            'status': order['status'],
+            'restaurant_id': str(order['restaurant_id']),
+            'restaurant_name': order['restaurant__name'],
+            'total': str(order['total']),
+            'estimated_delivery': order['estimated_delivery'],
+            'created_at': order['created_at'],
+        }
+        for order in orders.values(
+            'id', 'status', 'restaurant_id', 'restaurant__name', 'total',
+            'estimated_delivery', 'created_at'
+        )[:get_home_setting('SECTION_LIMIT')]
+    ]
+
+
+SECTIONS = {
+    'user': user_section,
+    'restaurants': restaurants_section,
+    'popular_items': popular_items_section,
+    'unread_notifications': unread_count_section,
+    'active_orders': active_orders_section,
+}
+
+
+def _run_section(section, user, params):
+    # Worker threads outlive the request, so apply CONN_MAX_AGE here the way
+    # request_started/request_finished do for the request thread
+    close_old_connections()
+    try:
+        return section(user, params)
+    finally:
+        close_old_connections()
+
+
+async def _resolve(name, user, params):
+    try:
+        data = await asyncio.wait_for(
+            sync_to_async(_run_section, thread_sensitive=False)(SECTIONS[name], user, params),
+            timeout=section_timeout(name),
+        )
+        return name, data, None
+    except asyncio.TimeoutError:
+        logger.warning('Home screen section %s timed out', name)
+        return name, None, 'timeout'
+    except Exception:
+        logger.exception('Home screen section %s failed', name)
+        return name, None, 'unavailable'
+
+
+def _authenticate(request):
+    result = JWTAuthentication().authenticate(request)
+    if result is None:
+        return None
+    user, _ = result
+    # Fetched here so serializing the user never queries from the event loop
+    user.avatar_asset
+    return user
+
+
+async def home_screen(request):
+    """
+    Composite home screen payload
+    Matches frontend home tab (authService.getCurrentUser, restaurantService,
+    notificationService.getUnreadCount, ordersService.getActiveOrders)
+    """
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': 'Method not allowed'}, status=405)
+
+    try:
+        user = await sync_to_async(_authenticate)(request)
+    except exceptions.AuthenticationFailed as error:
+        return JsonResponse({'success': False, 'message': str(error.detail)}, status=401)
+    if user is None:
+        return JsonResponse({'success': False, 'message': 'Authentication credentials were not provided.'},
+                            status=401)
+
+    # Not a DRF view, so the rate limits are checked here
+    request.user = user
+    wait = await sync_to_async(throttle_wait)(request)
+    if wait is not None:
+        response = JsonResponse({'success': False, 'message': 'Request was throttled.'}, status=429)
+        response['Retry-After'] = str(math.ceil(wait))
+        return response
+
+    params = request.GET.dict()
+    results = await asyncio.gather(*(_resolve(name, user, params) for name in SECTIONS))
+
+    response = {'success': True, 'errors': {}}
+    for name, data, error in results:
+        response[name] = data
+        if error is not None:
+            response['errors'][name] = error
+    return JsonResponse(response)
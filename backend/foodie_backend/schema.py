@@ -0,0 +1,99 @@
+"""
+OpenAPI schema views for foodie_backend project.
+
+Generating the schema introspects every view and serializer, so it is done
+once as a build step:
+
+    python manage.py spectacular --format openapi-json --file openapi-schema.json
+
+The schema view serves that artifact (OPENAPI_SCHEMA_FILE). Without it the
+schema is generated on the first request and kept for the life of the worker.
+
+drf-spectacular's views are only imported when a docs URL is first hit, so
+workers that never serve docs do not pay for the import at boot.
+"""
+
+import json
+from pathlib import Path
+
+from django.conf import settings
+
+# (api version, language) -> schema dict
+_schema_cache = {}
+
+
+def load_schema_artifact():
+    """Return the prebuilt schema dict, or None if no artifact was built"""
+    path = getattr(settings, 'OPENAPI_SCHEMA_FILE', None)
+    if not path or not Path(path).is_file():
+        return None
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def clear_schema_cache():
+    _schema_cache.clear()
+
+
+def _cached_schema_view():
+    from rest_framework.response import Response
+    from drf_spectacular.views import SpectacularAPIView
+
+    class CachedSpectacularAPIView(SpectacularAPIView):
+        """SpectacularAPIView that builds the schema at most once per worker"""
+
+        def _get_schema_response(self, request):
+            if not self.serve_public:
+                # Per-user schemas depend on permissions and cannot be shared
+                return super()._get_schema_response(request)
+
+            version = self.api_version or request.version or self._get_version_parameter(request)
+            key = (version, request.GET.get('lang') if settings.USE_I18N else None)
+
+            schema = _schema_cache.get(key)
+            if schema is None:
+                # The build artifact covers the default version and language only
+                if key == (None, None):
+                    schema = load_schema_artifact()
+                if schema is None:
+                    generator = self.generator_class(
+                        urlconf=self.urlconf, api_version=version, patterns=self.patterns
+                    )
+                    schema = generator.get_schema(request=None, public=True)
+                _schema_cache[key] = schema
+
+            return Response(
+                data=schema,
+                headers={'Content-Disposition': f'inline; filename="{self._get_filename(request, version)}"'}
+            )
+
+    return CachedSpectacularAPIView.as_view()
+
+
+def _swagger_view():
+    from drf_spectacular.views import SpectacularSwaggerView
+    return SpectacularSwaggerView.as_view(url_name='schema')
+
+
+def _redoc_view():
+    from drf_spectacular.views import SpectacularRedocView
+    return SpectacularRedocView.as_view(url_name='schema')
+
+
+def lazy_view(loader):
+    """Defer building (and importing) a view until its URL is first requested"""
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = loader()
+        return view(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+schema_view = lazy_view(_cached_schema_view)
+swagger_view = lazy_view(_swagger_view)
+redoc_view = lazy_view(_redoc_view)
@@ -46,20 +46,29 @@ LOCAL_APPS = [
     'apps.delivery',
     'apps.notifications',
     'apps.admin_panel',
+    'apps.media_assets',
+    'apps.sync',
+    'apps.tasks',
+    'apps.events',
+    'apps.geocoding',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'foodie_backend.admission.LoadSheddingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'foodie_backend.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.events.middleware.EventLoggingMiddleware',
+    'apps.admin_panel.profiling.RequestProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'foodie_backend.urls'
@@ -154,6 +163,203 @@ STATICFILES_DIRS = [BASE_DIR / 'static'] if (BASE_DIR / 'static').exists() else
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Hashed static file names let WhiteNoise serve them with far-future cache headers
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Image upload pipeline (thumbnails and WebP variants rendered in a process pool)
+MEDIA_PIPELINE = {
+    'WORKERS': config('MEDIA_PIPELINE_WORKERS', default=2, cast=int),
+    'SYNC': config('MEDIA_PIPELINE_SYNC', default=False, cast=bool),
+    'WEBP_QUALITY': 80,
+    'JPEG_QUALITY': 82,
+}
+
+# Composite home screen endpoint (foodie_backend/home.py)
+HOME_SCREEN = {
+    # Per-section budget; a dict like {'default': 800, 'popular_items': 400} also works
+    'SECTION_TIMEOUT_MS': config('HOME_SECTION_TIMEOUT_MS', default=800, cast=int),
+    'SECTION_LIMIT': 10,
+}
+
+# Time-decayed popularity / top-K trending (apps/restaurants/trending.py)
+TRENDING = {
+    'HALF_LIFE_HOURS': config('TRENDING_HALF_LIFE_HOURS', default=48, cast=float),
+    'TOP_K': 50,
+    'SNAPSHOT_SECONDS': config('TRENDING_SNAPSHOT_SECONDS', default=60, cast=int),
+}
+
+# Scheduled orders / pre-orders (apps/orders/scheduler.py, run_scheduler command)
+ORDER_SCHEDULER = {
+    'TICK_MS': 100,
+    'RELEASE_LEAD_MINUTES': config('ORDER_RELEASE_LEAD_MINUTES', default=45, cast=int),
+    'DISPATCH_LEAD_MINUTES': config('ORDER_DISPATCH_LEAD_MINUTES', default=20, cast=int),
+    'POLL_SECONDS': 1.0,
+    'BATCH_SIZE': 500,
+}
+
+# API response compression (foodie_backend/compression.py); static files are
+# precompressed by WhiteNoise instead
+RESPONSE_COMPRESSION = {
+    'ENABLED': config('RESPONSE_COMPRESSION', default=True, cast=bool),
+    'MIN_SIZE': 1024,
+    'ENCODINGS': ['br', 'zstd', 'gzip'],
+    'LEVELS': {
+        'application/json': {'br': 4, 'zstd': 3, 'gzip': 6},
+        'text/html': {'br': 5, 'zstd': 6, 'gzip': 6},
+    },
+    'CACHE_BYTES': config('RESPONSE_COMPRESSION_CACHE_MB', default=32, cast=int) * 1024 * 1024,
+    'EXCLUDE_PATHS': ['/api/v1/auth/'],
+}
+
+# Token-bucket rate limits per route priority (foodie_backend/throttling.py):
+# priority -> (burst, tokens per second). Use the redis store to share the
+# limits between worker processes
+RATE_LIMITING = {
+    'ENABLED': config('RATE_LIMITING', default=True, cast=bool),
+    'STORE': config('RATE_LIMIT_STORE', default='local'),
+    'REDIS_URL': REDIS_URL,
+    'USER_RATES': {'critical': (30, 1), 'normal': (120, 5), 'sheddable': (120, 5)},
+    'IP_RATES': {'critical': (150, 5), 'normal': (600, 25), 'sheddable': (600, 25)},
+}
+
+# Priority load shedding (foodie_backend/admission.py); route priorities are
+# in admission.DEFAULT_ROUTES. Thresholds are per worker process
+LOAD_SHEDDING = {
+    'ENABLED': config('LOAD_SHEDDING', default=True, cast=bool),
+    'MAX_IN_FLIGHT': {'sheddable': 4, 'normal': 16, 'critical': None},
+    'MAX_LATENCY_MS': {'sheddable': 150, 'normal': 1000, 'critical': None},
+    # Needs the proxy to send X-Request-Start
+    'MAX_QUEUE_MS': {'sheddable': 200, 'normal': 1000, 'critical': None},
+    'RETRY_AFTER_SECONDS': 2,
+}
+
+# Delta sync API (apps/sync)
+SYNC = {
+    # Must exceed the longest write transaction; see apps/sync/views.py
+    'SETTLE_SECONDS': config('SYNC_SETTLE_SECONDS', default=2, cast=int),
+    'PAGE_SIZE': 1000,
+    'MAX_MUTATIONS': 100,
+    'SNAPSHOT_LIMITS': {'orders': 50, 'notifications': 100},
+}
+
+# Driver GPS trails (apps/delivery/trajectory.py)
+DELIVERY_TRACKING = {
+    'MIN_MOVE_M': 3,
+    'MAX_GAP_SECONDS': 60,
+    # Faster than this between pings is a GPS jump
+    'MAX_SPEED_MPS': 50,
+    'SIMPLIFY_TOLERANCE_M': config('TRAJECTORY_SIMPLIFY_TOLERANCE_M', default=5, cast=float),
+    'MAX_PINGS_PER_REQUEST': 500,
+}
+
+# Multi-order trips for drivers (apps/delivery/batching.py)
+DELIVERY_BATCHING = {
+    'ENABLED': config('DELIVERY_BATCHING', default=True, cast=bool),
+    'MAX_ORDERS': 3,
+    'CAPACITY': 4,
+    'MAX_ADDED_DELAY_MINUTES': 10,
+    'PICKUP_RADIUS_KM': 1.5,
+    'READY_WINDOW_MINUTES': 10,
+    'MAX_CANDIDATES': 12,
+    'SPEED_KMH': 25,
+    'DETOUR_FACTOR': 1.3,
+    'PICKUP_SECONDS': 120,
+    'DROPOFF_SECONDS': 90,
+    'PREP_MINUTES': 15,
+    'PLAN_CACHE_SECONDS': 5,
+}
+
+# Dynamic delivery fees (apps/delivery/surge.py, run_surge command)
+SURGE_PRICING = {
+    'ENABLED': config('SURGE_PRICING', default=True, cast=bool),
+    # (south, west, north, east) of the metro grid
+    'BOUNDS': (40.45, -74.30, 40.95, -73.65),
+    'CELL_METRES': 200,
+    'RECOMPUTE_SECONDS': 5,
+    'SMOOTHING_CELLS': 3,
+    'TIME_SMOOTHING': 0.5,
+    'SENSITIVITY': 0.5,
+    'MIN_MULTIPLIER': 1.0,
+    'MAX_MULTIPLIER': config('SURGE_MAX_MULTIPLIER', default=2.5, cast=float),
+    'STEP': 0.05,
+    'SNAPSHOT_PATH': config('SURGE_SNAPSHOT_PATH', default=str(BASE_DIR / 'surge.grid')),
+}
+
+# Offline geocoding (apps/geocoding, gazetteer command)
+GEOCODING = {
+    'INDEX_PATH': config('GAZETTEER_PATH', default=str(BASE_DIR / 'gazetteer.bin')),
+    'CELL_METRES': 100,
+    'RELOAD_SECONDS': 5.0,
+    'LRU_SIZE': config('GEOCODING_LRU_SIZE', default=20000, cast=int),
+    'MAX_REVERSE_METRES': 250,
+    'BATCH_SIZE': 100,
+}
+
+# Restaurant opening hours index (apps/restaurants/hours.py)
+OPENING_HOURS = {
+    # Time zone of restaurants that do not set one
+    'DEFAULT_TIMEZONE': config('RESTAURANT_TIMEZONE', default='America/New_York'),
+    'HORIZON_DAYS': 8,
+    'REFRESH_SECONDS': config('OPENING_HOURS_REFRESH_SECONDS', default=10, cast=int),
+}
+
+# Memory-mapped restaurant and menu snapshot shared by the worker processes
+# (apps/restaurants/catalogue.py, catalogue command)
+CATALOGUE = {
+    'ENABLED': config('CATALOGUE_SNAPSHOT', default=True, cast=bool),
+    'SNAPSHOT_PATH': config('CATALOGUE_SNAPSHOT_PATH', default=str(BASE_DIR / 'catalogue.snapshot')),
+    'RELOAD_SECONDS': 2.0,
+    'REFRESH_SECONDS': config('CATALOGUE_REFRESH_SECONDS', default=10, cast=int),
+    'WATCH_SECONDS': 5,
+}
+
+# Background task queue (apps/tasks, run_tasks command)
+TASK_QUEUE = {
+    'BATCH_SIZE': config('TASK_BATCH_SIZE', default=100, cast=int),
+    'POLL_SECONDS': 0.5,
+    # Tasks still running after this long are assumed lost and requeued
+    'LOCK_TIMEOUT_SECONDS': 300,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_SECONDS': 10,
+    'BACKOFF_MAX_SECONDS': 3600,
+    'KEEP_COMPLETED': config('TASK_KEEP_COMPLETED', default=False, cast=bool),
+}
+
+# Admin user search (apps/authentication/search.py)
+USER_SEARCH = {
+    'ENABLED': config('USER_SEARCH_INDEX', default=True, cast=bool),
+    'CANDIDATES': 200,
+    'DEFAULT_LIMIT': 20,
+    'MAX_LIMIT': 100,
+}
+
+# Partitioned event tables (apps/events, event_partitions command)
+EVENT_LOG = {
+    'ENABLED': config('EVENT_LOG', default=True, cast=bool),
+    'BATCH_SIZE': 200,
+    'FLUSH_SECONDS': 5,
+    # 'day' or 'month' per table
+    'PARTITIONS': {'action_logs': 'day', 'service_metrics': 'day', 'business_events': 'month'},
+    'RETENTION_DAYS': {
+        'action_logs': config('EVENT_RETENTION_DAYS', default=30, cast=int),
+        'service_metrics': 14,
+        'business_events': 365,
+    },
+    'PREMAKE': 3,
+    'ARCHIVE_DIR': config('EVENT_ARCHIVE_DIR', default=str(BASE_DIR / 'archive')),
+    'ARCHIVE_CHUNK_ROWS': 5000,
+}
+
+# Sales tax applied to order subtotals
+ORDER_TAX_RATE = config('ORDER_TAX_RATE', default='0.08')
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -177,6 +383,13 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_THROTTLE_CLASSES': [
+        'foodie_backend.throttling.IPTokenBucketThrottle',
+        'foodie_backend.throttling.UserTokenBucketThrottle',
+    ],
+    # Reverse proxies in front of the app, so throttles read client IPs from
+    # X-Forwarded-For; 0 ignores the header, which clients could forge
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
 # JWT Configuration
@@ -216,6 +429,9 @@ SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
 
+# Prebuilt schema artifact served by /api/schema/ (see foodie_backend/schema.py)
+OPENAPI_SCHEMA_FILE = config('OPENAPI_SCHEMA_FILE', default=str(BASE_DIR / 'openapi-schema.json'))
+
 # Email Configuration (Console backend for development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -232,14 +448,19 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 FRONTEND_URL = config('FRONTEND_URL', default='exp://192.168.1.100:8081')
 
 # Development settings
+# Media directories are created by the storage backend on first upload, so
+# importing settings never touches the filesystem
 if DEBUG:
     INSTALLED_APPS += ['django_extensions']
-    
-    # Create media directory if it doesn't exist
-    MEDIA_ROOT.mkdir(exist_ok=True)
-    (MEDIA_ROOT / 'restaurant_images').mkdir(exist_ok=True)
-    (MEDIA_ROOT / 'menu_images').mkdir(exist_ok=True)
-    (MEDIA_ROOT / 'user_avatars').mkdir(exist_ok=True)
+
+# Request profiling (per-view query counts, N+1 patterns, timings)
+# Results: GET /api/v1/admin-panel/profiling/
+REQUEST_PROFILING = {
+    'ENABLED': config('REQUEST_PROFILING', default=False, cast=bool),
+    'SAMPLE_RATE': config('REQUEST_PROFILING_SAMPLE_RATE', default=0.1, cast=float),
+    'DUPLICATE_QUERY_THRESHOLD': 3,
+    'PROFILER_INTERVAL_MS': 5,
+}
 
 # Logging Configuration
 LOGGING = {
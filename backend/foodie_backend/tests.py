@@ -0,0 +1,226 @@
+"""
+Project Tests
+
+Token bucket rate limits (throttling.py) and priority load shedding
+(admission.py).
+"""
+
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from . import admission, throttling
+from .admission import LoadMonitor, LoadSheddingMiddleware, classify, queue_ms, request_priority
+from .throttling import LocalBucketStore, throttle_wait
+
+
+class Clock:
+    """Stands in for time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LocalBucketStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch('foodie_backend.throttling.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_retry_after(self):
+        store = LocalBucketStore(10)
+        self.assertEqual(store.take('a', 2, 1), (True, 0.0))
+        self.assertEqual(store.take('a', 2, 1), (True, 0.0))
+        self.assertEqual(store.take('a', 2, 1), (False, 1.0))
+        # Another key has its own bucket
+        self.assertEqual(store.take('b', 2, 1), (True, 0.0))
+
+    def test_refills_at_rate(self):
+        store = LocalBucketStore(10)
+        store.take('a', 1, 4)
+        self.clock.now += 0.125
+        allowed, wait = store.take('a', 1, 4)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 0.125)
+        self.clock.now += 0.125
+        self.assertEqual(store.take('a', 1, 4), (True, 0.0))
+
+    def test_refill_stops_at_burst(self):
+        store = LocalBucketStore(10)
+        store.take('a', 3, 1)
+        self.clock.now += 3600
+        self.assertEqual([store.take('a', 3, 1)[0] for _ in range(4)], [True, True, True, False])
+
+    def test_evicts_least_recently_used(self):
+        store = LocalBucketStore(2)
+        for key in ('a', 'b', 'a', 'c'):
+            store.take(key, 5, 1)
+        self.assertEqual(list(store.buckets), ['a', 'c'])
+
+
+@override_settings(RATE_LIMITING={
+    'ENABLED': True,
+    'KEY_PREFIX': 'test',
+    'USER_RATES': {'critical': (1, 1), 'normal': (1, 1), 'sheddable': (1, 1)},
+    'IP_RATES': {'critical': (1, 0.5), 'normal': (1, 0.5), 'sheddable': (1, 0.5)},
+})
+class ThrottleTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(throttling, '_store', LocalBucketStore(100))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, method, path):
+        request = getattr(RequestFactory(), method)(path)
+        request.user = AnonymousUser()
+        return request
+
+    def test_retry_after_once_the_bucket_is_empty(self):
+        self.assertIsNone(throttle_wait(self.request('get', '/api/v1/orders/')))
+        wait = throttle_wait(self.request('get', '/api/v1/orders/'))
+        self.assertAlmostEqual(wait, 2.0, places=2)
+
+    def test_priorities_have_their_own_buckets(self):
+        self.assertIsNone(throttle_wait(self.request('get', '/api/v1/restaurants/')))
+        self.assertIsNotNone(throttle_wait(self.request('get', '/api/v1/restaurants/')))
+        # Browsing spent its token; checkout still has one
+        self.assertIsNone(throttle_wait(self.request('post', '/api/v1/orders/')))
+
+    @override_settings(RATE_LIMITING={'ENABLED': False})
+    def test_disabled(self):
+        for _ in range(3):
+            self.assertIsNone(throttle_wait(self.request('get', '/api/v1/orders/')))
+
+
+class ClassifyTests(SimpleTestCase):
+
+    def test_default_routes(self):
+        cases = [
+            ('POST', '/api/v1/orders/', 'critical'),
+            ('GET', '/api/v1/orders/', 'normal'),
+            ('POST', '/api/v1/orders/abc/status/', 'critical'),
+            ('GET', '/api/v1/payments/methods/', 'critical'),
+            ('DELETE', '/api/v1/payments/methods/1/', 'critical'),
+            ('GET', '/api/v1/restaurants/', 'sheddable'),
+            ('POST', '/api/v1/restaurants/favorites/', 'normal'),
+            ('GET', '/api/v1/admin-panel/stats/', 'sheddable'),
+            ('GET', '/api/v1/admin-panel/users/', 'normal'),
+        ]
+        for method, path, priority in cases:
+            with self.subTest(method=method, path=path):
+                self.assertEqual(classify(method, path), priority)
+
+    @override_settings(LOAD_SHEDDING={
+        'ROUTES': [
+            ('get', r'^/api/v1/restaurants/search/', 'normal'),
+            ('*', r'^/api/v1/restaurants/', 'sheddable'),
+        ],
+        'DEFAULT_PRIORITY': 'critical',
+    })
+    def test_first_match_wins(self):
+        self.assertEqual(classify('GET', '/api/v1/restaurants/search/'), 'normal')
+        self.assertEqual(classify('POST', '/api/v1/restaurants/search/'), 'sheddable')
+        self.assertEqual(classify('GET', '/api/v1/orders/'), 'critical')
+
+    def test_middleware_priority_wins(self):
+        request = RequestFactory().get('/api/v1/restaurants/')
+        self.assertEqual(request_priority(request), 'sheddable')
+        request.admission_priority = 'critical'
+        self.assertEqual(request_priority(request), 'critical')
+
+
+class QueueTimeTests(SimpleTestCase):
+
+    now = 1_700_000_100.0
+
+    def test_units(self):
+        cases = [
+            ('t=1700000000', 100_000),
+            ('t=1700000099.75', 250),
+            ('t=1700000099900', 100),
+            ('1700000099950000', 50),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertAlmostEqual(queue_ms(header, self.now), expected, places=3)
+
+    def test_clock_skew_and_garbage(self):
+        self.assertEqual(queue_ms('t=1700000200', self.now), 0.0)
+        self.assertIsNone(queue_ms('t=soon', self.now))
+        self.assertIsNone(queue_ms(None, self.now))
+
+
+@override_settings(LOAD_SHEDDING={
+    'ENABLED': True,
+    'PATHS': ['/api/'],
+    'MAX_IN_FLIGHT': {'sheddable': 4, 'normal': 16, 'critical': None},
+    'MAX_LATENCY_MS': {'sheddable': 150, 'normal': 1000, 'critical': None},
+    'MAX_QUEUE_MS': {'sheddable': 200, 'normal': 1000, 'critical': None},
+    'LATENCY_HALF_LIFE_SECONDS': 60,
+    'RETRY_AFTER_SECONDS': 1.5,
+})
+class LoadSheddingTests(SimpleTestCase):
+
+    def setUp(self):
+        self.monitor = LoadMonitor()
+        patcher = mock.patch.object(admission, 'monitor', self.monitor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.middleware = LoadSheddingMiddleware(lambda request: HttpResponse('ok'))
+        self.factory = RequestFactory()
+
+    def statuses(self, **headers):
+        browse = self.middleware(self.factory.get('/api/v1/restaurants/', **headers))
+        profile = self.middleware(self.factory.get('/api/v1/auth/profile/', **headers))
+        checkout = self.middleware(self.factory.post('/api/v1/orders/', **headers))
+        return browse, profile, checkout
+
+    def test_admits_everything_when_idle(self):
+        self.assertEqual([response.status_code for response in self.statuses()], [200, 200, 200])
+        self.assertEqual(self.monitor.in_flight, 0)
+        self.assertEqual(self.monitor.admitted, {'critical': 1, 'normal': 1, 'sheddable': 1})
+
+    def test_sheds_sheddable_when_too_many_in_flight(self):
+        self.monitor.in_flight = 4
+        with self.assertLogs('foodie_backend.admission', 'WARNING'):
+            browse, profile, checkout = self.statuses()
+        self.assertEqual((browse.status_code, profile.status_code, checkout.status_code), (503, 200, 200))
+        self.assertEqual(browse['Retry-After'], '2')
+        self.assertEqual(self.monitor.shed['sheddable'], 1)
+
+    def test_sheds_everything_but_critical_when_far_too_many_in_flight(self):
+        self.monitor.in_flight = 100
+        with self.assertLogs('foodie_backend.admission', 'WARNING'):
+            statuses = [response.status_code for response in self.statuses()]
+        self.assertEqual(statuses, [503, 503, 200])
+
+    def test_sheds_when_higher_priorities_slow_down(self):
+        self.monitor.start('critical')
+        # The first sample after a quiet spell carries at least 5% weight
+        self.monitor.finish('critical', 10_000)
+        self.assertGreater(self.monitor.latency_above_ms('sheddable'), 150)
+        self.assertLess(self.monitor.latency_above_ms('normal'), 1000)
+        with self.assertLogs('foodie_backend.admission', 'WARNING'):
+            statuses = [response.status_code for response in self.statuses()]
+        self.assertEqual(statuses, [503, 200, 200])
+
+    def test_sheds_requests_that_queued_too_long(self):
+        started = f't={time.time() - 0.5:.3f}'
+        with self.assertLogs('foodie_backend.admission', 'WARNING'):
+            statuses = [response.status_code for response in self.statuses(HTTP_X_REQUEST_START=started)]
+        self.assertEqual(statuses, [503, 200, 200])
+
+    def test_ignores_paths_outside_the_api(self):
+        self.monitor.in_flight = 100
+        response = self.middleware(self.factory.get('/admin/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.monitor.shed, dict.fromkeys(admission.PRIORITIES, 0))
@@ -0,0 +1,206 @@
+"""
+Rate limiting for foodie_backend project.
+
+Token buckets per user and per client IP, applied to every DRF view through
+REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'], and to plain Django views (the
+async home screen) through throttle_wait(). A bucket holds up to `burst`
+tokens and refills at `rate` tokens per second; each request takes a token
+or is refused with 429 and Retry-After. Limits are set per route priority
+(critical, normal, sheddable; see admission.py) and each priority has its own
+buckets, so a client paging through restaurants does not spend the tokens it
+needs to check out.
+
+STORE 'local' keeps the buckets in this process's memory (an LRU of at most
+MAX_KEYS buckets). That costs nothing per request, but every worker process
+counts on its own, so the effective limit is the configured one times the
+number of workers. STORE 'redis' keeps them in Redis (REDIS_URL) and updates
+them with an atomic Lua script, so all workers share one limit. While Redis
+cannot be reached the local store is used instead.
+
+Behind a reverse proxy set REST_FRAMEWORK['NUM_PROXIES'] so client IPs are
+read from X-Forwarded-For.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+from .admission import request_priority
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] bucket; ARGV burst, rate, now (s). Returns {allowed, tokens left}
+TOKEN_BUCKET_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+def get_rate_limit_setting(name):
+    defaults = {
+        'ENABLED': True,
+        'STORE': 'local',
+        'REDIS_URL': 'redis://localhost:6379/0',
+        'KEY_PREFIX': 'ratelimit',
+        'MAX_KEYS': 100_000,
+        # priority -> (burst, tokens per second)
+        'USER_RATES': {'critical': (30, 1), 'normal': (120, 5), 'sheddable': (120, 5)},
+        'IP_RATES': {'critical': (150, 5), 'normal': (600, 25), 'sheddable': (600, 25)},
+    }
+    return getattr(settings, 'RATE_LIMITING', {}).get(name, defaults[name])
+
+
+def _wait(tokens, rate):
+    """Seconds until a bucket holding tokens has one to give"""
+    return max(0.0, (1 - tokens) / rate)
+
+
+class LocalBucketStore:
+    """Token buckets in this process's memory"""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, burst, rate):
+        """(allowed, seconds until a token is available)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self.buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Re-inserted at the end: the least recently used bucket is evicted first
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else _wait(tokens, rate)
+
+
+class RedisBucketStore:
+    """Token buckets shared by all workers through Redis"""
+
+    def __init__(self, url, fallback):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.fallback = fallback
+        self._down_until = 0.0
+
+    def take(self, key, burst, rate):
+        if time.monotonic() < self._down_until:
+            return self.fallback.take(key, burst, rate)
+        try:
+            allowed, tokens = self.script(keys=[key], args=[burst, rate, time.time()])
+        except redis.RedisError:
+            logger.warning('Rate limit store unavailable; using per-process limits for 10s', exc_info=True)
+            self._down_until = time.monotonic() + 10
+            return self.fallback.take(key, burst, rate)
+        return bool(allowed), 0.0 if allowed else _wait(float(tokens), rate)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                local = LocalBucketStore(get_rate_limit_setting('MAX_KEYS'))
+                kind = get_rate_limit_setting('STORE')
+                if kind == 'local':
+                    _store = local
+                elif kind == 'redis':
+                    if redis is None:
+                        raise ImproperlyConfigured("RATE_LIMITING['STORE'] = 'redis' needs the redis package")
+                    _store = RedisBucketStore(get_rate_limit_setting('REDIS_URL'), local)
+                else:
+                    raise ImproperlyConfigured(f"Unknown RATE_LIMITING['STORE']: {kind}")
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base class: one bucket per (scope, priority, client key)"""
+
+    scope = None
+    rates_setting = None
+
+    def get_client_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        if not get_rate_limit_setting('ENABLED'):
+            return True
+        client_key = self.get_client_key(request)
+        if client_key is None:
+            return True
+        priority = request_priority(request)
+        burst, rate = get_rate_limit_setting(self.rates_setting)[priority]
+        key = f"{get_rate_limit_setting('KEY_PREFIX')}:{self.scope}:{priority}:{client_key}"
+        allowed, self.retry_after = get_store().take(key, burst, rate)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Limits each signed-in user (USER_RATES)"""
+
+    scope = 'user'
+    rates_setting = 'USER_RATES'
+
+    def get_client_key(self, request):
+        user = request.user
+        return user.pk if user and user.is_authenticated else None
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Limits each client IP, signed in or not (IP_RATES)"""
+
+    scope = 'ip'
+    rates_setting = 'IP_RATES'
+
+    def get_client_key(self, request):
+        return self.get_ident(request)
+
+
+def throttle_wait(request):
+    """
+    Seconds until request may be retried, or None when it is within its limits
+    For views outside DRF, which skip DEFAULT_THROTTLE_CLASSES; set
+    request.user to the authenticated user first.
+    """
+    # Every bucket takes its token, as DRF checks every throttle
+    waits = [
+        throttle.wait() for throttle in (IPTokenBucketThrottle(), UserTokenBucketThrottle())
+        if not throttle.allow_request(request, None)
+    ]
+    return max(waits) if waits else None
@@ -7,12 +7,10 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
 from django.http import JsonResponse
+from apps.media_assets.views import serve_asset
+from .home import home_screen
+from .schema import redoc_view, schema_view, swagger_view
 
 def api_root(request):
     """API root endpoint with available endpoints"""
@@ -21,12 +19,15 @@ def api_root(request):
         'version': '1.0.0',
         'endpoints': {
             'auth': '/api/v1/auth/',
+            'home': '/api/v1/home/',
             'restaurants': '/api/v1/restaurants/',
             'orders': '/api/v1/orders/',
             'payments': '/api/v1/payments/',
             'delivery': '/api/v1/delivery/',
             'notifications': '/api/v1/notifications/',
             'admin': '/api/v1/admin-panel/',
+            'sync': '/api/v1/sync/',
+            'geocoding': '/api/v1/geocoding/',
             'docs': '/api/docs/',
             'schema': '/api/schema/',
         }
@@ -36,12 +37,15 @@ def api_root(request):
 api_urlpatterns = [
     path('', api_root, name='api_root'),
     path('auth/', include('apps.authentication.urls')),
+    path('home/', home_screen, name='home'),
     path('restaurants/', include('apps.restaurants.urls')),
     path('orders/', include('apps.orders.urls')),
     path('payments/', include('apps.payments.urls')),
     path('delivery/', include('apps.delivery.urls')),
     path('notifications/', include('apps.notifications.urls')),
     path('admin-panel/', include('apps.admin_panel.urls')),
+    path('sync/', include('apps.sync.urls')),
+    path('geocoding/', include('apps.geocoding.urls')),
 ]
 
 urlpatterns = [
@@ -52,12 +56,19 @@ urlpatterns = [
     path('api/v1/', include(api_urlpatterns)),
     
     # API documentation
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('api/schema/', schema_view, name='schema'),
+    path('api/docs/', swagger_view, name='swagger-ui'),
+    path('api/redoc/', redoc_view, name='redoc'),
 ]
 
 # Serve media files in development
 if settings.DEBUG:
+    urlpatterns += [
+        path(
+            f"{settings.MEDIA_URL.lstrip('/')}assets/<path:path>",
+            serve_asset,
+            {'document_root': settings.MEDIA_ROOT / 'assets'},
+        ),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
@@ -4,7 +4,18 @@ WSGI config for foodie_backend project.
 
 import os
 from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodie_backend.settings')
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+# Import the URLconf (and with it every view module) at boot rather than on
+# the first request. With gunicorn --preload this happens once in the master
+# and forked workers start warm.
+get_resolver().url_patterns
+
+# Map the catalogue snapshot now too; forked workers share its pages
+from apps.restaurants.catalogue import store as catalogue  # noqa: E402
+
+catalogue.load()
\ No newline at end of file